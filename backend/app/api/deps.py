@@ -3,16 +3,19 @@ Common dependencies for the welding system backend API.
 """
 from typing import Generator, Optional, List
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import REPLICA_READS_KEY, get_async_db, get_db
 from app.core.security import verify_token
+from app.core.data_access import WorkspaceContext
 from app.models.user import User
-from app.services.user_service import user_service
+from app.services.principal_service import principal_cache
+from app.services.workspace_service import resolve_workspace_context
 
 # OAuth2密码流程
 oauth2_scheme = OAuth2PasswordBearer(
@@ -46,8 +49,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # 获取用户信息
-    user = user_service.get(db, id=user_id)
+    # 获取用户信息（短时缓存的用户快照，命中时不查询数据库）
+    user = principal_cache.get_user(db, int(user_id))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -141,6 +144,123 @@ async def get_current_admin_user(
     return current_user
 
 
+def get_read_db(db: Session = Depends(get_db)) -> Session:
+    """
+    获取读为主的数据库会话.
+
+    配置了 DATABASE_REPLICA_URL 时，会话在发生写入前的 SELECT 路由到只读副本；
+    与 get_db 共用同一个请求级会话。
+    """
+    db.info[REPLICA_READS_KEY] = True
+    return db
+
+
+async def get_async_read_db(db: AsyncSession = Depends(get_async_db)) -> AsyncSession:
+    """
+    获取读为主的异步数据库会话（get_read_db 的异步版本）.
+
+    与 get_async_db 共用同一个请求级会话，因此用户认证查询也会走副本。
+    """
+    db.sync_session.info[REPLICA_READS_KEY] = True
+    return db
+
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(oauth2_scheme)
+) -> User:
+    """
+    获取当前认证用户（异步会话版本）.
+
+    用于运行在 get_async_db 上的端点：用户对象与端点共用同一个
+    AsyncSession，可直接传给 run_sync 中执行的同步服务逻辑。
+
+    Args:
+        db: 异步数据库会话
+        token: JWT访问令牌
+
+    Returns:
+        当前用户对象
+
+    Raises:
+        HTTPException: 如果令牌无效或用户不存在
+    """
+    # 验证令牌
+    user_id = verify_token(token, token_type="access")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的认证令牌",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    # 获取用户信息（短时缓存的用户快照，命中时不查询数据库）
+    user = await principal_cache.get_user_async(db, int(user_id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户不存在",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user
+
+
+async def get_current_active_user_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    """
+    获取当前活跃用户（异步会话版本）.
+
+    Raises:
+        HTTPException: 如果用户未激活
+    """
+    return await get_current_active_user(current_user)
+
+
+async def get_current_verified_user_async(
+    current_user: User = Depends(get_current_active_user_async)
+) -> User:
+    """
+    获取当前已验证用户（异步会话版本）.
+
+    Raises:
+        HTTPException: 如果用户未验证邮箱
+    """
+    return await get_current_verified_user(current_user)
+
+
+def get_workspace_context(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
+) -> WorkspaceContext:
+    """
+    获取当前请求的工作区上下文.
+
+    根据 X-Workspace-ID 请求头（未提供时使用用户默认工作区）解析，
+    同一请求内对相同参数只解析一次。
+
+    Raises:
+        HTTPException: 如果工作区ID无效或用户无权访问
+    """
+    return resolve_workspace_context(db, current_user, workspace_id)
+
+
+async def get_workspace_context_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user_async),
+    workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
+) -> WorkspaceContext:
+    """
+    获取当前请求的工作区上下文（异步会话版本）.
+
+    Raises:
+        HTTPException: 如果工作区ID无效或用户无权访问
+    """
+    return await db.run_sync(resolve_workspace_context, current_user, workspace_id)
+
+
 def check_user_permission(required_permission: str):
     """
     检查用户权限的依赖工厂函数.
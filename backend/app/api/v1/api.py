@@ -39,6 +39,8 @@ from app.api.v1.endpoints import (
     payments,
     notifications,
     approvals,
+    search,
+    export_jobs,
 )
 
 api_router = APIRouter()
@@ -138,5 +140,11 @@ api_router.include_router(workspace.router, prefix="/workspace", tags=["工作
 # 审批管理路由
 api_router.include_router(approvals.router, prefix="/approvals", tags=["审批管理"])
 
+# 文档检索路由
+api_router.include_router(search.router, prefix="/search", tags=["文档检索"])
+
+# 批量导出任务路由
+api_router.include_router(export_jobs.router, prefix="/exports", tags=["批量导出"])
+
 # 系统管理路由
 api_router.include_router(system.router, prefix="/system", tags=["系统管理"])
\ No newline at end of file
@@ -30,11 +30,13 @@ async def get_users_admin(
     end_date: Optional[date] = Query(None, description="结束日期"),
     sort_field: str = Query("created_at", description="排序字段"),
     sort_order: str = Query("desc", description="排序方向"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的next_cursor，启用游标分页）"),
+    total_mode: str = Query("exact", pattern="^(exact|estimated)$", description="总数模式：exact精确计数 / estimated估算"),
     current_admin: Admin = Depends(get_current_active_admin)
 ) -> Any:
     """
     获取所有用户列表（管理员专用）
-    支持分页、搜索、筛选
+    支持分页、搜索、筛选，以及游标分页和估算总数
     """
     try:
         result = admin_user_service.get_users_with_filters(
@@ -48,13 +50,20 @@ async def get_users_admin(
             start_date=start_date,
             end_date=end_date,
             sort_field=sort_field,
-            sort_order=sort_order
+            sort_order=sort_order,
+            cursor=cursor,
+            total_mode=total_mode
         )
 
         return {
             "success": True,
             "data": result
         }
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
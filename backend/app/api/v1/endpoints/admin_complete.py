@@ -10,6 +10,8 @@ from sqlalchemy import text, func, and_, or_
 from app.api.admin_deps import get_current_active_admin
 from app.models.admin import Admin
 from app.core.database import get_db
+from app.services.permission_service import PermissionCache, permission_cache
+from app.services.principal_service import principal_cache
 
 router = APIRouter()
 
@@ -433,6 +435,9 @@ async def update_user(
 
             db.execute(text(sql), params)
             db.commit()
+            # 原生SQL不经过ORM的缓存失效钩子
+            principal_cache.invalidate(int(user_id))
+            permission_cache.invalidate(PermissionCache.USER, int(user_id))
 
         return {
             "success": True,
@@ -612,6 +617,7 @@ async def reset_user_quota(
         })
 
         db.commit()
+        principal_cache.invalidate(int(user_id))
 
         return {
             "success": True,
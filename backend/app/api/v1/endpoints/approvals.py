@@ -3,16 +3,14 @@ Approval workflow API endpoints.
 审批工作流API端点
 """
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
 from app.models.user import User
-from app.api.deps import get_current_active_user
-from app.core.data_access import WorkspaceContext, WorkspaceType
-from app.models.company import CompanyEmployee
+from app.api.deps import get_current_active_user, get_workspace_context
+from app.core.data_access import WorkspaceContext
 from app.services.approval_service import ApprovalService
-from app.services.workspace_service import WorkspaceService
 from app.schemas.approval import (
     SubmitForApprovalRequest,
     ApprovalActionRequest,
@@ -28,67 +26,6 @@ from app.schemas.approval import (
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
-    x_workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
-) -> WorkspaceContext:
-    """
-    Get workspace context from header or user's default workspace.
-
-    Args:
-        db: Database session
-        current_user: Current user
-        x_workspace_id: Workspace ID from header (optional)
-
-    Returns:
-        WorkspaceContext object
-    """
-    print(f"[工作区上下文] 用户ID: {current_user.id}, 邮箱: {current_user.email}")
-    print(f"[工作区上下文] X-Workspace-ID header: {x_workspace_id}")
-    print(f"[工作区上下文] 用户会员类型: {current_user.membership_type}")
-
-    workspace_service = WorkspaceService(db)
-
-    # If workspace_id is provided in header, use it
-    if x_workspace_id:
-        print(f"[工作区上下文] 使用header中的工作区ID: {x_workspace_id}")
-        try:
-            context = workspace_service.create_workspace_context(current_user, x_workspace_id)
-            print(f"[工作区上下文] 创建成功: type={context.workspace_type}, company_id={context.company_id}")
-            return context
-        except Exception as e:
-            print(f"[工作区上下文] 创建失败: {str(e)}")
-            raise
-
-    # Otherwise, determine default workspace based on user's membership type
-    print(f"[工作区上下文] 未提供工作区ID,使用默认逻辑")
-    if current_user.membership_type == "enterprise":
-        # For enterprise users, find their company
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            print(f"[工作区上下文] 找到企业员工记录: company_id={employee.company_id}")
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-        else:
-            print(f"[工作区上下文] 未找到企业员工记录")
-
-    # Default to personal workspace
-    print(f"[工作区上下文] 使用个人工作区")
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 # ==================== 提交审批 ====================
 
 @router.post("/submit")
@@ -2,6 +2,7 @@
 Authentication endpoints for the welding system backend.
 """
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
@@ -10,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.core.config import settings
+from app.core.database import SessionLocal
 from app.core.security import (
     create_access_token,
     create_refresh_token,
@@ -28,8 +30,7 @@ from app.schemas.verification_code import (
 )
 from app.services.user_service import user_service
 from app.services.verification_service import verification_service
-from app.services.email_service import email_service
-from app.services.sms_service import sms_service
+from app.services.delivery_queue import delivery_queue
 from pydantic import BaseModel
 
 class RegisterResponse(BaseModel):
@@ -526,8 +527,17 @@ async def resend_verification_email(
     return {"message": "验证邮件已重新发送"}
 
 
+def _invalidate_undelivered_code(code_id: int) -> None:
+    """验证码最终发送失败时作废（在投递线程中调用，使用独立会话）"""
+    db = SessionLocal()
+    try:
+        verification_service.invalidate_code(db, code_id)
+    finally:
+        db.close()
+
+
 @router.post("/send-verification-code", response_model=VerificationCodeResponse)
-async def send_verification_code(
+def send_verification_code(
     request: VerificationCodeRequest,
     db: Session = Depends(deps.get_db)
 ) -> Any:
@@ -580,27 +590,21 @@ async def send_verification_code(
             expires_minutes=10
         )
 
-        # 发送验证码
-        send_success = False
-
-        if request.account_type == "email":
-            # 发送邮件验证码
-            send_success = email_service.send_verification_code(
-                to_email=request.account,
-                code=verification_code.code,
-                purpose=request.purpose,
-                expires_minutes=10
-            )
-        elif request.account_type == "phone":
-            # 发送短信验证码
-            send_success = sms_service.send_verification_code(
-                phone=request.account,
-                code=verification_code.code,
-                purpose=request.purpose,
-                expires_minutes=10
+        # 验证码邮件/短信入队，由后台线程发送（失败自动重试），接口立即返回
+        # 所有重试均失败时验证码作废，用户可重新获取；开发环境验证码随响应返回，
+        # 未配置邮件/短信服务时发送必然失败，不作废
+        delivery_queue.enqueue_verification_code(
+            account_type=request.account_type,
+            account=request.account,
+            code=verification_code.code,
+            purpose=request.purpose,
+            expires_minutes=10,
+            on_failure=None if settings.DEVELOPMENT else partial(
+                _invalidate_undelivered_code, verification_code.id
             )
+        )
 
-        # 开发环境：即使发送失败也返回成功（用于测试）
+        # 开发环境：返回验证码（用于测试）
         if settings.DEVELOPMENT:
             print(f"🔐 [开发环境] 验证码: {verification_code.code}")
             return {
@@ -609,16 +613,6 @@ async def send_verification_code(
                 "code": verification_code.code  # 开发环境返回验证码
             }
 
-        # 生产环境：检查发送结果
-        if not send_success:
-            # 发送失败，标记验证码为已使用
-            verification_code.is_used = True
-            db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"发送{'邮件' if request.account_type == 'email' else '短信'}失败，请稍后重试"
-            )
-
         return {
             "message": f"验证码已发送到您的{'邮箱' if request.account_type == 'email' else '手机'}",
             "expires_in": 600
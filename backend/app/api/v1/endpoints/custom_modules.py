@@ -8,7 +8,6 @@ from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.api.deps import get_current_user
 from app.models.user import User
-from app.models.company import CompanyEmployee
 from app.schemas.custom_module import (
     CustomModuleCreate,
     CustomModuleUpdate,
@@ -16,57 +15,11 @@ from app.schemas.custom_module import (
     CustomModuleSummary
 )
 from app.services.custom_module_service import CustomModuleService
-from app.services.workspace_service import WorkspaceService
-from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.workspace_service import resolve_workspace_context
 
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session,
-    current_user: User,
-    workspace_id: Optional[str] = None
-) -> WorkspaceContext:
-    """
-    获取工作区上下文
-
-    Args:
-        db: 数据库会话
-        current_user: 当前用户
-        workspace_id: 工作区ID（可选）
-
-    Returns:
-        WorkspaceContext对象
-    """
-    workspace_service = WorkspaceService(db)
-
-    # 如果提供了workspace_id，使用它
-    if workspace_id:
-        return workspace_service.create_workspace_context(current_user, workspace_id)
-
-    # 否则，根据用户的会员类型确定默认工作区
-    if current_user.membership_type == "enterprise":
-        # 企业用户，查找其企业
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-
-    # 默认使用个人工作区
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 @router.get("/", response_model=List[CustomModuleSummary])
 def get_custom_modules(
     module_type: Optional[str] = Query(None, description="模块类型 (wps/pqr/ppqr/common)"),
@@ -86,7 +39,7 @@ def get_custom_modules(
         category: 模块分类筛选
     """
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     module_service = CustomModuleService(db)
@@ -132,7 +85,7 @@ def get_custom_module(
 ):
     """获取单个自定义模块详情（带工作区上下文权限检查）"""
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     module_service = CustomModuleService(db)
@@ -154,7 +107,7 @@ def create_custom_module(
 ):
     """创建自定义模块（带工作区上下文）"""
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     module_service = CustomModuleService(db)
@@ -179,7 +132,7 @@ def update_custom_module(
 ):
     """更新自定义模块（带工作区上下文权限检查）"""
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     module_service = CustomModuleService(db)
@@ -206,7 +159,7 @@ def delete_custom_module(
 ):
     """删除自定义模块（带工作区上下文权限检查）"""
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     module_service = CustomModuleService(db)
@@ -4,68 +4,21 @@
 """
 from typing import Any, Optional
 from fastapi import APIRouter, Depends, Header
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.models.user import User
-from app.models.company import CompanyEmployee
 from app.services.dashboard_service import DashboardService
-from app.services.workspace_service import WorkspaceService
-from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.workspace_service import resolve_workspace_context
 
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session,
-    current_user: User,
-    workspace_id: Optional[str] = None
-) -> WorkspaceContext:
-    """
-    获取工作区上下文
-
-    Args:
-        db: 数据库会话
-        current_user: 当前用户
-        workspace_id: 工作区ID（可选）
-
-    Returns:
-        WorkspaceContext对象
-    """
-    workspace_service = WorkspaceService(db)
-
-    # 如果提供了workspace_id，使用它
-    if workspace_id:
-        return workspace_service.create_workspace_context(current_user, workspace_id)
-
-    # 否则，根据用户的会员类型确定默认工作区
-    if current_user.membership_type == "enterprise":
-        # 企业用户，查找其企业
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-
-    # 默认使用个人工作区
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 @router.get("/stats")
-def get_dashboard_stats(
+async def get_dashboard_stats(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -86,13 +39,10 @@ def get_dashboard_stats(
         - membership_usage: 会员配额使用情况
     """
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
-    
-    # 创建仪表盘服务
-    dashboard_service = DashboardService(db)
+    workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
     
     # 获取统计数据
-    stats = dashboard_service.get_overview_stats(current_user, workspace_context)
+    stats = await DashboardService.get_overview_stats_async(db, current_user, workspace_context)
     
     return {
         "success": True,
@@ -101,10 +51,10 @@ def get_dashboard_stats(
 
 
 @router.get("/recent-activities")
-def get_recent_activities(
+async def get_recent_activities(
     *,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user),
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID"),
     limit: int = 10
 ) -> Any:
@@ -118,13 +68,11 @@ def get_recent_activities(
         最近活动列表
     """
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
-    
-    # 创建仪表盘服务
-    dashboard_service = DashboardService(db)
+    workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
     
     # 获取最近活动
-    activities = dashboard_service.get_recent_activities(
+    activities = await DashboardService.get_recent_activities_async(
+        db,
         current_user,
         workspace_context,
         limit
@@ -0,0 +1,59 @@
+"""
+批量导出任务API端点
+查询导出进度并下载生成的ZIP文件
+"""
+import os
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.user import User
+from app.services.export_job_service import ExportJobService
+
+router = APIRouter()
+
+
+@router.get("/jobs/{job_id}", response_model=dict)
+def get_export_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    获取批量导出任务状态
+
+    返回状态（pending / running / completed / failed）、进度百分比、
+    已完成和失败的文档数。
+    """
+    job = ExportJobService(db).get_job(job_id, current_user)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="导出任务不存在")
+
+    return {
+        "success": True,
+        "data": ExportJobService.to_dict(job)
+    }
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """下载批量导出任务生成的ZIP文件"""
+    job = ExportJobService(db).get_job(job_id, current_user)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="导出任务不存在")
+
+    if job.status != "completed" or not job.file_path:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="导出任务尚未完成")
+
+    if not os.path.exists(job.file_path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="导出文件已过期，请重新导出")
+
+    filename = f"{job.document_type.upper()}_export_{job.created_at.strftime('%Y%m%d%H%M%S')}.zip"
+    return FileResponse(job.file_path, media_type="application/zip", filename=filename)
@@ -11,6 +11,7 @@ from app.api import deps
 from app.schemas.material import MaterialCreate, MaterialUpdate, MaterialResponse, MaterialListResponse
 from app.services.material_service import MaterialService
 from app.core.data_access import WorkspaceContext
+from app.core.pagination import next_cursor_for
 
 router = APIRouter()
 
@@ -26,6 +27,8 @@ async def get_materials_list(
     search: Optional[str] = Query(None, description="?????"),
     material_type: Optional[str] = Query(None, description="????"),
     low_stock: Optional[bool] = Query(None, description="?????"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的next_cursor，启用游标分页）"),
+    total_mode: str = Query("exact", pattern="^(exact|estimated)$", description="总数模式：exact精确计数 / estimated估算"),
     current_user: Any = Depends(deps.get_current_active_user)
 ) -> Any:
     """
@@ -39,6 +42,8 @@ async def get_materials_list(
     - **search**: ?????
     - **material_type**: ??????
     - **low_stock**: ????????
+    - **cursor**: 分页游标（深分页时替代skip，响应中返回next_cursor）
+    - **total_mode**: 总数模式（exact/estimated）
     """
     try:
         # ????????
@@ -58,7 +63,9 @@ async def get_materials_list(
             limit=limit,
             search=search,
             material_type=material_type,
-            low_stock=low_stock
+            low_stock=low_stock,
+            cursor=cursor,
+            total_mode=total_mode
         )
 
         # ??????
@@ -72,7 +79,8 @@ async def get_materials_list(
                 "total": total,
                 "page": page,
                 "page_size": limit,
-                "total_pages": total_pages
+                "total_pages": total_pages,
+                "next_cursor": next_cursor_for(materials, limit)
             },
             "message": "????????"
         }
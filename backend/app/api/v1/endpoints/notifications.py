@@ -5,7 +5,8 @@ from datetime import datetime
 from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
@@ -21,14 +22,14 @@ async def get_notifications(
     unread_only: bool = Query(False, description="只获取未读通知"),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
-    current_user = Depends(deps.get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(deps.get_current_user_async),
+    db: AsyncSession = Depends(deps.get_async_read_db)
 ) -> Any:
-    """获取用户通知列表"""
+    """获取用户通知列表（异步数据库会话）"""
     user_id = current_user.id
 
     # 查询有效的系统公告
-    query = db.query(SystemAnnouncement).filter(
+    query = select(SystemAnnouncement).where(
         and_(
             SystemAnnouncement.is_published == True,
             SystemAnnouncement.publish_at <= datetime.utcnow(),
@@ -45,19 +46,19 @@ async def get_notifications(
     )
 
     # 获取所有符合条件的公告ID
-    all_announcements = query.all()
+    all_announcements = (await db.execute(query)).scalars().all()
     announcement_ids = [a.id for a in all_announcements]
 
     # 获取用户的已读/已删除状态
     read_status_map = {}
     deleted_ids = set()
     if announcement_ids:
-        read_statuses = db.query(UserNotificationReadStatus).filter(
-            and_(
+        read_statuses = (await db.execute(
+            select(UserNotificationReadStatus).where(
                 UserNotificationReadStatus.user_id == user_id,
                 UserNotificationReadStatus.announcement_id.in_(announcement_ids)
             )
-        ).all()
+        )).scalars().all()
 
         for status in read_statuses:
             read_status_map[status.announcement_id] = status
@@ -120,14 +121,14 @@ async def get_notifications(
 
 @router.get("/unread-count")
 async def get_unread_count(
-    current_user = Depends(deps.get_current_user),
-    db: Session = Depends(get_db)
+    current_user = Depends(deps.get_current_user_async),
+    db: AsyncSession = Depends(deps.get_async_read_db)
 ) -> Any:
-    """获取未读通知数量"""
+    """获取未读通知数量（异步数据库会话）"""
     user_id = current_user.id
 
-    # 查询有效的系统公告
-    all_announcements = db.query(SystemAnnouncement).filter(
+    # 查询有效的系统公告ID
+    announcement_ids = (await db.execute(select(SystemAnnouncement.id).where(
         and_(
             SystemAnnouncement.is_published == True,
             SystemAnnouncement.publish_at <= datetime.utcnow(),
@@ -141,9 +142,7 @@ async def get_unread_count(
                 SystemAnnouncement.created_by == user_id
             )
         )
-    ).all()
-
-    announcement_ids = [a.id for a in all_announcements]
+    ))).scalars().all()
 
     # 获取已删除的通知ID
     deleted_ids = set()
@@ -151,12 +150,12 @@ async def get_unread_count(
     read_count = 0
     if announcement_ids:
         # 获取所有状态记录
-        statuses = db.query(UserNotificationReadStatus).filter(
-            and_(
+        statuses = (await db.execute(
+            select(UserNotificationReadStatus).where(
                 UserNotificationReadStatus.user_id == user_id,
                 UserNotificationReadStatus.announcement_id.in_(announcement_ids)
             )
-        ).all()
+        )).scalars().all()
 
         for status in statuses:
             if status.is_deleted:
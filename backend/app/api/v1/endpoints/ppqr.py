@@ -5,15 +5,17 @@ from typing import Any, List, Optional
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.models.user import User
-from app.models.company import CompanyEmployee
 from app.models.ppqr import PPQR
-from app.core.data_access import WorkspaceContext, WorkspaceType
-from app.services.workspace_service import WorkspaceService
+from app.core.data_access import WorkspaceType
+from app.core.pagination import next_cursor_for
+from app.services.workspace_service import resolve_workspace_context
 from app.services.ppqr_service import PPQRService
+from app.services.quota_service import QuotaService, QuotaType
 from app.schemas.ppqr import (
     PPQRCreate,
     PPQRUpdate,
@@ -25,54 +27,9 @@ from app.schemas.ppqr import (
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session,
-    current_user: User,
-    workspace_id: Optional[str] = None
-) -> WorkspaceContext:
-    """
-    Get workspace context from header or user's default workspace.
-
-    Args:
-        db: Database session
-        current_user: Current user
-        workspace_id: Workspace ID from header (optional)
-
-    Returns:
-        WorkspaceContext object
-    """
-    workspace_service = WorkspaceService(db)
-
-    # If workspace_id is provided in header, use it
-    if workspace_id:
-        return workspace_service.create_workspace_context(current_user, workspace_id)
-
-    # Otherwise, determine default workspace based on user's membership type
-    if current_user.membership_type == "enterprise":
-        # Enterprise user, find their company
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-
-    # Default to personal workspace
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 @router.get("/")
 async def get_ppqr_list(
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=1000, description="每页记录数"),
     skip: int = Query(None, ge=0, description="跳过记录数（可选，优先使用page）"),
@@ -80,7 +37,9 @@ async def get_ppqr_list(
     keyword: Optional[str] = Query(None, description="搜索关键词"),
     status: Optional[str] = Query(None, description="状态筛选"),
     test_conclusion: Optional[str] = Query(None, description="试验结论筛选"),
-    current_user: User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的next_cursor，启用游标分页）"),
+    total_mode: str = Query("exact", pattern="^(exact|estimated)$", description="总数模式：exact精确计数 / estimated估算"),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -91,30 +50,32 @@ async def get_ppqr_list(
     - **keyword**: 搜索关键词（搜索pPQR编号、标题、试验目的）
     - **status**: 状态筛选 (draft, review, approved, rejected)
     - **test_conclusion**: 试验结论筛选
+    - **cursor**: 分页游标（深分页时替代page，响应中返回next_cursor）
+    - **total_mode**: 总数模式（exact/estimated）
+
+    运行在异步数据库会话上，不占用线程池线程。
     """
     try:
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
 
         # 计算 skip 和 limit（优先使用 page 和 page_size）
         actual_skip = skip if skip is not None else (page - 1) * page_size
         actual_limit = limit if limit is not None else page_size
 
-        # 初始化pPQR服务
-        ppqr_service = PPQRService(db)
-
         # 获取总数
-        total = ppqr_service.count(
+        total = await PPQRService.count_async(
             db,
             current_user=current_user,
             workspace_context=workspace_context,
             status=status,
             test_conclusion=test_conclusion,
-            search_term=keyword
+            search_term=keyword,
+            total_mode=total_mode
         )
 
         # 获取pPQR列表
-        ppqr_list = ppqr_service.get_multi(
+        ppqr_list = await PPQRService.get_multi_async(
             db,
             skip=actual_skip,
             limit=actual_limit,
@@ -122,49 +83,24 @@ async def get_ppqr_list(
             workspace_context=workspace_context,
             status=status,
             test_conclusion=test_conclusion,
-            search_term=keyword
+            search_term=keyword,
+            cursor=cursor
         )
 
         # Convert to summary format with approval workflow info
-        from app.models.approval import ApprovalInstance, ApprovalWorkflowDefinition
         from app.services.approval_service import ApprovalService
 
-        approval_service = ApprovalService(db)
+        # 批量加载整页文档的审批摘要（固定查询次数，避免逐行查询）
+        approval_summaries = await ApprovalService.get_approval_summaries_async(
+            db,
+            'ppqr',
+            [ppqr.id for ppqr in ppqr_list],
+            current_user,
+            workspace_context
+        )
         ppqr_summaries = []
         for ppqr in ppqr_list:
-            # 查询关联的审批实例
-            approval_instance = db.query(ApprovalInstance).filter(
-                ApprovalInstance.document_type == "ppqr",
-                ApprovalInstance.document_id == ppqr.id
-            ).order_by(ApprovalInstance.created_at.desc()).first()
-
-            # 获取工作流名称
-            workflow_name = None
-            approval_status = None
-            approval_instance_id = None
-            submitter_id = None
-            can_approve = False
-            can_submit_approval = False
-
-            if approval_instance:
-                approval_instance_id = approval_instance.id
-                approval_status = approval_instance.status
-                submitter_id = approval_instance.submitter_id
-
-                # 查询工作流定义
-                workflow = db.query(ApprovalWorkflowDefinition).filter(
-                    ApprovalWorkflowDefinition.id == approval_instance.workflow_id
-                ).first()
-
-                if workflow:
-                    workflow_name = workflow.name
-
-                # 检查当前用户是否可以审批
-                if approval_instance.status in ['pending', 'in_progress']:
-                    can_approve = approval_service._can_approve(approval_instance, current_user)
-            else:
-                # 没有审批实例，检查是否可以提交审批
-                can_submit_approval = approval_service.should_require_approval('ppqr', workspace_context)
+            approval_summary = approval_summaries[ppqr.id]
 
             # 确定convert_to_pqr的值
             convert_to_pqr_value = None
@@ -192,12 +128,12 @@ async def get_ppqr_list(
                 convert_to_pqr=convert_to_pqr_value,
                 created_at=ppqr.created_at,
                 updated_at=ppqr.updated_at,
-                approval_instance_id=approval_instance_id,
-                approval_status=approval_status,
-                workflow_name=workflow_name,
-                can_approve=can_approve,
-                can_submit_approval=can_submit_approval,
-                submitter_id=submitter_id
+                approval_instance_id=approval_summary["approval_instance_id"],
+                approval_status=approval_summary["approval_status"],
+                workflow_name=approval_summary["workflow_name"],
+                can_approve=approval_summary["can_approve"],
+                can_submit_approval=approval_summary["can_submit_approval"],
+                submitter_id=approval_summary["submitter_id"]
             ))
 
         # 计算总页数
@@ -208,9 +144,13 @@ async def get_ppqr_list(
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor_for(ppqr_list, actual_limit)
         )
 
+    except ValueError as e:
+        # 注意：参数 status 遮蔽了 fastapi.status，这里直接使用状态码
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"[ERROR] 获取pPQR列表失败: {str(e)}")
         import traceback
@@ -236,36 +176,20 @@ async def create_ppqr(
         print(f"[DEBUG] 接收到的pPQR数据: {ppqr_data}")
 
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
-
-        # 检查会员配额（仅个人工作区）
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-
-            if not membership_service.check_quota_available(current_user, "ppqr"):
-                limits = membership_service.get_membership_limits(current_user.member_tier)
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"已达到pPQR配额限制 ({limits.get('ppqr', 0)}个)，请升级会员等级"
-                )
-
-        # 初始化pPQR服务
-        ppqr_service = PPQRService(db)
-
-        # 创建pPQR
-        ppqr = ppqr_service.create(
-            db,
-            ppqr_data=ppqr_data,
-            current_user=current_user,
-            workspace_context=workspace_context
-        )
-
-        # 更新配额使用情况（仅个人工作区）
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-            membership_service.update_quota_usage(current_user, "ppqr", 1)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
+
+        # 预留会员配额（仅个人工作区计数），创建失败时退回
+        with QuotaService(db).reserve(current_user, workspace_context, QuotaType.PPQR):
+            # 初始化pPQR服务
+            ppqr_service = PPQRService(db)
+
+            # 创建pPQR
+            ppqr = ppqr_service.create(
+                db,
+                ppqr_data=ppqr_data,
+                current_user=current_user,
+                workspace_context=workspace_context
+            )
 
         # 构建响应数据
         response_data = {
@@ -285,6 +209,8 @@ async def create_ppqr(
 
         return response_data
 
+    except HTTPException:
+        raise
     except ValueError as e:
         # 业务逻辑错误（如pPQR编号重复）
         raise HTTPException(status_code=400, detail=str(e))
@@ -301,8 +227,8 @@ async def create_ppqr(
 @router.get("/{ppqr_id}")
 async def get_ppqr_detail(
     ppqr_id: int,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -310,13 +236,10 @@ async def get_ppqr_detail(
     """
     try:
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
-
-        # 初始化pPQR服务
-        ppqr_service = PPQRService(db)
+        workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
 
         # 获取pPQR
-        ppqr = ppqr_service.get(
+        ppqr = await PPQRService.get_async(
             db,
             id=ppqr_id,
             current_user=current_user,
@@ -329,45 +252,12 @@ async def get_ppqr_detail(
                 detail="pPQR不存在或无权访问"
             )
 
-        # 查询关联的审批实例和工作流信息
-        from app.models.approval import ApprovalInstance, ApprovalWorkflowDefinition
+        # 查询关联的审批实例、工作流名称和当前用户的审批权限
         from app.services.approval_service import ApprovalService
 
-        approval_instance = db.query(ApprovalInstance).filter(
-            ApprovalInstance.document_type == "ppqr",
-            ApprovalInstance.document_id == ppqr.id
-        ).order_by(ApprovalInstance.created_at.desc()).first()
-
-        # 初始化审批服务
-        approval_service = ApprovalService(db)
-
-        # 获取审批相关信息
-        workflow_name = None
-        approval_status = None
-        approval_instance_id = None
-        submitter_id = None
-        can_approve = False
-        can_submit_approval = False
-
-        if approval_instance:
-            approval_instance_id = approval_instance.id
-            approval_status = approval_instance.status
-            submitter_id = approval_instance.submitter_id
-
-            # 查询工作流定义
-            workflow = db.query(ApprovalWorkflowDefinition).filter(
-                ApprovalWorkflowDefinition.id == approval_instance.workflow_id
-            ).first()
-
-            if workflow:
-                workflow_name = workflow.name
-
-            # 检查当前用户是否可以审批
-            if approval_instance.status in ['pending', 'in_progress']:
-                can_approve = approval_service._can_approve(approval_instance, current_user)
-        else:
-            # 没有审批实例，检查是否可以提交审批
-            can_submit_approval = approval_service.should_require_approval('ppqr', workspace_context)
+        approval_summary = (await ApprovalService.get_approval_summaries_async(
+            db, "ppqr", [ppqr.id], current_user, workspace_context
+        ))[ppqr.id]
 
         # 构建响应数据
         response_data = {
@@ -387,12 +277,7 @@ async def get_ppqr_detail(
             "updated_at": ppqr.updated_at.isoformat() if ppqr.updated_at else None,
             "created_by": ppqr.created_by,
             "updated_by": ppqr.updated_by,
-            "approval_instance_id": approval_instance_id,
-            "approval_status": approval_status,
-            "workflow_name": workflow_name,
-            "can_approve": can_approve,
-            "can_submit_approval": can_submit_approval,
-            "submitter_id": submitter_id
+            **approval_summary
         }
 
         return response_data
@@ -424,7 +309,7 @@ async def update_ppqr(
         print(f"[DEBUG] 更新pPQR {ppqr_id}，数据: {ppqr_data}")
 
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
         # 初始化pPQR服务
         ppqr_service = PPQRService(db)
@@ -489,7 +374,7 @@ async def delete_ppqr(
         print(f"[DEBUG] 开始删除pPQR {ppqr_id}")
 
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
         print(f"[DEBUG] 工作区上下文: {workspace_context.workspace_type}")
 
         # 初始化pPQR服务
@@ -516,9 +401,7 @@ async def delete_ppqr(
         if workspace_context.workspace_type == WorkspaceType.PERSONAL:
             print(f"[DEBUG] 更新配额使用情况...")
             try:
-                from app.services.membership_service import MembershipService
-                membership_service = MembershipService(db)
-                membership_service.update_quota_usage(current_user, "ppqr", -1)
+                QuotaService(db).release_usage(current_user, workspace_context, QuotaType.PPQR)
                 print(f"[DEBUG] 配额更新成功")
             except Exception as quota_error:
                 # 配额更新失败不应该阻止删除操作
@@ -559,7 +442,7 @@ async def duplicate_ppqr(
         import time
 
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
         # 初始化pPQR服务
         ppqr_service = PPQRService(db)
@@ -578,19 +461,11 @@ async def duplicate_ppqr(
                 detail="pPQR不存在或无权访问"
             )
 
-        # 检查配额（个人和企业工作区）
-        from app.services.quota_service import QuotaService, QuotaType
+        # 检查配额：企业工作区检查企业配额；个人工作区预留配额，创建失败时退回
         quota_service = QuotaService(db)
-
-        try:
-            quota_service.check_quota(
-                current_user,
-                workspace_context,
-                QuotaType.PPQR,
-                1
-            )
-        except HTTPException:
-            raise
+        if workspace_context.is_enterprise():
+            quota_service.check_quota(current_user, workspace_context, QuotaType.PPQR, 1)
+        reservation = quota_service.reserve(current_user, workspace_context, QuotaType.PPQR)
 
         # 构建新的pPQR数据
         ppqr_data = {
@@ -603,18 +478,13 @@ async def duplicate_ppqr(
         }
 
         # 创建新pPQR
-        new_ppqr = ppqr_service.create(
-            db,
-            ppqr_data=ppqr_data,
-            current_user=current_user,
-            workspace_context=workspace_context
-        )
-
-        # 更新配额使用情况（仅个人工作区）
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-            membership_service.update_quota_usage(current_user, "ppqr", 1)
+        with reservation:
+            new_ppqr = ppqr_service.create(
+                db,
+                ppqr_data=ppqr_data,
+                current_user=current_user,
+                workspace_context=workspace_context
+            )
 
         # 构建响应数据
         response_data = {
@@ -3,18 +3,15 @@ pPQR文档导出API端点
 支持导出为Word和PDF格式
 """
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
-import io
 from datetime import datetime
-from urllib.parse import quote
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
 from app.models.user import User
 from app.models.ppqr import PPQR
-from app.services.document_export_service import DocumentExportService
+from app.services.render_cache import render_cache, rendered_file_response
 
 router = APIRouter()
 
@@ -55,23 +52,22 @@ async def export_ppqr_to_word(
         print(f"[pPQR导出API] pPQR标题: {ppqr.title}")
         print(f"[pPQR导出API] 导出风格: {style}")
 
-        # 使用导出服务生成Word文档
-        export_service = DocumentExportService(db)
-        word_stream = export_service.export_ppqr_to_word(ppqr, style=style)
+        # 生成文件名（响应头中URL编码处理中文字符）
+        filename = f"pPQR_{ppqr.ppqr_number}_{datetime.now().strftime('%Y%m%d')}.docx"
+
+        # 获取渲染结果：同一版本重复导出直接返回缓存文件，否则在渲染进程池中生成；
+        # 直接从打开的文件流式返回，返回前文件被淘汰也不影响下载
+        handle = await render_cache.open_rendered("ppqr", "word", ppqr, style=style)
 
         print(f"[pPQR导出API] Word文档生成成功")
 
-        # 生成文件名，使用URL编码处理中文字符
-        filename = f"pPQR_{ppqr.ppqr_number}_{datetime.now().strftime('%Y%m%d')}.docx"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            word_stream,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-            }
+        return rendered_file_response(
+            handle,
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            filename
         )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[pPQR导出API错误] {str(e)}")
         import traceback
@@ -105,21 +101,15 @@ async def export_ppqr_to_pdf(
     # TODO: 添加权限检查
     
     try:
-        # 使用导出服务生成PDF文档
-        export_service = DocumentExportService(db)
-        pdf_stream = export_service.export_ppqr_to_pdf(ppqr)
-
-        # 生成文件名，使用URL编码处理中文字符
+        # 生成文件名（响应头中URL编码处理中文字符）
         filename = f"pPQR_{ppqr.ppqr_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            pdf_stream,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-            }
-        )
+
+        # 获取渲染结果：同一版本重复导出直接返回缓存文件，否则在渲染进程池中生成；
+        # 直接从打开的文件流式返回，返回前文件被淘汰也不影响下载
+        handle = await render_cache.open_rendered("ppqr", "pdf", ppqr)
+        return rendered_file_response(handle, "application/pdf", filename)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出PDF失败: {str(e)}")
 
@@ -3,72 +3,30 @@ PQR (Procedure Qualification Record) API endpoints for the welding system backen
 """
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.models.user import User
-from app.models.company import CompanyEmployee
 from app.schemas.pqr import (
     PQRCreate, PQRResponse, PQRUpdate, PQRSummary, PQRListResponse,
     PQRTestSpecimenCreate, PQRTestSpecimenResponse,
     PQRQualificationUpdate, PQRSearchParams, PQRExportRequest
 )
 from app.services.user_service import user_service
-from app.services.workspace_service import WorkspaceService
-from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.quota_service import QuotaService, QuotaType
+from app.services.export_job_service import ExportJobService, dispatch_export_job
+from app.services.workspace_service import resolve_workspace_context
+from app.core.data_access import DataAccessMiddleware, WorkspaceType
+from app.core.pagination import next_cursor_for
 
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session,
-    current_user: User,
-    workspace_id: Optional[str] = None
-) -> WorkspaceContext:
-    """
-    Get workspace context from header or user's default workspace.
-
-    Args:
-        db: Database session
-        current_user: Current user
-        workspace_id: Workspace ID from header (optional)
-
-    Returns:
-        WorkspaceContext object
-    """
-    workspace_service = WorkspaceService(db)
-
-    # If workspace_id is provided in header, use it
-    if workspace_id:
-        return workspace_service.create_workspace_context(current_user, workspace_id)
-
-    # Otherwise, determine default workspace based on user's membership type
-    if current_user.membership_type == "enterprise":
-        # For enterprise users, find their company
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-
-    # Default to personal workspace
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 @router.get("/", response_model=PQRListResponse)
-def read_pqr_list(
-    db: Session = Depends(deps.get_db),
+async def read_pqr_list(
+    db: AsyncSession = Depends(deps.get_async_db),
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(20, ge=1, le=1000, description="每页记录数"),
     skip: int = Query(None, ge=0, description="跳过记录数（可选，优先使用page）"),
@@ -77,7 +35,9 @@ def read_pqr_list(
     qualification_result: str = Query(None, description="评定结果过滤"),
     search_term: str = Query(None, description="搜索关键词"),
     keyword: str = Query(None, description="搜索关键词（别名）"),
-    current_user: User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的next_cursor，启用游标分页）"),
+    total_mode: str = Query("exact", pattern="^(exact|estimated)$", description="总数模式：exact精确计数 / estimated估算"),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -85,11 +45,12 @@ def read_pqr_list(
 
     - 个人工作区：只返回用户自己的PQR
     - 企业工作区：只返回企业内的PQR
+    - 运行在异步数据库会话上，不占用线程池线程
     """
     try:
         # Get workspace context
         print(f"DEBUG PQR: 开始获取工作区上下文, workspace_id={workspace_id}")
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
         print(f"DEBUG PQR: 工作区上下文获取成功: type={workspace_context.workspace_type}, user_id={workspace_context.user_id}")
 
         # Debug information
@@ -108,20 +69,20 @@ def read_pqr_list(
 
         # Initialize PQR service
         from app.services.pqr_service import PQRService
-        pqr_service_instance = PQRService(db)
 
         # Get total count with workspace filtering
-        total = pqr_service_instance.count(
+        total = await PQRService.count_async(
             db,
             current_user=current_user,
             workspace_context=workspace_context,
             owner_id=owner_id,
             qualification_result=qualification_result,
-            search_term=actual_search_term
+            search_term=actual_search_term,
+            total_mode=total_mode
         )
 
         # Get PQR list with workspace filtering
-        pqr_list = pqr_service_instance.get_multi(
+        pqr_list = await PQRService.get_multi_async(
             db,
             skip=actual_skip,
             limit=actual_limit,
@@ -129,49 +90,24 @@ def read_pqr_list(
             workspace_context=workspace_context,
             owner_id=owner_id,
             qualification_result=qualification_result,
-            search_term=actual_search_term
+            search_term=actual_search_term,
+            cursor=cursor
         )
 
         # Convert to summary format with approval workflow info
-        from app.models.approval import ApprovalInstance, ApprovalWorkflowDefinition
         from app.services.approval_service import ApprovalService
 
-        approval_service = ApprovalService(db)
+        # 批量加载整页文档的审批摘要（固定查询次数，避免逐行查询）
+        approval_summaries = await ApprovalService.get_approval_summaries_async(
+            db,
+            'pqr',
+            [pqr.id for pqr in pqr_list],
+            current_user,
+            workspace_context
+        )
         pqr_summaries = []
         for pqr in pqr_list:
-            # 查询关联的审批实例
-            approval_instance = db.query(ApprovalInstance).filter(
-                ApprovalInstance.document_type == "pqr",
-                ApprovalInstance.document_id == pqr.id
-            ).order_by(ApprovalInstance.created_at.desc()).first()
-
-            # 获取工作流名称
-            workflow_name = None
-            approval_status = None
-            approval_instance_id = None
-            submitter_id = None
-            can_approve = False
-            can_submit_approval = False
-
-            if approval_instance:
-                approval_instance_id = approval_instance.id
-                approval_status = approval_instance.status
-                submitter_id = approval_instance.submitter_id
-
-                # 查询工作流定义
-                workflow = db.query(ApprovalWorkflowDefinition).filter(
-                    ApprovalWorkflowDefinition.id == approval_instance.workflow_id
-                ).first()
-
-                if workflow:
-                    workflow_name = workflow.name
-
-                # 检查当前用户是否可以审批
-                if approval_instance.status in ['pending', 'in_progress']:
-                    can_approve = approval_service._can_approve(approval_instance, current_user)
-            else:
-                # 没有审批实例，检查是否可以提交审批
-                can_submit_approval = approval_service.should_require_approval('pqr', workspace_context)
+            approval_summary = approval_summaries[pqr.id]
 
             pqr_summaries.append(PQRSummary(
                 id=pqr.id,
@@ -186,12 +122,12 @@ def read_pqr_list(
                 status=pqr.status,
                 created_at=pqr.created_at,
                 updated_at=pqr.updated_at,
-                approval_instance_id=approval_instance_id,
-                approval_status=approval_status,
-                workflow_name=workflow_name,
-                can_approve=can_approve,
-                can_submit_approval=can_submit_approval,
-                submitter_id=submitter_id
+                approval_instance_id=approval_summary["approval_instance_id"],
+                approval_status=approval_summary["approval_status"],
+                workflow_name=approval_summary["workflow_name"],
+                can_approve=approval_summary["can_approve"],
+                can_submit_approval=approval_summary["can_submit_approval"],
+                submitter_id=approval_summary["submitter_id"]
             ))
 
         # 计算总页数
@@ -202,10 +138,13 @@ def read_pqr_list(
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=total_pages
+            total_pages=total_pages,
+            next_cursor=next_cursor_for(pqr_list, actual_limit)
         )
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         print(f"ERROR PQR: 获取PQR列表失败: {str(e)}")
         import traceback
@@ -231,7 +170,7 @@ def create_pqr(
     - 企业工作区：创建企业PQR
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission (enterprise members have access by default)
     if current_user.membership_type != "enterprise":
@@ -241,34 +180,20 @@ def create_pqr(
                 detail="没有足够的权限"
             )
 
-    try:
-        # 检查会员配额 (only for personal workspace)
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-
-            if not membership_service.check_quota_available(current_user, "pqr"):
-                limits = membership_service.get_membership_limits(current_user.member_tier)
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail=f"已达到PQR配额限制 ({limits['pqr']}个)，请升级会员等级"
-                )
-
-        # 创建PQR with workspace context
-        from app.services.pqr_service import PQRService
-        pqr_service_instance = PQRService(db)
-        pqr = pqr_service_instance.create(
-            db,
-            obj_in=pqr_in,
-            current_user=current_user,
-            workspace_context=workspace_context
-        )
+    # 预留会员配额（仅个人工作区计数），创建失败时退回
+    reservation = QuotaService(db).reserve(current_user, workspace_context, QuotaType.PQR)
 
-        # 更新配额使用情况 (only for personal workspace)
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-            membership_service.update_quota_usage(current_user, "pqr", 1)
+    try:
+        with reservation:
+            # 创建PQR with workspace context
+            from app.services.pqr_service import PQRService
+            pqr_service_instance = PQRService(db)
+            pqr = pqr_service_instance.create(
+                db,
+                obj_in=pqr_in,
+                current_user=current_user,
+                workspace_context=workspace_context
+            )
 
         return pqr
     except ValueError as e:
@@ -284,11 +209,11 @@ def create_pqr(
 
 
 @router.get("/{id}", response_model=PQRResponse)
-def read_pqr_by_id(
+async def read_pqr_by_id(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -297,11 +222,14 @@ def read_pqr_by_id(
     只能获取当前工作区内的PQR。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
-        if not user_service.has_permission(db, current_user.id, "pqr", "read"):
+        has_permission = await db.run_sync(
+            lambda session: user_service.has_permission(session, current_user.id, "pqr", "read")
+        )
+        if not has_permission:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="没有足够的权限"
@@ -309,8 +237,7 @@ def read_pqr_by_id(
 
     # Get PQR with workspace filtering
     from app.services.pqr_service import PQRService
-    pqr_service_instance = PQRService(db)
-    pqr = pqr_service_instance.get(
+    pqr = await PQRService.get_async(
         db,
         id=id,
         current_user=current_user,
@@ -321,33 +248,20 @@ def read_pqr_by_id(
         raise HTTPException(status_code=404, detail="PQR未找到或无权访问")
 
     # 查询关联的审批实例和工作流信息
-    from app.models.approval import ApprovalInstance, ApprovalWorkflowDefinition
+    from app.services.approval_service import ApprovalService
 
-    approval_instance = db.query(ApprovalInstance).filter(
-        ApprovalInstance.document_type == "pqr",
-        ApprovalInstance.document_id == pqr.id
-    ).order_by(ApprovalInstance.created_at.desc()).first()
+    approval_summary = (await ApprovalService.get_approval_summaries_async(
+        db, "pqr", [pqr.id], current_user, workspace_context
+    ))[pqr.id]
 
     # 创建响应字典
     pqr_dict = {
         **{k: v for k, v in pqr.__dict__.items() if not k.startswith('_')},
-        "approval_instance_id": None,
-        "approval_status": None,
-        "workflow_name": None
+        "approval_instance_id": approval_summary["approval_instance_id"],
+        "approval_status": approval_summary["approval_status"],
+        "workflow_name": approval_summary["workflow_name"]
     }
 
-    if approval_instance:
-        pqr_dict["approval_instance_id"] = approval_instance.id
-        pqr_dict["approval_status"] = approval_instance.status
-
-        # 查询工作流定义
-        workflow = db.query(ApprovalWorkflowDefinition).filter(
-            ApprovalWorkflowDefinition.id == approval_instance.workflow_id
-        ).first()
-
-        if workflow:
-            pqr_dict["workflow_name"] = workflow.name
-
     return pqr_dict
 
 
@@ -366,7 +280,7 @@ def update_pqr(
     只能更新当前工作区内有权限的PQR。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -393,13 +307,11 @@ def update_pqr(
     if pqr.user_id != current_user.id and not current_user.is_superuser:
         # For enterprise workspace, check if user is admin
         if workspace_context.workspace_type == WorkspaceType.ENTERPRISE:
-            employee = db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == current_user.id,
-                CompanyEmployee.company_id == workspace_context.company_id,
-                CompanyEmployee.status == "active"
-            ).first()
+            principal = DataAccessMiddleware(db).resolve_principal(
+                current_user.id, workspace_context.company_id
+            )
 
-            if not employee or employee.role != "admin":
+            if not principal.is_member or not principal.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="只能更新自己的PQR或需要管理员权限"
@@ -431,7 +343,7 @@ def delete_pqr(
     只能删除当前工作区内有权限的PQR。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -458,13 +370,11 @@ def delete_pqr(
     if pqr.user_id != current_user.id and not current_user.is_superuser:
         # For enterprise workspace, check if user is admin
         if workspace_context.workspace_type == WorkspaceType.ENTERPRISE:
-            employee = db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == current_user.id,
-                CompanyEmployee.company_id == workspace_context.company_id,
-                CompanyEmployee.status == "active"
-            ).first()
+            principal = DataAccessMiddleware(db).resolve_principal(
+                current_user.id, workspace_context.company_id
+            )
 
-            if not employee or employee.role != "admin":
+            if not principal.is_member or not principal.is_admin:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="只能删除自己的PQR或需要管理员权限"
@@ -478,12 +388,9 @@ def delete_pqr(
     try:
         pqr = pqr_service_instance.remove(db, id=id)
         
-        # 更新配额使用情况
-        from app.services.membership_service import MembershipService
-        membership_service = MembershipService(db)
-        user = db.query(User).filter(User.id == current_user.id).first()
-        membership_service.update_quota_usage(user, "pqr", -1)
-        
+        # 退回配额使用量（仅个人工作区计数）
+        QuotaService(db).release_usage(current_user, workspace_context, QuotaType.PQR)
+
         return pqr
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -620,7 +527,7 @@ def duplicate_pqr(
     """复制PQR."""
     try:
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
         # 导入PQR服务
         from app.services.pqr_service import PQRService
@@ -773,14 +680,45 @@ def export_pqr(
     *,
     db: Session = Depends(deps.get_db),
     export_request: PQRExportRequest,
-    current_user: User = Depends(deps.get_current_active_user)
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(deps.get_current_active_user),
+    workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
-    """导出PQR."""
-    # 这里应该实现实际的导出逻辑
-    # 目前只返回一个模拟的响应
+    """
+    批量导出PQR（带工作区上下文数据隔离）.
+
+    只导出当前工作区内有权限的PQR。创建后台导出任务，
+    通过 /exports/jobs/{job_id} 查询进度，完成后下载ZIP。
+    """
+    # Get workspace context
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
+
+    # 一次查询过滤出可访问的PQR并创建导出任务
+    export_job_service = ExportJobService(db)
+    try:
+        job = export_job_service.create_job(
+            "pqr",
+            export_request.pqr_ids,
+            export_request.export_format,
+            current_user,
+            workspace_context
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if job.total_count:
+        dispatch_export_job(background_tasks, job.id)
+    else:
+        job.status = "failed"
+        job.error_message = "没有可导出的PQR"
+        db.commit()
+
     return {
-        "message": f"导出请求已接收，将导出 {len(export_request.pqr_ids)} 个PQR文件",
+        "message": f"导出任务已创建，将导出 {job.total_count} 个PQR文件（共请求 {len(export_request.pqr_ids)} 个）",
         "format": export_request.export_format,
         "include_specimens": export_request.include_specimens,
-        "include_attachments": export_request.include_attachments
+        "include_attachments": export_request.include_attachments,
+        "accessible_count": job.total_count,
+        "requested_count": len(export_request.pqr_ids),
+        **ExportJobService.to_dict(job)
     }
\ No newline at end of file
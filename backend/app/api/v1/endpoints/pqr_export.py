@@ -3,18 +3,15 @@ PQR文档导出API端点
 支持导出为Word和PDF格式
 """
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Optional
-import io
 from datetime import datetime
-from urllib.parse import quote
 
 from app.api.deps import get_current_user
 from app.core.database import get_db
 from app.models.user import User
 from app.models.pqr import PQR
-from app.services.document_export_service import DocumentExportService
+from app.services.render_cache import render_cache, rendered_file_response
 
 router = APIRouter()
 
@@ -50,21 +47,19 @@ async def export_pqr_to_word(
     # TODO: 添加权限检查
 
     try:
-        # 使用导出服务生成Word文档
-        export_service = DocumentExportService(db)
-        word_stream = export_service.export_pqr_to_word(pqr, style=style)
-
-        # 生成文件名，使用URL编码处理中文字符
+        # 生成文件名（响应头中URL编码处理中文字符）
         filename = f"PQR_{pqr.pqr_number}_{datetime.now().strftime('%Y%m%d')}.docx"
-        encoded_filename = quote(filename)
 
-        return StreamingResponse(
-            word_stream,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-            }
+        # 获取渲染结果：同一版本重复导出直接返回缓存文件，否则在渲染进程池中生成；
+        # 直接从打开的文件流式返回，返回前文件被淘汰也不影响下载
+        handle = await render_cache.open_rendered("pqr", "word", pqr, style=style)
+        return rendered_file_response(
+            handle,
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            filename
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出Word失败: {str(e)}")
 
@@ -95,21 +90,15 @@ async def export_pqr_to_pdf(
     # TODO: 添加权限检查
     
     try:
-        # 使用导出服务生成PDF文档
-        export_service = DocumentExportService(db)
-        pdf_stream = export_service.export_pqr_to_pdf(pqr)
-
-        # 生成文件名，使用URL编码处理中文字符
+        # 生成文件名（响应头中URL编码处理中文字符）
         filename = f"PQR_{pqr.pqr_number}_{datetime.now().strftime('%Y%m%d')}.pdf"
-        encoded_filename = quote(filename)
 
-        return StreamingResponse(
-            pdf_stream,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-            }
-        )
+        # 获取渲染结果：同一版本重复导出直接返回缓存文件，否则在渲染进程池中生成；
+        # 直接从打开的文件流式返回，返回前文件被淘汰也不影响下载
+        handle = await render_cache.open_rendered("pqr", "pdf", pqr)
+        return rendered_file_response(handle, "application/pdf", filename)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出PDF失败: {str(e)}")
 
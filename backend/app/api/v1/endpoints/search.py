@@ -0,0 +1,63 @@
+"""
+Document search API endpoints for the welding system backend.
+WPS / PQR / pPQR 全文检索
+"""
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.search import DocumentSearchResponse
+from app.services.search_service import DOCUMENT_SOURCES, DocumentSearchService
+from app.services.workspace_service import resolve_workspace_context
+
+router = APIRouter()
+
+
+@router.get("/documents", response_model=DocumentSearchResponse)
+def search_documents(
+    db: Session = Depends(deps.get_db),
+    q: str = Query(..., min_length=1, max_length=200, description="检索词"),
+    types: Optional[str] = Query(None, description="文档类型，逗号分隔：wps,pqr,ppqr（默认全部）"),
+    skip: int = Query(0, ge=0, description="跳过记录数"),
+    limit: int = Query(20, ge=1, le=100, description="返回记录数"),
+    current_user: User = Depends(deps.get_current_active_user),
+    workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
+) -> Any:
+    """
+    按相关度检索当前工作区内的WPS、PQR、pPQR.
+
+    同时检索标题、编号、公司、项目、焊接工艺、材料等结构化字段
+    以及 modules_data 中的模块内容；标题和编号命中排序靠前。
+    未启用检索索引（SEARCH_INDEX_ENABLED=False）时索引无人维护，返回503。
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="全文检索未启用"
+        )
+
+    document_types = None
+    if types:
+        document_types = [t.strip().lower() for t in types.split(",") if t.strip()]
+        invalid = [t for t in document_types if t not in DOCUMENT_SOURCES]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"不支持的文档类型: {', '.join(invalid)}"
+            )
+
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
+
+    result = DocumentSearchService(db).search(
+        q,
+        current_user,
+        workspace_context,
+        document_types=document_types,
+        limit=limit,
+        offset=skip
+    )
+    return DocumentSearchResponse(items=result["items"], total=result["total"], query=q)
@@ -7,6 +7,11 @@ from fastapi import APIRouter, Depends
 
 from app.api import deps
 from app.core.database import db_manager
+from app.core.task_metrics import get_task_metrics
+from app.services.delivery_queue import delivery_queue
+from app.services.email_service import email_service
+from app.services.render_cache import render_cache
+from app.services.render_engine import render_engine
 
 router = APIRouter()
 
@@ -20,6 +25,44 @@ async def system_health(
     return health_status
 
 
+@router.get("/db-pool")
+async def database_pool_stats(
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """数据库连接池状态和获取连接等待指标."""
+    return db_manager.pool_stats()
+
+
+@router.get("/render-engine")
+async def render_engine_stats(
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """文档渲染引擎排队和执行指标，以及渲染结果缓存命中情况."""
+    return {
+        "engine": render_engine.stats(),
+        "cache": render_cache.stats()
+    }
+
+
+@router.get("/delivery-queue")
+async def delivery_queue_stats(
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """邮件/短信投递队列指标和SMTP连接复用情况."""
+    return {
+        "queue": delivery_queue.stats(),
+        "smtp_pool": email_service.smtp_pool.stats() if email_service.provider == "smtp" else None
+    }
+
+
+@router.get("/worker-tasks")
+async def worker_task_stats(
+    current_user: dict = Depends(deps.get_current_admin_user)
+) -> Any:
+    """后台任务（Celery）各任务的执行次数、耗时和吞吐量."""
+    return get_task_metrics()
+
+
 @router.get("/info")
 async def system_info(
     current_user: dict = Depends(deps.get_current_admin_user)
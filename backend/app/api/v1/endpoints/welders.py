@@ -20,6 +20,7 @@ from app.schemas.welder import (
 )
 from app.services.welder_service import WelderService
 from app.core.data_access import WorkspaceContext
+from app.core.pagination import next_cursor_for
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -37,6 +38,8 @@ async def get_welders_list(
     skill_level: Optional[str] = Query(None, description="技能等级筛选"),
     welder_status: Optional[str] = Query(None, description="状态筛选"),
     certification_status: Optional[str] = Query(None, description="证书状态筛选"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的next_cursor，启用游标分页）"),
+    total_mode: str = Query("exact", pattern="^(exact|estimated)$", description="总数模式：exact精确计数 / estimated估算"),
     current_user: Any = Depends(deps.get_current_active_user)
 ) -> Any:
     """
@@ -51,6 +54,8 @@ async def get_welders_list(
     - **skill_level**: 技能等级筛选
     - **welder_status**: 状态筛选
     - **certification_status**: 证书状态筛选
+    - **cursor**: 分页游标（深分页时替代skip，响应中返回next_cursor）
+    - **total_mode**: 总数模式（exact/estimated）
     """
     try:
         logger.info(f"[焊工列表] 开始获取焊工列表 - workspace_type={workspace_type}, company_id={company_id}, factory_id={factory_id}, user_id={current_user.id}")
@@ -76,7 +81,9 @@ async def get_welders_list(
             search=search,
             skill_level=skill_level,
             welder_status=welder_status,
-            certification_status=certification_status
+            certification_status=certification_status,
+            cursor=cursor,
+            total_mode=total_mode
         )
         logger.info(f"[焊工列表] 服务层返回成功 - 获取到 {len(welders)} 条记录, 总数: {total}")
 
@@ -92,7 +99,8 @@ async def get_welders_list(
                 "total": total,
                 "page": page,
                 "page_size": limit,
-                "total_pages": total_pages
+                "total_pages": total_pages,
+                "next_cursor": next_cursor_for(welders, limit)
             },
             "message": "获取焊工列表成功"
         }
@@ -567,6 +575,58 @@ async def get_welders_statistics(
         )
 
 
+@router.get("/statistics/expiring-certifications", response_model=dict)
+async def get_expiring_certifications(
+    workspace_type: str = Query(..., description="工作区类型：personal/enterprise"),
+    company_id: Optional[int] = Query(None, description="企业ID（企业工作区必填）"),
+    factory_id: Optional[int] = Query(None, description="工厂ID（可选）"),
+    days: int = Query(90, ge=1, le=730, description="到期天数范围"),
+    include_expired: bool = Query(False, description="是否包含已过期但仍标记为有效的证书"),
+    db: Session = Depends(deps.get_db),
+    current_user: Any = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    获取即将到期的焊工证书，按焊工和到期月份分组，用于安排复审
+
+    - **workspace_type**: 工作区类型（personal/enterprise）
+    - **company_id**: 企业ID（企业工作区必填）
+    - **factory_id**: 工厂ID（可选）
+    - **days**: 统计今天起多少天内到期的证书
+    - **include_expired**: 是否包含已过期的证书
+    """
+    try:
+        # 构建工作区上下文
+        workspace_context = WorkspaceContext(
+            workspace_type=workspace_type,
+            user_id=current_user.id,
+            company_id=company_id,
+            factory_id=factory_id
+        )
+
+        # 调用服务层
+        service = WelderService(db)
+        result = service.get_expiring_certifications(
+            current_user=current_user,
+            workspace_context=workspace_context,
+            days=days,
+            include_expired=include_expired
+        )
+
+        return {
+            "success": True,
+            "data": result,
+            "message": "获取到期证书成功"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 # ==================== 工作经历管理 ====================
 
 @router.get("/{welder_id}/work-records", response_model=dict)
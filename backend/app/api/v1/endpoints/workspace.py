@@ -2,15 +2,17 @@
 工作区管理API端点
 Workspace Management API Endpoints
 """
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from app.core.database import get_db
-from app.api.deps import get_current_verified_user
+from app.core.database import get_async_db, get_db
+from app.core.http_cache import etag_matches
+from app.api.deps import get_current_verified_user, get_current_verified_user_async
 from app.models.user import User
-from app.services.workspace_service import get_workspace_service
+from app.services.workspace_service import WorkspaceService, get_workspace_service
 
 
 router = APIRouter()
@@ -47,16 +49,25 @@ class WorkspaceSwitchResponse(BaseModel):
 
 @router.get("/workspaces", response_model=List[WorkspaceResponse])
 async def get_user_workspaces(
-    current_user: User = Depends(get_current_verified_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: User = Depends(get_current_verified_user_async),
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match")
 ):
     """
     获取用户所有可用的工作区
     
-    返回用户的个人工作区和所有企业工作区列表
+    返回用户的个人工作区和所有企业工作区列表。响应带 ETag，
+    客户端携带 If-None-Match 重新验证时，列表未变化则返回 304。
     """
-    workspace_service = get_workspace_service(db)
-    workspaces = workspace_service.get_user_workspaces(current_user)
+    workspaces, etag = await WorkspaceService.get_user_workspaces_with_etag_async(db, current_user)
+    
+    # 按用户区分的数据：只允许浏览器私有缓存，且每次使用前重新验证
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
     return workspaces
 
 
@@ -3,79 +3,38 @@ WPS (Welding Procedure Specification) API endpoints for the welding system backe
 """
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.models.user import User
-from app.models.company import CompanyEmployee
 from app.schemas.wps import (
     WPSCreate, WPSResponse, WPSUpdate, WPSSummary,
     WPSRevisionCreate, WPSRevisionResponse, WPSStatusUpdate,
     WPSSearchParams, WPSExportRequest
 )
 from app.services.wps_service import WPSService
+from app.services.quota_service import QuotaService, QuotaType
+from app.services.export_job_service import ExportJobService, dispatch_export_job
 from app.services.user_service import user_service
-from app.services.workspace_service import WorkspaceService
-from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.workspace_service import resolve_workspace_context
+from app.core.pagination import next_cursor_for
 
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session,
-    current_user: User,
-    workspace_id: Optional[str] = None
-) -> WorkspaceContext:
-    """
-    Get workspace context from header or user's default workspace.
-
-    Args:
-        db: Database session
-        current_user: Current user
-        workspace_id: Workspace ID from header (optional)
-
-    Returns:
-        WorkspaceContext object
-    """
-    workspace_service = WorkspaceService(db)
-
-    # If workspace_id is provided in header, use it
-    if workspace_id:
-        return workspace_service.create_workspace_context(current_user, workspace_id)
-
-    # Otherwise, determine default workspace based on user's membership type
-    if current_user.membership_type == "enterprise":
-        # For enterprise users, find their company
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-
-    # Default to personal workspace
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 @router.get("/", response_model=List[WPSSummary])
-def read_wps_list(
-    db: Session = Depends(deps.get_db),
+async def read_wps_list(
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
     skip: int = Query(0, ge=0, description="跳过记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回记录数"),
     owner_id: int = Query(None, description="所有者ID过滤"),
     status_filter: str = Query(None, description="状态过滤"),
     search_term: str = Query(None, description="搜索关键词"),
-    current_user: User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页X-Next-Cursor响应头的值，启用游标分页）"),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -83,11 +42,13 @@ def read_wps_list(
 
     - 个人工作区：只返回用户自己的WPS
     - 企业工作区：只返回企业内的WPS
+    - 整页时在 X-Next-Cursor 响应头返回下一页游标
+    - 运行在异步数据库会话上，不占用线程池线程
     """
     try:
         # Get workspace context
         print(f"DEBUG WPS: 开始获取工作区上下文, workspace_id={workspace_id}")
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
         print(f"DEBUG WPS: 工作区上下文获取成功: type={workspace_context.workspace_type}, user_id={workspace_context.user_id}")
 
         # Debug information
@@ -99,8 +60,7 @@ def read_wps_list(
 
         # Get WPS list with workspace filtering
         print(f"DEBUG WPS: 开始查询WPS列表, skip={skip}, limit={limit}")
-        wps_service_instance = WPSService(db)
-        wps_list = wps_service_instance.get_multi(
+        wps_list = await WPSService.get_multi_async(
             db,
             skip=skip,
             limit=limit,
@@ -108,50 +68,25 @@ def read_wps_list(
             workspace_context=workspace_context,
             owner_id=owner_id,
             status=status_filter,
-            search_term=search_term
+            search_term=search_term,
+            cursor=cursor
         )
         print(f"DEBUG WPS: 查询完成, 返回 {len(wps_list)} 条记录")
 
         # Convert to summary format with approval workflow info
-        from app.models.approval import ApprovalInstance, ApprovalWorkflowDefinition
         from app.services.approval_service import ApprovalService
 
-        approval_service = ApprovalService(db)
+        # 批量加载整页文档的审批摘要（固定查询次数，避免逐行查询）
+        approval_summaries = await ApprovalService.get_approval_summaries_async(
+            db,
+            'wps',
+            [wps.id for wps in wps_list],
+            current_user,
+            workspace_context
+        )
         wps_summaries = []
         for wps in wps_list:
-            # 查询关联的审批实例
-            approval_instance = db.query(ApprovalInstance).filter(
-                ApprovalInstance.document_type == "wps",
-                ApprovalInstance.document_id == wps.id
-            ).order_by(ApprovalInstance.created_at.desc()).first()
-
-            # 获取工作流名称
-            workflow_name = None
-            approval_status = None
-            approval_instance_id = None
-            submitter_id = None
-            can_approve = False
-            can_submit_approval = False
-
-            if approval_instance:
-                approval_instance_id = approval_instance.id
-                approval_status = approval_instance.status
-                submitter_id = approval_instance.submitter_id
-
-                # 查询工作流定义
-                workflow = db.query(ApprovalWorkflowDefinition).filter(
-                    ApprovalWorkflowDefinition.id == approval_instance.workflow_id
-                ).first()
-
-                if workflow:
-                    workflow_name = workflow.name
-
-                # 检查当前用户是否可以审批
-                if approval_instance.status in ['pending', 'in_progress']:
-                    can_approve = approval_service._can_approve(approval_instance, current_user)
-            else:
-                # 没有审批实例，检查是否可以提交审批
-                can_submit_approval = approval_service.should_require_approval('wps', workspace_context)
+            approval_summary = approval_summaries[wps.id]
 
             wps_summaries.append(WPSSummary(
                 id=wps.id,
@@ -168,18 +103,24 @@ def read_wps_list(
                 modules_data=wps.modules_data,
                 created_at=wps.created_at,
                 updated_at=wps.updated_at,
-                approval_instance_id=approval_instance_id,
-                approval_status=approval_status,
-                workflow_name=workflow_name,
-                can_approve=can_approve,
-                can_submit_approval=can_submit_approval,
-                submitter_id=submitter_id
+                approval_instance_id=approval_summary["approval_instance_id"],
+                approval_status=approval_summary["approval_status"],
+                workflow_name=approval_summary["workflow_name"],
+                can_approve=approval_summary["can_approve"],
+                can_submit_approval=approval_summary["can_submit_approval"],
+                submitter_id=approval_summary["submitter_id"]
             ))
 
+        next_cursor = next_cursor_for(wps_list, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
         print(f"DEBUG WPS: 返回 {len(wps_summaries)} 条WPS摘要")
         return wps_summaries
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         import traceback
         print(f"ERROR in read_wps_list: {str(e)}")
@@ -205,7 +146,7 @@ def create_wps(
     - 企业工作区：创建企业WPS
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission (enterprise members have access by default)
     if current_user.membership_type != "enterprise":
@@ -215,34 +156,18 @@ def create_wps(
                 detail="没有足够的权限"
             )
 
-    # Check membership quota (only for personal workspace)
-    if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-        from app.services.membership_service import MembershipService
-        membership_service = MembershipService(db)
-        user = db.query(User).filter(User.id == current_user.id).first()
-
-        if not membership_service.check_quota_available(user, "wps"):
-            limits = membership_service.get_membership_limits(user.member_tier)
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"已达到WPS配额限制 ({limits['wps']}个)，请升级会员等级"
-            )
+    # Reserve membership quota (only counted for personal workspace); released if creation fails
+    reservation = QuotaService(db).reserve(current_user, workspace_context, QuotaType.WPS)
 
     try:
-        wps_service_instance = WPSService(db)
-        wps = wps_service_instance.create(
-            db,
-            obj_in=wps_in,
-            current_user=current_user,
-            workspace_context=workspace_context
-        )
-
-        # Update quota usage (only for personal workspace)
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-            user = db.query(User).filter(User.id == current_user.id).first()
-            membership_service.update_quota_usage(user, "wps", 1)
+        with reservation:
+            wps_service_instance = WPSService(db)
+            wps = wps_service_instance.create(
+                db,
+                obj_in=wps_in,
+                current_user=current_user,
+                workspace_context=workspace_context
+            )
 
         return wps
     except ValueError as e:
@@ -250,11 +175,11 @@ def create_wps(
 
 
 @router.get("/{id}", response_model=WPSResponse)
-def read_wps_by_id(
+async def read_wps_by_id(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     id: int,
-    current_user: User = Depends(deps.get_current_active_user),
+    current_user: User = Depends(deps.get_current_active_user_async),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
@@ -263,19 +188,21 @@ def read_wps_by_id(
     只能获取当前工作区内的WPS。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = await db.run_sync(resolve_workspace_context, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
-        if not user_service.has_permission(db, current_user.id, "wps", "read"):
+        has_permission = await db.run_sync(
+            lambda session: user_service.has_permission(session, current_user.id, "wps", "read")
+        )
+        if not has_permission:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="没有足够的权限"
             )
 
     # Get WPS with workspace filtering
-    wps_service_instance = WPSService(db)
-    wps = wps_service_instance.get(
+    wps = await WPSService.get_async(
         db,
         id=id,
         current_user=current_user,
@@ -286,33 +213,20 @@ def read_wps_by_id(
         raise HTTPException(status_code=404, detail="WPS未找到或无权访问")
 
     # 查询关联的审批实例和工作流信息
-    from app.models.approval import ApprovalInstance, ApprovalWorkflowDefinition
+    from app.services.approval_service import ApprovalService
 
-    approval_instance = db.query(ApprovalInstance).filter(
-        ApprovalInstance.document_type == "wps",
-        ApprovalInstance.document_id == wps.id
-    ).order_by(ApprovalInstance.created_at.desc()).first()
+    approval_summary = (await ApprovalService.get_approval_summaries_async(
+        db, "wps", [wps.id], current_user, workspace_context
+    ))[wps.id]
 
     # 创建响应字典
     wps_dict = {
         **{k: v for k, v in wps.__dict__.items() if not k.startswith('_')},
-        "approval_instance_id": None,
-        "approval_status": None,
-        "workflow_name": None
+        "approval_instance_id": approval_summary["approval_instance_id"],
+        "approval_status": approval_summary["approval_status"],
+        "workflow_name": approval_summary["workflow_name"]
     }
 
-    if approval_instance:
-        wps_dict["approval_instance_id"] = approval_instance.id
-        wps_dict["approval_status"] = approval_instance.status
-
-        # 查询工作流定义
-        workflow = db.query(ApprovalWorkflowDefinition).filter(
-            ApprovalWorkflowDefinition.id == approval_instance.workflow_id
-        ).first()
-
-        if workflow:
-            wps_dict["workflow_name"] = workflow.name
-
     return wps_dict
 
 
@@ -331,7 +245,7 @@ def update_wps(
     只能更新当前工作区内有权限的WPS。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -381,7 +295,7 @@ def delete_wps(
     只能删除当前工作区内有权限的WPS。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -401,12 +315,8 @@ def delete_wps(
             workspace_context=workspace_context
         )
 
-        # Update quota usage (only for personal workspace)
-        if workspace_context.workspace_type == WorkspaceType.PERSONAL:
-            from app.services.membership_service import MembershipService
-            membership_service = MembershipService(db)
-            user = db.query(User).filter(User.id == current_user.id).first()
-            membership_service.update_quota_usage(user, "wps", -1)
+        # Release quota usage (only counted for personal workspace)
+        QuotaService(db).release_usage(current_user, workspace_context, QuotaType.WPS)
 
         return wps
     except ValueError as e:
@@ -424,7 +334,7 @@ def create_wps_revision(
 ) -> Any:
     """为WPS创建新版本（带工作区上下文）."""
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -465,7 +375,7 @@ def read_wps_revisions(
 ) -> Any:
     """获取WPS的版本历史（带工作区上下文）."""
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -501,7 +411,7 @@ def update_wps_status(
 ) -> Any:
     """更新WPS状态（带工作区上下文）."""
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -550,7 +460,7 @@ def search_wps(
     只搜索当前工作区内的WPS。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -625,7 +535,7 @@ def get_wps_statistics(
     只统计当前工作区内的WPS。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -653,7 +563,7 @@ def get_wps_count_by_status(
     只统计当前工作区内的WPS。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -673,16 +583,18 @@ def export_wps(
     *,
     db: Session = Depends(deps.get_db),
     export_request: WPSExportRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(deps.get_current_active_user),
     workspace_id: Optional[str] = Header(None, alias="X-Workspace-ID")
 ) -> Any:
     """
-    导出WPS（带工作区上下文数据隔离）.
+    批量导出WPS（带工作区上下文数据隔离）.
 
-    只能导出当前工作区内有权限的WPS。
+    只导出当前工作区内有权限的WPS。创建后台导出任务，
+    通过 /exports/jobs/{job_id} 查询进度，完成后下载ZIP。
     """
     # Get workspace context
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # Check permission
     if current_user.membership_type != "enterprise":
@@ -692,25 +604,32 @@ def export_wps(
                 detail="没有足够的权限"
             )
 
-    # Verify all requested WPS IDs are accessible in current workspace
-    wps_service_instance = WPSService(db)
-    accessible_count = 0
-    for wps_id in export_request.wps_ids:
-        wps = wps_service_instance.get(
-            db,
-            id=wps_id,
-            current_user=current_user,
-            workspace_context=workspace_context
+    # 一次查询过滤出可访问的WPS并创建导出任务
+    export_job_service = ExportJobService(db)
+    try:
+        job = export_job_service.create_job(
+            "wps",
+            export_request.wps_ids,
+            export_request.export_format,
+            current_user,
+            workspace_context
         )
-        if wps:
-            accessible_count += 1
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if job.total_count:
+        dispatch_export_job(background_tasks, job.id)
+    else:
+        job.status = "failed"
+        job.error_message = "没有可导出的WPS"
+        db.commit()
 
-    # TODO: Implement actual export logic
     return {
-        "message": f"导出请求已接收，将导出 {accessible_count} 个WPS文件（共请求 {len(export_request.wps_ids)} 个）",
+        "message": f"导出任务已创建，将导出 {job.total_count} 个WPS文件（共请求 {len(export_request.wps_ids)} 个）",
         "format": export_request.export_format,
         "include_revisions": export_request.include_revisions,
         "include_attachments": export_request.include_attachments,
-        "accessible_count": accessible_count,
-        "requested_count": len(export_request.wps_ids)
+        "accessible_count": job.total_count,
+        "requested_count": len(export_request.wps_ids),
+        **ExportJobService.to_dict(job)
     }
\ No newline at end of file
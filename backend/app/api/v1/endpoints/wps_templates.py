@@ -7,7 +7,6 @@ from sqlalchemy.orm import Session
 
 from app.api import deps
 from app.models.user import User
-from app.models.company import CompanyEmployee
 from app.schemas.wps_template import (
     WPSTemplateCreate,
     WPSTemplateUpdate,
@@ -16,57 +15,11 @@ from app.schemas.wps_template import (
     WPSTemplateListResponse
 )
 from app.services.wps_template_service import WPSTemplateService
-from app.services.workspace_service import WorkspaceService
-from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.workspace_service import resolve_workspace_context
 
 router = APIRouter()
 
 
-def get_workspace_context(
-    db: Session,
-    current_user: User,
-    workspace_id: Optional[str] = None
-) -> WorkspaceContext:
-    """
-    获取工作区上下文
-
-    Args:
-        db: 数据库会话
-        current_user: 当前用户
-        workspace_id: 工作区ID（可选）
-
-    Returns:
-        WorkspaceContext对象
-    """
-    workspace_service = WorkspaceService(db)
-
-    # 如果提供了workspace_id，使用它
-    if workspace_id:
-        return workspace_service.create_workspace_context(current_user, workspace_id)
-
-    # 否则，根据用户的会员类型确定默认工作区
-    if current_user.membership_type == "enterprise":
-        # 企业用户，查找其企业
-        employee = db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == current_user.id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if employee:
-            return WorkspaceContext(
-                user_id=current_user.id,
-                workspace_type=WorkspaceType.ENTERPRISE,
-                company_id=employee.company_id,
-                factory_id=employee.factory_id
-            )
-
-    # 默认使用个人工作区
-    return WorkspaceContext(
-        user_id=current_user.id,
-        workspace_type=WorkspaceType.PERSONAL
-    )
-
-
 @router.get("/", response_model=WPSTemplateListResponse)
 def get_templates(
     *,
@@ -90,7 +43,7 @@ def get_templates(
     """
     try:
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
         # 创建Service实例
         template_service = WPSTemplateService(db)
@@ -140,7 +93,7 @@ def get_template(
     """
     try:
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
         # 创建Service实例
         template_service = WPSTemplateService(db)
@@ -181,7 +134,7 @@ def create_template(
         print(f"创建模板请求数据: {template_in}")
 
         # 获取工作区上下文
-        workspace_context = get_workspace_context(db, current_user, workspace_id)
+        workspace_context = resolve_workspace_context(db, current_user, workspace_id)
         print(f"工作区上下文:")
         print(f"  - workspace_type: {workspace_context.workspace_type}")
         print(f"  - user_id: {workspace_context.user_id}")
@@ -225,7 +178,7 @@ def update_template(
 ) -> Any:
     """更新WPS模板（带工作区上下文权限检查）"""
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     template_service = WPSTemplateService(db)
@@ -250,7 +203,7 @@ def delete_template(
 ) -> None:
     """删除WPS模板（软删除，带工作区上下文权限检查）"""
     # 获取工作区上下文
-    workspace_context = get_workspace_context(db, current_user, workspace_id)
+    workspace_context = resolve_workspace_context(db, current_user, workspace_id)
 
     # 创建Service实例
     template_service = WPSTemplateService(db)
@@ -0,0 +1,255 @@
+"""
+Redis缓存辅助函数
+Thin, failure-tolerant helpers around the shared Redis client.
+
+所有函数在Redis不可用时静默降级（返回None / 不写入），
+调用方应始终把缓存视为可选加速层，而不是数据来源。
+
+Redis 客户端设置了读写和连接超时；一次调用失败后 REDIS_RETRY_INTERVAL 秒内
+读写缓存不再访问Redis（直接降级），Redis 不可达时每个进程每个间隔最多等待
+一次超时。失效操作（删除、递增版本号）始终尝试执行。
+事件循环中使用 *_async 版本（redis.asyncio），不阻塞事件循环。
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.database import async_redis_client, redis_client
+
+logger = logging.getLogger(__name__)
+
+# 所有缓存键的统一前缀
+CACHE_PREFIX = "weld:cache"
+
+
+# 在此时间（time.monotonic）之前不访问Redis
+_unavailable_until = 0.0
+
+
+def _redis_available() -> bool:
+    return time.monotonic() >= _unavailable_until
+
+
+def _mark_unavailable() -> None:
+    """Redis调用失败：暂停访问 REDIS_RETRY_INTERVAL 秒"""
+    global _unavailable_until
+    _unavailable_until = time.monotonic() + settings.REDIS_RETRY_INTERVAL
+
+
+def make_key(*parts: Any) -> str:
+    """拼接缓存键"""
+    return ":".join([CACHE_PREFIX, *[str(p) for p in parts]])
+
+
+def cache_get_json(key: str) -> Optional[Any]:
+    """
+    读取JSON缓存
+
+    Args:
+        key: 缓存键
+
+    Returns:
+        反序列化后的对象；未命中或Redis不可用时返回None
+    """
+    if not _redis_available():
+        return None
+    try:
+        raw = redis_client.get(key)
+    except redis.RedisError as e:
+        _mark_unavailable()
+        logger.debug(f"缓存读取失败 {key}: {e}")
+        return None
+    return _loads(raw)
+
+
+async def cache_get_json_async(key: str) -> Optional[Any]:
+    """cache_get_json 的异步版本"""
+    if not _redis_available():
+        return None
+    try:
+        raw = await async_redis_client.get(key)
+    except redis.RedisError as e:
+        _mark_unavailable()
+        logger.debug(f"缓存读取失败 {key}: {e}")
+        return None
+    return _loads(raw)
+
+
+def _loads(raw: Optional[str]) -> Optional[Any]:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_set_json(key: str, value: Any, ttl: int) -> None:
+    """
+    写入JSON缓存
+
+    Args:
+        key: 缓存键
+        value: 可JSON序列化的对象
+        ttl: 过期时间（秒）
+    """
+    if not _redis_available():
+        return
+    try:
+        redis_client.set(key, json.dumps(value, default=str), ex=ttl)
+    except redis.RedisError as e:
+        _mark_unavailable()
+        logger.debug(f"缓存写入失败 {key}: {e}")
+
+
+async def cache_set_json_async(key: str, value: Any, ttl: int) -> None:
+    """cache_set_json 的异步版本"""
+    if not _redis_available():
+        return
+    try:
+        await async_redis_client.set(key, json.dumps(value, default=str), ex=ttl)
+    except redis.RedisError as e:
+        _mark_unavailable()
+        logger.debug(f"缓存写入失败 {key}: {e}")
+
+
+def cache_delete(*keys: str) -> None:
+    """删除缓存键"""
+    if not keys:
+        return
+    # 失效操作不受暂停访问限制：跳过会让Redis恢复后旧缓存继续有效
+    try:
+        redis_client.delete(*keys)
+    except redis.RedisError as e:
+        _mark_unavailable()
+        logger.debug(f"缓存删除失败 {keys}: {e}")
+
+
+def get_version(namespace: str, ident: Any) -> int:
+    """
+    获取命名空间的缓存版本号
+
+    版本号作为缓存键的一部分，递增版本号即可让该命名空间下
+    所有旧缓存失效，而无需逐个删除。
+
+    Returns:
+        当前版本号；Redis不可用时返回0
+    """
+    if not _redis_available():
+        return 0
+    try:
+        value = redis_client.get(make_key("version", namespace, ident))
+    except redis.RedisError:
+        _mark_unavailable()
+        return 0
+    return _version(value)
+
+
+async def get_version_async(namespace: str, ident: Any) -> int:
+    """get_version 的异步版本"""
+    if not _redis_available():
+        return 0
+    try:
+        value = await async_redis_client.get(make_key("version", namespace, ident))
+    except redis.RedisError:
+        _mark_unavailable()
+        return 0
+    return _version(value)
+
+
+def _version(value: Optional[str]) -> int:
+    try:
+        return int(value) if value is not None else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_versions(namespace: str, idents: Iterable[Any]) -> Dict[Any, int]:
+    """
+    批量获取多个标识的缓存版本号（一次往返）
+
+    Returns:
+        标识 -> 版本号；Redis不可用时全部为0
+    """
+    idents = list(idents)
+    if not idents:
+        return {}
+    if not _redis_available():
+        return {ident: 0 for ident in idents}
+    try:
+        values = redis_client.mget([make_key("version", namespace, ident) for ident in idents])
+    except redis.RedisError:
+        _mark_unavailable()
+        return {ident: 0 for ident in idents}
+    return {ident: _version(value) for ident, value in zip(idents, values)}
+
+
+def bump_version(namespace: str, ident: Any) -> None:
+    """递增命名空间的缓存版本号，使旧缓存失效（不受暂停访问限制）"""
+    try:
+        redis_client.incr(make_key("version", namespace, ident))
+    except redis.RedisError as e:
+        _mark_unavailable()
+        logger.warning(f"缓存版本递增失败 {namespace}:{ident}: {e}")
+
+
+class LocalTTLCache:
+    """
+    进程内LRU缓存（条目带过期时间）
+
+    用作Redis前面的一级缓存：命中时不访问Redis。其他进程中的变更无法通知到
+    本进程，最迟在 ttl 秒后生效，因此 ttl 应保持在几秒以内。
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取未过期的条目，未命中返回None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入条目，超出上限时淘汰最久未使用的条目"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """删除条目"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """删除键满足条件的所有条目"""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,122 @@
+"""
+Celery 应用
+Worker application and beat schedule for periodic and background jobs.
+
+定时任务（通知、验证码清理、导出清理、计数校准、检索索引）和批量导出
+渲染由 Celery 工作进程执行，beat 负责按计划投递。在 backend 目录下启动：
+
+    # 定时任务 / 维护任务
+    celery -A app.core.celery_app worker -Q default -l info
+    # 批量导出：渲染进程池不能在 prefork 的守护子进程中创建，使用 solo 池
+    celery -A app.core.celery_app worker -Q exports -P solo -l info
+    # 定时计划
+    celery -A app.core.celery_app beat -l info
+
+每个任务的耗时、成功/失败数和吞吐量由任务信号记录（见 app.core.task_metrics）。
+CELERY_TASK_ALWAYS_EAGER=true 时 .delay() 在调用方同步执行，无需 broker，用于测试。
+"""
+import logging
+import time
+from typing import Any, Dict
+
+from celery import Celery, signals
+from celery.schedules import crontab
+
+from app.core.config import settings
+from app.core.task_metrics import record_task
+
+logger = logging.getLogger(__name__)
+
+# 批量导出任务使用单独的队列
+EXPORT_QUEUE = "exports"
+
+
+def _beat_schedule() -> Dict[str, Dict[str, Any]]:
+    """定时计划（时间按 CELERY_TIMEZONE）"""
+    schedule = {
+        "daily-notifications": {
+            "task": "notifications.daily",
+            "schedule": crontab(hour=8, minute=0),
+        },
+        "hourly-notifications": {
+            "task": "notifications.hourly",
+            "schedule": crontab(minute=30),
+        },
+        "cleanup-verification-codes": {
+            "task": "verification.cleanup",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "cleanup-export-jobs": {
+            "task": "maintenance.export_cleanup",
+            "schedule": crontab(minute=15),
+        },
+    }
+    if settings.WORKSPACE_COUNTERS_ENABLED:
+        schedule["reconcile-workspace-counters"] = {
+            "task": "maintenance.counter_reconcile",
+            "schedule": crontab(hour=4, minute=0),
+        }
+    if settings.SEARCH_INDEX_ENABLED:
+        schedule["reindex-search"] = {
+            "task": "maintenance.search_reindex",
+            "schedule": crontab(minute=45),
+        }
+    return schedule
+
+
+celery_app = Celery(
+    "welding_system",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+    include=["app.tasks.celery_tasks"],
+)
+
+celery_app.conf.update(
+    task_serializer=settings.CELERY_TASK_SERIALIZER,
+    accept_content=settings.CELERY_ACCEPT_CONTENT,
+    result_serializer=settings.CELERY_TASK_SERIALIZER,
+    result_expires=24 * 3600,
+    timezone=settings.CELERY_TIMEZONE,
+    enable_utc=True,
+    task_default_queue="default",
+    task_routes={"exports.*": {"queue": EXPORT_QUEUE}},
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=settings.CELERY_WORKER_PREFETCH_MULTIPLIER,
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+    beat_schedule=_beat_schedule(),
+)
+
+
+# ---------------------------------------------------------------------------
+# 任务指标
+# ---------------------------------------------------------------------------
+
+# task_id -> 开始时间
+_started: Dict[str, float] = {}
+
+
+@signals.task_prerun.connect
+def _on_task_prerun(task_id=None, task=None, **kwargs) -> None:
+    _started[task_id] = time.perf_counter()
+
+
+@signals.task_postrun.connect
+def _on_task_postrun(task_id=None, task=None, retval=None, state=None, **kwargs) -> None:
+    started = _started.pop(task_id, None)
+    if started is None or task is None:
+        return
+    duration_ms = (time.perf_counter() - started) * 1000
+    # 任务函数捕获异常后返回 {"success": False, ...}，同样计为失败
+    success = state == "SUCCESS" and not (isinstance(retval, dict) and retval.get("success") is False)
+    record_task(task.name, duration_ms, success)
+    logger.info(f"[后台任务] {task.name} {'完成' if success else '失败'}，耗时 {duration_ms:.0f}ms")
+
+
+@signals.worker_process_init.connect
+def _on_worker_process_init(**kwargs) -> None:
+    """prefork 子进程不复用父进程的数据库连接"""
+    from app.core.database import engine
+
+    engine.dispose(close=False)
@@ -29,11 +29,80 @@ class Settings(BaseSettings):
     DATABASE_USER: str = "weld_user"
     DATABASE_PASSWORD: str = "weld_password"
 
+    # 连接池配置（同步、异步引擎各自按此配置建池）
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    DATABASE_POOL_TIMEOUT: int = 30  # 获取连接的最长等待（秒）
+    DATABASE_POOL_RECYCLE: int = 1800  # 连接最长存活时间（秒），-1 表示不回收
+    DATABASE_POOL_PRE_PING: bool = True  # 每次取出连接前 ping；已设置 recycle 时可关闭以省去一次往返
+    DATABASE_QUERY_CACHE_SIZE: int = 500  # SQLAlchemy 编译语句缓存条目数
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100  # asyncpg 预备语句缓存；经 pgbouncer 事务模式连接时设为0
+    DATABASE_SLOW_CHECKOUT_MS: int = 200  # 获取连接等待超过该值（毫秒）时记录警告
+
+    # 只读副本（为空时所有查询走主库）
+    # 设置后，通过 get_read_db / get_async_read_db 获取的会话在未发生写入前，
+    # SELECT 语句路由到副本
+    DATABASE_REPLICA_URL: Optional[str] = None
+
     # Redis配置
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
+    REDIS_SOCKET_TIMEOUT: float = 1.0  # Redis读写超时（秒），缓存操作超时后按未命中处理
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 1.0  # Redis连接超时（秒）
+    REDIS_RETRY_INTERVAL: float = 5  # 缓存访问Redis失败后暂停访问的时间（秒），期间直接降级
+
+    # 缓存配置
+    DATA_ACCESS_CACHE_TTL: int = 300  # 企业访问主体缓存（秒）
+    DASHBOARD_STATS_CACHE_TTL: int = 60  # 工作区模块统计缓存（秒）
+    WORKSPACE_LIST_CACHE_TTL: int = 300  # 用户工作区列表（含配额快照）缓存（秒）
+    PERMISSION_CACHE_TTL: int = 300  # 已解析权限集合的Redis缓存（秒）
+    PERMISSION_LOCAL_CACHE_TTL: float = 5  # 进程内权限缓存（秒），其他进程中的权限变更最迟在此时间后生效
+    PERMISSION_LOCAL_CACHE_SIZE: int = 10000  # 进程内权限缓存条目数上限
+    PRINCIPAL_CACHE_TTL: int = 30  # 当前用户快照的Redis缓存（秒）
+    PRINCIPAL_LOCAL_CACHE_TTL: float = 3  # 进程内当前用户快照缓存（秒），其他进程中的用户变更最迟在此时间后生效
+    PRINCIPAL_LOCAL_CACHE_SIZE: int = 10000  # 进程内当前用户快照条目数上限
+
+    # 文档检索配置
+    # 启用后写入路径同步维护 document_search_index，列表关键词过滤改走检索索引
+    # （需先执行 migrations/create_document_search_index.sql 并运行一次全量重建）
+    SEARCH_INDEX_ENABLED: bool = False
+
+    # 工作区计数配置
+    # 启用后写入路径在同一事务中维护 workspace_counters，仪表盘统计直接读取计数表
+    # （需先执行 migrations/create_workspace_counters.sql 并运行一次计数重建）
+    WORKSPACE_COUNTERS_ENABLED: bool = False
+
+    # 文档渲染配置（Word/PDF导出在独立进程池中渲染）
+    RENDER_POOL_WORKERS: int = 2  # 渲染进程数（同时渲染的任务数）
+    RENDER_MAX_QUEUE: int = 20  # 等待渲染的最大任务数，超出时返回503
+    RENDER_TIMEOUT_SECONDS: int = 60  # 单个导出请求（含排队）的超时时间
+    RENDER_WARM_UP_ON_STARTUP: bool = True  # 应用启动时拉起渲染进程并预热样式/字体
+    RENDER_CACHE_DIR: str = "./storage/render_cache"  # 渲染结果缓存目录
+    RENDER_CACHE_MAX_MB: int = 512  # 渲染结果缓存大小上限，超出时按LRU淘汰
+    EXPORT_SPOOL_MAX_MB: int = 16  # 导出输出在内存中缓冲的上限，超出后转存磁盘临时文件
+
+    # 导出图片处理配置（Word导出时图片降采样并缓存）
+    EXPORT_IMAGE_CACHE_DIR: str = "./storage/image_cache"  # 处理后图片的缓存目录
+    EXPORT_IMAGE_CACHE_MAX_MB: int = 256  # 图片缓存大小上限，超出时按LRU淘汰
+    EXPORT_IMAGE_DPI: int = 200  # 嵌入图片的目标打印分辨率
+    EXPORT_IMAGE_JPEG_QUALITY: int = 85  # 重新编码为JPEG时的质量
+    EXPORT_IMAGE_FETCH_CONCURRENCY: int = 8  # 并发下载网络图片数
+    EXPORT_IMAGE_FETCH_TIMEOUT: int = 10  # 单张网络图片下载超时（秒）
+    EXPORT_IMAGE_MAX_SOURCE_MB: int = 20  # 单张网络图片大小上限
+    EXPORT_IMAGE_REMOTE_TTL_SECONDS: int = 86400  # 网络图片缓存刷新周期
+
+    # 批量导出任务配置
+    EXPORT_JOB_DIR: str = "./storage/exports"  # 导出ZIP文件目录
+    EXPORT_JOB_MAX_DOCUMENTS: int = 500  # 单个任务最多导出的文档数
+    EXPORT_JOB_RETENTION_HOURS: int = 24  # 任务及ZIP文件保留时间
+    EXPORT_JOB_STALE_SECONDS: int = 3600  # 超过该时间仍未结束的任务视为中断
+    EXPORT_JOB_RENDER_CONCURRENCY: int = 1  # 单个任务同时渲染的文档数（不超过渲染进程数-1，为交互式导出保留进程）
+    EXPORT_JOBS_USE_WORKER: bool = False  # 交给 Celery exports 队列执行（默认在API进程后台执行）
+
+    # 定时通知任务配置
+    NOTIFICATION_BATCH_SIZE: int = 500  # 每批读取并提交的用户/订阅数
 
     # JWT配置
     SECRET_KEY: str = "dev-secret-key-for-testing-purposes-change-in-production"
@@ -68,7 +137,7 @@ class Settings(BaseSettings):
     ]
 
     # 邮件配置
-    EMAIL_PROVIDER: str = "smtp"  # smtp, sendgrid, aliyun
+    EMAIL_PROVIDER: str = "smtp"  # smtp, sendgrid, aliyun, local
     SMTP_TLS_PORT: int = 587
     SMTP_SERVER: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
@@ -77,6 +146,16 @@ class Settings(BaseSettings):
     EMAILS_FROM_EMAIL: str = "noreply@yourdomain.com"
     EMAILS_FROM_NAME: str = "焊接工艺管理系统"
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 4
+    SMTP_POOL_SIZE: int = 2  # 复用的SMTP连接数
+    SMTP_POOL_MAX_IDLE_SECONDS: int = 60  # 空闲超过该时间的连接复用前先 NOOP 检查
+    SMTP_POOL_MAX_MESSAGES: int = 100  # 单个连接发送该数量邮件后重建
+    SMTP_TIMEOUT: int = 10  # SMTP连接/读写超时（秒）
+
+    # 邮件/短信投递队列（EMAIL_PROVIDER / SMS_PROVIDER 设为 local 时只记录不发送，用于测试）
+    DELIVERY_WORKERS: int = 2  # 后台投递线程数，0 表示在调用方同步发送（仅用于测试）
+    DELIVERY_MAX_ATTEMPTS: int = 4  # 单条消息最多尝试次数
+    DELIVERY_RETRY_BACKOFF_SECONDS: float = 2.0  # 首次重试等待时间，之后按2倍递增
+    DELIVERY_RETRY_MAX_BACKOFF_SECONDS: float = 60.0  # 重试等待上限
 
     # SendGrid配置（可选）
     SENDGRID_API_KEY: Optional[str] = None
@@ -87,7 +166,7 @@ class Settings(BaseSettings):
     ALIYUN_REGION_ID: str = "cn-hangzhou"
 
     # 短信配置
-    SMS_PROVIDER: str = "aliyun"  # aliyun, tencent, yunpian
+    SMS_PROVIDER: str = "aliyun"  # aliyun, tencent, yunpian, local
 
     # 阿里云短信配置
     ALIYUN_SMS_SIGN_NAME: str = "焊接工艺管理系统"
@@ -111,6 +190,9 @@ class Settings(BaseSettings):
     CELERY_TASK_SERIALIZER: str = "json"
     CELERY_ACCEPT_CONTENT: List[str] = ["json"]
     CELERY_TIMEZONE: str = "Asia/Shanghai"
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # 任务在调用方同步执行（测试 / 无 broker 环境）
+    CELERY_WORKER_PREFETCH_MULTIPLIER: int = 1  # 每个工作进程预取的任务数（长任务保持为1）
+    TASK_METRICS_WINDOW_MINUTES: int = 60  # 任务吞吐量统计窗口（分钟）
 
     # API配置
     API_V1_STR: str = "/api/v1"
@@ -2,12 +2,14 @@
 数据访问权限中间件
 Data Access Middleware for workspace isolation and permission control
 """
-from typing import Optional, Type, TypeVar, List, Any
+from typing import Optional, Type, TypeVar, List, Any, Dict, Set
 from sqlalchemy.orm import Session, Query
 from sqlalchemy.orm.attributes import InstrumentedAttribute
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, event, inspect
 from fastapi import HTTPException, status
 
+from app.core.cache import bump_version, cache_get_json, cache_set_json, get_version, make_key
+from app.core.config import settings
 from app.models.user import User
 from app.models.company import Company, CompanyEmployee, CompanyRole, Factory
 
@@ -67,11 +69,150 @@ class WorkspaceContext:
             raise ValueError("企业工作区必须指定company_id")
 
 
+class AccessPrincipal:
+    """
+    已解析的企业访问主体
+
+    汇总用户在某个企业中的访问信息（所有者标记、员工记录、角色权限、
+    有效数据访问范围、工厂），一次解析后供同一请求内的所有过滤和逐行
+    权限检查复用，避免重复查询 Company / CompanyEmployee / CompanyRole。
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        company_id: int,
+        is_owner: bool = False,
+        is_member: bool = False,
+        employee_id: Optional[int] = None,
+        employee_role: Optional[str] = None,
+        company_role_id: Optional[int] = None,
+        role_found: bool = False,
+        role_permissions: Optional[Dict[str, Any]] = None,
+        role_data_access_scope: Optional[str] = None,
+        employee_data_access_scope: Optional[str] = None,
+        factory_id: Optional[int] = None
+    ):
+        self.user_id = user_id
+        self.company_id = company_id
+        self.is_owner = is_owner
+        self.is_member = is_member
+        self.employee_id = employee_id
+        self.employee_role = employee_role
+        self.company_role_id = company_role_id
+        self.role_found = role_found
+        self.role_permissions = role_permissions or {}
+        self.role_data_access_scope = role_data_access_scope
+        self.employee_data_access_scope = employee_data_access_scope
+        self.factory_id = factory_id
+
+    @property
+    def is_admin(self) -> bool:
+        """是否为企业管理员"""
+        return self.employee_role == "admin"
+
+    @property
+    def data_access_scope(self) -> str:
+        """有效数据访问范围（角色优先，其次员工设置，默认factory）"""
+        if self.company_role_id:
+            if self.role_found:
+                return self.role_data_access_scope or self.employee_data_access_scope or "factory"
+            return "factory"
+        return self.employee_data_access_scope or "factory"
+
+    @property
+    def can_cross_factory(self) -> bool:
+        """是否允许跨工厂访问（员工或角色任一为company级别）"""
+        if self.employee_data_access_scope == "company":
+            return True
+        return bool(self.company_role_id and self.role_found and self.role_data_access_scope == "company")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为字典（用于Redis缓存）"""
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AccessPrincipal":
+        """从字典恢复"""
+        return cls(**data)
+
+
 class DataAccessMiddleware:
     """统一的数据访问权限检查中间件"""
     
+    # Session.info 中请求级主体缓存的键
+    SESSION_CACHE_KEY = "data_access_principals"
+
     def __init__(self, db: Session):
         self.db = db
+
+    def resolve_principal(self, user_id: int, company_id: int) -> AccessPrincipal:
+        """
+        解析用户在企业中的访问主体
+
+        查找顺序：请求级缓存（绑定在数据库会话上）→ Redis 跨请求缓存 → 数据库。
+        Redis 缓存键包含企业版本号，员工、角色或企业变更提交后版本号递增，
+        旧缓存即自动失效。
+
+        Args:
+            user_id: 用户ID
+            company_id: 企业ID
+
+        Returns:
+            AccessPrincipal: 访问主体
+        """
+        request_cache = self.db.info.setdefault(self.SESSION_CACHE_KEY, {})
+        cache_key = (user_id, company_id)
+        principal = request_cache.get(cache_key)
+        if principal is not None:
+            return principal
+
+        version = get_version("company_access", company_id)
+        redis_key = make_key("principal", company_id, version, user_id)
+        cached = cache_get_json(redis_key)
+        if cached is not None:
+            principal = AccessPrincipal.from_dict(cached)
+        else:
+            principal = self._load_principal(user_id, company_id)
+            cache_set_json(redis_key, principal.to_dict(), settings.DATA_ACCESS_CACHE_TTL)
+
+        request_cache[cache_key] = principal
+        return principal
+
+    def _load_principal(self, user_id: int, company_id: int) -> AccessPrincipal:
+        """从数据库加载访问主体"""
+        principal = AccessPrincipal(user_id=user_id, company_id=company_id)
+
+        company = self.db.query(Company).filter(Company.id == company_id).first()
+        if company and company.owner_id == user_id:
+            principal.is_owner = True
+
+        employee = self.db.query(CompanyEmployee).filter(
+            CompanyEmployee.user_id == user_id,
+            CompanyEmployee.company_id == company_id,
+            CompanyEmployee.status == "active"
+        ).first()
+        if not employee:
+            return principal
+
+        principal.is_member = True
+        principal.employee_id = employee.id
+        principal.employee_role = employee.role
+        principal.company_role_id = employee.company_role_id
+        principal.employee_data_access_scope = employee.data_access_scope
+        principal.factory_id = employee.factory_id
+
+        if employee.company_role_id:
+            role = self.db.query(CompanyRole).filter(
+                CompanyRole.id == employee.company_role_id,
+                CompanyRole.is_active == True
+            ).first()
+            if role:
+                principal.role_found = True
+                principal.role_permissions = role.permissions or {}
+                principal.role_data_access_scope = role.data_access_scope
+
+        return principal
     
     def check_access(
         self,
@@ -131,25 +272,15 @@ class DataAccessMiddleware:
         action: str
     ) -> bool:
         """检查企业工作区数据访问权限"""
-        from app.models.company import Company
+        principal = self.resolve_principal(user.id, resource.company_id)
 
         # 1. 首先检查用户是否是企业所有者（拥有所有权限）
-        company = self.db.query(Company).filter(
-            Company.id == resource.company_id
-        ).first()
-
-        if company and company.owner_id == user.id:
+        if principal.is_owner:
             # 企业所有者拥有所有权限
             return True
 
         # 2. 检查用户是否是企业员工
-        employee = self.db.query(CompanyEmployee).filter(
-            CompanyEmployee.user_id == user.id,
-            CompanyEmployee.company_id == resource.company_id,
-            CompanyEmployee.status == "active"
-        ).first()
-
-        if not employee:
+        if not principal.is_member:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="权限不足：您不是该企业的成员"
@@ -167,7 +298,7 @@ class DataAccessMiddleware:
 
         elif resource.access_level == AccessLevel.FACTORY:
             # 工厂级别：同工厂成员可访问
-            if not self._check_factory_access(employee, resource, action):
+            if not self._check_factory_access(principal, resource, action):
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="权限不足：您无权访问此工厂的数据"
@@ -177,72 +308,56 @@ class DataAccessMiddleware:
         elif resource.access_level == AccessLevel.COMPANY:
             # 公司级别：全公司成员可访问
             # 已经验证是公司成员，检查角色权限
-            return self._check_role_permission(employee, resource, action)
+            return self._check_role_permission(principal, resource, action)
 
         elif resource.access_level == AccessLevel.PUBLIC:
             # 公开数据：所有企业成员可查看
             if action == DataAccessAction.VIEW:
                 return True
             # 其他操作需要检查权限
-            return self._check_role_permission(employee, resource, action)
+            return self._check_role_permission(principal, resource, action)
 
         return False
     
     def _check_factory_access(
         self,
-        employee: CompanyEmployee,
+        principal: AccessPrincipal,
         resource: Any,
         action: str
     ) -> bool:
         """检查工厂级别访问权限"""
         # 如果资源没有指定工厂，则按公司级别处理
         if not resource.factory_id:
-            return self._check_role_permission(employee, resource, action)
+            return self._check_role_permission(principal, resource, action)
 
         # 如果员工在同一工厂，直接检查角色权限
-        if employee.factory_id == resource.factory_id:
-            return self._check_role_permission(employee, resource, action)
-
-        # 不同工厂，检查员工的数据访问范围
-        # 如果员工的data_access_scope是"company"，则可以访问所有工厂的数据
-        if employee.data_access_scope == "company":
-            return self._check_role_permission(employee, resource, action)
-
-        # 如果员工有角色，检查角色的data_access_scope
-        if employee.company_role_id:
-            role = self.db.query(CompanyRole).filter(
-                CompanyRole.id == employee.company_role_id,
-                CompanyRole.is_active == True
-            ).first()
+        if principal.factory_id == resource.factory_id:
+            return self._check_role_permission(principal, resource, action)
 
-            if role and role.data_access_scope == "company":
-                return self._check_role_permission(employee, resource, action)
+        # 不同工厂，检查员工或其角色的数据访问范围
+        # 任一为"company"即可访问所有工厂的数据
+        if principal.can_cross_factory:
+            return self._check_role_permission(principal, resource, action)
 
         # 否则不允许跨工厂访问
         return False
     
     def _check_role_permission(
         self,
-        employee: CompanyEmployee,
+        principal: AccessPrincipal,
         resource: Any,
         action: str
     ) -> bool:
         """检查角色权限"""
         # 企业管理员（role="admin"）拥有所有权限
-        if employee.role == "admin":
+        if principal.is_admin:
             return True
 
         # 如果没有角色，使用默认权限
-        if not employee.company_role_id:
-            return self._check_default_permission(employee, resource, action)
+        if not principal.company_role_id:
+            return self._check_default_permission(principal, resource, action)
 
-        # 获取角色
-        role = self.db.query(CompanyRole).filter(
-            CompanyRole.id == employee.company_role_id,
-            CompanyRole.is_active == True
-        ).first()
-
-        if not role:
+        if not principal.role_found:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="权限不足：您的角色不存在或已被禁用"
@@ -250,7 +365,7 @@ class DataAccessMiddleware:
 
         # 检查模块权限
         resource_type = type(resource).__name__.lower()
-        permissions = role.permissions or {}
+        permissions = principal.role_permissions
 
         # 映射资源类型到权限模块名称（带_management后缀）
         resource_to_module = {
@@ -300,13 +415,13 @@ class DataAccessMiddleware:
     
     def _check_default_permission(
         self,
-        employee: CompanyEmployee,
+        principal: AccessPrincipal,
         resource: Any,
         action: str
     ) -> bool:
         """检查默认权限（无角色时）"""
         # 企业管理员（role="admin"）拥有所有权限
-        if employee.role == "admin":
+        if principal.is_admin:
             return True
 
         # 默认权限：可以查看和创建，但不能编辑和删除他人数据
@@ -318,7 +433,7 @@ class DataAccessMiddleware:
 
         # 编辑和删除需要是创建者
         if action in [DataAccessAction.EDIT, DataAccessAction.DELETE]:
-            return resource.user_id == employee.user_id
+            return resource.user_id == principal.user_id
 
         return False
     
@@ -391,16 +506,11 @@ class DataAccessMiddleware:
 
         # 企业工作区：查询企业内可访问的数据
         elif workspace_context.is_enterprise():
-            from app.models.company import Company, CompanyRole
-
             print(f"[数据隔离] 应用企业工作区过滤")
 
-            # 检查用户是否是企业所有者
-            company = self.db.query(Company).filter(
-                Company.id == workspace_context.company_id
-            ).first()
+            principal = self.resolve_principal(user.id, workspace_context.company_id)
 
-            if company and company.owner_id == user.id:
+            if principal.is_owner:
                 # 企业所有者可以查看所有企业数据
                 print(f"[数据隔离] 用户是企业所有者,可查看所有企业数据: company_id={workspace_context.company_id}")
                 conditions = []
@@ -412,23 +522,16 @@ class DataAccessMiddleware:
                     query = query.filter(and_(*conditions))
                 return query
 
-            # 获取员工信息
-            employee = self.db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == user.id,
-                CompanyEmployee.company_id == workspace_context.company_id,
-                CompanyEmployee.status == "active"
-            ).first()
-
-            if not employee:
+            if not principal.is_member:
                 # 不是企业成员，返回空结果
                 print(f"[数据隔离] 用户不是企业成员,返回空结果")
                 query = query.filter(model.id == -1)
                 return query
 
-            print(f"[数据隔离] 员工信息: role={employee.role}, data_access_scope={employee.data_access_scope}, factory_id={employee.factory_id}")
+            print(f"[数据隔离] 员工信息: role={principal.employee_role}, data_access_scope={principal.employee_data_access_scope}, factory_id={principal.factory_id}")
 
             # 企业管理员可以查看所有企业数据
-            if employee.role == "admin":
+            if principal.is_admin:
                 print(f"[数据隔离] 用户是企业管理员,可查看所有企业数据")
                 conditions = []
                 if has_ws_col:
@@ -447,17 +550,7 @@ class DataAccessMiddleware:
                 conditions.append(model.company_id == workspace_context.company_id)
 
             # 根据data_access_scope决定访问范围
-            data_access_scope = "factory"  # 默认工厂级别
-
-            if employee.company_role_id:
-                role = self.db.query(CompanyRole).filter(
-                    CompanyRole.id == employee.company_role_id,
-                    CompanyRole.is_active == True
-                ).first()
-                if role:
-                    data_access_scope = role.data_access_scope or employee.data_access_scope or "factory"
-            else:
-                data_access_scope = employee.data_access_scope or "factory"
+            data_access_scope = principal.data_access_scope
 
             print(f"[数据隔离] 最终data_access_scope: {data_access_scope}")
 
@@ -469,9 +562,9 @@ class DataAccessMiddleware:
                 return query
 
             # 如果是factory级别，只能查看所在工厂的数据
-            if employee.factory_id and has_factory_col:
-                print(f"[数据隔离] factory级别,只能查看工厂{employee.factory_id}的数据")
-                conditions.append(model.factory_id == employee.factory_id)
+            if principal.factory_id and has_factory_col:
+                print(f"[数据隔离] factory级别,只能查看工厂{principal.factory_id}的数据")
+                conditions.append(model.factory_id == principal.factory_id)
             else:
                 print(f"[数据隔离] factory级别但没有factory_id或模型不含factory_id列,可查看所有企业数据")
 
@@ -480,3 +573,48 @@ class DataAccessMiddleware:
 
         return query
 
+
+
+# ---------------------------------------------------------------------------
+# 访问主体缓存失效
+# ---------------------------------------------------------------------------
+# 会话 info 中待失效企业ID集合的键
+_PENDING_INVALIDATION_KEY = "data_access_pending_companies"
+
+
+def _collect_affected_companies(session: Session) -> Set[int]:
+    """收集本次flush中涉及访问控制的企业ID"""
+    company_ids: Set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Company) and obj.id is not None:
+            # 企业只有所有者变更会影响访问主体（配额计数等更新无需失效）
+            if obj in session.dirty and not inspect(obj).attrs.owner_id.history.has_changes():
+                continue
+            company_ids.add(obj.id)
+        elif isinstance(obj, (CompanyEmployee, CompanyRole)) and obj.company_id is not None:
+            company_ids.add(obj.company_id)
+    return company_ids
+
+
+@event.listens_for(Session, "before_flush")
+def _track_access_changes(session: Session, flush_context, instances) -> None:
+    """flush前记录员工、角色、企业的变更，并清空请求级主体缓存"""
+    company_ids = _collect_affected_companies(session)
+    if not company_ids:
+        return
+    session.info.setdefault(_PENDING_INVALIDATION_KEY, set()).update(company_ids)
+    session.info.pop(DataAccessMiddleware.SESSION_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_access_cache(session: Session) -> None:
+    """事务提交后递增企业访问版本号，使Redis中的主体缓存失效"""
+    for company_id in session.info.pop(_PENDING_INVALIDATION_KEY, set()):
+        bump_version("company_access", company_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_access_changes(session: Session) -> None:
+    """事务回滚后丢弃待失效记录"""
+    session.info.pop(_PENDING_INVALIDATION_KEY, None)
+    session.info.pop(DataAccessMiddleware.SESSION_CACHE_KEY, None)
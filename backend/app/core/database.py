@@ -3,30 +3,103 @@ Database configuration and session management for the welding system backend.
 """
 from typing import AsyncGenerator
 
-from sqlalchemy import create_engine, MetaData
+from sqlalchemy import create_engine, event, MetaData
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import settings
+from app.core.db_pool import TimedAsyncQueuePool, TimedQueuePool, pool_options, pool_stats
+
+
+def _async_url(url: str) -> str:
+    """同步连接URL转换为 asyncpg 连接URL"""
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+def _create_sync_engine(url: str, name: str):
+    """创建带连接池指标的同步引擎"""
+    return create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        echo=settings.DEBUG,
+        **pool_options(name)
+    )
+
+
+def _create_async_engine(url: str, name: str):
+    """创建带连接池指标的异步引擎"""
+    return create_async_engine(
+        _async_url(url),
+        poolclass=TimedAsyncQueuePool,
+        echo=settings.DEBUG,
+        connect_args={
+            # asyncpg 自身的语句缓存与 SQLAlchemy 适配层的预备语句缓存
+            "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        },
+        **pool_options(name)
+    )
+
 
 # 使用PostgreSQL数据库
 database_url = str(settings.DATABASE_URL)
 
 # PostgreSQL配置
-engine = create_engine(
-    database_url,
-    pool_pre_ping=True,
-    echo=settings.DEBUG,
-)
-async_engine = create_async_engine(
-    database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    pool_pre_ping=True,
-    echo=settings.DEBUG,
-)
+engine = _create_sync_engine(database_url, "primary")
+async_engine = _create_async_engine(database_url, "primary_async")
+
+# 只读副本（未配置时为None）
+replica_engine = None
+async_replica_engine = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = _create_sync_engine(settings.DATABASE_REPLICA_URL, "replica")
+    async_replica_engine = _create_async_engine(settings.DATABASE_REPLICA_URL, "replica_async")
+
+# 主库引擎 -> 副本引擎（异步引擎以其 sync_engine 参与会话路由）
+_REPLICA_BINDS = {}
+if replica_engine is not None:
+    _REPLICA_BINDS[engine] = replica_engine
+    _REPLICA_BINDS[async_engine.sync_engine] = async_replica_engine.sync_engine
+
+# 会话 info 中的读写分离标记
+REPLICA_READS_KEY = "replica_reads"
+_HAS_WRITES_KEY = "has_writes"
+
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+
+    会话 info 中设置了 REPLICA_READS_KEY 时，只要本会话尚未发生写入，
+    普通 SELECT（不含 FOR UPDATE）就路由到只读副本；一旦 flush 过，
+    后续查询都回到主库，保证读到自己的写入。
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        bind = super().get_bind(mapper, clause=clause, **kw)
+        replica = _REPLICA_BINDS.get(bind)
+        if (
+            replica is not None
+            and self.info.get(REPLICA_READS_KEY)
+            and not self.info.get(_HAS_WRITES_KEY)
+            and not self._flushing
+            and getattr(clause, "is_select", False)
+            and getattr(clause, "_for_update_arg", None) is None
+        ):
+            return replica
+        return bind
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _mark_session_writes(session, flush_context, instances) -> None:
+    """会话发生写入后不再使用副本"""
+    session.info[_HAS_WRITES_KEY] = True
+
 
 # 会话工厂
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False,
     autoflush=False,
     bind=engine
@@ -36,6 +109,7 @@ SessionLocal = sessionmaker(
 AsyncSessionLocal = sessionmaker(
     async_engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False
 )
 
@@ -94,15 +168,30 @@ async def init_db():
 async def close_db():
     """关闭数据库连接."""
     await async_engine.dispose()
+    if async_replica_engine is not None:
+        await async_replica_engine.dispose()
+    await async_redis_client.aclose()
 
 
-# Redis连接
+# Redis连接（设置超时：Redis缓慢或不可达时调用方按未命中降级，而不是无限期等待）
 import redis
+import redis.asyncio
 
 redis_client = redis.from_url(
     settings.REDIS_URL,
     encoding="utf-8",
-    decode_responses=True
+    decode_responses=True,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT
+)
+
+# 异步客户端：供事件循环中的缓存读取使用，不阻塞事件循环
+async_redis_client = redis.asyncio.from_url(
+    settings.REDIS_URL,
+    encoding="utf-8",
+    decode_responses=True,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT
 )
 
 
@@ -179,6 +268,22 @@ class DatabaseManager:
 
         return health_status
 
+    def pool_stats(self) -> dict:
+        """
+        各连接池的占用情况和获取连接指标.
+
+        Returns:
+            连接池名称 -> 指标
+        """
+        stats = {
+            "primary": pool_stats(self.engine),
+            "primary_async": pool_stats(self.async_engine.sync_engine),
+        }
+        if replica_engine is not None:
+            stats["replica"] = pool_stats(replica_engine)
+            stats["replica_async"] = pool_stats(async_replica_engine.sync_engine)
+        return stats
+
     async def execute_raw_sql(self, sql: str, params: dict = None):
         """
         执行原始SQL查询.
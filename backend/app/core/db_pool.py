@@ -0,0 +1,124 @@
+"""
+数据库连接池
+Connection pool classes with checkout wait-time metrics and slow-checkout logging.
+
+TimedQueuePool / TimedAsyncQueuePool 在从池中获取连接时计时：
+记录获取次数、累计/最大等待时间、超时次数，等待超过
+settings.DATABASE_SLOW_CHECKOUT_MS 时输出带池状态的警告日志。
+指标按池的 logging_name（primary / replica / async …）分别统计。
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """单个连接池的获取连接指标"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.slow_checkouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def record(self, wait_ms: float, timed_out: bool = False) -> None:
+        """记录一次获取连接"""
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            if wait_ms >= settings.DATABASE_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """当前指标快照"""
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+            }
+
+
+# 池名称 -> 指标（池被 dispose/recreate 后沿用同一名称的指标）
+_pool_metrics: Dict[str, PoolMetrics] = {}
+_registry_lock = threading.Lock()
+
+
+def get_pool_metrics(name: str) -> PoolMetrics:
+    """获取（必要时创建）指定名称连接池的指标"""
+    with _registry_lock:
+        if name not in _pool_metrics:
+            _pool_metrics[name] = PoolMetrics()
+        return _pool_metrics[name]
+
+
+class _TimedPoolMixin:
+    """为 QueuePool 的获取连接过程计时"""
+
+    def _do_get(self):
+        name = self._orig_logging_name or "default"
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            wait_ms = (time.perf_counter() - started) * 1000
+            get_pool_metrics(name).record(wait_ms, timed_out=True)
+            logger.error(f"[连接池:{name}] 获取连接超时 {wait_ms:.0f}ms, {self.status()}")
+            raise
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        get_pool_metrics(name).record(wait_ms)
+        if wait_ms >= settings.DATABASE_SLOW_CHECKOUT_MS:
+            logger.warning(f"[连接池:{name}] 获取连接耗时 {wait_ms:.0f}ms, {self.status()}")
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """带获取连接计时的同步连接池"""
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """带获取连接计时的异步连接池"""
+
+
+def pool_options(logging_name: str) -> Dict[str, Any]:
+    """根据配置生成 create_engine / create_async_engine 的连接池参数"""
+    return {
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+        "pool_logging_name": logging_name,
+        "query_cache_size": settings.DATABASE_QUERY_CACHE_SIZE,
+    }
+
+
+def pool_stats(engine) -> Dict[str, Any]:
+    """连接池当前占用情况和获取连接指标"""
+    pool = engine.pool
+    name = pool._orig_logging_name or "default"
+    return {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        **get_pool_metrics(name).snapshot(),
+    }
@@ -0,0 +1,70 @@
+"""
+磁盘缓存目录的大小跟踪与LRU淘汰
+Size tracking and LRU eviction for on-disk cache directories.
+
+渲染结果缓存和导出图片缓存共用：
+
+- 首次写入时扫描目录统计总大小，之后按写入大小累加
+- 总大小超过上限时按最近访问时间（mtime）从旧到新删除文件，直到降到
+  上限的90%；调用方命中时刷新 mtime，即按 LRU 淘汰
+- 写入中的临时文件（.tmp）不计入、不淘汰
+- 多进程可共用同一目录，淘汰时以实际扫描结果为准
+"""
+import os
+import threading
+from typing import List, Optional, Tuple
+
+
+class DiskLRU:
+    """缓存目录的大小跟踪与LRU淘汰"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size: Optional[int] = None
+        self._lock = threading.Lock()
+
+        # 指标
+        self.evictions = 0
+
+    def added(self, size: int) -> None:
+        """记录新写入的文件大小，超出上限时淘汰旧文件"""
+        with self._lock:
+            if self.size is None:
+                self.size = sum(entry_size for _, entry_size, _ in self._scan())
+            else:
+                self.size += size
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """列出缓存文件 (mtime, size, path)，包括子目录"""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict(self) -> None:
+        """按访问时间从旧到新删除文件，直到总大小降到上限的90%"""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                # 已被其他进程删除，或（Windows）文件仍被打开
+                continue
+        self.size = total
@@ -0,0 +1,30 @@
+"""
+HTTP 条件请求辅助函数
+ETag helpers for conditional GET (If-None-Match / 304 Not Modified).
+
+响应内容不变时客户端带上次的 ETag 重新验证，服务端返回 304 而不再传输响应体。
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+
+def make_etag(payload: Any) -> str:
+    """按响应内容计算强 ETag（内容相同则 ETag 相同，与生成它的进程无关）"""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match 请求头是否匹配当前 ETag
+
+    支持逗号分隔的多个值、"*" 以及弱校验前缀 W/（GET 的 If-None-Match 使用弱比较）。
+    """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    return any((value[2:] if value.startswith("W/") else value) == current for value in candidates)
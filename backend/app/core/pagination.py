@@ -0,0 +1,152 @@
+"""
+分页工具
+Keyset (cursor) pagination and total-count helpers for list APIs.
+
+游标模式按 (created_at DESC NULLS FIRST, id DESC) 排序，并用
+``(created_at, id) < (游标created_at, 游标id)`` 定位下一页，
+查询代价与页深无关；配合 (…, created_at, id) 复合索引使用。
+
+created_at 可为空：空值记录排在最前（与 PostgreSQL 索引倒序扫描的顺序一致），
+游标落在空值记录中时按 id 继续，之后进入非空记录。
+"""
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+logger = logging.getLogger(__name__)
+
+
+class TotalMode:
+    """总数统计模式常量"""
+    EXACT = "exact"          # 精确 COUNT(*)
+    ESTIMATED = "estimated"  # 基于查询计划的估算值（常数时间）
+
+    ALL = (EXACT, ESTIMATED)
+
+
+def encode_cursor(created_at: Optional[datetime], record_id: int) -> str:
+    """
+    编码不透明游标
+
+    Args:
+        created_at: 当前页最后一条记录的创建时间（可为空）
+        record_id: 当前页最后一条记录的ID
+
+    Returns:
+        str: URL安全的游标字符串
+    """
+    payload = json.dumps(
+        {"c": created_at.isoformat() if created_at is not None else None, "i": record_id},
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """
+    解码游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] is not None else None
+        return created_at, int(payload["i"])
+    except (ValueError, KeyError, TypeError, UnicodeError) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def apply_keyset(query: Query, model: Any, cursor: Optional[str] = None) -> Query:
+    """
+    对查询应用游标定位和 (created_at DESC NULLS FIRST, id DESC) 排序
+
+    Args:
+        query: SQLAlchemy查询对象（不应已包含 ORDER BY）
+        model: 数据模型类（需有 created_at 和 id 列）
+        cursor: 上一页返回的游标（首页为None）
+
+    Returns:
+        Query: 应用游标后的查询对象
+    """
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        if created_at is None:
+            # 游标落在排在最前的空值记录中：余下的空值记录及全部非空记录
+            query = query.filter(or_(
+                and_(model.created_at.is_(None), model.id < record_id),
+                model.created_at.isnot(None)
+            ))
+        else:
+            # 空值记录已在前面的页中，比较结果为NULL而被排除
+            query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, record_id))
+    return query.order_by(model.created_at.desc().nulls_first(), model.id.desc())
+
+
+def next_cursor_for(items: List[Any], limit: int) -> Optional[str]:
+    """
+    根据当前页结果生成下一页游标
+
+    当前页不满 limit 条时说明已到末页，返回None。
+    """
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+
+def count_query(db: Session, query: Query, total_mode: str = TotalMode.EXACT) -> int:
+    """
+    统计查询总数
+
+    Args:
+        db: 数据库会话
+        query: 已应用过滤条件的查询对象
+        total_mode: exact（精确计数）或 estimated（查询计划估算）
+
+    Returns:
+        int: 总数（估算模式失败时回退为精确计数）
+    """
+    if total_mode == TotalMode.ESTIMATED:
+        estimate = estimate_count(db, query)
+        if estimate is not None:
+            return estimate
+    return query.order_by(None).count()
+
+
+def estimate_count(db: Session, query: Query) -> Optional[int]:
+    """
+    使用 PostgreSQL 查询计划的行数估算代替 COUNT(*)
+
+    估算值依赖表统计信息（ANALYZE），对大表足够用于分页展示。
+
+    Returns:
+        Optional[int]: 估算行数；非PostgreSQL或执行失败时返回None
+    """
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+
+    # 以命名参数（:name）编译，再交给 text() 由当前驱动绑定参数：
+    # 直接把驱动格式的SQL（asyncpg 为 $1::INTEGER）配字典参数执行会失败
+    compiled = query.order_by(None).statement.compile(
+        dialect=postgresql.dialect(paramstyle="named"),
+        compile_kwargs={"render_postcompile": True}
+    )
+    explain = text(f"EXPLAIN (FORMAT JSON) {compiled}").bindparams(**compiled.params)
+    try:
+        # 使用保存点，避免 EXPLAIN 失败导致外层事务中止
+        with db.begin_nested():
+            result = db.execute(explain).scalar()
+        plan = result if isinstance(result, list) else json.loads(result)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception as e:
+        logger.warning(f"估算总数失败，回退为精确计数: {e}")
+        return None
@@ -0,0 +1,147 @@
+"""
+分组统计工具
+Single-query grouped statistics using GROUP BY GROUPING SETS.
+
+一次查询同时得到总数、各维度（状态、工艺、日期桶……）的分组计数
+以及若干条件计数，取代“先 DISTINCT 再逐值 COUNT”的循环写法。
+
+PostgreSQL 下使用 ``GROUP BY GROUPING SETS ((维度1), (维度2), …, ())``，
+以 ``GROUPING()`` 位掩码区分每行所属的分组；其他数据库回退为
+每个维度一条 GROUP BY 查询。
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, literal_column, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+
+
+# 日期分桶单位 -> (PostgreSQL to_char 格式, SQLite strftime 格式)
+_BUCKET_FORMATS = {
+    "day": ("YYYY-MM-DD", "%Y-%m-%d"),
+    "month": ("YYYY-MM", "%Y-%m"),
+    "year": ("YYYY", "%Y"),
+}
+
+
+@dataclass
+class GroupedStats:
+    """分组统计结果"""
+    total: int = 0
+    groups: Dict[str, Dict[Any, int]] = field(default_factory=dict)
+    conditions: Dict[str, int] = field(default_factory=dict)
+
+    def group(self, name: str, keys: Optional[List[Any]] = None) -> Dict[Any, int]:
+        """
+        获取某维度的分组计数
+
+        Args:
+            name: 维度名称
+            keys: 需要补零的固定取值（如状态枚举）；为None时只返回出现过的值
+        """
+        counts = self.groups.get(name, {})
+        if keys is None:
+            return dict(counts)
+        return {key: counts.get(key, 0) for key in keys}
+
+
+def date_bucket(db: Session, column: ColumnElement, unit: str = "month") -> ColumnElement:
+    """
+    日期分桶表达式（结果为 "2025-01" 形式的字符串）
+
+    Args:
+        db: 数据库会话（用于判断方言）
+        column: 日期/时间列
+        unit: day / month / year
+    """
+    if unit not in _BUCKET_FORMATS:
+        raise ValueError(f"不支持的日期分桶单位: {unit}")
+    pg_format, sqlite_format = _BUCKET_FORMATS[unit]
+    # 格式以字面量渲染，保证 SELECT 与 GROUP BY 中的表达式完全一致
+    if db.get_bind().dialect.name == "postgresql":
+        return func.to_char(column, literal_column(f"'{pg_format}'"))
+    return func.strftime(literal_column(f"'{sqlite_format}'"), column)
+
+
+def grouped_statistics(
+    db: Session,
+    model: Any,
+    criteria: List[ColumnElement],
+    dimensions: Dict[str, ColumnElement],
+    conditions: Optional[Dict[str, ColumnElement]] = None
+) -> GroupedStats:
+    """
+    一次查询统计总数、分组计数和条件计数
+
+    Args:
+        db: 数据库会话
+        model: 数据模型类（以 model.id 计数）
+        criteria: 过滤条件（工作区、is_active 等）
+        dimensions: 维度名称 -> 分组表达式，值为NULL的分组会被忽略
+        conditions: 条件名称 -> 布尔表达式，统计满足条件的记录数
+
+    Returns:
+        GroupedStats: 统计结果
+    """
+    conditions = conditions or {}
+    names = list(dimensions.keys())
+
+    if not names or db.get_bind().dialect.name != "postgresql":
+        return _grouped_statistics_fallback(db, model, criteria, dimensions, conditions)
+
+    columns = [dimensions[name] for name in names]
+    grouping_sets = [tuple_(column) for column in columns] + [tuple_()]
+    query = db.query(
+        *[column.label(f"dim_{i}") for i, column in enumerate(columns)],
+        func.grouping(*columns).label("grouping_id"),
+        func.count(model.id).label("total"),
+        *[
+            func.count(model.id).filter(expr).label(f"cond_{i}")
+            for i, expr in enumerate(conditions.values())
+        ]
+    ).filter(*criteria).group_by(func.grouping_sets(*grouping_sets))
+
+    result = GroupedStats(groups={name: {} for name in names})
+    all_bits = (1 << len(names)) - 1
+
+    for row in query.all():
+        if row.grouping_id == all_bits:
+            # 空分组集：总计行
+            result.total = row.total
+            result.conditions = {
+                name: getattr(row, f"cond_{i}") for i, name in enumerate(conditions.keys())
+            }
+            continue
+        for i, name in enumerate(names):
+            # GROUPING() 中第 i 个参数对应从高位数起的第 i 位，为0表示按该维度分组
+            if not row.grouping_id & (1 << (len(names) - 1 - i)):
+                value = getattr(row, f"dim_{i}")
+                if value is not None:
+                    result.groups[name][value] = row.total
+                break
+
+    return result
+
+
+def _grouped_statistics_fallback(
+    db: Session,
+    model: Any,
+    criteria: List[ColumnElement],
+    dimensions: Dict[str, ColumnElement],
+    conditions: Dict[str, ColumnElement]
+) -> GroupedStats:
+    """不支持 GROUPING SETS 时：总计一条查询，每个维度一条 GROUP BY 查询"""
+    totals = db.query(
+        func.count(model.id).label("total"),
+        *[func.count(model.id).filter(expr) for expr in conditions.values()]
+    ).filter(*criteria).one()
+
+    result = GroupedStats(
+        total=totals[0],
+        conditions={name: totals[i + 1] for i, name in enumerate(conditions.keys())}
+    )
+    for name, expr in dimensions.items():
+        rows = db.query(expr, func.count(model.id)).filter(*criteria).group_by(expr).all()
+        result.groups[name] = {value: count for value, count in rows if value is not None}
+    return result
@@ -0,0 +1,141 @@
+"""
+后台任务指标
+Per-task latency and throughput metrics for worker tasks.
+
+Celery 工作进程与 API 进程相互独立，指标写入 Redis，由管理接口汇总读取：
+
+- weld:task_metrics:{任务名}          哈希：count / failed / total_ms / max_ms /
+                                      last_ms / last_status / last_finished_at
+- weld:task_metrics:{任务名}:{分钟}    该分钟内完成的任务数（超出统计窗口后过期）
+
+同时在当前进程内保留一份，Redis 不可用或 eager 模式测试时直接读取进程内指标。
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict
+
+import redis
+
+from app.core.config import settings
+from app.core.database import redis_client
+
+logger = logging.getLogger(__name__)
+
+METRICS_PREFIX = "weld:task_metrics"
+_TASKS_KEY = f"{METRICS_PREFIX}:tasks"
+
+# 仅在更大时更新 max_ms
+_MAX_SCRIPT = redis_client.register_script(
+    "local current = tonumber(redis.call('HGET', KEYS[1], 'max_ms') or '0') "
+    "if tonumber(ARGV[1]) > current then redis.call('HSET', KEYS[1], 'max_ms', ARGV[1]) end"
+)
+
+# 进程内指标：任务名 -> 指标（minutes 为 分钟 -> 完成数）
+_local: Dict[str, Dict[str, Any]] = {}
+_local_lock = threading.Lock()
+
+
+def _window_minutes() -> int:
+    return max(1, settings.TASK_METRICS_WINDOW_MINUTES)
+
+
+def record_task(name: str, duration_ms: float, success: bool) -> None:
+    """
+    记录一次任务执行
+
+    Args:
+        name: 任务名
+        duration_ms: 耗时（毫秒）
+        success: 是否成功（抛出异常或返回 success=False 视为失败）
+    """
+    now = time.time()
+    minute = int(now // 60)
+    status = "success" if success else "failed"
+
+    with _local_lock:
+        metrics = _local.setdefault(name, {
+            "count": 0, "failed": 0, "total_ms": 0.0, "max_ms": 0.0, "minutes": {}
+        })
+        metrics["count"] += 1
+        metrics["failed"] += 0 if success else 1
+        metrics["total_ms"] += duration_ms
+        metrics["max_ms"] = max(metrics["max_ms"], duration_ms)
+        metrics["last_ms"] = duration_ms
+        metrics["last_status"] = status
+        metrics["last_finished_at"] = now
+        minutes = metrics["minutes"]
+        minutes[minute] = minutes.get(minute, 0) + 1
+        for old in [m for m in minutes if m <= minute - _window_minutes()]:
+            del minutes[old]
+
+    key = f"{METRICS_PREFIX}:{name}"
+    minute_key = f"{key}:{minute}"
+    try:
+        pipe = redis_client.pipeline()
+        pipe.sadd(_TASKS_KEY, name)
+        pipe.hincrby(key, "count", 1)
+        if not success:
+            pipe.hincrby(key, "failed", 1)
+        pipe.hincrbyfloat(key, "total_ms", round(duration_ms, 3))
+        pipe.hset(key, mapping={
+            "last_ms": round(duration_ms, 3),
+            "last_status": status,
+            "last_finished_at": now,
+        })
+        pipe.incr(minute_key)
+        pipe.expire(minute_key, (_window_minutes() + 1) * 60)
+        pipe.execute()
+        _MAX_SCRIPT(keys=[key], args=[round(duration_ms, 3)])
+    except redis.RedisError as e:
+        logger.debug(f"[任务指标] 写入Redis失败 {name}: {e}")
+
+
+def _summarize(metrics: Dict[str, Any], completed_in_window: int) -> Dict[str, Any]:
+    count = int(metrics.get("count") or 0)
+    total_ms = float(metrics.get("total_ms") or 0)
+    return {
+        "count": count,
+        "failed": int(metrics.get("failed") or 0),
+        "avg_ms": round(total_ms / count, 1) if count else None,
+        "max_ms": round(float(metrics.get("max_ms") or 0), 1),
+        "last_ms": round(float(metrics["last_ms"]), 1) if metrics.get("last_ms") is not None else None,
+        "last_status": metrics.get("last_status"),
+        "last_finished_at": float(metrics["last_finished_at"]) if metrics.get("last_finished_at") else None,
+        "completed_in_window": completed_in_window,
+        "per_minute": round(completed_in_window / _window_minutes(), 3),
+    }
+
+
+def get_local_task_metrics() -> Dict[str, Dict[str, Any]]:
+    """当前进程内的任务指标"""
+    with _local_lock:
+        return {
+            name: _summarize(metrics, sum(metrics["minutes"].values()))
+            for name, metrics in _local.items()
+        }
+
+
+def get_task_metrics() -> Dict[str, Any]:
+    """
+    所有任务的指标（汇总全部工作进程）
+
+    Returns:
+        {"window_minutes": 统计窗口, "source": "redis" / "local", "tasks": {任务名: 指标}}
+    """
+    window = _window_minutes()
+    current_minute = int(time.time() // 60)
+    try:
+        names = sorted(redis_client.smembers(_TASKS_KEY))
+        tasks = {}
+        for name in names:
+            key = f"{METRICS_PREFIX}:{name}"
+            metrics = redis_client.hgetall(key)
+            minute_counts = redis_client.mget(
+                [f"{key}:{minute}" for minute in range(current_minute - window + 1, current_minute + 1)]
+            )
+            tasks[name] = _summarize(metrics, sum(int(value) for value in minute_counts if value))
+        return {"window_minutes": window, "source": "redis", "tasks": tasks}
+    except redis.RedisError as e:
+        logger.debug(f"[任务指标] 读取Redis失败: {e}")
+        return {"window_minutes": window, "source": "local", "tasks": get_local_task_metrics()}
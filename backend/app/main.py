@@ -168,6 +168,12 @@ async def startup_event():
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     logger.info(f"Upload directory created: {settings.UPLOAD_DIR}")
 
+    # 后台预热文档渲染进程池（不阻塞启动）
+    if settings.RENDER_WARM_UP_ON_STARTUP:
+        import asyncio
+        from app.services.render_engine import render_engine
+        app.state.render_warm_up = asyncio.create_task(render_engine.warm_up())
+
     logger.info("Welding System Backend started successfully")
 
 
@@ -176,7 +182,17 @@ async def startup_event():
 async def shutdown_event():
     """应用关闭时的清理操作."""
     logger.info("Shutting down Welding System Backend...")
-    # 这里可以添加清理逻辑
+
+    # 关闭文档渲染进程池
+    from app.services.render_engine import render_engine
+    render_engine.shutdown()
+
+    # 发送投递队列中剩余的邮件/短信，关闭SMTP连接
+    from app.services.delivery_queue import delivery_queue
+    from app.services.email_service import email_service
+    delivery_queue.shutdown()
+    email_service.close()
+
     logger.info("Welding System Backend shutdown completed")
 
 
@@ -28,6 +28,10 @@ from app.models.welder import (
 from app.models.pqr import PQR, PQRTestSpecimen
 from app.models.ppqr import PPQR, PPQRComparison
 from app.models.user_notification import UserNotificationReadStatus
+from app.models.search_index import DocumentSearchIndex
+from app.models.workspace_counter import WorkspaceCounter
+from app.models.export_job import ExportJob
+from app.models.notification_ledger import NotificationLedger
 from app.models.approval import (
     ApprovalWorkflowDefinition,
     ApprovalInstance,
@@ -68,6 +72,10 @@ __all__ = [
     "PPQR",
     "PPQRComparison",
     "UserNotificationReadStatus",
+    "DocumentSearchIndex",
+    "WorkspaceCounter",
+    "ExportJob",
+    "NotificationLedger",
     "ApprovalWorkflowDefinition",
     "ApprovalInstance",
     "ApprovalHistory",
@@ -0,0 +1,60 @@
+"""
+Export job model for the welding system backend.
+批量导出任务
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String, Text
+
+from app.core.database import Base
+
+
+class ExportJob(Base):
+    """
+    批量导出任务
+
+    记录一次多文档导出的请求参数、执行进度和生成的ZIP文件。
+    任务在后台渲染所有文档并写入ZIP，前端轮询状态后下载。
+    """
+
+    __tablename__ = "export_jobs"
+
+    id = Column(String(36), primary_key=True, comment="任务ID（UUID）")
+
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, comment="发起用户ID")
+    workspace_type = Column(String(20), nullable=False, default="personal", comment="工作区类型: personal/enterprise")
+    company_id = Column(Integer, nullable=True, comment="企业ID（企业工作区）")
+
+    document_type = Column(String(20), nullable=False, comment="文档类型: wps, pqr, ppqr")
+    export_format = Column(String(10), nullable=False, comment="导出格式: pdf, word")
+    style = Column(String(30), nullable=True, comment="Word表格风格")
+    document_ids = Column(JSON, nullable=False, comment="要导出的文档ID列表（已按工作区过滤）")
+
+    status = Column(String(20), nullable=False, default="pending", comment="状态: pending, running, completed, failed")
+    total_count = Column(Integer, nullable=False, default=0, comment="文档总数")
+    completed_count = Column(Integer, nullable=False, default=0, comment="已完成数")
+    failed_count = Column(Integer, nullable=False, default=0, comment="失败数")
+    errors = Column(JSON, nullable=True, comment="失败文档及原因")
+    error_message = Column(Text, nullable=True, comment="任务失败原因")
+
+    file_path = Column(String(500), nullable=True, comment="ZIP文件路径")
+    file_size = Column(Integer, nullable=True, comment="ZIP文件大小（字节）")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="创建时间")
+    started_at = Column(DateTime, nullable=True, comment="开始时间")
+    finished_at = Column(DateTime, nullable=True, comment="结束时间")
+
+    __table_args__ = (
+        Index('idx_export_jobs_user_created', 'user_id', 'created_at'),
+        Index('idx_export_jobs_status_created', 'status', 'created_at'),
+    )
+
+    @property
+    def progress(self) -> int:
+        """进度百分比"""
+        if not self.total_count:
+            return 100 if self.status in ("completed", "failed") else 0
+        return int((self.completed_count + self.failed_count) * 100 / self.total_count)
+
+    def __repr__(self):
+        return f"<ExportJob(id={self.id}, {self.document_type}/{self.export_format}, status={self.status})>"
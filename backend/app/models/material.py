@@ -5,7 +5,7 @@ Welding Material models for the welding system backend.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -152,6 +152,13 @@ class WeldingMaterial(Base):
     # company = relationship("Company", back_populates="materials")
     # factory = relationship("Factory", back_populates="materials")
     # transactions = relationship("MaterialTransaction", back_populates="material", cascade="all, delete-orphan")
+
+    # ==================== 表级约束 ====================
+    __table_args__ = (
+        # 游标分页索引：(范围列, created_at, id)
+        Index('idx_materials_company_created', 'company_id', 'created_at', 'id'),
+        Index('idx_materials_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f"<WeldingMaterial(id={self.id}, code={self.material_code}, name={self.material_name})>"
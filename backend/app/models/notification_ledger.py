@@ -0,0 +1,35 @@
+"""
+Notification ledger model for the welding system backend.
+已发送通知登记（定时通知去重）
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+
+from app.core.database import Base
+
+
+class NotificationLedger(Base):
+    """
+    已发送通知登记
+
+    定时任务生成的每条自动通知以 (用户, 通知类型, 去重键) 登记一次，
+    与通知在同一事务中写入；重复运行任务时已登记的通知直接跳过。
+    """
+
+    __tablename__ = "notification_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="接收通知的用户ID")
+    kind = Column(String(30), nullable=False, comment="通知类型: expiration_reminder, tier_change, quota_warning")
+    dedup_key = Column(String(100), nullable=False, comment="去重键（同类型下唯一标识一次通知）")
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, comment="发送时间")
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'kind', 'dedup_key', name='uq_notification_ledger'),
+    )
+
+    def __repr__(self):
+        return f"<NotificationLedger(user_id={self.user_id}, kind={self.kind}, dedup_key={self.dedup_key})>"
@@ -5,7 +5,7 @@ from typing import Optional
 from datetime import datetime, date
 
 from sqlalchemy.orm import Mapped, relationship
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Date, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.core.database import Base
@@ -198,6 +198,13 @@ class PPQR(Base):
     # parent_ppqr = relationship("PPQR", remote_side=[id], foreign_keys=[parent_ppqr_id])
     # converted_pqr = relationship("PQR", foreign_keys=[converted_to_pqr_id])
 
+    # ==================== 表级约束 ====================
+    __table_args__ = (
+        # 游标分页索引：(范围列, created_at, id)
+        Index('idx_ppqr_company_created', 'company_id', 'created_at', 'id'),
+        Index('idx_ppqr_user_created', 'user_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f"<PPQR(id={self.id}, number={self.ppqr_number}, title={self.title})>"
 
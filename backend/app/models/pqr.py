@@ -5,7 +5,7 @@ from typing import Optional
 from datetime import datetime
 
 from sqlalchemy.orm import Mapped, relationship
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.core.database import Base
@@ -185,6 +185,13 @@ class PQR(Base):
     # factory_rel = relationship("Factory", back_populates="pqr_records")
     # qualifier = relationship("User", foreign_keys=[qualified_by])
 
+    # ==================== 表级约束 ====================
+    __table_args__ = (
+        # 游标分页索引：(范围列, created_at, id)
+        Index('idx_pqr_company_created', 'company_id', 'created_at', 'id'),
+        Index('idx_pqr_user_created', 'user_id', 'created_at', 'id'),
+    )
+
 
 class PQRTestSpecimen(Base):
     """PQR试样信息 model."""
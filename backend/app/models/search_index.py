@@ -0,0 +1,71 @@
+"""
+Document search index model for the welding system backend.
+WPS / PQR / pPQR 全文检索索引
+"""
+from datetime import datetime
+
+from sqlalchemy import DDL, Column, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.core.database import Base
+
+
+class DocumentSearchIndex(Base):
+    """
+    文档检索索引
+
+    每个 WPS / PQR / pPQR 对应一行，保存结构化字段与展平后的
+    modules_data 文本，以及预先计算好的 tsvector（中文按二元组切分）。
+    数据隔离字段与源文档保持一致，可直接复用 DataAccessMiddleware 过滤。
+    """
+
+    __tablename__ = "document_search_index"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # 源文档
+    document_type = Column(String(20), nullable=False, comment="文档类型: wps, pqr, ppqr")
+    document_id = Column(Integer, nullable=False, comment="文档ID")
+
+    # 数据隔离字段（与源文档同步）
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="创建用户ID")
+    workspace_type = Column(String(20), nullable=False, default="personal", comment="工作区类型")
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="CASCADE"), nullable=True, comment="企业ID")
+    factory_id = Column(Integer, ForeignKey("factories.id", ondelete="SET NULL"), nullable=True, comment="工厂ID")
+    access_level = Column(String(20), default="private", comment="访问级别")
+
+    # 展示字段
+    document_number = Column(String(100), comment="文档编号")
+    title = Column(String(500), comment="标题")
+    status = Column(String(50), comment="状态")
+
+    # 检索字段
+    content = Column(Text, comment="展平后的检索文本（用于pg_trgm模糊匹配）")
+    search_vector = Column(TSVECTOR, comment="全文检索向量")
+
+    # 增量重建依据
+    source_updated_at = Column(DateTime, nullable=True, comment="源文档更新时间")
+    indexed_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="索引时间")
+
+    __table_args__ = (
+        UniqueConstraint('document_type', 'document_id', name='uq_search_index_document'),
+        Index('idx_search_index_company', 'workspace_type', 'company_id', 'document_type'),
+        Index('idx_search_index_user', 'workspace_type', 'user_id', 'document_type'),
+        Index('idx_search_index_vector', 'search_vector', postgresql_using='gin'),
+        Index(
+            'idx_search_index_content_trgm', 'content',
+            postgresql_using='gin',
+            postgresql_ops={'content': 'gin_trgm_ops'}
+        ),
+    )
+
+    def __repr__(self):
+        return f"<DocumentSearchIndex(type={self.document_type}, document_id={self.document_id})>"
+
+
+# 三元组索引依赖 pg_trgm 扩展，建表前确保扩展存在
+event.listen(
+    DocumentSearchIndex.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
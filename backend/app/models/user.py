@@ -4,7 +4,7 @@ User model for the welding system backend.
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, relationship
 
 from app.core.database import Base
@@ -66,4 +66,9 @@ class User(Base):
     #     back_populates="users"
     # )
     # wps_files = relationship("WPS", back_populates="owner", foreign_keys="WPS.owner_id")
-    # pqr_files = relationship("PQR", back_populates="owner", foreign_keys="PQR.owner_id")
\ No newline at end of file
+    # pqr_files = relationship("PQR", back_populates="owner", foreign_keys="PQR.owner_id")
+
+    __table_args__ = (
+        # 管理后台用户列表游标分页索引
+        Index('idx_users_created', 'created_at', 'id'),
+    )
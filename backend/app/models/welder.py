@@ -5,7 +5,7 @@ Welder models for the welding system backend.
 from datetime import datetime, date
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Date, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, Date, ForeignKey, Enum as SQLEnum, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -145,6 +145,13 @@ class Welder(Base):
     # certifications = relationship("WelderCertification", back_populates="welder", cascade="all, delete-orphan")
     # training_records = relationship("WelderTraining", back_populates="welder", cascade="all, delete-orphan")
     # work_records = relationship("WelderWorkRecord", back_populates="welder", cascade="all, delete-orphan")
+
+    # ==================== 表级约束 ====================
+    __table_args__ = (
+        # 游标分页索引：(范围列, created_at, id)
+        Index('idx_welders_company_created', 'company_id', 'created_at', 'id'),
+        Index('idx_welders_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     def __repr__(self):
         return f"<Welder(id={self.id}, code={self.welder_code}, name={self.full_name})>"
@@ -224,6 +231,11 @@ class WelderCertification(Base):
     # welder = relationship("Welder", back_populates="certifications")
     # user = relationship("User", foreign_keys=[user_id])
     # company = relationship("Company")
+
+    # 到期分析索引：按焊工查有效证书的到期日
+    __table_args__ = (
+        Index('idx_welder_cert_expiry', 'welder_id', 'status', 'expiry_date'),
+    )
     
     def __repr__(self):
         return f"<WelderCertification(id={self.id}, number={self.certification_number})>"
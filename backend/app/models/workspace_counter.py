@@ -0,0 +1,41 @@
+"""
+Workspace counter model for the welding system backend.
+工作区记录计数（物化计数表）
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+
+from app.core.database import Base
+
+
+class WorkspaceCounter(Base):
+    """
+    工作区记录计数
+
+    按 (工作区类型, 所有者, 资源, 状态) 保存启用记录的数量，
+    在业务写入的同一事务中增减，仪表盘模块计数直接读取而无需 COUNT。
+    个人工作区的所有者为用户ID，企业工作区的所有者为企业ID。
+    """
+
+    __tablename__ = "workspace_counters"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    workspace_type = Column(String(20), nullable=False, comment="工作区类型: personal/enterprise")
+    owner_id = Column(Integer, nullable=False, comment="所有者ID（个人为用户ID，企业为企业ID）")
+    resource = Column(String(30), nullable=False, comment="资源类型: wps, pqr, ppqr, materials, welders, equipment, production, quality")
+    status = Column(String(50), nullable=False, default="", comment="记录状态（无状态为空字符串）")
+    count = Column(Integer, nullable=False, default=0, comment="记录数")
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, comment="更新时间")
+
+    __table_args__ = (
+        UniqueConstraint('workspace_type', 'owner_id', 'resource', 'status', name='uq_workspace_counter'),
+    )
+
+    def __repr__(self):
+        return (
+            f"<WorkspaceCounter({self.workspace_type}:{self.owner_id}, "
+            f"resource={self.resource}, status={self.status}, count={self.count})>"
+        )
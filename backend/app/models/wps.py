@@ -157,6 +157,9 @@ class WPS(Base):
         # 复合索引：提高查询性能
         Index('idx_wps_workspace_user', 'workspace_type', 'user_id'),
         Index('idx_wps_workspace_company', 'workspace_type', 'company_id'),
+        # 游标分页索引：(范围列, created_at, id)
+        Index('idx_wps_company_created', 'company_id', 'created_at', 'id'),
+        Index('idx_wps_user_created', 'user_id', 'created_at', 'id'),
     )
 
 
@@ -173,6 +173,7 @@ class PPQRListResponse(BaseModel):
     page: int = Field(..., description="当前页码")
     page_size: int = Field(..., description="每页记录数")
     total_pages: int = Field(..., description="总页数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页，末页为空）")
 
     model_config = ConfigDict(from_attributes=True)
 
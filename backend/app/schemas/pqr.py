@@ -337,6 +337,7 @@ class PQRListResponse(BaseModel):
     page: int = Field(..., description="当前页码")
     page_size: int = Field(..., description="每页记录数")
     total_pages: int = Field(..., description="总页数")
+    next_cursor: Optional[str] = Field(None, description="下一页游标（游标分页，末页为空）")
 
 
 # PQR试样信息 schemas
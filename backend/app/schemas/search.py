@@ -0,0 +1,26 @@
+"""
+Document search schemas for the welding system backend.
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class DocumentSearchHit(BaseModel):
+    """Single ranked search hit."""
+    document_type: str = Field(..., description="文档类型：wps, pqr, ppqr")
+    document_id: int = Field(..., description="文档ID")
+    document_number: Optional[str] = Field(None, description="文档编号")
+    title: Optional[str] = Field(None, description="标题")
+    status: Optional[str] = Field(None, description="状态")
+    rank: float = Field(..., description="相关度得分")
+    snippet: Optional[str] = Field(None, description="命中片段")
+    updated_at: Optional[datetime] = Field(None, description="文档更新时间")
+
+
+class DocumentSearchResponse(BaseModel):
+    """Ranked document search response."""
+    items: List[DocumentSearchHit] = Field(..., description="检索结果")
+    total: int = Field(..., description="命中总数")
+    query: str = Field(..., description="检索词")
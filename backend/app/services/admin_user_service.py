@@ -8,6 +8,7 @@ from uuid import UUID
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_, text
 
+from app.core.pagination import TotalMode, apply_keyset, count_query, next_cursor_for
 from app.models.user import User
 from app.models.admin import Admin
 
@@ -30,10 +31,15 @@ class AdminUserService:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         sort_field: str = "created_at",
-        sort_order: str = "desc"
+        sort_order: str = "desc",
+        cursor: Optional[str] = None,
+        total_mode: str = TotalMode.EXACT
     ) -> Dict[str, Any]:
         """
         获取用户列表（支持筛选和分页）
+
+        提供 cursor 时使用游标分页：固定按 created_at、id 倒序，
+        忽略 page 和排序参数，深分页代价不随页码增长。
         """
         query = db.query(User)
 
@@ -66,20 +72,24 @@ class AdminUserService:
         if end_date:
             query = query.filter(User.created_at <= end_date)
 
-        # 排序
-        if hasattr(User, sort_field):
-            sort_column = getattr(User, sort_field)
-            if sort_order.lower() == "desc":
-                query = query.order_by(sort_column.desc())
-            else:
-                query = query.order_by(sort_column.asc())
-
         # 总数统计
-        total = query.count()
+        total = count_query(db, query, total_mode)
 
-        # 分页查询
-        offset = (page - 1) * page_size
-        users = query.offset(offset).limit(page_size).all()
+        if cursor:
+            # 游标分页
+            users = apply_keyset(query, User, cursor).limit(page_size).all()
+        else:
+            # 排序
+            if hasattr(User, sort_field):
+                sort_column = getattr(User, sort_field)
+                if sort_order.lower() == "desc":
+                    query = query.order_by(sort_column.desc(), User.id.desc())
+                else:
+                    query = query.order_by(sort_column.asc(), User.id.asc())
+
+            # 分页查询
+            offset = (page - 1) * page_size
+            users = query.offset(offset).limit(page_size).all()
 
         # 转换为响应格式
         user_items = []
@@ -92,7 +102,13 @@ class AdminUserService:
             "total": total,
             "page": page,
             "page_size": page_size,
-            "total_pages": (total + page_size - 1) // page_size
+            "total_pages": (total + page_size - 1) // page_size,
+            # 仅默认排序下游标与结果顺序一致
+            "next_cursor": (
+                next_cursor_for(users, page_size)
+                if cursor or (sort_field == "created_at" and sort_order.lower() == "desc")
+                else None
+            )
         }
 
     def get_user_by_id(self, db: Session, user_id: str) -> Optional[User]:
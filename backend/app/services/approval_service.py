@@ -4,6 +4,7 @@ Approval workflow service for the welding system backend.
 """
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_, func
 from fastapi import HTTPException, status
@@ -533,6 +534,156 @@ class ApprovalService:
 
         return stats
 
+    def get_approval_summaries(
+        self,
+        document_type: str,
+        document_ids: List[int],
+        current_user: User,
+        workspace_context: WorkspaceContext
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取列表页文档的审批摘要
+
+        以固定次数的查询完成整页文档的审批信息加载（最新审批实例、
+        工作流名称、当前用户能否审批、能否提交审批），替代逐行查询。
+
+        Args:
+            document_type: 文档类型（wps, pqr, ppqr）
+            document_ids: 文档ID列表
+            current_user: 当前用户
+            workspace_context: 工作区上下文
+
+        Returns:
+            Dict[int, Dict]: 文档ID -> 审批摘要字段
+        """
+        summaries: Dict[int, Dict[str, Any]] = {}
+        if not document_ids:
+            return summaries
+
+        # 1. 每个文档的最新审批实例（窗口函数，一次查询）
+        ranked = self.db.query(
+            ApprovalInstance.id.label("instance_id"),
+            func.row_number().over(
+                partition_by=ApprovalInstance.document_id,
+                order_by=ApprovalInstance.created_at.desc()
+            ).label("rn")
+        ).filter(
+            ApprovalInstance.document_type == document_type,
+            ApprovalInstance.document_id.in_(document_ids)
+        ).subquery()
+
+        instances = self.db.query(ApprovalInstance).join(
+            ranked, ApprovalInstance.id == ranked.c.instance_id
+        ).filter(ranked.c.rn == 1).all()
+        latest = {instance.document_id: instance for instance in instances}
+
+        # 2. 工作流名称（一次查询）
+        workflow_ids = {instance.workflow_id for instance in instances}
+        workflow_names: Dict[int, str] = {}
+        if workflow_ids:
+            workflow_names = dict(self.db.query(
+                ApprovalWorkflowDefinition.id,
+                ApprovalWorkflowDefinition.name
+            ).filter(ApprovalWorkflowDefinition.id.in_(workflow_ids)).all())
+
+        # 3. 当前用户在待审批实例所属企业中的审批资格（最多两次查询）
+        pending_company_ids = {
+            instance.company_id for instance in instances
+            if instance.status in ['pending', 'in_progress']
+        }
+        approvable_companies = self._get_approvable_companies(
+            current_user, document_type, pending_company_ids
+        )
+
+        # 4. 无审批实例的文档能否提交审批只取决于工作区，计算一次即可
+        can_submit_approval: Optional[bool] = None
+
+        for document_id in document_ids:
+            instance = latest.get(document_id)
+            if instance:
+                summaries[document_id] = {
+                    "approval_instance_id": instance.id,
+                    "approval_status": instance.status,
+                    "workflow_name": workflow_names.get(instance.workflow_id),
+                    "submitter_id": instance.submitter_id,
+                    "can_approve": (
+                        instance.status in ['pending', 'in_progress']
+                        and instance.company_id in approvable_companies
+                    ),
+                    "can_submit_approval": False
+                }
+            else:
+                if can_submit_approval is None:
+                    can_submit_approval = self.should_require_approval(document_type, workspace_context)
+                summaries[document_id] = {
+                    "approval_instance_id": None,
+                    "approval_status": None,
+                    "workflow_name": None,
+                    "submitter_id": None,
+                    "can_approve": False,
+                    "can_submit_approval": can_submit_approval
+                }
+
+        return summaries
+
+    @classmethod
+    async def get_approval_summaries_async(
+        cls,
+        db: AsyncSession,
+        document_type: str,
+        document_ids: List[int],
+        current_user: User,
+        workspace_context: WorkspaceContext
+    ) -> Dict[int, Dict[str, Any]]:
+        """get_approval_summaries 的异步版本（在 AsyncSession 上通过 run_sync 执行）"""
+        return await db.run_sync(
+            lambda session: cls(session).get_approval_summaries(
+                document_type, document_ids, current_user, workspace_context
+            )
+        )
+
+    def _get_approvable_companies(
+        self,
+        user: User,
+        document_type: str,
+        company_ids: set
+    ) -> set:
+        """批量计算用户在哪些企业中拥有该文档类型的审批权限（与 _can_approve 规则一致）"""
+        if not company_ids:
+            return set()
+
+        # 系统层面的管理员拥有所有权限
+        if user.is_admin:
+            return set(company_ids)
+
+        employees = self.db.query(
+            CompanyEmployee.company_id,
+            CompanyEmployee.company_role_id
+        ).filter(
+            CompanyEmployee.user_id == user.id,
+            CompanyEmployee.company_id.in_(company_ids),
+            CompanyEmployee.status == "active",
+            CompanyEmployee.company_role_id.isnot(None)
+        ).all()
+        if not employees:
+            return set()
+
+        role_ids = {role_id for _, role_id in employees}
+        role_permissions = dict(self.db.query(
+            CompanyRole.id,
+            CompanyRole.permissions
+        ).filter(CompanyRole.id.in_(role_ids)).all())
+
+        module_key = f"{document_type}_management"
+        approvable = set()
+        for company_id, role_id in employees:
+            if role_id not in role_permissions:
+                continue
+            permissions = role_permissions[role_id] or {}
+            if permissions.get(module_key, {}).get('approve', False):
+                approvable.add(company_id)
+        return approvable
+
     # ==================== 私有辅助方法 ====================
 
     def _process_approval(
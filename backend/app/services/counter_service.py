@@ -0,0 +1,277 @@
+"""
+工作区计数服务
+Materialized per-workspace record counters maintained on write.
+
+业务写入 flush 后，根据新增 / 删除 / 启停用 / 状态变化计算计数增量，
+在同一事务中以 ``INSERT ... ON CONFLICT DO UPDATE`` 累加到
+workspace_counters；reconcile() 从源表全量重建计数。
+
+计数按工作区和记录状态维护，由仪表盘模块计数读取（见
+workspace_stats_service）。WPS/PQR 统计概览按 owner_id 跨工作区统计，
+并按工艺、月份、评定结果等计数表没有的维度分组，仍直接查询源表。
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import case, event, func, inspect, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_access import WorkspaceType
+from app.models.equipment import Equipment
+from app.models.material import WeldingMaterial
+from app.models.ppqr import PPQR
+from app.models.pqr import PQR
+from app.models.production import ProductionTask
+from app.models.quality import QualityInspection
+from app.models.welder import Welder
+from app.models.workspace_counter import WorkspaceCounter
+from app.models.wps import WPS
+
+logger = logging.getLogger(__name__)
+
+# 资源类型 -> 模型（均带 user_id / workspace_type / company_id / status / is_active 列）
+COUNTER_RESOURCES: Dict[str, Any] = {
+    "wps": WPS,
+    "pqr": PQR,
+    "ppqr": PPQR,
+    "materials": WeldingMaterial,
+    "welders": Welder,
+    "equipment": Equipment,
+    "production": ProductionTask,
+}
+
+# 质量检验表按 company_id 区分工作区，以检验结果作为状态
+QUALITY_RESOURCE = "quality"
+
+# 计数键: (workspace_type, owner_id, resource, status)
+CounterKey = Tuple[str, int, str, str]
+
+
+def _counter_key(resource: str, values: Dict[str, Any]) -> Optional[CounterKey]:
+    """根据记录字段值计算计数键；停用或缺少所有者的记录不计数"""
+    if resource == QUALITY_RESOURCE:
+        if values["company_id"]:
+            return WorkspaceType.ENTERPRISE, values["company_id"], resource, values["inspection_result"] or ""
+        if values["owner_id"]:
+            return WorkspaceType.PERSONAL, values["owner_id"], resource, values["inspection_result"] or ""
+        return None
+
+    if values["is_active"] is False:
+        return None
+    if values["workspace_type"] == WorkspaceType.ENTERPRISE:
+        owner_id = values["company_id"]
+    else:
+        owner_id = values["user_id"]
+    if not owner_id:
+        return None
+    return values["workspace_type"] or WorkspaceType.PERSONAL, owner_id, resource, values["status"] or ""
+
+
+_TRACKED_FIELDS = ("workspace_type", "company_id", "user_id", "status", "is_active")
+_QUALITY_FIELDS = ("company_id", "owner_id", "inspection_result")
+
+_MODEL_RESOURCES = {model: resource for resource, model in COUNTER_RESOURCES.items()}
+_MODEL_RESOURCES[QualityInspection] = QUALITY_RESOURCE
+
+
+def _field_values(obj: Any, fields: Tuple[str, ...], previous: bool) -> Dict[str, Any]:
+    """读取记录的当前值，或flush前（上次提交）的值"""
+    state = inspect(obj)
+    values = {}
+    for field in fields:
+        history = state.attrs[field].history
+        if previous and history.deleted:
+            values[field] = history.deleted[0]
+        else:
+            values[field] = getattr(obj, field)
+    return values
+
+
+def collect_counter_deltas(session: Session) -> Dict[CounterKey, int]:
+    """
+    计算本次flush产生的计数增量
+
+    必须在 after_flush 中调用：此时 new / dirty / deleted 与属性历史
+    仍保持flush前的状态，而新记录已获得主键和默认值。
+    """
+    deltas: Dict[CounterKey, int] = defaultdict(int)
+
+    for obj in session.new:
+        resource = _MODEL_RESOURCES.get(type(obj))
+        if resource:
+            fields = _QUALITY_FIELDS if resource == QUALITY_RESOURCE else _TRACKED_FIELDS
+            key = _counter_key(resource, _field_values(obj, fields, previous=False))
+            if key:
+                deltas[key] += 1
+
+    for obj in session.dirty:
+        resource = _MODEL_RESOURCES.get(type(obj))
+        if resource:
+            fields = _QUALITY_FIELDS if resource == QUALITY_RESOURCE else _TRACKED_FIELDS
+            old_key = _counter_key(resource, _field_values(obj, fields, previous=True))
+            new_key = _counter_key(resource, _field_values(obj, fields, previous=False))
+            if old_key != new_key:
+                if old_key:
+                    deltas[old_key] -= 1
+                if new_key:
+                    deltas[new_key] += 1
+
+    for obj in session.deleted:
+        resource = _MODEL_RESOURCES.get(type(obj))
+        if resource:
+            fields = _QUALITY_FIELDS if resource == QUALITY_RESOURCE else _TRACKED_FIELDS
+            key = _counter_key(resource, _field_values(obj, fields, previous=True))
+            if key:
+                deltas[key] -= 1
+
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def apply_counter_deltas(connection, deltas: Dict[CounterKey, int]) -> None:
+    """
+    将计数增量原子地累加到 workspace_counters
+
+    按键排序写入，避免并发事务以不同顺序锁行导致死锁。
+    """
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "workspace_type": workspace_type,
+            "owner_id": owner_id,
+            "resource": resource,
+            "status": status,
+            "count": delta,
+            "updated_at": now,
+        }
+        for (workspace_type, owner_id, resource, status), delta in sorted(deltas.items())
+    ]
+    stmt = pg_insert(WorkspaceCounter.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_workspace_counter",
+        set_={
+            "count": WorkspaceCounter.__table__.c.count + stmt.excluded.count,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    connection.execute(stmt)
+
+
+def counter_totals_select(workspace_type: str, owner_id: int):
+    """
+    工作区各资源记录总数的查询（列: stat="<资源>_count", total）
+
+    可与其他统计子查询 UNION ALL 后一次执行。
+    """
+    return select(
+        (WorkspaceCounter.resource + "_count").label("stat"),
+        func.sum(WorkspaceCounter.count).label("total")
+    ).where(
+        WorkspaceCounter.workspace_type == workspace_type,
+        WorkspaceCounter.owner_id == owner_id
+    ).group_by(WorkspaceCounter.resource)
+
+
+class CounterService:
+    """工作区计数服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_counts(self, workspace_type: str, owner_id: int) -> Dict[str, Dict[str, int]]:
+        """
+        获取工作区的计数
+
+        Args:
+            workspace_type: 工作区类型
+            owner_id: 个人工作区为用户ID，企业工作区为企业ID
+
+        Returns:
+            Dict: {资源类型: {状态: 记录数}}
+        """
+        rows = self.db.query(
+            WorkspaceCounter.resource, WorkspaceCounter.status, WorkspaceCounter.count
+        ).filter(
+            WorkspaceCounter.workspace_type == workspace_type,
+            WorkspaceCounter.owner_id == owner_id,
+            WorkspaceCounter.count != 0
+        ).all()
+
+        counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for resource, status, count in rows:
+            counts[resource][status] = count
+        return dict(counts)
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        从源表全量重建计数
+
+        重建期间以 SHARE ROW EXCLUSIVE 锁住计数表：并发写入的计数
+        更新会等待重建提交，因此不会丢失或重复计数。
+
+        Returns:
+            Dict[str, int]: 每种资源重建后的记录总数
+        """
+        table = WorkspaceCounter.__table__
+        if self.db.get_bind().dialect.name == "postgresql":
+            self.db.execute(text("LOCK TABLE workspace_counters IN SHARE ROW EXCLUSIVE MODE"))
+        self.db.execute(table.delete())
+
+        now = datetime.utcnow()
+        columns = ["workspace_type", "owner_id", "resource", "status", "count", "updated_at"]
+
+        for resource, model in COUNTER_RESOURCES.items():
+            owner = case(
+                (model.workspace_type == WorkspaceType.ENTERPRISE, model.company_id),
+                else_=model.user_id
+            )
+            workspace_type = func.coalesce(model.workspace_type, WorkspaceType.PERSONAL)
+            status = func.coalesce(model.status, "")
+            grouped = select(
+                workspace_type, owner, literal(resource), status, func.count(model.id), literal(now)
+            ).where(
+                model.is_active.isnot(False), owner.isnot(None)
+            ).group_by(workspace_type, owner, status)
+            self.db.execute(table.insert().from_select(columns, grouped))
+
+        owner = func.coalesce(QualityInspection.company_id, QualityInspection.owner_id)
+        workspace_type = case(
+            (QualityInspection.company_id.isnot(None), WorkspaceType.ENTERPRISE),
+            else_=WorkspaceType.PERSONAL
+        )
+        status = func.coalesce(QualityInspection.inspection_result, "")
+        grouped = select(
+            workspace_type, owner, literal(QUALITY_RESOURCE), status, func.count(QualityInspection.id), literal(now)
+        ).where(owner.isnot(None)).group_by(workspace_type, owner, status)
+        self.db.execute(table.insert().from_select(columns, grouped))
+
+        self.db.commit()
+
+        totals = dict(
+            self.db.query(WorkspaceCounter.resource, func.sum(WorkspaceCounter.count))
+            .group_by(WorkspaceCounter.resource).all()
+        )
+        result = {resource: int(totals.get(resource) or 0) for resource in _MODEL_RESOURCES.values()}
+        logger.info(f"[工作区计数] 重建完成: {result}")
+        return result
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_workspace_counters(session: Session, flush_context) -> None:
+    """在业务写入的同一事务中累加计数增量（失败时整个事务回滚）"""
+    if not settings.WORKSPACE_COUNTERS_ENABLED:
+        return
+
+    deltas = collect_counter_deltas(session)
+    if not deltas:
+        return
+
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+    apply_counter_deltas(connection, deltas)
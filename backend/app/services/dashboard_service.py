@@ -4,20 +4,16 @@
 """
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_, desc
+from sqlalchemy import and_, or_, desc
 
 from app.models.user import User
-from app.models.company import Company, CompanyEmployee, Factory
+from app.models.company import Company
 from app.models.wps import WPS
 from app.models.pqr import PQR
-from app.models.ppqr import PPQR
-from app.models.material import WeldingMaterial
-from app.models.welder import Welder
-from app.models.equipment import Equipment
-from app.models.production import ProductionTask
-from app.models.quality import QualityInspection
 from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.workspace_stats_service import WorkspaceStatsService, MODULE_STAT_KEYS
 
 
 class DashboardService:
@@ -25,6 +21,17 @@ class DashboardService:
     
     def __init__(self, db: Session):
         self.db = db
+        self.stats_service = WorkspaceStatsService(db)
+
+    @classmethod
+    async def get_overview_stats_async(cls, db: AsyncSession, *args, **kwargs) -> Dict[str, Any]:
+        """get_overview_stats 的异步版本（在 AsyncSession 上通过 run_sync 执行）"""
+        return await db.run_sync(lambda session: cls(session).get_overview_stats(*args, **kwargs))
+
+    @classmethod
+    async def get_recent_activities_async(cls, db: AsyncSession, *args, **kwargs) -> List[Dict[str, Any]]:
+        """get_recent_activities 的异步版本（在 AsyncSession 上通过 run_sync 执行）"""
+        return await db.run_sync(lambda session: cls(session).get_recent_activities(*args, **kwargs))
     
     def get_overview_stats(
         self,
@@ -54,79 +61,19 @@ class DashboardService:
     def _get_personal_stats(self, user: User) -> Dict[str, Any]:
         """获取个人工作区统计数据"""
 
-        # WPS统计
-        wps_count = self.db.query(func.count(WPS.id)).filter(
-            WPS.user_id == user.id,
-            WPS.workspace_type == WorkspaceType.PERSONAL,
-            WPS.is_active == True
-        ).scalar() or 0
-
-        # PQR统计
-        pqr_count = self.db.query(func.count(PQR.id)).filter(
-            PQR.user_id == user.id,
-            PQR.workspace_type == WorkspaceType.PERSONAL,
-            PQR.is_active == True
-        ).scalar() or 0
-
-        # pPQR统计
-        ppqr_count = self.db.query(func.count(PPQR.id)).filter(
-            PPQR.user_id == user.id,
-            PPQR.workspace_type == WorkspaceType.PERSONAL,
-            PPQR.is_active == True
-        ).scalar() or 0
-
-        # 焊材统计
-        materials_count = self.db.query(func.count(WeldingMaterial.id)).filter(
-            WeldingMaterial.user_id == user.id,
-            WeldingMaterial.workspace_type == WorkspaceType.PERSONAL,
-            WeldingMaterial.is_active == True
-        ).scalar() or 0
-
-        # 焊工统计
-        welders_count = self.db.query(func.count(Welder.id)).filter(
-            Welder.user_id == user.id,
-            Welder.workspace_type == WorkspaceType.PERSONAL,
-            Welder.is_active == True
-        ).scalar() or 0
+        # 各模块记录数（单次查询，按工作区缓存）
+        counts = self.stats_service.get_module_counts(WorkspaceType.PERSONAL, user.id)
 
-        # 设备统计
-        equipment_count = self.db.query(func.count(Equipment.id)).filter(
-            Equipment.user_id == user.id,
-            Equipment.workspace_type == WorkspaceType.PERSONAL,
-            Equipment.is_active == True
-        ).scalar() or 0
-
-        # 生产任务统计
-        production_count = self.db.query(func.count(ProductionTask.id)).filter(
-            ProductionTask.user_id == user.id,
-            ProductionTask.workspace_type == WorkspaceType.PERSONAL,
-            ProductionTask.is_active == True
-        ).scalar() or 0
-
-        # 质量检验统计
-        quality_count = self.db.query(func.count(QualityInspection.id)).filter(
-            QualityInspection.user_id == user.id,
-            QualityInspection.workspace_type == WorkspaceType.PERSONAL,
-            QualityInspection.is_active == True
-        ).scalar() or 0
-        
         # 存储使用情况
         storage_used_mb = user.storage_quota_used or 0
-        
+
         # 获取会员配额限制
         from app.services.membership_service import MembershipService
         membership_service = MembershipService(self.db)
         limits = membership_service.get_membership_limits(user.member_tier)
-        
+
         return {
-            "wps_count": wps_count,
-            "pqr_count": pqr_count,
-            "ppqr_count": ppqr_count,
-            "materials_count": materials_count,
-            "welders_count": welders_count,
-            "equipment_count": equipment_count,
-            "production_count": production_count,
-            "quality_count": quality_count,
+            **{key: counts.get(key, 0) for key in MODULE_STAT_KEYS},
             "storage_used_mb": storage_used_mb,
             "storage_limit_mb": limits.get("storage", 100),
             "membership_usage": {
@@ -138,7 +85,7 @@ class DashboardService:
                 "ppqr_limit": limits.get("ppqr", 0),
             }
         }
-    
+
     def _get_enterprise_stats(
         self,
         user: User,
@@ -146,94 +93,26 @@ class DashboardService:
     ) -> Dict[str, Any]:
         """获取企业工作区统计数据"""
 
-        company = self.db.query(Company).filter(
-            Company.id == workspace_context.company_id
-        ).first()
+        company = self.db.get(Company, workspace_context.company_id)
 
         if not company:
             return {}
 
-        # WPS统计
-        wps_count = self.db.query(func.count(WPS.id)).filter(
-            WPS.company_id == workspace_context.company_id,
-            WPS.workspace_type == WorkspaceType.ENTERPRISE,
-            WPS.is_active == True
-        ).scalar() or 0
-
-        # PQR统计
-        pqr_count = self.db.query(func.count(PQR.id)).filter(
-            PQR.company_id == workspace_context.company_id,
-            PQR.workspace_type == WorkspaceType.ENTERPRISE,
-            PQR.is_active == True
-        ).scalar() or 0
-
-        # pPQR统计
-        ppqr_count = self.db.query(func.count(PPQR.id)).filter(
-            PPQR.company_id == workspace_context.company_id,
-            PPQR.workspace_type == WorkspaceType.ENTERPRISE,
-            PPQR.is_active == True
-        ).scalar() or 0
-
-        # 焊材统计
-        materials_count = self.db.query(func.count(WeldingMaterial.id)).filter(
-            WeldingMaterial.company_id == workspace_context.company_id,
-            WeldingMaterial.workspace_type == WorkspaceType.ENTERPRISE,
-            WeldingMaterial.is_active == True
-        ).scalar() or 0
+        # 各模块记录数及员工、工厂数量（单次查询，按工作区缓存）
+        counts = self.stats_service.get_module_counts(
+            WorkspaceType.ENTERPRISE, user.id, workspace_context.company_id
+        )
+        wps_count = counts.get("wps_count", 0)
+        pqr_count = counts.get("pqr_count", 0)
+        ppqr_count = counts.get("ppqr_count", 0)
 
-        # 焊工统计
-        welders_count = self.db.query(func.count(Welder.id)).filter(
-            Welder.company_id == workspace_context.company_id,
-            Welder.workspace_type == WorkspaceType.ENTERPRISE,
-            Welder.is_active == True
-        ).scalar() or 0
-
-        # 设备统计
-        equipment_count = self.db.query(func.count(Equipment.id)).filter(
-            Equipment.company_id == workspace_context.company_id,
-            Equipment.workspace_type == WorkspaceType.ENTERPRISE,
-            Equipment.is_active == True
-        ).scalar() or 0
-
-        # 生产任务统计
-        production_count = self.db.query(func.count(ProductionTask.id)).filter(
-            ProductionTask.company_id == workspace_context.company_id,
-            ProductionTask.workspace_type == WorkspaceType.ENTERPRISE,
-            ProductionTask.is_active == True
-        ).scalar() or 0
-
-        # 质量检验统计
-        quality_count = self.db.query(func.count(QualityInspection.id)).filter(
-            QualityInspection.company_id == workspace_context.company_id,
-            QualityInspection.workspace_type == WorkspaceType.ENTERPRISE,
-            QualityInspection.is_active == True
-        ).scalar() or 0
-        
         # 存储使用情况 (暂时使用默认值,因为Company模型中还没有这些字段)
         storage_used_mb = getattr(company, 'storage_quota_used', 0) or 0
         max_storage_gb = getattr(company, 'max_storage_gb', None)
         storage_limit_mb = max_storage_gb * 1024 if max_storage_gb else 1024
 
-        # 员工数量统计
-        employee_count = self.db.query(func.count(CompanyEmployee.id)).filter(
-            CompanyEmployee.company_id == workspace_context.company_id,
-            CompanyEmployee.status == 'active'
-        ).scalar() or 0
-
-        # 工厂数量统计
-        factory_count = self.db.query(func.count(Factory.id)).filter(
-            Factory.company_id == workspace_context.company_id
-        ).scalar() or 0
-
         return {
-            "wps_count": wps_count,
-            "pqr_count": pqr_count,
-            "ppqr_count": ppqr_count,
-            "materials_count": materials_count,
-            "welders_count": welders_count,
-            "equipment_count": equipment_count,
-            "production_count": production_count,
-            "quality_count": quality_count,
+            **{key: counts.get(key, 0) for key in MODULE_STAT_KEYS},
             "storage_used_mb": storage_used_mb,
             "storage_limit_mb": storage_limit_mb,
             "membership_usage": {
@@ -246,8 +125,8 @@ class DashboardService:
             },
             "company_info": {
                 "name": company.name,
-                "employee_count": employee_count,
-                "factory_count": factory_count,
+                "employee_count": counts.get("employee_count", 0),
+                "factory_count": counts.get("factory_count", 0),
             }
         }
     
@@ -0,0 +1,273 @@
+"""
+邮件/短信投递队列
+Background delivery queue for outbound email and SMS with retry and backoff.
+
+原先发送验证码时在请求处理中同步调用邮件/短信服务：每封邮件新建SMTP
+连接并完成 STARTTLS 和登录，短信每次新建SDK客户端，接口响应时间取决于
+第三方服务，偶发失败直接返回500。现在：
+
+- 接口只负责创建验证码并入队，立即返回
+- DELIVERY_WORKERS 个后台线程从队列取出消息发送，邮件复用
+  EmailService 的 SMTP 连接池
+- 发送失败（返回 False 或抛出异常）按指数退避加随机抖动重试，
+  最多 DELIVERY_MAX_ATTEMPTS 次；最终失败时调用 on_failure（验证码作废）
+- 抛出 PermanentDeliveryError 的失败（如手机号格式错误）重试无意义，直接放弃
+- DELIVERY_WORKERS=0 时在调用方线程中同步发送（不等待退避），仅用于测试；
+  调用方须为同步代码（如同步接口，由线程池执行），不能在事件循环中调用
+
+队列在进程内，每个 API 进程一个全局实例；关闭时等待队列中的消息发送完毕。
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentDeliveryError(Exception):
+    """不可重试的发送失败（如手机号格式错误），不再重试"""
+
+
+class DeliveryJob:
+    """一条待投递的消息"""
+
+    __slots__ = ("description", "send", "on_failure", "attempts", "permanent", "enqueued_at")
+
+    def __init__(
+        self,
+        description: str,
+        send: Callable[[], bool],
+        on_failure: Optional[Callable[[], None]] = None
+    ):
+        self.description = description
+        self.send = send
+        self.on_failure = on_failure
+        self.attempts = 0
+        self.permanent = False
+        self.enqueued_at = time.monotonic()
+
+
+class DeliveryQueue:
+    """后台投递队列（线程池 + 失败重试）"""
+
+    def __init__(
+        self,
+        workers: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        max_backoff_seconds: float
+    ):
+        self.workers = workers
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+        self._queue: "queue.Queue[Optional[DeliveryJob]]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._timers: Dict[int, threading.Timer] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        # 指标
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # 入队
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        description: str,
+        send: Callable[[], bool],
+        on_failure: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        提交一条消息
+
+        Args:
+            description: 日志中显示的描述
+            send: 发送函数，成功返回 True
+            on_failure: 所有重试均失败（或遇到不可重试的失败）后调用
+        """
+        job = DeliveryJob(description, send, on_failure)
+        self.enqueued += 1
+
+        if self.workers <= 0:
+            # 同步模式（仅用于测试）：在调用方线程中立即依次重试，不等待退避
+            while not self._attempt(job):
+                if job.permanent or job.attempts >= self.max_attempts:
+                    self._give_up(job)
+                    return
+                self.retried += 1
+            return
+
+        self._ensure_started()
+        self._queue.put(job)
+
+    def enqueue_verification_code(
+        self,
+        account_type: str,
+        account: str,
+        code: str,
+        purpose: str,
+        expires_minutes: int,
+        on_failure: Optional[Callable[[], None]] = None
+    ) -> None:
+        """验证码邮件/短信入队"""
+        # 延迟导入，避免邮件/短信服务的初始化依赖队列模块
+        if account_type == "email":
+            from app.services.email_service import email_service
+
+            def send() -> bool:
+                return email_service.send_verification_code(
+                    to_email=account, code=code, purpose=purpose, expires_minutes=expires_minutes
+                )
+        elif account_type == "phone":
+            from app.services.sms_service import sms_service
+
+            def send() -> bool:
+                if not sms_service.validate_phone(account):
+                    raise PermanentDeliveryError("手机号格式错误")
+                return sms_service.send_verification_code(
+                    phone=account, code=code, purpose=purpose, expires_minutes=expires_minutes
+                )
+        else:
+            raise ValueError(f"不支持的账号类型: {account_type}")
+
+        self.submit(f"{account_type} 验证码 -> {account}", send, on_failure)
+
+    # ------------------------------------------------------------------
+    # 投递
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        """首次入队时启动后台线程"""
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"delivery-worker-{index}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                self._deliver(job)
+            finally:
+                self._queue.task_done()
+
+    def _attempt(self, job: DeliveryJob) -> bool:
+        """发送一次，返回是否成功"""
+        job.attempts += 1
+        try:
+            ok = bool(job.send())
+        except PermanentDeliveryError as e:
+            logger.warning(f"[投递队列] 发送失败且不可重试 ({job.description}): {e}")
+            job.permanent = True
+            ok = False
+        except Exception as e:
+            logger.warning(f"[投递队列] 发送异常 ({job.description}, 第{job.attempts}次): {e}")
+            ok = False
+        if ok:
+            self.sent += 1
+            logger.debug(
+                f"[投递队列] 已发送 {job.description}, 第{job.attempts}次, "
+                f"入队后 {(time.monotonic() - job.enqueued_at) * 1000:.0f}ms"
+            )
+        return ok
+
+    def _deliver(self, job: DeliveryJob) -> None:
+        if self._attempt(job):
+            return
+        if job.permanent or job.attempts >= self.max_attempts or self._closed:
+            self._give_up(job)
+            return
+
+        # 指数退避 + 随机抖动，避免第三方服务故障时集中重试
+        delay = min(self.max_backoff_seconds, self.backoff_seconds * (2 ** (job.attempts - 1)))
+        delay *= random.uniform(0.5, 1.0)
+        self.retried += 1
+        logger.info(f"[投递队列] {job.description} 发送失败，{delay:.1f}s 后第{job.attempts + 1}次重试")
+
+        timer = threading.Timer(delay, self._requeue, args=(job,))
+        timer.daemon = True
+        with self._lock:
+            self._timers[id(job)] = timer
+        timer.start()
+
+    def _requeue(self, job: DeliveryJob) -> None:
+        with self._lock:
+            self._timers.pop(id(job), None)
+        self._queue.put(job)
+
+    def _give_up(self, job: DeliveryJob) -> None:
+        self.failed += 1
+        logger.error(f"[投递队列] {job.description} 发送失败，已尝试 {job.attempts} 次")
+        if job.on_failure is not None:
+            try:
+                job.on_failure()
+            except Exception as e:
+                logger.error(f"[投递队列] 失败回调异常 ({job.description}): {e}")
+
+    # ------------------------------------------------------------------
+    # 关闭与指标
+    # ------------------------------------------------------------------
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """
+        停止后台线程：队列中的消息发送完毕（不再重试），等待中的重试立即执行一次
+
+        Args:
+            timeout: 等待线程退出的最长时间（秒）
+        """
+        self._closed = True
+        with self._lock:
+            pending = list(self._timers.values())
+            self._timers.clear()
+        for timer in pending:
+            timer.cancel()
+            self._queue.put(timer.args[0])
+
+        for _ in self._threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        self._threads = []
+
+    def stats(self) -> Dict[str, int]:
+        """投递指标（当前进程）"""
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "retry_pending": len(self._timers),
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+# 全局投递队列实例
+delivery_queue = DeliveryQueue(
+    workers=settings.DELIVERY_WORKERS,
+    max_attempts=settings.DELIVERY_MAX_ATTEMPTS,
+    backoff_seconds=settings.DELIVERY_RETRY_BACKOFF_SECONDS,
+    max_backoff_seconds=settings.DELIVERY_RETRY_MAX_BACKOFF_SECONDS
+)
@@ -5,6 +5,7 @@
 from sqlalchemy.orm import Session
 from typing import Optional, BinaryIO
 import io
+import tempfile
 from datetime import datetime
 from bs4 import BeautifulSoup
 
@@ -19,16 +20,35 @@ except ImportError:
     DOCX_AVAILABLE = False
     print("警告: python-docx未安装，Word导出功能不可用")
 
-try:
-    from weasyprint import HTML, CSS
-    WEASYPRINT_AVAILABLE = True
-except (ImportError, OSError) as e:
-    WEASYPRINT_AVAILABLE = False
-    print(f"警告: weasyprint不可用，PDF导出功能不可用 ({str(e)[:100]})")
-
+from app.core.config import settings
 from app.models.wps import WPS
 from app.models.pqr import PQR
 from app.models.ppqr import PPQR
+from app.services.image_pipeline import (
+    BODY_IMAGE_WIDTH_INCHES,
+    CELL_IMAGE_WIDTH_INCHES,
+    image_pipeline,
+)
+from app.services.print_styles import WEASYPRINT_AVAILABLE, print_stylesheets
+
+if not WEASYPRINT_AVAILABLE:
+    print("警告: weasyprint不可用，PDF导出功能不可用")
+
+try:
+    from app.services.docx_converter import HtmlDocxConverter
+    LXML_CONVERTER_AVAILABLE = True
+except ImportError:
+    LXML_CONVERTER_AVAILABLE = False
+
+
+def spooled_output() -> BinaryIO:
+    """
+    导出文件的输出缓冲
+
+    不超过 EXPORT_SPOOL_MAX_MB 时保存在内存中，超出后自动转存到磁盘临时文件，
+    避免带大量图片的文档在内存中保留完整副本。
+    """
+    return tempfile.SpooledTemporaryFile(max_size=settings.EXPORT_SPOOL_MAX_MB * 1024 * 1024)
 
 
 class DocumentExportService:
@@ -37,7 +57,12 @@ class DocumentExportService:
     def __init__(self, db: Session):
         self.db = db
     
-    def export_wps_to_word(self, wps: WPS, style: str = "blue_white") -> io.BytesIO:
+    def export_wps_to_word(
+        self,
+        wps: WPS,
+        style: str = "blue_white",
+        output: Optional[BinaryIO] = None
+    ) -> BinaryIO:
         """
         导出WPS为Word文档
 
@@ -47,9 +72,10 @@ class DocumentExportService:
                 - "blue_white": 蓝白相间风格（默认）
                 - "plain": 纯白风格
                 - "classic": 经典风格（深蓝标题）
+            output: 输出文件对象，未指定时使用 spooled_output()
 
         Returns:
-            Word文档的BytesIO流
+            写入Word文档并回到开头的输出流
         """
         if not DOCX_AVAILABLE:
             raise ImportError("python-docx未安装，请运行: pip install python-docx")
@@ -78,22 +104,23 @@ class DocumentExportService:
         footer_para.text = f"打印日期: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
         footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
         
-        # 保存到内存
-        file_stream = io.BytesIO()
+        # 写入输出流（默认超过阈值后转存磁盘）
+        file_stream = output if output is not None else spooled_output()
         doc.save(file_stream)
         file_stream.seek(0)
         
         return file_stream
     
-    def export_wps_to_pdf(self, wps: WPS) -> io.BytesIO:
+    def export_wps_to_pdf(self, wps: WPS, output: Optional[BinaryIO] = None) -> BinaryIO:
         """
         导出WPS为PDF文档
         
         Args:
             wps: WPS对象
+            output: 输出文件对象，未指定时使用 spooled_output()
             
         Returns:
-            PDF文档的BytesIO流
+            写入PDF文档并回到开头的输出流
         """
         if not WEASYPRINT_AVAILABLE:
             raise ImportError("weasyprint未安装，请运行: pip install weasyprint")
@@ -105,14 +132,32 @@ class DocumentExportService:
         full_html = self._generate_pdf_html(wps, html_content)
         
         # 生成PDF
-        pdf_bytes = HTML(string=full_html).write_pdf()
+        file_stream = output if output is not None else spooled_output()
+        print_stylesheets.write_pdf(full_html, file_stream)
+        file_stream.seek(0)
         
-        return io.BytesIO(pdf_bytes)
+        return file_stream
     
     def _html_to_word(self, doc: Document, html_content: str, style: str = "blue_white"):
         """
         将HTML内容转换为Word文档
 
+        优先使用基于 lxml 的单次遍历转换器，lxml 不可用时回退到 BeautifulSoup 转换流程。
+
+        Args:
+            doc: Word文档对象
+            html_content: HTML内容
+            style: 表格风格
+        """
+        if LXML_CONVERTER_AVAILABLE:
+            HtmlDocxConverter(doc, style=style).convert(html_content)
+        else:
+            self._html_to_word_legacy(doc, html_content, style=style)
+
+    def _html_to_word_legacy(self, doc: Document, html_content: str, style: str = "blue_white"):
+        """
+        将HTML内容转换为Word文档（BeautifulSoup + html.parser）
+
         Args:
             doc: Word文档对象
             html_content: HTML内容
@@ -126,21 +171,13 @@ class DocumentExportService:
             # 如果没有body标签，就处理整个文档
             body = soup
 
-        # 统计HTML中的图片数量
-        all_imgs = soup.find_all('img')
-        print(f"[Word导出] HTML中总共有 {len(all_imgs)} 张图片")
-        for idx, img in enumerate(all_imgs):
-            img_src = img.get('src', '')
-            print(f"[Word导出] 图片{idx}: {img_src[:100] if img_src else 'NO SRC'}...")
-            # 检查图片是否在表格内
-            parent = img.parent
-            in_table = False
-            while parent:
-                if parent.name == 'table':
-                    in_table = True
-                    break
-                parent = parent.parent
-            print(f"[Word导出] 图片{idx}在表格内: {in_table}")
+        # 并发预取全部网络图片（表格内图片按单元格宽度处理）
+        images = [
+            (img.get('src', ''), CELL_IMAGE_WIDTH_INCHES if img.find_parent('table') else BODY_IMAGE_WIDTH_INCHES)
+            for img in soup.find_all('img')
+        ]
+        print(f"[Word导出] HTML中总共有 {len(images)} 张图片")
+        image_pipeline.prefetch(images)
 
         # 递归处理所有顶层元素
         self._process_elements(doc, body.children, inside_table=False, style=style)
@@ -227,88 +264,14 @@ class DocumentExportService:
             doc: Word文档对象
             img_element: BeautifulSoup图片元素
         """
-        import requests
-        import io
-        from urllib.parse import urlparse
-
-        try:
-            # 获取图片URL
-            img_src = img_element.get('src', '')
-            print(f"[Word导出] img_element.get('src'): {img_src[:100] if img_src else 'EMPTY'}")
-
-            if not img_src:
-                print(f"[Word导出] 图片没有src属性，跳过")
-                return
-
-            print(f"[Word导出] 处理图片: {img_src[:100]}...")
-
-            # 检查是否是base64图片
-            if img_src.startswith('data:image'):
-                # Base64图片
-                import base64
-                import re
-
-                # 提取base64数据 - 使用更灵活的方式处理
-                # 格式: data:image/png;base64,<base64数据>
-                try:
-                    # 找到逗号位置，分离header和base64数据
-                    comma_index = img_src.find(',')
-                    if comma_index == -1:
-                        print(f"[Word导出] base64图片格式错误，找不到逗号分隔符")
-                        return
-
-                    header = img_src[:comma_index]  # data:image/png;base64
-                    base64_data = img_src[comma_index + 1:]  # base64数据
-
-                    # 从header中提取图片格式
-                    format_match = re.search(r'image/(\w+)', header)
-                    image_format = format_match.group(1) if format_match else 'png'
-
-                    print(f"[Word导出] base64图片格式: {image_format}, 数据长度: {len(base64_data)}")
-
-                    if not base64_data or len(base64_data) == 0:
-                        print(f"[Word导出] base64数据为空")
-                        return
-
-                    # 解码base64数据
-                    image_data = base64.b64decode(base64_data)
-                    image_stream = io.BytesIO(image_data)
-
-                    # 添加图片到Word
-                    para = doc.add_paragraph()
-                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    run = para.add_run()
-                    run.add_picture(image_stream, width=Inches(5))
-                    print(f"[Word导出] 成功添加base64图片，大小: {len(image_data)} 字节")
-
-                except Exception as base64_error:
-                    print(f"[Word导出] base64解码失败: {str(base64_error)}")
-                    raise
-
-            elif img_src.startswith('http://') or img_src.startswith('https://'):
-                # 网络图片
-                response = requests.get(img_src, timeout=10)
-                if response.status_code == 200:
-                    image_stream = io.BytesIO(response.content)
-
-                    # 添加图片到Word
-                    para = doc.add_paragraph()
-                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    run = para.add_run()
-                    run.add_picture(image_stream, width=Inches(5))
-                    print(f"[Word导出] 成功添加网络图片")
-                else:
-                    print(f"[Word导出] 下载图片失败，状态码: {response.status_code}")
+        image_stream = self._load_image(img_element, BODY_IMAGE_WIDTH_INCHES)
+        if image_stream is None:
+            return
 
-            else:
-                # 本地文件路径（相对或绝对）
-                # 注意：这种情况下图片可能无法访问，因为路径可能是前端的路径
-                print(f"[Word导出] 跳过本地路径图片: {img_src}")
-
-        except Exception as e:
-            print(f"[Word导出] 添加图片到Word失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        para = doc.add_paragraph()
+        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = para.add_run()
+        run.add_picture(image_stream, width=Inches(BODY_IMAGE_WIDTH_INCHES))
 
     def _add_image_to_word_cell(self, cell, img_element):
         """
@@ -318,82 +281,41 @@ class DocumentExportService:
             cell: python-docx表格单元格对象
             img_element: BeautifulSoup图片元素
         """
-        import requests
-        import io
-        import base64
-        import re
-        from urllib.parse import urlparse
+        image_stream = self._load_image(img_element, CELL_IMAGE_WIDTH_INCHES)
+        if image_stream is None:
+            return
 
-        try:
-            # 获取图片URL
-            img_src = img_element.get('src', '')
-            print(f"[Word导出] 表格单元格图片src: {img_src[:100] if img_src else 'EMPTY'}")
-
-            if not img_src:
-                print(f"[Word导出] 表格单元格图片没有src属性，跳过")
-                return
-
-            # 检查是否是base64图片
-            if img_src.startswith('data:image'):
-                # Base64图片
-                try:
-                    # 找到逗号位置，分离header和base64数据
-                    comma_index = img_src.find(',')
-                    if comma_index == -1:
-                        print(f"[Word导出] 表格单元格base64图片格式错误，找不到逗号分隔符")
-                        return
-
-                    header = img_src[:comma_index]
-                    base64_data = img_src[comma_index + 1:]
-
-                    # 从header中提取图片格式
-                    format_match = re.search(r'image/(\w+)', header)
-                    image_format = format_match.group(1) if format_match else 'png'
-
-                    print(f"[Word导出] 表格单元格base64图片格式: {image_format}, 数据长度: {len(base64_data)}")
-
-                    if not base64_data or len(base64_data) == 0:
-                        print(f"[Word导出] 表格单元格base64数据为空")
-                        return
-
-                    # 解码base64数据
-                    image_data = base64.b64decode(base64_data)
-                    image_stream = io.BytesIO(image_data)
-
-                    # 添加图片到单元格
-                    para = cell.paragraphs[0] if cell.paragraphs else cell.add_paragraph()
-                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    run = para.add_run()
-                    run.add_picture(image_stream, width=Inches(3))  # 单元格内图片宽度较小
-                    print(f"[Word导出] 成功添加表格单元格base64图片，大小: {len(image_data)} 字节")
-
-                except Exception as base64_error:
-                    print(f"[Word导出] 表格单元格base64解码失败: {str(base64_error)}")
-                    raise
-
-            elif img_src.startswith('http://') or img_src.startswith('https://'):
-                # 网络图片
-                response = requests.get(img_src, timeout=10)
-                if response.status_code == 200:
-                    image_stream = io.BytesIO(response.content)
-
-                    # 添加图片到单元格
-                    para = cell.paragraphs[0] if cell.paragraphs else cell.add_paragraph()
-                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    run = para.add_run()
-                    run.add_picture(image_stream, width=Inches(3))
-                    print(f"[Word导出] 成功添加表格单元格网络图片")
-                else:
-                    print(f"[Word导出] 表格单元格下载图片失败，状态码: {response.status_code}")
+        para = cell.paragraphs[0] if cell.paragraphs else cell.add_paragraph()
+        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        run = para.add_run()
+        run.add_picture(image_stream, width=Inches(CELL_IMAGE_WIDTH_INCHES))
 
-            else:
-                # 本地文件路径
-                print(f"[Word导出] 跳过表格单元格本地路径图片: {img_src}")
+    def _load_image(self, img_element, width_inches: float) -> Optional[io.BytesIO]:
+        """
+        通过图片处理流程获取降采样后的图片
+
+        Args:
+            img_element: BeautifulSoup图片元素
+            width_inches: 嵌入宽度（英寸）
 
+        Returns:
+            io.BytesIO: 图片内容；没有src、本地路径或获取失败时返回 None
+        """
+        img_src = img_element.get('src', '')
+        if not img_src:
+            print(f"[Word导出] 图片没有src属性，跳过")
+            return None
+
+        try:
+            image_stream = image_pipeline.get_image(img_src, width_inches)
         except Exception as e:
-            print(f"[Word导出] 添加图片到表格单元格失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            print(f"[Word导出] 处理图片失败: {str(e)}")
+            return None
+
+        if image_stream is None:
+            # 本地文件路径（相对或绝对）可能是前端的路径，无法访问
+            print(f"[Word导出] 跳过无法获取的图片: {img_src[:100]}")
+        return image_stream
 
     def _is_inside_table(self, element) -> bool:
         """
@@ -728,73 +650,13 @@ class DocumentExportService:
             content: HTML内容
             
         Returns:
-            完整的HTML字符串
+            完整的HTML字符串（打印样式由 print_stylesheets 在渲染时提供）
         """
         return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="UTF-8">
-            <style>
-                @page {{
-                    size: A4;
-                    margin: 2cm;
-                    @bottom-center {{
-                        content: "第 " counter(page) " 页";
-                    }}
-                }}
-                body {{
-                    font-family: 'SimSun', 'Microsoft YaHei', 'Arial', sans-serif;
-                    font-size: 12pt;
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                h1 {{
-                    text-align: center;
-                    font-size: 24pt;
-                    margin-bottom: 10pt;
-                    color: #000;
-                }}
-                h2 {{
-                    font-size: 18pt;
-                    background-color: #f0f0f0;
-                    padding: 8pt;
-                    margin-top: 15pt;
-                    color: #000;
-                }}
-                h3 {{
-                    font-size: 14pt;
-                    margin-top: 10pt;
-                    color: #000;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 10pt 0;
-                    page-break-inside: avoid;
-                }}
-                td, th {{
-                    border: 1px solid #000;
-                    padding: 6pt 8pt;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f0f0f0;
-                    font-weight: bold;
-                }}
-                img {{
-                    max-width: 100%;
-                    page-break-inside: avoid;
-                }}
-                p {{
-                    margin: 0.5em 0;
-                }}
-                hr {{
-                    border: none;
-                    border-top: 2px solid #ddd;
-                    margin: 2em 0;
-                }}
-            </style>
         </head>
         <body>
             {content}
@@ -845,7 +707,12 @@ class DocumentExportService:
 
     # ==================== PQR导出方法 ====================
 
-    def export_pqr_to_word(self, pqr: PQR, style: str = "blue_white") -> io.BytesIO:
+    def export_pqr_to_word(
+        self,
+        pqr: PQR,
+        style: str = "blue_white",
+        output: Optional[BinaryIO] = None
+    ) -> BinaryIO:
         """
         导出PQR为Word文档
 
@@ -855,9 +722,10 @@ class DocumentExportService:
                 - "blue_white": 蓝白相间风格（默认）
                 - "plain": 纯白风格
                 - "classic": 经典风格（深蓝标题）
+            output: 输出文件对象，未指定时使用 spooled_output()
 
         Returns:
-            Word文档的BytesIO流
+            写入Word文档并回到开头的输出流
         """
         if not DOCX_AVAILABLE:
             raise ImportError("python-docx未安装，请运行: pip install python-docx")
@@ -886,22 +754,23 @@ class DocumentExportService:
         footer_para.text = f"打印日期: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
         footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-        # 保存到内存
-        file_stream = io.BytesIO()
+        # 写入输出流（默认超过阈值后转存磁盘）
+        file_stream = output if output is not None else spooled_output()
         doc.save(file_stream)
         file_stream.seek(0)
 
         return file_stream
 
-    def export_pqr_to_pdf(self, pqr: PQR) -> io.BytesIO:
+    def export_pqr_to_pdf(self, pqr: PQR, output: Optional[BinaryIO] = None) -> BinaryIO:
         """
         导出PQR为PDF文档
 
         Args:
             pqr: PQR对象
+            output: 输出文件对象，未指定时使用 spooled_output()
 
         Returns:
-            PDF文档的BytesIO流
+            写入PDF文档并回到开头的输出流
         """
         if not WEASYPRINT_AVAILABLE:
             raise ImportError("weasyprint未安装，请运行: pip install weasyprint")
@@ -913,9 +782,11 @@ class DocumentExportService:
         full_html = self._generate_pdf_html_for_pqr(pqr, html_content)
 
         # 生成PDF
-        pdf_bytes = HTML(string=full_html).write_pdf()
+        file_stream = output if output is not None else spooled_output()
+        print_stylesheets.write_pdf(full_html, file_stream)
+        file_stream.seek(0)
 
-        return io.BytesIO(pdf_bytes)
+        return file_stream
 
     def _generate_default_pqr_html(self, pqr: PQR) -> str:
         """
@@ -973,73 +844,13 @@ class DocumentExportService:
             content: HTML内容
 
         Returns:
-            完整的HTML字符串
+            完整的HTML字符串（打印样式由 print_stylesheets 在渲染时提供）
         """
         return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="UTF-8">
-            <style>
-                @page {{
-                    size: A4;
-                    margin: 2cm;
-                    @bottom-center {{
-                        content: "第 " counter(page) " 页";
-                    }}
-                }}
-                body {{
-                    font-family: 'SimSun', 'Microsoft YaHei', 'Arial', sans-serif;
-                    font-size: 12pt;
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                h1 {{
-                    text-align: center;
-                    font-size: 24pt;
-                    margin-bottom: 10pt;
-                    color: #000;
-                }}
-                h2 {{
-                    font-size: 18pt;
-                    background-color: #f0f0f0;
-                    padding: 8pt;
-                    margin-top: 15pt;
-                    color: #000;
-                }}
-                h3 {{
-                    font-size: 14pt;
-                    margin-top: 10pt;
-                    color: #000;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 10pt 0;
-                    page-break-inside: avoid;
-                }}
-                td, th {{
-                    border: 1px solid #000;
-                    padding: 6pt 8pt;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f0f0f0;
-                    font-weight: bold;
-                }}
-                img {{
-                    max-width: 100%;
-                    page-break-inside: avoid;
-                }}
-                p {{
-                    margin: 0.5em 0;
-                }}
-                hr {{
-                    border: none;
-                    border-top: 2px solid #ddd;
-                    margin: 2em 0;
-                }}
-            </style>
         </head>
         <body>
             {content}
@@ -1049,7 +860,12 @@ class DocumentExportService:
 
     # ==================== pPQR导出方法 ====================
 
-    def export_ppqr_to_word(self, ppqr: PPQR, style: str = "blue_white") -> io.BytesIO:
+    def export_ppqr_to_word(
+        self,
+        ppqr: PPQR,
+        style: str = "blue_white",
+        output: Optional[BinaryIO] = None
+    ) -> BinaryIO:
         """
         导出pPQR为Word文档
 
@@ -1059,9 +875,10 @@ class DocumentExportService:
                 - "blue_white": 蓝白相间风格（默认）
                 - "plain": 纯白风格
                 - "classic": 经典风格（深蓝标题）
+            output: 输出文件对象，未指定时使用 spooled_output()
 
         Returns:
-            Word文档的BytesIO流
+            写入Word文档并回到开头的输出流
         """
         if not DOCX_AVAILABLE:
             raise ImportError("python-docx未安装，请运行: pip install python-docx")
@@ -1091,8 +908,8 @@ class DocumentExportService:
             footer_para.text = f"打印日期: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
             footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-            # 保存到内存
-            file_stream = io.BytesIO()
+            # 写入输出流（默认超过阈值后转存磁盘）
+            file_stream = output if output is not None else spooled_output()
             doc.save(file_stream)
             file_stream.seek(0)
 
@@ -1105,15 +922,16 @@ class DocumentExportService:
             print(f"[pPQR导出Word错误] 堆栈跟踪:\n{traceback.format_exc()}")
             raise
 
-    def export_ppqr_to_pdf(self, ppqr: PPQR) -> io.BytesIO:
+    def export_ppqr_to_pdf(self, ppqr: PPQR, output: Optional[BinaryIO] = None) -> BinaryIO:
         """
         导出pPQR为PDF文档
 
         Args:
             ppqr: PPQR对象
+            output: 输出文件对象，未指定时使用 spooled_output()
 
         Returns:
-            PDF文档的BytesIO流
+            写入PDF文档并回到开头的输出流
         """
         if not WEASYPRINT_AVAILABLE:
             raise ImportError("weasyprint未安装，请运行: pip install weasyprint")
@@ -1125,9 +943,11 @@ class DocumentExportService:
         full_html = self._generate_pdf_html_for_ppqr(ppqr, html_content)
 
         # 生成PDF
-        pdf_bytes = HTML(string=full_html).write_pdf()
+        file_stream = output if output is not None else spooled_output()
+        print_stylesheets.write_pdf(full_html, file_stream)
+        file_stream.seek(0)
 
-        return io.BytesIO(pdf_bytes)
+        return file_stream
 
     def _generate_default_ppqr_html(self, ppqr: PPQR) -> str:
         """
@@ -1205,73 +1025,13 @@ class DocumentExportService:
             content: HTML内容
 
         Returns:
-            完整的HTML字符串
+            完整的HTML字符串（打印样式由 print_stylesheets 在渲染时提供）
         """
         return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="UTF-8">
-            <style>
-                @page {{
-                    size: A4;
-                    margin: 2cm;
-                    @bottom-center {{
-                        content: "第 " counter(page) " 页";
-                    }}
-                }}
-                body {{
-                    font-family: 'SimSun', 'Microsoft YaHei', 'Arial', sans-serif;
-                    font-size: 12pt;
-                    line-height: 1.6;
-                    color: #333;
-                }}
-                h1 {{
-                    text-align: center;
-                    font-size: 24pt;
-                    margin-bottom: 10pt;
-                    color: #000;
-                }}
-                h2 {{
-                    font-size: 18pt;
-                    background-color: #f0f0f0;
-                    padding: 8pt;
-                    margin-top: 15pt;
-                    color: #000;
-                }}
-                h3 {{
-                    font-size: 14pt;
-                    margin-top: 10pt;
-                    color: #000;
-                }}
-                table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 10pt 0;
-                    page-break-inside: avoid;
-                }}
-                td, th {{
-                    border: 1px solid #000;
-                    padding: 6pt 8pt;
-                    text-align: left;
-                }}
-                th {{
-                    background-color: #f0f0f0;
-                    font-weight: bold;
-                }}
-                img {{
-                    max-width: 100%;
-                    page-break-inside: avoid;
-                }}
-                p {{
-                    margin: 0.5em 0;
-                }}
-                hr {{
-                    border: none;
-                    border-top: 2px solid #ddd;
-                    margin: 2em 0;
-                }}
-            </style>
         </head>
         <body>
             {content}
@@ -0,0 +1,320 @@
+"""
+HTML -> Word 转换器
+Single-pass lxml based converter from document HTML to python-docx elements.
+
+原转换流程使用纯 Python 的 html.parser 解析，并为调试日志对每张图片
+逐级查找父节点，段落/表格处理时又反复扫描子树（_is_inside_table、
+_is_nested_table、find_all）。本转换器：
+
+1. 使用 lxml（libxml2）解析一次
+2. 一次遍历标注上下文：哪些表格包含嵌套表格、每张图片是否位于表格内
+   （决定嵌入宽度，同时用于并发预取网络图片）
+3. 一次遍历顶层元素直接生成Word段落/表格，输出与原转换流程一致
+
+表格风格、单元格配色与 DocumentExportService 原有规则相同。
+"""
+import logging
+from typing import Iterator, List, Optional, Set, Tuple
+
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Inches, Pt
+from lxml import etree, html as lxml_html
+
+from app.services.image_pipeline import (
+    BODY_IMAGE_WIDTH_INCHES,
+    CELL_IMAGE_WIDTH_INCHES,
+    image_pipeline,
+)
+
+logger = logging.getLogger(__name__)
+
+# 需要递归处理子元素的容器
+_CONTAINER_TAGS = ("div", "section", "article")
+
+
+def cell_background_color(style: str, is_label: bool, row_idx: int) -> Optional[str]:
+    """
+    根据风格获取单元格背景色
+
+    Args:
+        style: 表格风格
+        is_label: 是否是标签列
+        row_idx: 行索引
+
+    Returns:
+        背景色（十六进制，如 'D9E2F3'），如果不需要背景色则返回 None
+    """
+    if style == "plain":
+        # 纯白风格：无背景色
+        return None
+    if style == "classic":
+        # 经典风格：标签列深蓝色，值列白色
+        return '4472C4' if is_label else None
+    # blue_white（默认）：标签列浅蓝色，值列奇数行更浅的蓝色
+    if is_label:
+        return 'D9E2F3'
+    return 'EBF1FA' if row_idx % 2 == 1 else None
+
+
+def _text(element) -> str:
+    """元素的文本内容（不含注释）"""
+    return element.text_content()
+
+
+def _children(element) -> Iterator:
+    """元素的子元素（跳过注释和处理指令）"""
+    for child in element:
+        if isinstance(child.tag, str):
+            yield child
+
+
+def _shade(word_cell, color: Optional[str]) -> None:
+    """设置单元格背景色"""
+    if color:
+        shading_elm = OxmlElement('w:shd')
+        shading_elm.set(qn('w:fill'), color)
+        word_cell._element.get_or_add_tcPr().append(shading_elm)
+
+
+def _format_runs(word_cell, size: int, bold: bool) -> None:
+    """设置单元格内所有文字的字号（及加粗）"""
+    for paragraph in word_cell.paragraphs:
+        for run in paragraph.runs:
+            if bold:
+                run.font.bold = True
+            run.font.size = Pt(size)
+
+
+class HtmlDocxConverter:
+    """单次解析、单次遍历的 HTML -> Word 转换器"""
+
+    def __init__(self, doc, style: str = "blue_white"):
+        self.doc = doc
+        self.style = style
+        # 上下文标注结果
+        self._nested_tables: Set = set()
+        self._images: List[Tuple[str, float]] = []
+
+    def convert(self, html_content: str) -> None:
+        """将HTML内容转换为Word文档"""
+        if not html_content or not html_content.strip():
+            return
+
+        # 内联 base64 图片可使文档达到数十MB，需解除 libxml2 的默认大小限制，否则超出部分被截断
+        parser = lxml_html.HTMLParser(huge_tree=True)
+        root = lxml_html.document_fromstring(html_content, parser=parser)
+        body = root.find("body")
+        if body is None:
+            body = root
+
+        self._annotate(body)
+        logger.debug(f"[Word导出] HTML中总共有 {len(self._images)} 张图片")
+        image_pipeline.prefetch(self._images)
+
+        self._emit_elements(body)
+
+    # ------------------------------------------------------------------
+    # 上下文标注
+    # ------------------------------------------------------------------
+
+    def _annotate(self, body) -> None:
+        """一次遍历：标记包含嵌套表格的表格，收集图片及其嵌入宽度"""
+        table_stack: List = []
+        for event, element in etree.iterwalk(body, events=("start", "end")):
+            tag = element.tag
+            if tag == "table":
+                if event == "start":
+                    self._nested_tables.update(table_stack)
+                    table_stack.append(element)
+                else:
+                    table_stack.pop()
+            elif tag == "img" and event == "start":
+                width = CELL_IMAGE_WIDTH_INCHES if table_stack else BODY_IMAGE_WIDTH_INCHES
+                self._images.append((element.get("src", ""), width))
+
+    # ------------------------------------------------------------------
+    # 生成Word元素
+    # ------------------------------------------------------------------
+
+    def _emit_elements(self, parent) -> None:
+        """处理顶层元素（容器元素递归处理其子元素）"""
+        doc = self.doc
+        for element in _children(parent):
+            tag = element.tag
+
+            if tag == "h1":
+                heading = doc.add_heading(_text(element), level=1)
+                heading.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+            elif tag == "h2":
+                doc.add_heading(_text(element), level=2)
+
+            elif tag == "h3":
+                doc.add_heading(_text(element), level=3)
+
+            elif tag == "p":
+                text = _text(element).strip()
+                if text:
+                    para = doc.add_paragraph(text)
+                    element_style = element.get("style", "")
+                    if 'text-align: center' in element_style or 'text-align:center' in element_style:
+                        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                    elif 'text-align: right' in element_style or 'text-align:right' in element_style:
+                        para.alignment = WD_ALIGN_PARAGRAPH.RIGHT
+
+            elif tag == "table":
+                if element in self._nested_tables:
+                    self._emit_parallel_table(element)
+                else:
+                    self._emit_table(element)
+
+            elif tag == "hr":
+                doc.add_paragraph('_' * 50)
+
+            elif tag == "img":
+                self._emit_image(element, BODY_IMAGE_WIDTH_INCHES)
+
+            elif tag in _CONTAINER_TAGS:
+                self._emit_elements(element)
+
+    def _emit_image(self, element, width_inches: float, word_cell=None) -> None:
+        """嵌入图片（正文段落或表格单元格）"""
+        img_src = element.get("src", "")
+        if not img_src:
+            return
+        try:
+            image_stream = image_pipeline.get_image(img_src, width_inches)
+        except Exception as e:
+            logger.warning(f"[Word导出] 处理图片失败: {e}")
+            return
+        if image_stream is None:
+            logger.info(f"[Word导出] 跳过无法获取的图片: {img_src[:100]}")
+            return
+
+        if word_cell is None:
+            para = self.doc.add_paragraph()
+        else:
+            para = word_cell.paragraphs[0] if word_cell.paragraphs else word_cell.add_paragraph()
+        para.alignment = WD_ALIGN_PARAGRAPH.CENTER
+        para.add_run().add_picture(image_stream, width=Inches(width_inches))
+
+    def _emit_table(self, table_element) -> None:
+        """普通表格，支持colspan和rowspan"""
+        rows = [list(row.iter("td", "th")) for row in table_element.iter("tr")]
+        if not rows:
+            return
+
+        max_cols = max(sum(int(cell.get("colspan", 1)) for cell in cells) for cells in rows)
+        if max_cols == 0:
+            return
+
+        table = self.doc.add_table(rows=len(rows), cols=max_cols)
+        table.style = 'Light Grid Accent 1'
+        word_rows = table.rows
+
+        for row_idx, cells in enumerate(rows):
+            # 每行取一次单元格；本行之前的合并已完成，本行内的合并只影响已处理的列
+            row_cells = word_rows[row_idx].cells
+            col_idx = 0
+
+            for cell in cells:
+                colspan = int(cell.get("colspan", 1))
+                rowspan = int(cell.get("rowspan", 1))
+                if col_idx >= len(row_cells):
+                    break
+
+                cell_text = _text(cell).strip()
+                word_cell = row_cells[col_idx]
+                word_cell.text = ''
+
+                for img in cell.iter("img"):
+                    self._emit_image(img, CELL_IMAGE_WIDTH_INCHES, word_cell=word_cell)
+
+                if cell_text:
+                    para = word_cell.paragraphs[0] if word_cell.paragraphs else word_cell.add_paragraph()
+                    para.text = cell_text
+
+                # 表头与第一列（标签列）加粗
+                _format_runs(word_cell, 10, bold=cell.tag == "th" or col_idx == 0)
+                _shade(word_cell, cell_background_color(self.style, col_idx == 0, row_idx))
+
+                if colspan > 1:
+                    try:
+                        end_col = min(col_idx + colspan - 1, len(row_cells) - 1)
+                        if end_col > col_idx:
+                            word_cell.merge(row_cells[end_col])
+                    except Exception as e:
+                        logger.warning(f"[Word导出] 合并列失败: {e}")
+
+                if rowspan > 1:
+                    try:
+                        end_row = min(row_idx + rowspan - 1, len(word_rows) - 1)
+                        if end_row > row_idx:
+                            word_cell.merge(word_rows[end_row].cells[col_idx])
+                    except Exception as e:
+                        logger.warning(f"[Word导出] 合并行失败: {e}")
+
+                col_idx += colspan
+
+    def _emit_parallel_table(self, table_element) -> None:
+        """嵌套表格：将并列的模块转换为一个大表格，每个模块占两列（标签 + 值）"""
+        tbody = table_element.find("tbody")
+        outer_rows = (tbody if tbody is not None else table_element).findall("tr")
+        if not outer_rows:
+            return
+
+        # 只处理第一行（并列模块通常在一行中）
+        outer_cells = [cell for cell in _children(outer_rows[0]) if cell.tag in ("td", "th")]
+        if not outer_cells:
+            return
+
+        modules = []
+        for col_idx, cell in enumerate(outer_cells):
+            title = None
+            module_rows = []
+            for element in _children(cell):
+                if element.tag == "h3":
+                    title = _text(element).strip()
+                elif element.tag in ("div", "table"):
+                    inner_table = element if element.tag == "table" else next(element.iter("table"), None)
+                    if inner_table is None:
+                        continue
+                    for row in inner_table.iter("tr"):
+                        cells = list(row.iter("td", "th"))
+                        if len(cells) >= 2:
+                            module_rows.append((_text(cells[0]).strip(), _text(cells[1]).strip()))
+            modules.append((title or f'模块 {col_idx + 1}', module_rows))
+
+        total_cols = len(modules) * 2
+        total_rows = max(len(module_rows) for _, module_rows in modules) + 1
+
+        word_table = self.doc.add_table(rows=total_rows, cols=total_cols)
+        word_table.style = 'Table Grid'
+        word_rows = word_table.rows
+        row_cells = [row.cells for row in word_rows]
+
+        for module_idx, (title, module_rows) in enumerate(modules):
+            col_offset = module_idx * 2
+
+            # 标题行：合并两列
+            title_cell = row_cells[0][col_offset]
+            title_cell.merge(row_cells[0][col_offset + 1])
+            title_cell.text = title
+            for paragraph in title_cell.paragraphs:
+                for run in paragraph.runs:
+                    run.font.bold = True
+                    run.font.size = Pt(12)
+                paragraph.alignment = 1  # 居中对齐
+
+            for row_idx, (label, value) in enumerate(module_rows):
+                label_cell = row_cells[row_idx + 1][col_offset]
+                label_cell.text = label
+                _format_runs(label_cell, 10, bold=True)
+                _shade(label_cell, cell_background_color(self.style, True, row_idx))
+
+                value_cell = row_cells[row_idx + 1][col_offset + 1]
+                value_cell.text = value
+                _format_runs(value_cell, 10, bold=False)
+                _shade(value_cell, cell_background_color(self.style, False, row_idx))
@@ -1,12 +1,16 @@
 """
 Email service for sending verification codes and notifications.
-Supports multiple email providers: SMTP, SendGrid, Aliyun DirectMail.
+Supports multiple email providers: SMTP (pooled connections), SendGrid, Aliyun DirectMail,
+plus a local provider that only records messages (tests / development).
 """
 import smtplib
 import logging
+import queue
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 from app.core.config import settings
@@ -14,14 +18,150 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of logged-in SMTP connections.
+
+    Connections are reused across messages instead of paying the TCP, STARTTLS
+    and AUTH round trips for every email. Idle connections are checked with
+    NOOP before reuse and recycled after a number of messages, since most
+    servers drop long-lived sessions.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        size: int = 2,
+        timeout: float = 10,
+        max_idle_seconds: float = 60,
+        max_messages: int = 100
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.max_messages = max_messages
+
+        self._slots = threading.BoundedSemaphore(size)
+        # Idle connections as (server, last_used, messages_sent); LIFO keeps hot ones in use
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+
+        # Metrics
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self.reused = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        server.starttls()
+        server.login(self.user, self.password)
+        self.connections_opened += 1
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP) -> None:
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _checkout(self):
+        """Take a live idle connection, or open a new one."""
+        while True:
+            try:
+                server, last_used, sent = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), 0
+            if time.monotonic() - last_used > self.max_idle_seconds:
+                try:
+                    if server.noop()[0] != 250:
+                        raise smtplib.SMTPServerDisconnected("NOOP failed")
+                except Exception:
+                    self._close(server)
+                    continue
+            self.reused += 1
+            return server, sent
+
+    def send_message(self, msg) -> None:
+        """Send a message over a pooled connection (one reconnect on a dropped session)."""
+        with self._slots:
+            server, sent = self._checkout()
+            try:
+                try:
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # The server closed an idle session between NOOP checks
+                    self._close(server)
+                    server, sent = self._connect(), 0
+                    server.send_message(msg)
+            except Exception:
+                self._close(server)
+                raise
+
+            self.messages_sent += 1
+            sent += 1
+            if sent >= self.max_messages:
+                self._close(server)
+            else:
+                self._idle.put((server, time.monotonic(), sent))
+
+    def close_all(self) -> None:
+        """Close all idle connections."""
+        while True:
+            try:
+                server, _, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(server)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "idle": self._idle.qsize(),
+            "connections_opened": self.connections_opened,
+            "messages_sent": self.messages_sent,
+            "reused": self.reused,
+        }
+
+
 class EmailService:
     """Email service for sending emails via different providers."""
 
     def __init__(self):
         """Initialize email service."""
         self.provider = getattr(settings, 'EMAIL_PROVIDER', 'smtp')
+        self._smtp_pool: Optional[SMTPConnectionPool] = None
+        self._smtp_pool_lock = threading.Lock()
+        # Messages captured by the local provider (tests / development)
+        self.outbox: List[Dict[str, Any]] = []
         logger.info(f"Email service initialized with provider: {self.provider}")
 
+    @property
+    def smtp_pool(self) -> SMTPConnectionPool:
+        """Shared SMTP connection pool (created on first use)."""
+        with self._smtp_pool_lock:
+            if self._smtp_pool is None:
+                self._smtp_pool = SMTPConnectionPool(
+                    host=settings.SMTP_SERVER,
+                    port=settings.SMTP_PORT,
+                    user=settings.SMTP_USER,
+                    password=settings.SMTP_PASSWORD,
+                    size=settings.SMTP_POOL_SIZE,
+                    timeout=settings.SMTP_TIMEOUT,
+                    max_idle_seconds=settings.SMTP_POOL_MAX_IDLE_SECONDS,
+                    max_messages=settings.SMTP_POOL_MAX_MESSAGES
+                )
+            return self._smtp_pool
+
+    def close(self) -> None:
+        """Close pooled SMTP connections."""
+        if self._smtp_pool is not None:
+            self._smtp_pool.close_all()
+
     def send_verification_code(
         self,
         to_email: str,
@@ -109,6 +249,10 @@ class EmailService:
                 return self._send_via_aliyun(
                     to_email, subject, html_content, text_content, from_email, from_name
                 )
+            elif self.provider == 'local':
+                return self._send_via_local(
+                    to_email, subject, html_content, text_content, from_email, from_name
+                )
             else:
                 logger.error(f"Unknown email provider: {self.provider}")
                 return False
@@ -144,11 +288,8 @@ class EmailService:
             part2 = MIMEText(html_content, 'html', 'utf-8')
             msg.attach(part2)
             
-            # Send email
-            with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-                server.starttls()
-                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-                server.send_message(msg)
+            # Send email over a pooled, already authenticated connection
+            self.smtp_pool.send_message(msg)
             
             logger.info(f"Email sent successfully to {to_email} via SMTP")
             return True
@@ -157,6 +298,27 @@ class EmailService:
             logger.error(f"SMTP send failed: {str(e)}", exc_info=True)
             return False
 
+    def _send_via_local(
+        self,
+        to_email: str,
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        from_email: Optional[str] = None,
+        from_name: Optional[str] = None
+    ) -> bool:
+        """Record the email in the in-memory outbox instead of sending it."""
+        self.outbox.append({
+            "to": to_email,
+            "subject": subject,
+            "html": html_content,
+            "text": text_content,
+            "from": f"{from_name or settings.EMAILS_FROM_NAME} <{from_email or settings.EMAILS_FROM_EMAIL}>",
+            "sent_at": datetime.utcnow(),
+        })
+        logger.info(f"Email captured by local provider: {to_email} - {subject}")
+        return True
+
     def _send_via_sendgrid(
         self,
         to_email: str,
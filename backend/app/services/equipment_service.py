@@ -5,12 +5,13 @@ Equipment service for managing equipment, maintenance, and usage records.
 from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime, date, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, desc
 
 from app.models.user import User
 from app.models.equipment import Equipment, EquipmentMaintenance, EquipmentUsage
 from app.models.company import Company, CompanyEmployee
 from app.core.data_access import DataAccessMiddleware, WorkspaceContext, WorkspaceType, AccessLevel
+from app.core.statistics import grouped_statistics
 from app.services.quota_service import QuotaService
 
 
@@ -498,80 +499,42 @@ class EquipmentService:
             Dict[str, Any]: 统计信息
         """
         try:
-            # 构建基础查询 - 应用工作区过滤
-            query = self.db.query(Equipment).filter(Equipment.is_active == True)
+            # 构建过滤条件 - 应用工作区过滤
+            criteria = [Equipment.is_active == True]
 
-            # 应用工作区过滤
             if workspace_context.workspace_type == "personal":
-                query = query.filter(
+                criteria += [
                     Equipment.workspace_type == "personal",
                     Equipment.user_id == current_user.id
-                )
+                ]
             elif workspace_context.workspace_type == "company" or workspace_context.workspace_type == "enterprise":
                 if workspace_context.company_id:
-                    query = query.filter(
+                    criteria += [
                         Equipment.workspace_type == "enterprise",
                         Equipment.company_id == workspace_context.company_id
-                    )
+                    ]
                 else:
-                    query = query.filter(Equipment.id == -1)
+                    criteria.append(Equipment.id == -1)
             else:
-                query = query.filter(Equipment.id == -1)
-
-            # 总数统计
-            total_equipment = query.count()
-
-            # 状态统计 - 应用相同的工作区过滤
-            status_query = self.db.query(
-                Equipment.status,
-                func.count(Equipment.id).label('count')
-            ).filter(Equipment.is_active == True)
-
-            if workspace_context.workspace_type == "personal":
-                status_query = status_query.filter(
-                    Equipment.workspace_type == "personal",
-                    Equipment.user_id == current_user.id
-                )
-            elif workspace_context.workspace_type == "company" or workspace_context.workspace_type == "enterprise":
-                if workspace_context.company_id:
-                    status_query = status_query.filter(
-                        Equipment.workspace_type == "enterprise",
-                        Equipment.company_id == workspace_context.company_id
-                    )
-
-            status_stats = status_query.group_by(Equipment.status).all()
-            status_counts = {stat.status: stat.count for stat in status_stats}
-
-            # 类型统计 - 应用相同的工作区过滤
-            type_query = self.db.query(
-                Equipment.equipment_type,
-                func.count(Equipment.id).label('count')
-            ).filter(Equipment.is_active == True)
-
-            if workspace_context.workspace_type == "personal":
-                type_query = type_query.filter(
-                    Equipment.workspace_type == "personal",
-                    Equipment.user_id == current_user.id
-                )
-            elif workspace_context.workspace_type == "company" or workspace_context.workspace_type == "enterprise":
-                if workspace_context.company_id:
-                    type_query = type_query.filter(
-                        Equipment.workspace_type == "enterprise",
-                        Equipment.company_id == workspace_context.company_id
-                    )
-
-            type_stats = type_query.group_by(Equipment.equipment_type).all()
-            type_counts = {stat.equipment_type: stat.count for stat in type_stats}
-
-            # 维护提醒统计
-            upcoming_maintenance = query.filter(
-                Equipment.next_maintenance_date <= date.today() + timedelta(days=30)
-            ).count()
-
-            # 过期检验统计
-            overdue_inspection = query.filter(
-                Equipment.next_inspection_date < date.today()
-            ).count()
+                criteria.append(Equipment.id == -1)
+
+            # 总数、状态/类型分组、维护和检验提醒在一次查询中完成
+            stats = grouped_statistics(
+                self.db, Equipment, criteria,
+                dimensions={
+                    "status": Equipment.status,
+                    "type": Equipment.equipment_type,
+                },
+                conditions={
+                    "upcoming_maintenance": Equipment.next_maintenance_date <= date.today() + timedelta(days=30),
+                    "overdue_inspection": Equipment.next_inspection_date < date.today(),
+                }
+            )
+            total_equipment = stats.total
+            status_counts = stats.group("status")
+            type_counts = stats.group("type")
+            upcoming_maintenance = stats.conditions["upcoming_maintenance"]
+            overdue_inspection = stats.conditions["overdue_inspection"]
 
             return {
                 "total_equipment": total_equipment,
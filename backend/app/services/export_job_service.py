@@ -0,0 +1,356 @@
+"""
+批量导出任务服务
+Background jobs that render many WPS/PQR/pPQR documents into one ZIP.
+
+创建任务时按工作区过滤出可访问的文档ID；任务在后台一次查询取出
+全部文档，经渲染缓存 / 渲染进程池并行渲染，渲染结果依次写入磁盘上的
+ZIP文件，进度实时写回 export_jobs 表。
+
+任务与交互式导出共用渲染进程池：每个任务同时渲染的文档数为
+EXPORT_JOB_RENDER_CONCURRENCY，且不超过渲染进程数减一，运行中的任务
+至少为交互式导出留出一个渲染进程（渲染进程数为1时无法保留）。
+"""
+import asyncio
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_access import DataAccessMiddleware, WorkspaceContext
+from app.core.database import SessionLocal
+from app.models.export_job import ExportJob
+from app.models.ppqr import PPQR
+from app.models.pqr import PQR
+from app.models.user import User
+from app.models.wps import WPS
+from app.services.render_cache import FORMAT_EXTENSIONS, render_cache
+
+logger = logging.getLogger(__name__)
+
+# 文档类型 -> 模型
+DOCUMENT_MODELS: Dict[str, Any] = {
+    "wps": WPS,
+    "pqr": PQR,
+    "ppqr": PPQR,
+}
+
+# 请求中的导出格式 -> 渲染格式
+EXPORT_FORMATS = {
+    "pdf": "pdf",
+    "docx": "word",
+    "word": "word",
+}
+
+# 写入ZIP时的复制块大小
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# 文件名前缀
+_FILENAME_PREFIXES = {"wps": "WPS", "pqr": "PQR", "ppqr": "pPQR"}
+
+
+class ExportJobService:
+    """批量导出任务服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def create_job(
+        self,
+        document_type: str,
+        document_ids: List[int],
+        export_format: str,
+        current_user: User,
+        workspace_context: WorkspaceContext,
+        style: Optional[str] = None
+    ) -> ExportJob:
+        """
+        创建批量导出任务
+
+        Args:
+            document_type: 文档类型（wps / pqr / ppqr）
+            document_ids: 请求导出的文档ID
+            export_format: 导出格式（pdf / docx）
+            current_user: 当前用户
+            workspace_context: 工作区上下文
+            style: Word表格风格
+
+        Returns:
+            ExportJob: 新建的任务（只包含当前工作区可访问的文档）
+
+        Raises:
+            ValueError: 文档类型或导出格式不支持、文档数超过上限
+        """
+        if document_type not in DOCUMENT_MODELS:
+            raise ValueError(f"不支持的文档类型: {document_type}")
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"不支持的导出格式: {export_format}，可选: pdf, docx")
+
+        requested_ids = list(dict.fromkeys(document_ids))
+        if len(requested_ids) > settings.EXPORT_JOB_MAX_DOCUMENTS:
+            raise ValueError(f"单次最多导出 {settings.EXPORT_JOB_MAX_DOCUMENTS} 个文档")
+
+        accessible_ids = self.accessible_document_ids(
+            document_type, requested_ids, current_user, workspace_context
+        )
+
+        job = ExportJob(
+            id=str(uuid.uuid4()),
+            user_id=current_user.id,
+            workspace_type=workspace_context.workspace_type,
+            company_id=workspace_context.company_id,
+            document_type=document_type,
+            export_format=EXPORT_FORMATS[export_format],
+            style=style,
+            document_ids=accessible_ids,
+            status="pending",
+            total_count=len(accessible_ids)
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def accessible_document_ids(
+        self,
+        document_type: str,
+        document_ids: List[int],
+        current_user: User,
+        workspace_context: WorkspaceContext
+    ) -> List[int]:
+        """一次查询过滤出当前工作区可访问的文档ID（保持请求顺序）"""
+        if not document_ids:
+            return []
+        model = DOCUMENT_MODELS[document_type]
+        query = self.db.query(model.id).filter(model.id.in_(document_ids))
+        query = DataAccessMiddleware(self.db).apply_workspace_filter(
+            query, model, current_user, workspace_context
+        )
+        found = {row.id for row in query.all()}
+        return [document_id for document_id in document_ids if document_id in found]
+
+    def get_job(self, job_id: str, current_user: User) -> Optional[ExportJob]:
+        """获取当前用户的导出任务"""
+        return self.db.query(ExportJob).filter(
+            ExportJob.id == job_id,
+            ExportJob.user_id == current_user.id
+        ).first()
+
+    @staticmethod
+    def to_dict(job: ExportJob) -> Dict[str, Any]:
+        """任务状态响应"""
+        return {
+            "job_id": job.id,
+            "document_type": job.document_type,
+            "export_format": job.export_format,
+            "status": job.status,
+            "progress": job.progress,
+            "total_count": job.total_count,
+            "completed_count": job.completed_count,
+            "failed_count": job.failed_count,
+            "errors": job.errors or [],
+            "error_message": job.error_message,
+            "file_size": job.file_size,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    def cleanup_expired_jobs(self) -> Dict[str, int]:
+        """
+        清理过期的导出任务
+
+        删除超过 EXPORT_JOB_RETENTION_HOURS 的任务及其ZIP文件，
+        并把进程重启前未完成的任务标记为失败。
+        """
+        now = datetime.utcnow()
+        expired_before = now - timedelta(hours=settings.EXPORT_JOB_RETENTION_HOURS)
+        stale_before = now - timedelta(seconds=settings.EXPORT_JOB_STALE_SECONDS)
+
+        expired = self.db.query(ExportJob).filter(ExportJob.created_at < expired_before).all()
+        for job in expired:
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            self.db.delete(job)
+
+        stale_count = self.db.query(ExportJob).filter(
+            ExportJob.status.in_(["pending", "running"]),
+            ExportJob.created_at < stale_before
+        ).update({
+            ExportJob.status: "failed",
+            ExportJob.error_message: "任务执行中断",
+            ExportJob.finished_at: now
+        }, synchronize_session=False)
+
+        self.db.commit()
+        return {"deleted": len(expired), "interrupted": stale_count}
+
+
+# ---------------------------------------------------------------------------
+# 任务执行
+# ---------------------------------------------------------------------------
+
+def _update_job(job_id: str, **fields: Any) -> None:
+    """更新任务字段（独立会话，立即提交）"""
+    db = SessionLocal()
+    try:
+        db.query(ExportJob).filter(ExportJob.id == job_id).update(fields, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _load_job_documents(job_id: str) -> Optional[Dict[str, Any]]:
+    """读取任务参数，并一次查询取出全部待导出文档"""
+    db = SessionLocal()
+    try:
+        job = db.get(ExportJob, job_id)
+        if not job:
+            return None
+        model = DOCUMENT_MODELS[job.document_type]
+        documents = db.query(model).filter(model.id.in_(job.document_ids)).all()
+        by_id = {document.id: document for document in documents}
+        # 会话关闭后仍需读取文档列值，先从会话中分离
+        db.expunge_all()
+        return {
+            "document_type": job.document_type,
+            "export_format": job.export_format,
+            "style": job.style,
+            "documents": [by_id[i] for i in job.document_ids if i in by_id],
+            "missing": [i for i in job.document_ids if i not in by_id],
+        }
+    finally:
+        db.close()
+
+
+def _archive_name(document_type: str, document: Any, extension: str, used: set) -> str:
+    """ZIP内文件名（编号重复时追加ID）"""
+    number = getattr(document, f"{document_type}_number", None) or str(document.id)
+    safe_number = "".join(c if c not in '\\/:*?"<>|' else "_" for c in str(number))
+    name = f"{_FILENAME_PREFIXES[document_type]}_{safe_number}.{extension}"
+    if name in used:
+        name = f"{_FILENAME_PREFIXES[document_type]}_{safe_number}_{document.id}.{extension}"
+    used.add(name)
+    return name
+
+
+def _write_member(archive: zipfile.ZipFile, name: str, handle: BinaryIO) -> None:
+    """把已打开的渲染结果写入ZIP"""
+    with archive.open(name, "w") as member:
+        shutil.copyfileobj(handle, member, _COPY_CHUNK_SIZE)
+
+
+def _job_render_concurrency() -> int:
+    """单个任务同时渲染的文档数：至少为交互式导出留出一个渲染进程"""
+    return max(1, min(settings.EXPORT_JOB_RENDER_CONCURRENCY, settings.RENDER_POOL_WORKERS - 1))
+
+
+async def run_export_job(job_id: str) -> None:
+    """
+    执行批量导出任务
+
+    文档并行渲染（并发数见 _job_render_concurrency），每完成一个即写入ZIP
+    并更新进度；单个文档失败不影响其他文档。
+    """
+    params = await asyncio.to_thread(_load_job_documents, job_id)
+    if params is None:
+        logger.warning(f"[批量导出] 任务不存在: {job_id}")
+        return
+
+    document_type = params["document_type"]
+    fmt = params["export_format"]
+    extension = FORMAT_EXTENSIONS[fmt]
+    errors: List[Dict[str, Any]] = [
+        {"document_id": document_id, "error": "文档不存在"} for document_id in params["missing"]
+    ]
+
+    os.makedirs(settings.EXPORT_JOB_DIR, exist_ok=True)
+    final_path = os.path.join(settings.EXPORT_JOB_DIR, f"{job_id}.zip")
+    part_path = f"{final_path}.part"
+
+    await asyncio.to_thread(
+        _update_job, job_id, status="running", started_at=datetime.utcnow(), failed_count=len(errors)
+    )
+    logger.info(f"[批量导出] 任务开始: {job_id}, {document_type}/{fmt}, {len(params['documents'])} 个文档")
+
+    semaphore = asyncio.Semaphore(_job_render_concurrency())
+    zip_lock = asyncio.Lock()
+    used_names: set = set()
+    completed = 0
+
+    try:
+        with zipfile.ZipFile(part_path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+
+            async def export_one(document: Any) -> None:
+                nonlocal completed
+                try:
+                    # 渲染后立即打开：等待写入ZIP期间缓存文件可能被其他导出淘汰删除
+                    async with semaphore:
+                        handle = await render_cache.open_rendered(
+                            document_type, fmt, document, style=params["style"]
+                        )
+                    try:
+                        async with zip_lock:
+                            name = _archive_name(document_type, document, extension, used_names)
+                            # PDF/DOCX本身已压缩，直接存储；写入在线程中进行以免阻塞事件循环
+                            await asyncio.to_thread(_write_member, archive, name, handle)
+                    finally:
+                        handle.close()
+                    completed += 1
+                except Exception as e:
+                    logger.warning(f"[批量导出] {document_type} {document.id} 渲染失败: {e}")
+                    errors.append({"document_id": document.id, "error": str(e)})
+                await asyncio.to_thread(
+                    _update_job, job_id, completed_count=completed, failed_count=len(errors)
+                )
+
+            await asyncio.gather(*[export_one(document) for document in params["documents"]])
+
+        os.replace(part_path, final_path)
+        await asyncio.to_thread(
+            _update_job,
+            job_id,
+            status="completed" if completed or not errors else "failed",
+            completed_count=completed,
+            failed_count=len(errors),
+            errors=errors,
+            error_message=None if completed or not errors else "所有文档均导出失败",
+            file_path=final_path,
+            file_size=os.path.getsize(final_path),
+            finished_at=datetime.utcnow()
+        )
+        logger.info(f"[批量导出] 任务完成: {job_id}, 成功 {completed}, 失败 {len(errors)}")
+
+    except Exception as e:
+        logger.error(f"[批量导出] 任务失败: {job_id}: {e}", exc_info=True)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        await asyncio.to_thread(
+            _update_job,
+            job_id,
+            status="failed",
+            errors=errors,
+            error_message=str(e),
+            finished_at=datetime.utcnow()
+        )
+
+
+def dispatch_export_job(background_tasks: BackgroundTasks, job_id: str) -> None:
+    """
+    启动批量导出任务
+
+    EXPORT_JOBS_USE_WORKER 为真时投递到 Celery exports 队列，
+    否则在当前API进程中作为后台任务执行。
+    """
+    if settings.EXPORT_JOBS_USE_WORKER:
+        from app.tasks.celery_tasks import render_export_job
+
+        render_export_job.delay(job_id)
+    else:
+        background_tasks.add_task(run_export_job, job_id)
@@ -0,0 +1,303 @@
+"""
+导出图片处理
+Decode-once / downsample / cache pipeline for images embedded in exported Word documents.
+
+文档HTML中的图片多为整张照片的 base64 内联数据或网络地址，原先每次导出
+都要重新解码、逐张同步下载，并以原始分辨率嵌入Word。图片处理流程：
+
+- 内容寻址：内联图片按 data URI 的哈希、网络图片按 URL（加刷新周期）
+  计算键，处理结果存放在 EXPORT_IMAGE_CACHE_DIR，跨导出复用
+- 降采样：按嵌入宽度 × EXPORT_IMAGE_DPI 计算目标像素宽度，超出时缩小，
+  无透明通道的图片重新编码为JPEG
+- 并发下载：转换前先用共享的 HTTP 客户端并发预取全部未缓存的网络图片
+- 淘汰：缓存目录超过 EXPORT_IMAGE_CACHE_MAX_MB 时按最近访问时间淘汰
+
+图片处理在渲染进程中执行，每个进程持有一个全局实例。
+"""
+import base64
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.core.disk_cache import DiskLRU
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 处理逻辑版本：降采样/编码方式变化时递增，使旧缓存失效
+PROCESSOR_VERSION = 1
+
+# Word中图片的嵌入宽度（英寸）
+BODY_IMAGE_WIDTH_INCHES = 5
+CELL_IMAGE_WIDTH_INCHES = 3
+
+# 无需转码即可嵌入Word的格式
+_EMBEDDABLE_FORMATS = ("JPEG", "PNG")
+
+
+def is_remote_src(src: str) -> bool:
+    """是否为网络图片地址"""
+    return src.startswith("http://") or src.startswith("https://")
+
+
+class ImagePipeline:
+    """导出图片的解码、降采样和缓存"""
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int,
+        dpi: int,
+        jpeg_quality: int,
+        fetch_concurrency: int,
+        fetch_timeout: float,
+        max_source_bytes: int,
+        remote_ttl: int
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+        self.fetch_concurrency = fetch_concurrency
+        self.fetch_timeout = fetch_timeout
+        self.max_source_bytes = max_source_bytes
+        self.remote_ttl = remote_ttl
+
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+        self._lru = DiskLRU(directory, max_bytes)
+        # 当前文档预取的网络图片原始内容（URL -> bytes，失败为 None），下次预取时清空
+        self._prefetched: Dict[str, Optional[bytes]] = {}
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+
+    # ------------------------------------------------------------------
+    # 缓存键与存储
+    # ------------------------------------------------------------------
+
+    def target_width(self, width_inches: float) -> int:
+        """嵌入宽度对应的目标像素宽度"""
+        return max(1, int(width_inches * self.dpi))
+
+    def cache_key(self, src: str, target_px: int) -> Optional[str]:
+        """处理结果的缓存键；不支持的图片来源返回 None"""
+        if src.startswith("data:image"):
+            source = src
+        elif is_remote_src(src):
+            # 网络图片可能被替换：按刷新周期分段，每个周期最多重新下载一次
+            source = f"{src}|{int(time.time() // self.remote_ttl)}"
+        else:
+            return None
+        digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        parts = f"v{PROCESSOR_VERSION}|{target_px}|{self.jpeg_quality}|{digest}"
+        return hashlib.sha256(parts.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        """读取缓存的处理结果，命中时刷新访问时间"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+
+    def _put(self, key: str, content: bytes) -> None:
+        """写入处理结果（原子替换），必要时淘汰旧文件"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._lru.added(len(content))
+
+    # ------------------------------------------------------------------
+    # 图片来源
+    # ------------------------------------------------------------------
+
+    def _get_client(self) -> httpx.Client:
+        """懒加载共享的 HTTP 客户端（复用连接）"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = httpx.Client(
+                    timeout=self.fetch_timeout,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=self.fetch_concurrency)
+                )
+            return self._client
+
+    def _fetch(self, url: str) -> Optional[bytes]:
+        """下载网络图片，失败或超过大小上限时返回 None"""
+        try:
+            with self._get_client().stream("GET", url) as response:
+                if response.status_code != 200:
+                    logger.warning(f"[图片处理] 下载图片失败，状态码: {response.status_code}, {url}")
+                    return None
+                chunks = []
+                size = 0
+                for chunk in response.iter_bytes():
+                    size += len(chunk)
+                    if size > self.max_source_bytes:
+                        logger.warning(f"[图片处理] 图片超过大小上限，跳过: {url}")
+                        return None
+                    chunks.append(chunk)
+            self.fetched += 1
+            return b"".join(chunks)
+        except httpx.HTTPError as e:
+            logger.warning(f"[图片处理] 下载图片失败: {url}: {e}")
+            return None
+
+    def prefetch(self, images: Iterable[Tuple[str, float]]) -> None:
+        """
+        并发预取未缓存的网络图片
+
+        Args:
+            images: (src, 嵌入宽度英寸) 列表
+        """
+        urls = []
+        for src, width_inches in images:
+            if not is_remote_src(src) or src in urls:
+                continue
+            key = self.cache_key(src, self.target_width(width_inches))
+            if not os.path.exists(self._path(key)):
+                urls.append(src)
+
+        self._prefetched = {}
+        if not urls:
+            return
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.fetch_concurrency, len(urls))) as executor:
+            self._prefetched = dict(zip(urls, executor.map(self._fetch, urls)))
+        logger.info(
+            f"[图片处理] 预取 {len(urls)} 张网络图片: {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    def _load_source(self, src: str) -> Optional[bytes]:
+        """解码内联图片或获取网络图片的原始内容"""
+        if src.startswith("data:image"):
+            comma_index = src.find(",")
+            if comma_index == -1:
+                logger.warning("[图片处理] base64图片格式错误，找不到逗号分隔符")
+                return None
+            return base64.b64decode(src[comma_index + 1:]) or None
+        if src in self._prefetched:
+            return self._prefetched[src]
+        return self._fetch(src)
+
+    # ------------------------------------------------------------------
+    # 处理
+    # ------------------------------------------------------------------
+
+    def _process(self, raw: bytes, target_px: int) -> bytes:
+        """降采样到目标宽度；已足够小且可直接嵌入的图片保持原样"""
+        if not PIL_AVAILABLE:
+            return raw
+
+        with Image.open(io.BytesIO(raw)) as image:
+            source_format = image.format
+            if image.width <= target_px and source_format in _EMBEDDABLE_FORMATS:
+                return raw
+
+            target_height = max(1, round(image.height * target_px / image.width))
+            # JPEG 解码时直接按比例缩小，减少解码开销
+            image.draft("RGB", (target_px, target_height))
+            image = ImageOps.exif_transpose(image)
+            if image.width > target_px:
+                target_height = max(1, round(image.height * target_px / image.width))
+                image = image.resize((target_px, target_height), Image.LANCZOS)
+
+            output = io.BytesIO()
+            has_alpha = image.mode in ("RGBA", "LA") or (
+                image.mode == "P" and "transparency" in image.info
+            )
+            if has_alpha:
+                image.save(output, format="PNG", optimize=True)
+            else:
+                image.convert("RGB").save(
+                    output, format="JPEG", quality=self.jpeg_quality, optimize=True
+                )
+            return output.getvalue()
+
+    def get_image(self, src: str, width_inches: float) -> Optional[io.BytesIO]:
+        """
+        获取可嵌入Word的图片
+
+        Args:
+            src: 图片 src（data URI 或 http(s) 地址）
+            width_inches: 嵌入宽度（英寸）
+
+        Returns:
+            io.BytesIO: 处理后的图片；来源不支持或获取失败时返回 None
+        """
+        target_px = self.target_width(width_inches)
+        key = self.cache_key(src, target_px)
+        if key is None:
+            return None
+
+        content = self._get(key)
+        if content is not None:
+            self.hits += 1
+            return io.BytesIO(content)
+
+        self.misses += 1
+        raw = self._load_source(src)
+        if not raw:
+            return None
+
+        content = self._process(raw, target_px)
+        try:
+            self._put(key, content)
+        except OSError as e:
+            logger.warning(f"[图片处理] 写入图片缓存失败: {e}")
+        return io.BytesIO(content)
+
+    def stats(self) -> Dict[str, int]:
+        """图片处理指标（当前进程）"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetched": self.fetched,
+            "evictions": self._lru.evictions,
+        }
+
+
+# 全局图片处理实例（每个渲染进程一个）
+image_pipeline = ImagePipeline(
+    directory=settings.EXPORT_IMAGE_CACHE_DIR,
+    max_bytes=settings.EXPORT_IMAGE_CACHE_MAX_MB * 1024 * 1024,
+    dpi=settings.EXPORT_IMAGE_DPI,
+    jpeg_quality=settings.EXPORT_IMAGE_JPEG_QUALITY,
+    fetch_concurrency=settings.EXPORT_IMAGE_FETCH_CONCURRENCY,
+    fetch_timeout=settings.EXPORT_IMAGE_FETCH_TIMEOUT,
+    max_source_bytes=settings.EXPORT_IMAGE_MAX_SOURCE_MB * 1024 * 1024,
+    remote_ttl=settings.EXPORT_IMAGE_REMOTE_TTL_SECONDS
+)
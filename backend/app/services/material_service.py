@@ -13,6 +13,7 @@ from app.models.user import User
 from app.models.company import Company, CompanyEmployee, CompanyRole
 from app.schemas.material import MaterialCreate, MaterialUpdate
 from app.core.data_access import DataAccessMiddleware, WorkspaceContext
+from app.core.pagination import TotalMode, apply_keyset, count_query
 from app.services.quota_service import QuotaService
 
 
@@ -109,7 +110,9 @@ class MaterialService:
         limit: int = 100,
         search: Optional[str] = None,
         material_type: Optional[str] = None,
-        low_stock: Optional[bool] = None
+        low_stock: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = TotalMode.EXACT
     ) -> tuple[List[WeldingMaterial], int]:
         """
         获取焊材列表
@@ -117,11 +120,13 @@ class MaterialService:
         Args:
             current_user: 当前用户
             workspace_context: 工作区上下文
-            skip: 跳过记录数
+            skip: 跳过记录数（提供cursor时忽略）
             limit: 返回记录数
             search: 搜索关键词
             material_type: 焊材类型筛选
             low_stock: 低库存筛选
+            cursor: 上一页返回的分页游标
+            total_mode: 总数模式（exact精确 / estimated估算）
             
         Returns:
             tuple: (焊材列表, 总数)
@@ -167,15 +172,23 @@ class MaterialService:
                 )
             
             # 获取总数
-            total = query.count()
+            total = count_query(self.db, query, total_mode)
             
-            # 分页和排序
-            materials = query.order_by(WeldingMaterial.created_at.desc()).offset(skip).limit(limit).all()
+            # 分页和排序（游标模式不使用offset）
+            query = apply_keyset(query, WeldingMaterial, cursor)
+            if not cursor:
+                query = query.offset(skip)
+            materials = query.limit(limit).all()
             
             return materials, total
             
         except HTTPException:
             raise
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -3,17 +3,19 @@ Notification service for handling system notifications.
 """
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Sequence, Tuple
 from uuid import UUID
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from fastapi import HTTPException, status
 
 from app.models.user import User
 from app.models.subscription import Subscription
 from app.models.system_announcement import SystemAnnouncement
+from app.models.notification_ledger import NotificationLedger
 from app.core.database import get_db
 from app.core.config import settings
 
@@ -23,12 +25,92 @@ except ImportError:
     Depends = None
 
 
+# 到期提醒阶段（到期前天数）：每个阶段每个订阅周期只提醒一次
+EXPIRATION_REMINDER_STAGES = (1, 3, 7)
+
+# 通知登记键: (用户ID, 通知类型, 去重键)
+LedgerKey = Tuple[int, str, str]
+
+
 class NotificationService:
     """通知服务类"""
 
     def __init__(self, db: Session):
         self.db = db
 
+    # ==================== 批量通知流水线 ====================
+
+    def _stream(self, statement, batch_size: Optional[int] = None) -> Iterator[Sequence[Any]]:
+        """
+        通过服务端游标分批读取查询结果
+
+        读取使用独立连接，写入所在的会话可以按批提交而不关闭游标。
+        """
+        batch_size = batch_size or settings.NOTIFICATION_BATCH_SIZE
+        with self.db.get_bind().connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=batch_size
+            ).execute(statement)
+            for rows in result.partitions():
+                yield rows
+
+    def _publish(self, pending: Dict[LedgerKey, Dict[str, Any]]) -> int:
+        """
+        登记并批量创建一批通知，提交事务
+
+        已登记过的 (用户, 类型, 去重键) 跳过；登记与通知在同一事务中写入。
+
+        Args:
+            pending: 登记键 -> 公告字段
+
+        Returns:
+            int: 新创建的通知数
+        """
+        if not pending:
+            return 0
+
+        claim = pg_insert(NotificationLedger).values([
+            {"user_id": user_id, "kind": kind, "dedup_key": dedup_key}
+            for user_id, kind, dedup_key in pending
+        ]).on_conflict_do_nothing(
+            constraint="uq_notification_ledger"
+        ).returning(
+            NotificationLedger.user_id, NotificationLedger.kind, NotificationLedger.dedup_key
+        )
+        claimed = [tuple(row) for row in self.db.execute(claim)]
+
+        if claimed:
+            self.db.execute(insert(SystemAnnouncement), [pending[key] for key in claimed])
+        self.db.commit()
+        return len(claimed)
+
+    @staticmethod
+    def _announcement_row(
+        title: str,
+        content: str,
+        announcement_type: str,
+        priority: str,
+        target_audience: str,
+        expire_at: Optional[datetime],
+        created_by: int
+    ) -> Dict[str, Any]:
+        """自动通知的公告字段（用于批量写入）"""
+        now = datetime.utcnow()
+        return {
+            "title": title,
+            "content": content,
+            "announcement_type": announcement_type,
+            "priority": priority,
+            "target_audience": target_audience,
+            "is_auto_generated": True,
+            "is_published": True,
+            "publish_at": now,
+            "expire_at": expire_at,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+
     def check_expiring_subscriptions(self, days_ahead: int = 7) -> List[Dict[str, Any]]:
         """检查即将到期的订阅"""
         expiry_date = datetime.utcnow() + timedelta(days=days_ahead)
@@ -57,37 +139,52 @@ class NotificationService:
 
         return result
 
-    def send_expiration_reminders(self, days_ahead: int = 7) -> int:
-        """发送订阅到期提醒"""
-        expiring_subscriptions = self.check_expiring_subscriptions(days_ahead)
-        
+    def send_expiration_reminders(self, days_ahead: int = 7, batch_size: Optional[int] = None) -> int:
+        """
+        发送订阅到期提醒
+
+        按到期前 7 / 3 / 1 天分阶段，每个订阅周期每个阶段只提醒一次，
+        每日任务和每小时任务重复运行不会重复提醒。
+        """
+        now = datetime.utcnow()
+        stages = sorted({stage for stage in EXPIRATION_REMINDER_STAGES if stage <= days_ahead} | {days_ahead})
+
+        statement = select(
+            Subscription.id, Subscription.user_id, Subscription.end_date
+        ).join(User, User.id == Subscription.user_id).where(
+            Subscription.end_date <= now + timedelta(days=days_ahead),
+            Subscription.end_date > now,
+            Subscription.status == "active",
+            User.auto_renewal == False
+        ).order_by(Subscription.id)
+
         sent_count = 0
-        for subscription_info in expiring_subscriptions:
-            try:
-                # 创建系统公告
-                announcement = SystemAnnouncement(
+        for rows in self._stream(statement, batch_size):
+            pending: Dict[LedgerKey, Dict[str, Any]] = {}
+            for subscription in rows:
+                days_until_expiry = (subscription.end_date - now).days
+                stage = next(stage for stage in stages if days_until_expiry <= stage)
+                # 去重键包含到期日：续费后进入新的订阅周期，重新提醒
+                key = (
+                    subscription.user_id,
+                    "expiration_reminder",
+                    f"{subscription.id}:{subscription.end_date:%Y%m%d}:{stage}"
+                )
+                pending[key] = self._announcement_row(
                     title="订阅即将到期提醒",
-                    content=f"您的订阅将在 {subscription_info['days_until_expiry']} 天后到期，请及时续费以免影响使用。",
+                    content=f"您的订阅将在 {days_until_expiry} 天后到期，请及时续费以免影响使用。",
                     announcement_type="warning",
                     priority="normal",
                     target_audience="user",
-                    is_auto_generated=True,
-                    is_published=True,
-                    publish_at=datetime.utcnow(),
-                    expire_at=subscription_info['end_date'],
-                    created_by=subscription_info['user_id']
+                    expire_at=subscription.end_date,
+                    created_by=subscription.user_id
                 )
 
-                self.db.add(announcement)
-                
                 # 这里可以添加邮件通知逻辑
                 # email_service.send_expiration_reminder(subscription_info)
-                
-                sent_count += 1
-            except Exception as e:
-                print(f"发送到期提醒失败: {str(e)}")
-        
-        self.db.commit()
+
+            sent_count += self._publish(pending)
+
         return sent_count
 
     def check_expired_subscriptions(self) -> List[Dict[str, Any]]:
@@ -127,53 +224,47 @@ class NotificationService:
         # 检查并切换过期订阅
         results = tier_service.check_and_switch_expired_subscriptions()
 
+        # 会员等级发生变化的用户，按批登记并创建系统公告
+        today = datetime.utcnow().strftime('%Y%m%d')
+        batch_size = settings.NOTIFICATION_BATCH_SIZE
         processed_count = 0
+        pending: Dict[LedgerKey, Dict[str, Any]] = {}
         for result in results:
             if 'error' in result:
                 print(f"[订阅到期处理错误] 用户 {result['user_id']}: {result['error']}")
                 continue
+            if not result['changed']:
+                continue
 
             user_id = result['user_id']
 
-            try:
-                # 如果会员等级发生变化，创建系统公告
-                if result['changed']:
-                    user = self.db.query(User).filter(User.id == user_id).first()
-                    if not user:
-                        continue
+            # 根据新等级确定公告内容
+            if result['new_tier'] == 'free':
+                # 降为免费版
+                announcement_content = "您的订阅已过期，已自动切换为免费版。部分功能可能受限，请升级订阅以继续使用全部功能。"
+            else:
+                # 切换到次高等级
+                announcement_content = f"您的高等级订阅已过期，已自动切换到您的其他有效订阅（{result['new_tier']}）。"
+
+            key = (user_id, "tier_change", f"{result['old_tier']}>{result['new_tier']}:{today}")
+            pending[key] = self._announcement_row(
+                title="会员等级变更通知",
+                content=announcement_content,
+                announcement_type="info",
+                priority="normal",
+                target_audience="user",
+                expire_at=datetime.utcnow() + timedelta(days=30),
+                created_by=user_id
+            )
 
-                    # 根据新等级确定公告内容
-                    if result['new_tier'] == 'free':
-                        # 降为免费版
-                        announcement_content = "您的订阅已过期，已自动切换为免费版。部分功能可能受限，请升级订阅以继续使用全部功能。"
-                    else:
-                        # 切换到次高等级
-                        announcement_content = f"您的高等级订阅已过期，已自动切换到您的其他有效订阅（{result['new_tier']}）。"
-
-                    # 创建系统公告
-                    announcement = SystemAnnouncement(
-                        title="会员等级变更通知",
-                        content=announcement_content,
-                        announcement_type="info",
-                        priority="normal",
-                        target_audience="user",
-                        is_auto_generated=True,
-                        is_published=True,
-                        publish_at=datetime.utcnow(),
-                        expire_at=datetime.utcnow() + timedelta(days=30),
-                        created_by=user_id
-                    )
-
-                    self.db.add(announcement)
-
-                    # 这里可以添加邮件通知逻辑
-                    # email_service.send_tier_change_notice(user, result)
-
-                    processed_count += 1
-            except Exception as e:
-                print(f"处理过期订阅失败 (用户 {user_id}): {str(e)}")
-        
-        self.db.commit()
+            # 这里可以添加邮件通知逻辑
+            # email_service.send_tier_change_notice(user, result)
+
+            if len(pending) >= batch_size:
+                processed_count += self._publish(pending)
+                pending = {}
+
+        processed_count += self._publish(pending)
         return processed_count
 
     def process_auto_renewals(self) -> int:
@@ -190,14 +281,19 @@ class NotificationService:
             )
         ).all()
 
+        # 一次加载涉及的订阅计划
+        from app.models.subscription import SubscriptionPlan
+        plan_ids = {subscription.plan_id for subscription in auto_renew_subscriptions}
+        plans = {
+            plan.id: plan
+            for plan in self.db.query(SubscriptionPlan).filter(SubscriptionPlan.id.in_(plan_ids))
+        } if plan_ids else {}
+
         renewed_count = 0
         for subscription in auto_renew_subscriptions:
             try:
                 # 获取订阅计划
-                from app.models.subscription import SubscriptionPlan
-                plan = self.db.query(SubscriptionPlan).filter(
-                    SubscriptionPlan.id == subscription.plan_id
-                ).first()
+                plan = plans.get(subscription.plan_id)
                 
                 if not plan:
                     continue
@@ -350,8 +446,8 @@ class NotificationService:
 
     # ==================== 新增：配额相关通知 ====================
 
-    def notify_quota_warning(self, user: User, quota_type: str, usage_percent: int):
-        """配额使用警告"""
+    def _quota_warning_row(self, user: Any, quota_type: str, usage_percent: int) -> Dict[str, Any]:
+        """配额使用警告的公告字段（user 可以是 User 或查询行）"""
         quota_names = {
             "wps": "WPS记录",
             "pqr": "PQR记录",
@@ -385,14 +481,27 @@ class NotificationService:
 
 升级会员，获得更多配额！"""
 
-        self.create_system_announcement(
+        return self._announcement_row(
             title=title,
             content=content,
             announcement_type=announcement_type,
             priority=priority,
-            target_audience="user" if user.membership_type.startswith("personal") else "enterprise",
+            target_audience="user" if (user.membership_type or "personal").startswith("personal") else "enterprise",
             expire_at=datetime.utcnow() + timedelta(days=7),
-            created_by=user.id,
+            created_by=user.id
+        )
+
+    def notify_quota_warning(self, user: User, quota_type: str, usage_percent: int):
+        """配额使用警告"""
+        row = self._quota_warning_row(user, quota_type, usage_percent)
+        self.create_system_announcement(
+            title=row["title"],
+            content=row["content"],
+            announcement_type=row["announcement_type"],
+            priority=row["priority"],
+            target_audience=row["target_audience"],
+            expire_at=row["expire_at"],
+            created_by=row["created_by"],
             is_auto_generated=True
         )
 
@@ -441,55 +550,60 @@ class NotificationService:
             is_auto_generated=True
         )
 
-    def check_and_notify_quota_usage(self, thresholds: List[int] = [80, 90, 100]):
+    def check_and_notify_quota_usage(
+        self,
+        thresholds: List[int] = [80, 90, 100],
+        batch_size: Optional[int] = None
+    ) -> int:
         """
         检查并通知配额使用情况
 
+        分批读取活跃用户的配额使用量（不加载完整用户对象），每个配额的
+        每个阈值在同一配额上限下只通知一次；升级会员后上限变化，重新计算。
+
         Args:
             thresholds: 触发通知的阈值列表，默认[80, 90, 100]
+            batch_size: 每批处理的用户数，默认 NOTIFICATION_BATCH_SIZE
         """
         from app.services.membership_service import MembershipService
 
         membership_service = MembershipService(self.db)
+        limits_by_tier: Dict[str, Dict[str, int]] = {}
+        # 从高到低，只发送达到的最高阈值的通知
+        descending_thresholds = sorted(thresholds, reverse=True)
         notified_count = 0
 
-        # 查找所有活跃用户
-        users = self.db.query(User).filter(User.is_active == True).all()
-
-        for user in users:
-            # 获取用户配额限制
-            quotas = membership_service.get_membership_limits(user.member_tier or "free")
-
-            # 检查各类配额
-            for quota_type in ["wps", "pqr", "ppqr"]:
-                if quota_type not in quotas:
-                    continue
+        statement = select(
+            User.id, User.username, User.email, User.member_tier, User.membership_type,
+            User.wps_quota_used, User.pqr_quota_used, User.ppqr_quota_used
+        ).where(User.is_active == True).order_by(User.id)
+
+        for rows in self._stream(statement, batch_size):
+            pending: Dict[LedgerKey, Dict[str, Any]] = {}
+            for user in rows:
+                # 获取用户配额限制（按会员等级缓存）
+                tier = user.member_tier or "free"
+                quotas = limits_by_tier.get(tier)
+                if quotas is None:
+                    quotas = limits_by_tier[tier] = membership_service.get_membership_limits(tier)
+
+                # 检查各类配额
+                for quota_type in ("wps", "pqr", "ppqr"):
+                    limit = quotas.get(quota_type, 0)
+                    if limit <= 0:  # 无限配额
+                        continue
 
-                limit = quotas[quota_type]
+                    used = getattr(user, f"{quota_type}_quota_used") or 0
+                    usage_percent = int((used / limit) * 100)
 
-                # 获取已使用量
-                if quota_type == "wps":
-                    used = user.wps_quota_used or 0
-                elif quota_type == "pqr":
-                    used = user.pqr_quota_used or 0
-                elif quota_type == "ppqr":
-                    used = user.ppqr_quota_used or 0
-                else:
-                    continue
-
-                if limit <= 0:  # 无限配额
-                    continue
+                    threshold = next((t for t in descending_thresholds if usage_percent >= t), None)
+                    if threshold is None:
+                        continue
 
-                usage_percent = int((used / limit) * 100)
+                    key = (user.id, "quota_warning", f"{quota_type}:{limit}:{threshold}")
+                    pending[key] = self._quota_warning_row(user, quota_type, usage_percent)
 
-                # 检查是否达到阈值
-                for threshold in thresholds:
-                    if usage_percent >= threshold:
-                        # 检查是否已经发送过此阈值的通知（避免重复通知）
-                        # 这里可以添加去重逻辑
-                        self.notify_quota_warning(user, quota_type, usage_percent)
-                        notified_count += 1
-                        break  # 只发送最高阈值的通知
+            notified_count += self._publish(pending)
 
         return notified_count
 
@@ -1,14 +1,23 @@
 """
 Permission service for managing user permissions and access control.
+
+权限集合在导入时按会员等级 / 管理员级别预编译为 frozenset；每个用户解析出的
+权限集合经两级缓存复用：进程内LRU（PERMISSION_LOCAL_CACHE_TTL 秒）→ Redis
+（键包含版本号）→ 数据库。会员等级、启用状态、角色分配或角色定义变更提交后
+递增版本号并清除本进程缓存，其他进程最迟在进程内缓存过期后读取到新权限。
 """
-from typing import Dict, List, Optional, Any, Set
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Any, Set, Tuple
 from enum import Enum
 
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from app.core.cache import LocalTTLCache, bump_version, cache_get_json, cache_set_json, get_version, make_key
+from app.core.config import settings
 from app.models.user import User
 from app.models.admin import Admin
+from app.models.role import Permission as PermissionModel, Role
 
 
 class Permission(Enum):
@@ -135,76 +144,289 @@ class Permission(Enum):
     FILE_DOWNLOAD = "file:download"
 
 
+# ==================== 预编译权限集合 ====================
+
+ALL_PERMISSIONS: FrozenSet[str] = frozenset(p.value for p in Permission)
+
+# 所有用户都有读取自己信息的权限；启用的用户另有基础读取权限
+BASE_PERMISSIONS: FrozenSet[str] = frozenset([Permission.USER_READ.value])
+ACTIVE_BASE_PERMISSIONS: FrozenSet[str] = BASE_PERMISSIONS | frozenset([
+    Permission.WPS_READ.value,
+    Permission.PQR_READ.value,
+    Permission.FILE_READ.value,
+    Permission.FILE_DOWNLOAD.value,
+])
+
+_PERSONAL_PRO_PERMISSIONS = frozenset([
+    Permission.WPS_CREATE.value,
+    Permission.WPS_UPDATE.value,
+    Permission.WPS_DELETE.value,
+    Permission.PQR_CREATE.value,
+    Permission.PQR_UPDATE.value,
+    Permission.PQR_DELETE.value,
+    Permission.PPQR_CREATE.value,
+    Permission.PPQR_UPDATE.value,
+    Permission.PPQR_DELETE.value,
+    Permission.FILE_UPLOAD.value,
+    Permission.FILE_DOWNLOAD.value,
+])
+
+_PERSONAL_ADVANCED_PERMISSIONS = _PERSONAL_PRO_PERMISSIONS | frozenset([
+    Permission.WPS_EXPORT.value,
+    Permission.PQR_EXPORT.value,
+    Permission.PPQR_EXPORT.value,
+    Permission.EQUIPMENT_CREATE.value,
+    Permission.EQUIPMENT_UPDATE.value,
+    Permission.EQUIPMENT_DELETE.value,
+    Permission.PRODUCTION_READ.value,
+    Permission.PRODUCTION_CREATE.value,
+    Permission.PRODUCTION_UPDATE.value,
+    Permission.PRODUCTION_DELETE.value,
+    Permission.QUALITY_READ.value,
+    Permission.QUALITY_CREATE.value,
+    Permission.QUALITY_UPDATE.value,
+    Permission.QUALITY_DELETE.value,
+])
+
+_PERSONAL_FLAGSHIP_PERMISSIONS = _PERSONAL_ADVANCED_PERMISSIONS | frozenset([
+    Permission.MATERIAL_CREATE.value,
+    Permission.MATERIAL_UPDATE.value,
+    Permission.MATERIAL_DELETE.value,
+    Permission.WELDER_CREATE.value,
+    Permission.WELDER_UPDATE.value,
+    Permission.WELDER_DELETE.value,
+    Permission.REPORT_READ.value,
+])
+
+# 会员等级 -> 权限（企业版及以上拥有所有权限）
+TIER_PERMISSIONS: Dict[str, FrozenSet[str]] = {
+    "free": frozenset([
+        Permission.WPS_CREATE.value,
+        Permission.PQR_CREATE.value,
+        Permission.FILE_UPLOAD.value,
+    ]),
+    "personal_pro": _PERSONAL_PRO_PERMISSIONS,
+    "personal_advanced": _PERSONAL_ADVANCED_PERMISSIONS,
+    "personal_flagship": _PERSONAL_FLAGSHIP_PERMISSIONS,
+    "enterprise": ALL_PERMISSIONS,
+    "enterprise_pro": ALL_PERMISSIONS,
+    "enterprise_pro_max": ALL_PERMISSIONS,
+}
+
+# 所有管理员都有读取权限
+ADMIN_BASE_PERMISSIONS: FrozenSet[str] = frozenset([
+    Permission.USER_READ.value,
+    Permission.WPS_READ.value,
+    Permission.PQR_READ.value,
+    Permission.PPQR_READ.value,
+    Permission.EQUIPMENT_READ.value,
+    Permission.MATERIAL_READ.value,
+    Permission.WELDER_READ.value,
+    Permission.PRODUCTION_READ.value,
+    Permission.QUALITY_READ.value,
+    Permission.REPORT_READ.value,
+    Permission.MEMBERSHIP_READ.value,
+    Permission.SUBSCRIPTION_READ.value,
+    Permission.SYSTEM_READ.value,
+    Permission.ANNOUNCEMENT_READ.value,
+    Permission.ENTERPRISE_READ.value,
+    Permission.FILE_READ.value,
+])
+
+# 管理员级别 -> 权限（超级管理员拥有所有权限）
+ADMIN_LEVEL_PERMISSIONS: Dict[str, FrozenSet[str]] = {
+    "admin": frozenset([
+        Permission.USER_CREATE.value,
+        Permission.USER_UPDATE.value,
+        Permission.USER_DELETE.value,
+        Permission.WPS_MANAGE.value,
+        Permission.PQR_MANAGE.value,
+        Permission.PPQR_MANAGE.value,
+        Permission.EQUIPMENT_MANAGE.value,
+        Permission.MATERIAL_MANAGE.value,
+        Permission.WELDER_MANAGE.value,
+        Permission.PRODUCTION_MANAGE.value,
+        Permission.QUALITY_MANAGE.value,
+        Permission.REPORT_MANAGE.value,
+        Permission.MEMBERSHIP_MANAGE.value,
+        Permission.SUBSCRIPTION_MANAGE.value,
+        Permission.ANNOUNCEMENT_MANAGE.value,
+        Permission.ENTERPRISE_MANAGE.value,
+        Permission.FILE_MANAGE.value,
+    ]),
+    "super_admin": ALL_PERMISSIONS,
+}
+
+# (是否启用, 会员等级) -> 用户完整权限集合（基础权限 + 会员等级权限）
+_USER_PERMISSION_SETS: Dict[Tuple[bool, Optional[str]], FrozenSet[str]] = {}
+for _tier, _tier_permissions in list(TIER_PERMISSIONS.items()) + [(None, frozenset())]:
+    _USER_PERMISSION_SETS[(True, _tier)] = ACTIVE_BASE_PERMISSIONS | _tier_permissions
+    _USER_PERMISSION_SETS[(False, _tier)] = BASE_PERMISSIONS | _tier_permissions
+
+
+def user_permission_set(is_active: Optional[bool], member_tier: Optional[str]) -> FrozenSet[str]:
+    """用户的基础权限 + 会员等级权限（预编译集合，未知等级只有基础权限）"""
+    permissions = _USER_PERMISSION_SETS.get((bool(is_active), member_tier))
+    if permissions is None:
+        permissions = ACTIVE_BASE_PERMISSIONS if is_active else BASE_PERMISSIONS
+    return permissions
+
+
+# ==================== 已解析权限缓存 ====================
+
+class PermissionCache:
+    """
+    已解析权限集合的两级缓存
+
+    进程内LRU（短TTL）→ Redis（键包含主体版本号和角色定义版本号）→ 加载函数。
+    """
+
+    # 权限集合类型
+    USER = "user"      # 基础 + 会员等级权限
+    ADMIN = "admin"    # 管理员权限
+    ROLES = "roles"    # 用户角色权限（resource:action）
+
+    # 角色 / 权限定义的全局版本号
+    DEFINITIONS = "definitions"
+
+    def __init__(self, local_ttl: float, max_entries: int, redis_ttl: int):
+        self.redis_ttl = redis_ttl
+        self._local = LocalTTLCache(local_ttl, max_entries)
+
+        # 指标
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.loads = 0
+
+    def get_or_load(self, kind: str, ident: int, loader: Callable[[], Iterable[str]]) -> FrozenSet[str]:
+        """
+        获取已解析的权限集合
+
+        Args:
+            kind: 权限集合类型（USER / ADMIN / ROLES）
+            ident: 用户ID或管理员ID
+            loader: 缓存未命中时从数据库解析权限
+        """
+        key = (kind, ident)
+        permissions = self._local.get(key)
+        if permissions is not None:
+            self.local_hits += 1
+            return permissions
+
+        redis_key = make_key(
+            "permissions", kind, ident,
+            get_version("permissions", f"{kind}:{ident}"),
+            get_version("permissions", self.DEFINITIONS)
+        )
+        cached = cache_get_json(redis_key)
+        if cached is not None:
+            permissions = frozenset(cached)
+            self.redis_hits += 1
+        else:
+            permissions = frozenset(loader())
+            self.loads += 1
+            cache_set_json(redis_key, sorted(permissions), self.redis_ttl)
+
+        self._local.set(key, permissions)
+        return permissions
+
+    def invalidate(self, kind: str, ident: int) -> None:
+        """主体的权限发生变化：清除本进程缓存并递增版本号"""
+        self._local.pop((kind, ident))
+        bump_version("permissions", f"{kind}:{ident}")
+
+    def invalidate_definitions(self) -> None:
+        """角色或权限定义发生变化：所有角色权限集合失效"""
+        self._local.discard_where(lambda key: key[0] == self.ROLES)
+        bump_version("permissions", self.DEFINITIONS)
+
+    def clear(self) -> None:
+        """清空本进程缓存"""
+        self._local.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "loads": self.loads,
+        }
+
+
+# 全局权限缓存实例
+permission_cache = PermissionCache(
+    local_ttl=settings.PERMISSION_LOCAL_CACHE_TTL,
+    max_entries=settings.PERMISSION_LOCAL_CACHE_SIZE,
+    redis_ttl=settings.PERMISSION_CACHE_TTL
+)
+
+
 class PermissionService:
     """权限服务类"""
     
     def __init__(self, db: Session):
         self.db = db
     
-    def get_user_permissions(self, user_id: int) -> Set[str]:
+    def get_user_permissions(self, user_id: int) -> FrozenSet[str]:
         """获取用户权限集合"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        return permission_cache.get_or_load(
+            PermissionCache.USER, user_id, lambda: self._load_user_permissions(user_id)
+        )
+    
+    def get_admin_permissions(self, admin_id: int) -> FrozenSet[str]:
+        """获取管理员权限集合"""
+        return permission_cache.get_or_load(
+            PermissionCache.ADMIN, admin_id, lambda: self._load_admin_permissions(admin_id)
+        )
+    
+    def _load_user_permissions(self, user_id: int) -> FrozenSet[str]:
+        """从数据库解析用户权限（只读取启用状态和会员等级）"""
+        user = self.db.query(User.id, User.is_active, User.member_tier).filter(User.id == user_id).first()
         if not user:
-            return set()
-        
-        # 基础权限
-        permissions = self._get_base_permissions(user)
+            return frozenset()
         
-        # 会员等级权限
-        membership_permissions = self._get_membership_permissions(user)
-        permissions.update(membership_permissions)
+        # 基础权限 + 会员等级权限
+        permissions = user_permission_set(user.is_active, user.member_tier)
         
         # 自定义权限（如果有）
         custom_permissions = self._get_custom_permissions(user)
-        permissions.update(custom_permissions)
+        if custom_permissions:
+            permissions = permissions | custom_permissions
         
         return permissions
     
-    def get_admin_permissions(self, admin_id: int) -> Set[str]:
-        """获取管理员权限集合"""
-        admin = self.db.query(Admin).filter(Admin.id == admin_id).first()
+    def _load_admin_permissions(self, admin_id: int) -> FrozenSet[str]:
+        """从数据库解析管理员权限"""
+        admin = self.db.query(Admin.id, Admin.admin_level).filter(Admin.id == admin_id).first()
         if not admin:
-            return set()
-        
-        # 管理员基础权限
-        permissions = self._get_admin_base_permissions(admin)
+            return frozenset()
         
-        # 角色权限
-        role_permissions = self._get_role_permissions(admin)
-        permissions.update(role_permissions)
+        # 管理员基础权限 + 角色权限
+        permissions = ADMIN_BASE_PERMISSIONS | self._get_role_permissions(admin)
         
         # 自定义权限（如果有）
         custom_permissions = self._get_admin_custom_permissions(admin)
-        permissions.update(custom_permissions)
+        if custom_permissions:
+            permissions = permissions | custom_permissions
         
         return permissions
     
+    def _get_permissions(self, user_id: int, is_admin: bool) -> FrozenSet[str]:
+        if is_admin:
+            return self.get_admin_permissions(user_id)
+        return self.get_user_permissions(user_id)
+    
     def has_permission(self, user_id: int, permission: str, is_admin: bool = False) -> bool:
         """检查用户是否有指定权限"""
-        if is_admin:
-            permissions = self.get_admin_permissions(user_id)
-        else:
-            permissions = self.get_user_permissions(user_id)
-        
-        return permission in permissions
+        return permission in self._get_permissions(user_id, is_admin)
     
     def has_any_permission(self, user_id: int, permissions: List[str], is_admin: bool = False) -> bool:
         """检查用户是否有任意一个指定权限"""
-        if is_admin:
-            user_permissions = self.get_admin_permissions(user_id)
-        else:
-            user_permissions = self.get_user_permissions(user_id)
-        
-        return any(permission in user_permissions for permission in permissions)
+        return not self._get_permissions(user_id, is_admin).isdisjoint(permissions)
     
     def has_all_permissions(self, user_id: int, permissions: List[str], is_admin: bool = False) -> bool:
         """检查用户是否有所有指定权限"""
-        if is_admin:
-            user_permissions = self.get_admin_permissions(user_id)
-        else:
-            user_permissions = self.get_user_permissions(user_id)
-        
-        return all(permission in user_permissions for permission in permissions)
+        return self._get_permissions(user_id, is_admin).issuperset(permissions)
     
     def check_permission(self, user_id: int, permission: str, is_admin: bool = False):
         """检查权限，如果没有则抛出异常"""
@@ -214,197 +436,96 @@ class PermissionService:
                 detail=f"权限不足，需要权限: {permission}"
             )
     
-    def _get_base_permissions(self, user: User) -> Set[str]:
+    def _get_base_permissions(self, user: User) -> FrozenSet[str]:
         """获取用户基础权限"""
-        permissions = set()
-        
-        # 所有用户都有读取自己信息的权限
-        permissions.add(Permission.USER_READ.value)
-        
-        # 根据用户状态添加权限
-        if user.is_active:
-            permissions.add(Permission.WPS_READ.value)
-            permissions.add(Permission.PQR_READ.value)
-            permissions.add(Permission.FILE_READ.value)
-            permissions.add(Permission.FILE_DOWNLOAD.value)
-        
-        return permissions
+        return ACTIVE_BASE_PERMISSIONS if user.is_active else BASE_PERMISSIONS
     
-    def _get_membership_permissions(self, user: User) -> Set[str]:
+    def _get_membership_permissions(self, user: User) -> FrozenSet[str]:
         """根据会员等级获取权限"""
-        permissions = set()
-        
-        if not user.member_tier:
-            return permissions
-        
-        # 免费版权限
-        if user.member_tier == "free":
-            permissions.add(Permission.WPS_CREATE.value)
-            permissions.add(Permission.PQR_CREATE.value)
-            permissions.add(Permission.FILE_UPLOAD.value)
-        
-        # 个人专业版权限
-        elif user.member_tier == "personal_pro":
-            permissions.update([
-                Permission.WPS_CREATE.value,
-                Permission.WPS_UPDATE.value,
-                Permission.WPS_DELETE.value,
-                Permission.PQR_CREATE.value,
-                Permission.PQR_UPDATE.value,
-                Permission.PQR_DELETE.value,
-                Permission.PPQR_CREATE.value,
-                Permission.PPQR_UPDATE.value,
-                Permission.PPQR_DELETE.value,
-                Permission.FILE_UPLOAD.value,
-                Permission.FILE_DOWNLOAD.value,
-            ])
-        
-        # 个人高级版权限
-        elif user.member_tier == "personal_advanced":
-            permissions.update([
-                Permission.WPS_CREATE.value,
-                Permission.WPS_UPDATE.value,
-                Permission.WPS_DELETE.value,
-                Permission.WPS_EXPORT.value,
-                Permission.PQR_CREATE.value,
-                Permission.PQR_UPDATE.value,
-                Permission.PQR_DELETE.value,
-                Permission.PQR_EXPORT.value,
-                Permission.PPQR_CREATE.value,
-                Permission.PPQR_UPDATE.value,
-                Permission.PPQR_DELETE.value,
-                Permission.PPQR_EXPORT.value,
-                Permission.EQUIPMENT_CREATE.value,
-                Permission.EQUIPMENT_UPDATE.value,
-                Permission.EQUIPMENT_DELETE.value,
-                Permission.PRODUCTION_READ.value,
-                Permission.PRODUCTION_CREATE.value,
-                Permission.PRODUCTION_UPDATE.value,
-                Permission.PRODUCTION_DELETE.value,
-                Permission.QUALITY_READ.value,
-                Permission.QUALITY_CREATE.value,
-                Permission.QUALITY_UPDATE.value,
-                Permission.QUALITY_DELETE.value,
-                Permission.FILE_UPLOAD.value,
-                Permission.FILE_DOWNLOAD.value,
-            ])
-        
-        # 个人旗舰版权限
-        elif user.member_tier == "personal_flagship":
-            permissions.update([
-                Permission.WPS_CREATE.value,
-                Permission.WPS_UPDATE.value,
-                Permission.WPS_DELETE.value,
-                Permission.WPS_EXPORT.value,
-                Permission.PQR_CREATE.value,
-                Permission.PQR_UPDATE.value,
-                Permission.PQR_DELETE.value,
-                Permission.PQR_EXPORT.value,
-                Permission.PPQR_CREATE.value,
-                Permission.PPQR_UPDATE.value,
-                Permission.PPQR_DELETE.value,
-                Permission.PPQR_EXPORT.value,
-                Permission.EQUIPMENT_CREATE.value,
-                Permission.EQUIPMENT_UPDATE.value,
-                Permission.EQUIPMENT_DELETE.value,
-                Permission.MATERIAL_CREATE.value,
-                Permission.MATERIAL_UPDATE.value,
-                Permission.MATERIAL_DELETE.value,
-                Permission.WELDER_CREATE.value,
-                Permission.WELDER_UPDATE.value,
-                Permission.WELDER_DELETE.value,
-                Permission.PRODUCTION_READ.value,
-                Permission.PRODUCTION_CREATE.value,
-                Permission.PRODUCTION_UPDATE.value,
-                Permission.PRODUCTION_DELETE.value,
-                Permission.QUALITY_READ.value,
-                Permission.QUALITY_CREATE.value,
-                Permission.QUALITY_UPDATE.value,
-                Permission.QUALITY_DELETE.value,
-                Permission.REPORT_READ.value,
-                Permission.FILE_UPLOAD.value,
-                Permission.FILE_DOWNLOAD.value,
-            ])
-        
-        # 企业版及以上权限
-        elif user.member_tier in ["enterprise", "enterprise_pro", "enterprise_pro_max"]:
-            # 企业版拥有所有权限
-            permissions.update([p.value for p in Permission])
-        
-        return permissions
+        return TIER_PERMISSIONS.get(user.member_tier, frozenset())
     
-    def _get_custom_permissions(self, user: User) -> Set[str]:
+    def _get_custom_permissions(self, user: User) -> FrozenSet[str]:
         """获取用户自定义权限"""
         # 这里可以从数据库中获取用户的自定义权限
         # 暂时返回空集合
-        return set()
+        return frozenset()
     
-    def _get_admin_base_permissions(self, admin: Admin) -> Set[str]:
+    def _get_admin_base_permissions(self, admin: Admin) -> FrozenSet[str]:
         """获取管理员基础权限"""
-        permissions = set()
-        
-        # 所有管理员都有读取权限
-        permissions.update([
-            Permission.USER_READ.value,
-            Permission.WPS_READ.value,
-            Permission.PQR_READ.value,
-            Permission.PPQR_READ.value,
-            Permission.EQUIPMENT_READ.value,
-            Permission.MATERIAL_READ.value,
-            Permission.WELDER_READ.value,
-            Permission.PRODUCTION_READ.value,
-            Permission.QUALITY_READ.value,
-            Permission.REPORT_READ.value,
-            Permission.MEMBERSHIP_READ.value,
-            Permission.SUBSCRIPTION_READ.value,
-            Permission.SYSTEM_READ.value,
-            Permission.ANNOUNCEMENT_READ.value,
-            Permission.ENTERPRISE_READ.value,
-            Permission.FILE_READ.value,
-        ])
-        
-        return permissions
+        return ADMIN_BASE_PERMISSIONS
     
-    def _get_role_permissions(self, admin: Admin) -> Set[str]:
+    def _get_role_permissions(self, admin: Admin) -> FrozenSet[str]:
         """根据管理员角色获取权限"""
-        permissions = set()
-        
-        # 普通管理员权限
-        if admin.admin_level == "admin":
-            permissions.update([
-                Permission.USER_CREATE.value,
-                Permission.USER_UPDATE.value,
-                Permission.USER_DELETE.value,
-                Permission.WPS_MANAGE.value,
-                Permission.PQR_MANAGE.value,
-                Permission.PPQR_MANAGE.value,
-                Permission.EQUIPMENT_MANAGE.value,
-                Permission.MATERIAL_MANAGE.value,
-                Permission.WELDER_MANAGE.value,
-                Permission.PRODUCTION_MANAGE.value,
-                Permission.QUALITY_MANAGE.value,
-                Permission.REPORT_MANAGE.value,
-                Permission.MEMBERSHIP_MANAGE.value,
-                Permission.SUBSCRIPTION_MANAGE.value,
-                Permission.ANNOUNCEMENT_MANAGE.value,
-                Permission.ENTERPRISE_MANAGE.value,
-                Permission.FILE_MANAGE.value,
-            ])
-        
-        # 超级管理员权限
-        elif admin.admin_level == "super_admin":
-            # 超级管理员拥有所有权限
-            permissions.update([p.value for p in Permission])
-        
-        return permissions
+        return ADMIN_LEVEL_PERMISSIONS.get(admin.admin_level, frozenset())
     
-    def _get_admin_custom_permissions(self, admin: Admin) -> Set[str]:
+    def _get_admin_custom_permissions(self, admin: Admin) -> FrozenSet[str]:
         """获取管理员自定义权限"""
         # 这里可以从数据库中获取管理员的自定义权限
         # 暂时返回空集合
-        return set()
+        return frozenset()
 
 
 def get_permission_service(db: Session) -> PermissionService:
     """获取权限服务实例"""
-    return PermissionService(db)
\ No newline at end of file
+    return PermissionService(db)
+
+
+# ---------------------------------------------------------------------------
+# 权限缓存失效
+# ---------------------------------------------------------------------------
+# 会话 info 中待失效主体的键
+_PENDING_PERMISSION_KEY = "permission_pending_invalidation"
+
+# 影响用户权限的字段
+_USER_PERMISSION_FIELDS = ("is_active", "member_tier")
+_ADMIN_PERMISSION_FIELDS = ("admin_level", "is_active")
+
+
+def _changed(obj: Any, fields: Iterable[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_permission_changes(session: Session, flush_context, instances) -> None:
+    """flush前记录会员等级、启用状态、角色分配和角色定义的变更"""
+    pending: Set[Tuple[str, Any]] = set()
+
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            if _changed(obj, _USER_PERMISSION_FIELDS):
+                pending.add((PermissionCache.USER, obj.id))
+            if "roles" in inspect(obj).attrs.keys() and inspect(obj).attrs.roles.history.has_changes():
+                pending.add((PermissionCache.ROLES, obj.id))
+        elif isinstance(obj, Admin):
+            if _changed(obj, _ADMIN_PERMISSION_FIELDS):
+                pending.add((PermissionCache.ADMIN, obj.id))
+        elif isinstance(obj, (Role, PermissionModel)):
+            pending.add((PermissionCache.DEFINITIONS, None))
+
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, (Role, PermissionModel)):
+            pending.add((PermissionCache.DEFINITIONS, None))
+        elif obj in session.deleted and isinstance(obj, User):
+            pending.update({(PermissionCache.USER, obj.id), (PermissionCache.ROLES, obj.id)})
+        elif obj in session.deleted and isinstance(obj, Admin):
+            pending.add((PermissionCache.ADMIN, obj.id))
+
+    if pending:
+        session.info.setdefault(_PENDING_PERMISSION_KEY, set()).update(pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_permission_cache(session: Session) -> None:
+    """事务提交后使变更主体的权限缓存失效"""
+    for kind, ident in session.info.pop(_PENDING_PERMISSION_KEY, set()):
+        if kind == PermissionCache.DEFINITIONS:
+            permission_cache.invalidate_definitions()
+        else:
+            permission_cache.invalidate(kind, ident)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_permission_changes(session: Session) -> None:
+    """事务回滚后丢弃待失效记录"""
+    session.info.pop(_PENDING_PERMISSION_KEY, None)
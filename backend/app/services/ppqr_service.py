@@ -3,12 +3,16 @@ pPQR Service
 处理pPQR相关的业务逻辑
 """
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_
 
 from app.models.ppqr import PPQR
 from app.models.user import User
 from app.core.data_access import WorkspaceContext, DataAccessMiddleware
+from app.core.config import settings
+from app.core.pagination import TotalMode, apply_keyset, count_query
+from app.services.search_service import document_ids_matching
 
 
 class PPQRService:
@@ -18,6 +22,25 @@ class PPQRService:
         self.db = db
         self.data_access = DataAccessMiddleware(db)
 
+    # ==================== 异步接口 ====================
+    # 在 AsyncSession 上复用同一套查询和数据权限逻辑（通过 run_sync），
+    # 供运行在 get_async_db 上的读接口使用，不占用线程池线程。
+
+    @classmethod
+    async def get_async(cls, db: AsyncSession, **kwargs) -> Optional[PPQR]:
+        """get 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get(session, **kwargs))
+
+    @classmethod
+    async def get_multi_async(cls, db: AsyncSession, **kwargs) -> List[PPQR]:
+        """get_multi 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get_multi(session, **kwargs))
+
+    @classmethod
+    async def count_async(cls, db: AsyncSession, **kwargs) -> int:
+        """count 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).count(session, **kwargs))
+
     def get_multi(
         self,
         db: Session,
@@ -28,23 +51,28 @@ class PPQRService:
         workspace_context: WorkspaceContext,
         status: Optional[str] = None,
         test_conclusion: Optional[str] = None,
-        search_term: Optional[str] = None
+        search_term: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[PPQR]:
         """
         获取pPQR列表（带工作区上下文数据隔离）
 
         Args:
             db: 数据库会话
-            skip: 跳过记录数
+            skip: 跳过记录数（提供cursor时忽略）
             limit: 返回记录数
             current_user: 当前用户
             workspace_context: 工作区上下文
             status: 状态筛选
             test_conclusion: 试验结论筛选
             search_term: 搜索关键词
+            cursor: 上一页返回的分页游标
 
         Returns:
             pPQR列表
+
+        Raises:
+            ValueError: 游标格式无效
         """
         # 验证工作区上下文
         workspace_context.validate()
@@ -67,18 +95,24 @@ class PPQRService:
 
         # 应用搜索
         if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    PPQR.ppqr_number.ilike(search_pattern),
-                    PPQR.title.ilike(search_pattern),
-                    PPQR.test_purpose.ilike(search_pattern)
+            if settings.SEARCH_INDEX_ENABLED:
+                # 启用检索索引时走全文/三元组索引，避免多列ILIKE顺序扫描
+                query = query.filter(PPQR.id.in_(document_ids_matching("ppqr", search_term)))
+            else:
+                search_pattern = f"%{search_term}%"
+                query = query.filter(
+                    or_(
+                        PPQR.ppqr_number.ilike(search_pattern),
+                        PPQR.title.ilike(search_pattern),
+                        PPQR.test_purpose.ilike(search_pattern)
+                    )
                 )
-            )
 
-        # 排序和分页
-        query = query.order_by(PPQR.created_at.desc())
-        query = query.offset(skip).limit(limit)
+        # 排序和分页（游标模式不使用offset）
+        query = apply_keyset(query, PPQR, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        query = query.limit(limit)
 
         return query.all()
 
@@ -90,7 +124,8 @@ class PPQRService:
         workspace_context: WorkspaceContext,
         status: Optional[str] = None,
         test_conclusion: Optional[str] = None,
-        search_term: Optional[str] = None
+        search_term: Optional[str] = None,
+        total_mode: str = TotalMode.EXACT
     ) -> int:
         """
         获取pPQR总数（带工作区上下文数据隔离）
@@ -102,6 +137,7 @@ class PPQRService:
             status: 状态筛选
             test_conclusion: 试验结论筛选
             search_term: 搜索关键词
+            total_mode: 总数模式（exact精确 / estimated估算）
 
         Returns:
             pPQR总数
@@ -110,7 +146,7 @@ class PPQRService:
         workspace_context.validate()
 
         # 构建基础查询
-        query = db.query(func.count(PPQR.id))
+        query = db.query(PPQR)
 
         # 应用工作区过滤
         query = self.data_access.apply_workspace_filter(
@@ -127,16 +163,20 @@ class PPQRService:
 
         # 应用搜索
         if search_term:
-            search_pattern = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    PPQR.ppqr_number.ilike(search_pattern),
-                    PPQR.title.ilike(search_pattern),
-                    PPQR.test_purpose.ilike(search_pattern)
+            if settings.SEARCH_INDEX_ENABLED:
+                # 启用检索索引时走全文/三元组索引，避免多列ILIKE顺序扫描
+                query = query.filter(PPQR.id.in_(document_ids_matching("ppqr", search_term)))
+            else:
+                search_pattern = f"%{search_term}%"
+                query = query.filter(
+                    or_(
+                        PPQR.ppqr_number.ilike(search_pattern),
+                        PPQR.title.ilike(search_pattern),
+                        PPQR.test_purpose.ilike(search_pattern)
+                    )
                 )
-            )
 
-        return query.scalar()
+        return count_query(db, query, total_mode)
 
     def get(
         self,
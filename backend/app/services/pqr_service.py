@@ -4,6 +4,7 @@ PQR (Procedure Qualification Record) service for the welding system backend.
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 
@@ -11,6 +12,10 @@ from app.models.pqr import PQR, PQRTestSpecimen
 from app.models.user import User
 from app.schemas.pqr import PQRCreate, PQRUpdate, PQRTestSpecimenCreate, PQRQualificationUpdate
 from app.core.data_access import DataAccessMiddleware, WorkspaceContext, WorkspaceType
+from app.core.config import settings
+from app.core.pagination import TotalMode, apply_keyset, count_query
+from app.core.statistics import date_bucket, grouped_statistics
+from app.services.search_service import document_ids_matching
 
 
 class PQRService:
@@ -21,6 +26,25 @@ class PQRService:
         self.db = db
         self.data_access = DataAccessMiddleware(db)
 
+    # ==================== 异步接口 ====================
+    # 在 AsyncSession 上复用同一套查询和数据权限逻辑（通过 run_sync），
+    # 供运行在 get_async_db 上的读接口使用，不占用线程池线程。
+
+    @classmethod
+    async def get_async(cls, db: AsyncSession, **kwargs) -> Optional[PQR]:
+        """get 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get(session, **kwargs))
+
+    @classmethod
+    async def get_multi_async(cls, db: AsyncSession, **kwargs) -> List[PQR]:
+        """get_multi 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get_multi(session, **kwargs))
+
+    @classmethod
+    async def count_async(cls, db: AsyncSession, **kwargs) -> int:
+        """count 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).count(session, **kwargs))
+
     def get(
         self,
         db: Session,
@@ -66,14 +90,15 @@ class PQRService:
         owner_id: Optional[int] = None,
         qualification_result: Optional[str] = None,
         search_term: Optional[str] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[PQR]:
         """
         Get multiple PQR with filtering options and workspace isolation.
 
         Args:
             db: Database session
-            skip: Number of records to skip
+            skip: Number of records to skip (ignored when cursor is given)
             limit: Maximum number of records to return
             current_user: Current user (required for workspace filtering)
             workspace_context: Workspace context (required for workspace filtering)
@@ -81,9 +106,13 @@ class PQRService:
             qualification_result: Filter by qualification result
             search_term: Search term for filtering
             status: Filter by status
+            cursor: Keyset cursor returned by the previous page
 
         Returns:
             List of PQR objects
+
+        Raises:
+            ValueError: If the cursor is malformed
         """
         query = db.query(PQR).filter(PQR.is_active == True)
 
@@ -124,18 +153,26 @@ class PQRService:
             query = query.filter(PQR.status == status)
 
         if search_term:
-            search_filter = or_(
-                PQR.title.ilike(f"%{search_term}%"),
-                PQR.pqr_number.ilike(f"%{search_term}%"),
-                PQR.wps_number.ilike(f"%{search_term}%"),
-                PQR.company.ilike(f"%{search_term}%"),
-                PQR.project_name.ilike(f"%{search_term}%"),
-                PQR.welding_process.ilike(f"%{search_term}%"),
-                PQR.base_material_spec.ilike(f"%{search_term}%")
-            )
-            query = query.filter(search_filter)
+            if settings.SEARCH_INDEX_ENABLED:
+                # Use the maintained full-text/trigram index instead of ILIKE scans
+                query = query.filter(PQR.id.in_(document_ids_matching("pqr", search_term)))
+            else:
+                search_filter = or_(
+                    PQR.title.ilike(f"%{search_term}%"),
+                    PQR.pqr_number.ilike(f"%{search_term}%"),
+                    PQR.wps_number.ilike(f"%{search_term}%"),
+                    PQR.company.ilike(f"%{search_term}%"),
+                    PQR.project_name.ilike(f"%{search_term}%"),
+                    PQR.welding_process.ilike(f"%{search_term}%"),
+                    PQR.base_material_spec.ilike(f"%{search_term}%")
+                )
+                query = query.filter(search_filter)
 
-        return query.order_by(PQR.created_at.desc()).offset(skip).limit(limit).all()
+        query = apply_keyset(query, PQR, cursor)
+        if cursor:
+            return query.limit(limit).all()
+
+        return query.offset(skip).limit(limit).all()
 
     def count(
         self,
@@ -146,7 +183,8 @@ class PQRService:
         owner_id: Optional[int] = None,
         qualification_result: Optional[str] = None,
         search_term: Optional[str] = None,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        total_mode: str = TotalMode.EXACT
     ) -> int:
         """
         Count PQR with filtering options and workspace isolation.
@@ -159,6 +197,7 @@ class PQRService:
             qualification_result: Filter by qualification result
             search_term: Search term for filtering
             status: Filter by status
+            total_mode: exact or estimated (query-plan estimate, constant time)
 
         Returns:
             Count of PQR records
@@ -202,18 +241,22 @@ class PQRService:
             query = query.filter(PQR.status == status)
 
         if search_term:
-            search_filter = or_(
-                PQR.title.ilike(f"%{search_term}%"),
-                PQR.pqr_number.ilike(f"%{search_term}%"),
-                PQR.wps_number.ilike(f"%{search_term}%"),
-                PQR.company.ilike(f"%{search_term}%"),
-                PQR.project_name.ilike(f"%{search_term}%"),
-                PQR.welding_process.ilike(f"%{search_term}%"),
-                PQR.base_material_spec.ilike(f"%{search_term}%")
-            )
-            query = query.filter(search_filter)
+            if settings.SEARCH_INDEX_ENABLED:
+                # Use the maintained full-text/trigram index instead of ILIKE scans
+                query = query.filter(PQR.id.in_(document_ids_matching("pqr", search_term)))
+            else:
+                search_filter = or_(
+                    PQR.title.ilike(f"%{search_term}%"),
+                    PQR.pqr_number.ilike(f"%{search_term}%"),
+                    PQR.wps_number.ilike(f"%{search_term}%"),
+                    PQR.company.ilike(f"%{search_term}%"),
+                    PQR.project_name.ilike(f"%{search_term}%"),
+                    PQR.welding_process.ilike(f"%{search_term}%"),
+                    PQR.base_material_spec.ilike(f"%{search_term}%")
+                )
+                query = query.filter(search_filter)
 
-        return query.count()
+        return count_query(db, query, total_mode)
 
     def create(
         self,
@@ -517,78 +560,47 @@ class PQRService:
         owner_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """Get PQR statistics."""
-        query = db.query(PQR).filter(PQR.is_active == True)
+        criteria = [PQR.is_active == True]
 
         if owner_id:
-            query = query.filter(PQR.owner_id == owner_id)
-
-        # Total count
-        total_count = query.count()
-
-        # Count by qualification result
-        qualification_counts = {}
-        for result in ["qualified", "not qualified"]:
-            count = query.filter(PQR.qualification_result == result).count()
-            qualification_counts[result] = count
-
-        # Count by welding process
-        process_counts = {}
-        processes = db.query(PQR.welding_process).filter(
-            and_(PQR.welding_process.isnot(None), PQR.is_active == True)
-        ).distinct().all()
-
-        for (process,) in processes:
-            if process:
-                count = query.filter(PQR.welding_process == process).count()
-                process_counts[process] = count
-
-        # Count by base material group
-        material_counts = {}
-        materials = db.query(PQR.base_material_group).filter(
-            and_(PQR.base_material_group.isnot(None), PQR.is_active == True)
-        ).distinct().all()
-
-        for (material,) in materials:
-            if material:
-                count = query.filter(PQR.base_material_group == material).count()
-                material_counts[material] = count
-
-        # Recently tested
-        recent_count = query.filter(
-            PQR.test_date >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        ).count()
-
-        # Test results summary
-        tensile_pass_count = query.filter(
-            PQR.tensile_test_result == "pass"
-        ).count()
-
-        bend_pass_count = query.filter(
-            or_(
-                PQR.root_bend_result == "pass",
-                PQR.face_bend_result == "pass"
-            )
-        ).count()
-
-        ndt_pass_count = query.filter(
-            or_(
-                PQR.rt_result == "pass",
-                PQR.ut_result == "pass",
-                PQR.mt_result == "pass",
-                PQR.pt_result == "pass"
-            )
-        ).count()
+            criteria.append(PQR.owner_id == owner_id)
+
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        stats = grouped_statistics(
+            db, PQR, criteria,
+            dimensions={
+                "qualification": PQR.qualification_result,
+                "process": PQR.welding_process,
+                "material": PQR.base_material_group,
+                "month": date_bucket(db, PQR.test_date),
+            },
+            conditions={
+                "recent": PQR.test_date >= today,
+                "tensile_pass": PQR.tensile_test_result == "pass",
+                "bend_pass": or_(
+                    PQR.root_bend_result == "pass",
+                    PQR.face_bend_result == "pass"
+                ),
+                "ndt_pass": or_(
+                    PQR.rt_result == "pass",
+                    PQR.ut_result == "pass",
+                    PQR.mt_result == "pass",
+                    PQR.pt_result == "pass"
+                ),
+            }
+        )
 
         return {
-            "total_count": total_count,
-            "qualification_counts": qualification_counts,
-            "process_counts": process_counts,
-            "material_counts": material_counts,
-            "recent_count": recent_count,
+            "total_count": stats.total,
+            "qualification_counts": stats.group("qualification", ["qualified", "not qualified"]),
+            "process_counts": stats.group("process"),
+            "material_counts": stats.group("material"),
+            "monthly_counts": stats.group("month"),
+            "recent_count": stats.conditions["recent"],
             "test_summary": {
-                "tensile_pass_count": tensile_pass_count,
-                "bend_pass_count": bend_pass_count,
-                "ndt_pass_count": ndt_pass_count
+                "tensile_pass_count": stats.conditions["tensile_pass"],
+                "bend_pass_count": stats.conditions["bend_pass"],
+                "ndt_pass_count": stats.conditions["ndt_pass"]
             }
         }
 
@@ -0,0 +1,222 @@
+"""
+认证主体缓存
+Short-lived cache of the authenticated user snapshot used by get_current_user.
+
+每个请求在校验JWT后都要加载当前用户。这里把用户行的列值（不含密码哈希）
+缓存为快照：进程内LRU（PRINCIPAL_LOCAL_CACHE_TTL 秒）→ Redis（键包含版本号，
+PRINCIPAL_CACHE_TTL 秒）→ 数据库。命中时用快照构造一个已持久化状态的 User
+对象并并入当前会话（不发出查询），端点可以照常读取、修改并提交。
+
+- 用户行通过ORM变更（会员等级、启用状态、资料、登录时间等）提交后递增版本号
+  并清除本进程缓存；其他进程最迟在进程内缓存过期后读取到新值
+- 通过原生SQL修改用户行的代码需要调用 principal_cache.invalidate(user_id)
+- 配额使用量列在同步会话中不取自快照，首次访问时从数据库加载，
+  避免基于过期计数累加
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import (
+    LocalTTLCache, bump_version, cache_get_json, cache_get_json_async, cache_set_json,
+    cache_set_json_async, get_version, get_version_async, make_key
+)
+from app.core.config import settings
+from app.models.user import User
+
+# 不进入快照的列
+_EXCLUDED_COLUMNS = ("hashed_password",)
+
+# 同步会话中每次从数据库读取的列（配额累加基于这些值）
+_RELOAD_ON_ACCESS_COLUMNS = ("wps_quota_used", "pqr_quota_used", "ppqr_quota_used", "storage_quota_used")
+
+# 快照列 -> 是否为日期时间列
+_SNAPSHOT_COLUMNS: Dict[str, bool] = {
+    attr.key: isinstance(attr.columns[0].type, DateTime)
+    for attr in inspect(User).column_attrs
+    if attr.key not in _EXCLUDED_COLUMNS
+}
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    """用户行 -> 可JSON序列化的快照"""
+    snapshot = {}
+    for key, is_datetime in _SNAPSHOT_COLUMNS.items():
+        value = getattr(user, key)
+        snapshot[key] = value.isoformat() if is_datetime and value is not None else value
+    return snapshot
+
+
+def _build_user(snapshot: Dict[str, Any], exclude: Tuple[str, ...] = ()) -> User:
+    """快照 -> 已脱离会话、状态与刚查询出的对象相同的 User（未包含的列访问时加载）"""
+    values = {}
+    for key, is_datetime in _SNAPSHOT_COLUMNS.items():
+        if key in exclude or key not in snapshot:
+            continue
+        value = snapshot[key]
+        values[key] = datetime.fromisoformat(value) if is_datetime and value is not None else value
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+class PrincipalCache:
+    """当前用户快照的两级缓存"""
+
+    def __init__(self, local_ttl: float, max_entries: int, redis_ttl: int):
+        self.redis_ttl = redis_ttl
+        self._local = LocalTTLCache(local_ttl, max_entries)
+
+        # 指标
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.loads = 0
+
+    def _redis_key(self, user_id: int) -> str:
+        return make_key("current_user", user_id, get_version("current_user", user_id))
+
+    def _cached(self, user_id: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """读取快照，返回 (快照或None, 未命中时写入用的Redis键)"""
+        snapshot = self._local.get(user_id)
+        if snapshot is not None:
+            self.local_hits += 1
+            return snapshot, None
+
+        # 先取版本号再查询数据库：并发提交递增版本后，旧值只会写到旧版本的键上
+        redis_key = self._redis_key(user_id)
+        snapshot = cache_get_json(redis_key)
+        if snapshot is not None:
+            self.redis_hits += 1
+            self._local.set(user_id, snapshot)
+        return snapshot, redis_key
+
+    async def _cached_async(self, user_id: int) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """_cached 的异步版本（redis.asyncio，不阻塞事件循环）"""
+        snapshot = self._local.get(user_id)
+        if snapshot is not None:
+            self.local_hits += 1
+            return snapshot, None
+
+        redis_key = make_key("current_user", user_id, await get_version_async("current_user", user_id))
+        snapshot = await cache_get_json_async(redis_key)
+        if snapshot is not None:
+            self.redis_hits += 1
+            self._local.set(user_id, snapshot)
+        return snapshot, redis_key
+
+    def _remember(self, user: User) -> Dict[str, Any]:
+        """记录加载的用户快照到进程内缓存"""
+        snapshot = _snapshot(user)
+        self.loads += 1
+        self._local.set(user.id, snapshot)
+        return snapshot
+
+    def _store(self, redis_key: str, user: User) -> None:
+        cache_set_json(redis_key, self._remember(user), self.redis_ttl)
+
+    def get_user(self, db: Session, user_id: int) -> Optional[User]:
+        """
+        获取当前会话中的用户对象
+
+        Args:
+            db: 请求的数据库会话
+            user_id: 用户ID
+
+        Returns:
+            会话中的 User；用户不存在时返回None
+        """
+        existing = db.identity_map.get(inspect(User).identity_key_from_primary_key((user_id,)))
+        if existing is not None:
+            return existing
+
+        snapshot, redis_key = self._cached(user_id)
+        if snapshot is not None:
+            return db.merge(_build_user(snapshot, exclude=_RELOAD_ON_ACCESS_COLUMNS), load=False)
+
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is not None:
+            self._store(redis_key, user)
+        return user
+
+    async def get_user_async(self, db: AsyncSession, user_id: int) -> Optional[User]:
+        """
+        获取当前异步会话中的用户对象（get_user 的异步版本）
+
+        异步会话中不能在访问属性时隐式加载，因此并入快照中的全部列。
+        Redis 通过 redis.asyncio 访问，不阻塞事件循环。
+        """
+        existing = db.sync_session.identity_map.get(inspect(User).identity_key_from_primary_key((user_id,)))
+        if existing is not None:
+            return existing
+
+        snapshot, redis_key = await self._cached_async(user_id)
+        if snapshot is not None:
+            return await db.merge(_build_user(snapshot), load=False)
+
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+        if user is not None:
+            await cache_set_json_async(redis_key, self._remember(user), self.redis_ttl)
+        return user
+
+    def invalidate(self, user_id: int) -> None:
+        """用户行发生变化：清除本进程缓存并递增版本号"""
+        self._local.pop(user_id)
+        bump_version("current_user", user_id)
+
+    def clear(self) -> None:
+        """清空本进程缓存"""
+        self._local.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._local),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "loads": self.loads,
+        }
+
+
+# 全局认证主体缓存实例
+principal_cache = PrincipalCache(
+    local_ttl=settings.PRINCIPAL_LOCAL_CACHE_TTL,
+    max_entries=settings.PRINCIPAL_LOCAL_CACHE_SIZE,
+    redis_ttl=settings.PRINCIPAL_CACHE_TTL
+)
+
+
+# ---------------------------------------------------------------------------
+# 缓存失效
+# ---------------------------------------------------------------------------
+# 会话 info 中待失效用户ID的键
+_PENDING_PRINCIPAL_KEY = "principal_pending_invalidation"
+
+
+@event.listens_for(Session, "before_flush")
+def _track_user_changes(session: Session, flush_context, instances) -> None:
+    """flush前记录发生变更或被删除的用户"""
+    pending: Set[int] = set()
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj, include_collections=False):
+            pending.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending.add(obj.id)
+    if pending:
+        session.info.setdefault(_PENDING_PRINCIPAL_KEY, set()).update(pending)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session: Session) -> None:
+    """事务提交后使变更用户的快照失效"""
+    for user_id in session.info.pop(_PENDING_PRINCIPAL_KEY, set()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    """事务回滚后丢弃待失效记录"""
+    session.info.pop(_PENDING_PRINCIPAL_KEY, None)
@@ -0,0 +1,157 @@
+"""
+PDF打印样式
+Preloaded WeasyPrint stylesheets and font configuration shared by all PDF exports.
+
+原先每次PDF导出都把完整CSS内联进HTML，WeasyPrint 每次都要重新解析
+样式表并重新查找中文字体。现在每个渲染进程在启动时：
+
+- 按样式变体解析一次 CSS，所有PDF导出复用同一个 CSS 对象
+- 共用一个 FontConfiguration，字体查找结果在进程内缓存
+- 预热：渲染一页包含中文的示例文档，完成 Pango/fontconfig 初始化，
+  部署后的第一次导出不再额外等待
+"""
+import logging
+import time
+from typing import Dict, Optional
+
+try:
+    from weasyprint import CSS, HTML
+    from weasyprint.text.fonts import FontConfiguration
+    WEASYPRINT_AVAILABLE = True
+except (ImportError, OSError):
+    WEASYPRINT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 默认打印样式（WPS / PQR / pPQR 共用）
+DEFAULT_PRINT_CSS = """
+@page {
+    size: A4;
+    margin: 2cm;
+    @bottom-center {
+        content: "第 " counter(page) " 页";
+    }
+}
+body {
+    font-family: 'SimSun', 'Microsoft YaHei', 'Arial', sans-serif;
+    font-size: 12pt;
+    line-height: 1.6;
+    color: #333;
+}
+h1 {
+    text-align: center;
+    font-size: 24pt;
+    margin-bottom: 10pt;
+    color: #000;
+}
+h2 {
+    font-size: 18pt;
+    background-color: #f0f0f0;
+    padding: 8pt;
+    margin-top: 15pt;
+    color: #000;
+}
+h3 {
+    font-size: 14pt;
+    margin-top: 10pt;
+    color: #000;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 10pt 0;
+    page-break-inside: avoid;
+}
+td, th {
+    border: 1px solid #000;
+    padding: 6pt 8pt;
+    text-align: left;
+}
+th {
+    background-color: #f0f0f0;
+    font-weight: bold;
+}
+img {
+    max-width: 100%;
+    page-break-inside: avoid;
+}
+p {
+    margin: 0.5em 0;
+}
+hr {
+    border: none;
+    border-top: 2px solid #ddd;
+    margin: 2em 0;
+}
+"""
+
+# 样式变体 -> CSS
+PRINT_STYLE_VARIANTS: Dict[str, str] = {
+    "default": DEFAULT_PRINT_CSS,
+}
+
+# 预热用的示例文档（包含中文、表格和页脚页码）
+_WARM_UP_HTML = """
+<h1>焊接工艺规程</h1>
+<h2>基本信息</h2>
+<table><tr><th>编号</th><td>WPS-0001</td></tr><tr><th>标题</th><td>预热</td></tr></table>
+<p>焊接工艺管理系统</p>
+"""
+
+
+class PrintStylesheets:
+    """进程内共享的PDF样式表与字体配置"""
+
+    def __init__(self):
+        self._font_config: Optional["FontConfiguration"] = None
+        self._stylesheets: Dict[str, "CSS"] = {}
+
+    @property
+    def font_config(self) -> "FontConfiguration":
+        """共享的字体配置（首次使用时创建）"""
+        if self._font_config is None:
+            self._font_config = FontConfiguration()
+        return self._font_config
+
+    def get(self, variant: str = "default") -> "CSS":
+        """获取已解析的样式表（每个变体只解析一次）"""
+        stylesheet = self._stylesheets.get(variant)
+        if stylesheet is None:
+            if variant not in PRINT_STYLE_VARIANTS:
+                raise ValueError(f"不支持的打印样式: {variant}")
+            stylesheet = CSS(string=PRINT_STYLE_VARIANTS[variant], font_config=self.font_config)
+            self._stylesheets[variant] = stylesheet
+        return stylesheet
+
+    def write_pdf(self, html_content: str, target, variant: str = "default") -> None:
+        """使用共享样式表和字体配置渲染PDF到 target"""
+        HTML(string=html_content).write_pdf(
+            target=target,
+            stylesheets=[self.get(variant)],
+            font_config=self.font_config
+        )
+
+    def warm_up(self) -> Optional[float]:
+        """
+        预热：解析全部样式变体并渲染一页示例文档
+
+        Returns:
+            float: 耗时（毫秒）；WeasyPrint 不可用时返回 None
+        """
+        if not WEASYPRINT_AVAILABLE:
+            return None
+
+        started = time.perf_counter()
+        for variant in PRINT_STYLE_VARIANTS:
+            self.get(variant)
+            HTML(string=_WARM_UP_HTML).write_pdf(
+                stylesheets=[self.get(variant)],
+                font_config=self.font_config
+            )
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"[打印样式] 预热完成: {len(PRINT_STYLE_VARIANTS)} 个样式变体, {elapsed_ms:.0f}ms")
+        return elapsed_ms
+
+
+# 全局实例（每个渲染进程一个）
+print_stylesheets = PrintStylesheets()
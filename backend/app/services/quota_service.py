@@ -1,14 +1,25 @@
 """
 配额管理服务
 Quota Management Service
+
+个人工作区的文档类配额（WPS、PQR、pPQR、存储）记在 users.*_quota_used 列上。
+创建路径使用预留接口：reserve() 用一条条件 UPDATE 原子地检查并累加使用量
+（UPDATE ... SET used = used + n WHERE used + n <= limit RETURNING used）
+并立即提交，只在这一条语句期间持有用户行锁；创建失败时 release()
+原子地退回。并发创建不会超出配额，也不会丢失累加。
 """
+import zlib
 from typing import Optional, Dict, Any
+from sqlalchemy import case, func, text, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException, status
 
 from app.models.user import User
 from app.models.company import Company, CompanyEmployee
 from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.services.membership_service import MembershipService
+from app.services.principal_service import principal_cache
 
 
 class QuotaType:
@@ -31,11 +42,172 @@ class QuotaType:
     FACTORIES = "factories"
 
 
+# 个人工作区按使用量列计数的配额类型 -> (使用量列, 显示名称, 单位)
+_USAGE_COLUMNS = {
+    QuotaType.WPS: (User.wps_quota_used, "WPS", "个"),
+    QuotaType.PQR: (User.pqr_quota_used, "PQR", "个"),
+    QuotaType.PPQR: (User.ppqr_quota_used, "pPQR", "个"),
+    QuotaType.STORAGE: (User.storage_quota_used, "存储", "MB"),
+}
+
+
+class QuotaReservation:
+    """
+    配额预留
+
+    reserve() 返回时使用量已经计入并提交。创建成功后调用 commit() 保留，
+    失败时调用 release() 退回；也可以作为上下文管理器使用，
+    代码块抛出异常时自动退回。
+    """
+
+    def __init__(self, service: "QuotaService", user: User, quota_type: str, amount: int):
+        self.service = service
+        self.user = user
+        self.quota_type = quota_type
+        self.amount = amount
+        self.settled = amount == 0
+
+    def commit(self) -> None:
+        """确认预留（使用量保留）"""
+        self.settled = True
+
+    def release(self) -> None:
+        """退回预留的使用量（重复调用无效）"""
+        if self.settled:
+            return
+        self.settled = True
+        # 创建失败：先丢弃会话中未提交的更改，再退回使用量
+        self.service.db.rollback()
+        self.service._release(self.user, self.quota_type, self.amount)
+
+    def __enter__(self) -> "QuotaReservation":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.release()
+        return False
+
+
 class QuotaService:
     """配额管理服务"""
     
     def __init__(self, db: Session):
         self.db = db
+
+    def reserve(
+        self,
+        user: User,
+        workspace_context: WorkspaceContext,
+        quota_type: str,
+        amount: int = 1
+    ) -> QuotaReservation:
+        """
+        预留配额（创建数据前调用）
+
+        检查和累加在同一条条件 UPDATE 中完成并立即提交（会同时提交会话中
+        已有的更改，因此在创建数据之前调用），并发请求不会同时通过检查。
+
+        Args:
+            user: 用户对象
+            workspace_context: 工作区上下文
+            quota_type: 配额类型
+            amount: 预留的数量
+
+        Returns:
+            QuotaReservation: 创建成功后 commit()，失败时 release()
+
+        Raises:
+            HTTPException: 如果配额不足
+
+        Note:
+            只有个人工作区的文档类配额按使用量列计数，其他情况返回空预留
+        """
+        if not workspace_context.is_personal() or quota_type not in _USAGE_COLUMNS or amount <= 0:
+            return QuotaReservation(self, user, quota_type, 0)
+
+        column, label, unit = _USAGE_COLUMNS[quota_type]
+        limit = MembershipService(self.db).get_membership_limits(user.member_tier).get(quota_type, 0)
+        used = func.coalesce(column, 0)
+        stmt = (
+            update(User)
+            .where(User.id == user.id, used + amount <= limit)
+            .values({column: used + amount})
+            .returning(column)
+        )
+        if self._execute_usage_update(user, column, stmt) is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"已达到{label}配额限制 ({limit}{unit})，请升级会员等级"
+            )
+        return QuotaReservation(self, user, quota_type, amount)
+
+    def release_usage(
+        self,
+        user: User,
+        workspace_context: WorkspaceContext,
+        quota_type: str,
+        amount: int = 1
+    ):
+        """
+        退回配额使用量（删除数据后调用，原子递减且不低于0）
+
+        Args:
+            user: 用户对象
+            workspace_context: 工作区上下文
+            quota_type: 配额类型
+            amount: 退回的数量
+        """
+        if not workspace_context.is_personal() or quota_type not in _USAGE_COLUMNS or amount <= 0:
+            return
+        self._release(user, quota_type, amount)
+
+    def lock_quota_scope(self, scope: str, ident: int):
+        """
+        在当前事务内串行化同一范围的配额检查
+
+        用于没有使用量列、需要先计数再插入的配额（如自定义模板数量）。
+        使用 PostgreSQL 事务级咨询锁，提交或回滚时释放，只阻塞同一范围内的
+        并发创建，不锁用户行；其他数据库不加锁。
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            return
+        self.db.execute(
+            text("SELECT pg_advisory_xact_lock(:scope, :ident)"),
+            {"scope": zlib.crc32(scope.encode("utf-8")) & 0x7FFFFFFF, "ident": ident}
+        )
+
+    def _release(self, user: User, quota_type: str, amount: int):
+        """原子地减少使用量（不低于0）"""
+        column = _USAGE_COLUMNS[quota_type][0]
+        used = func.coalesce(column, 0)
+        stmt = (
+            update(User)
+            .where(User.id == user.id)
+            .values({column: case((used > amount, used - amount), else_=0)})
+            .returning(column)
+        )
+        self._execute_usage_update(user, column, stmt)
+
+    def _execute_usage_update(self, user: User, column, stmt) -> Optional[int]:
+        """
+        执行使用量更新并立即提交
+
+        使用请求会话自身的连接（不再占用连接池中的第二个连接），用户行锁
+        只持有到这条语句提交。更新后同步会话中用户对象的已提交值并使当前
+        用户缓存失效。
+
+        Returns:
+            更新后的使用量；条件不满足（配额不足）时返回None
+        """
+        new_used = self.db.execute(stmt.execution_options(synchronize_session=False)).scalar()
+        self.db.commit()
+        if new_used is not None:
+            set_committed_value(user, column.key, new_used)
+            principal_cache.invalidate(user.id)
+        return new_used
     
     def check_quota(
         self,
@@ -218,6 +390,9 @@ class QuotaService:
             )
 
         self.db.commit()
+        if workspace_context.is_personal():
+            # 条件UPDATE不经过对象变更，会话事件不会使当前用户缓存失效
+            principal_cache.invalidate(user.id)
     
     def _increment_personal_quota(
         self,
@@ -231,8 +406,15 @@ class QuotaService:
         if not hasattr(user, used_key):
             raise ValueError(f"不支持的配额类型: {quota_type}")
         
-        current_used = getattr(user, used_key, 0) or 0
-        setattr(user, used_key, current_used + increment)
+        column = getattr(User, used_key)
+        new_used = self.db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values({column: func.coalesce(column, 0) + increment})
+            .returning(column)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        set_committed_value(user, used_key, new_used)
     
     def _increment_enterprise_quota(
         self,
@@ -321,6 +503,9 @@ class QuotaService:
             )
 
         self.db.commit()
+        if workspace_context.is_personal():
+            # 条件UPDATE不经过对象变更，会话事件不会使当前用户缓存失效
+            principal_cache.invalidate(user.id)
     
     def _decrement_personal_quota(
         self,
@@ -334,9 +519,16 @@ class QuotaService:
         if not hasattr(user, used_key):
             raise ValueError(f"不支持的配额类型: {quota_type}")
         
-        current_used = getattr(user, used_key, 0) or 0
-        new_used = max(0, current_used - decrement)
-        setattr(user, used_key, new_used)
+        column = getattr(User, used_key)
+        used = func.coalesce(column, 0)
+        new_used = self.db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values({column: case((used > decrement, used - decrement), else_=0)})
+            .returning(column)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        set_committed_value(user, used_key, new_used)
     
     def _decrement_enterprise_quota(
         self,
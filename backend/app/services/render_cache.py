@@ -0,0 +1,228 @@
+"""
+渲染结果缓存
+Content-addressed on-disk cache for rendered WPS/PQR/pPQR documents.
+
+导出远比编辑频繁：同一版本的文档重复导出时直接返回磁盘上的渲染结果，
+不再重新解析HTML和渲染。
+
+- 缓存键：文档类型、文档列值的内容哈希（含 document_html 与 updated_at）、
+  输出格式、表格风格和渲染器版本；Word 页脚带打印日期，键中另含当天日期
+- 存储：RENDER_CACHE_DIR 下以键命名的文件；渲染进程直接写入同目录的
+  临时文件，完成后原子替换，渲染结果不在内存中保留完整副本
+- 淘汰：总大小超过 RENDER_CACHE_MAX_MB 时按最近访问时间（mtime）淘汰，
+  命中时刷新 mtime，即按 LRU 淘汰
+- 同一键的并发请求只渲染一次
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from datetime import date
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+from urllib.parse import quote
+
+from starlette.background import BackgroundTask
+from starlette.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.disk_cache import DiskLRU
+from app.services.render_engine import document_snapshot, render_engine
+
+logger = logging.getLogger(__name__)
+
+# 渲染器版本：渲染逻辑或样式变化导致输出不同时递增，使旧缓存全部失效
+RENDERER_VERSION = 3
+
+# 输出格式 -> 文件扩展名
+FORMAT_EXTENSIONS = {"word": "docx", "pdf": "pdf"}
+
+# 下载响应每次读取的字节数
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def render_cache_key(kind: str, fmt: str, snapshot: Dict[str, Any], style: Optional[str] = None) -> str:
+    """计算渲染结果的缓存键"""
+    content = json.dumps(snapshot, sort_keys=True, ensure_ascii=False, default=str)
+    parts = [
+        f"v{RENDERER_VERSION}",
+        kind,
+        fmt,
+        style or "",
+        # Word 页脚包含打印日期，按天区分
+        date.today().isoformat() if fmt == "word" else "",
+        hashlib.sha256(content.encode("utf-8")).hexdigest(),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """磁盘渲染结果缓存（按大小上限LRU淘汰）"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lru = DiskLRU(directory, max_bytes)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # 指标
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.directory, f"{key}.{FORMAT_EXTENSIONS[fmt]}")
+
+    def get(self, key: str, fmt: str) -> Optional[str]:
+        """查找缓存文件，命中时刷新访问时间并返回路径"""
+        path = self._path(key, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def reserve(self) -> str:
+        """在缓存目录中创建渲染输出用的临时文件，返回路径"""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        return tmp_path
+
+    def commit(self, key: str, fmt: str, tmp_path: str, size: int) -> str:
+        """把渲染好的临时文件原子替换为缓存文件，必要时淘汰旧文件，返回路径"""
+        path = self._path(key, fmt)
+        os.replace(tmp_path, path)
+        self._lru.added(size)
+        return path
+
+    async def render(
+        self,
+        kind: str,
+        fmt: str,
+        document: Any,
+        style: Optional[str] = None
+    ) -> str:
+        """
+        获取渲染好的文档文件（未命中时通过渲染引擎渲染并写入缓存）
+
+        Args:
+            kind: 文档类型（wps / pqr / ppqr）
+            fmt: 输出格式（word / pdf）
+            document: ORM文档对象
+            style: Word表格风格（仅 word 格式使用）
+
+        Returns:
+            str: 缓存文件路径
+        """
+        style = style if fmt == "word" else None
+        key = render_cache_key(kind, fmt, document_snapshot(document), style)
+
+        path = self.get(key, fmt)
+        if path:
+            self.hits += 1
+            return path
+
+        # 同一文档版本的并发导出只渲染一次
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        tmp_path = None
+        try:
+            # 渲染进程直接写入缓存目录中的临时文件，完成后原子替换
+            tmp_path = await asyncio.to_thread(self.reserve)
+            size = await render_engine.render(kind, fmt, document, tmp_path, style=style)
+            path = await asyncio.to_thread(self.commit, key, fmt, tmp_path, size)
+            tmp_path = None
+            future.set_result(path)
+            return path
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # 避免没有其他等待者时出现 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            if tmp_path is not None:
+                self._discard(tmp_path)
+
+    async def open_rendered(
+        self,
+        kind: str,
+        fmt: str,
+        document: Any,
+        style: Optional[str] = None
+    ) -> BinaryIO:
+        """
+        获取渲染好的文档并打开（参数同 render）
+
+        返回的文件对象不受之后的缓存淘汰影响（删除只移除目录项），调用方负责关闭。
+        render 返回到打开之间文件被淘汰时重新渲染一次。
+        """
+        for attempt in range(2):
+            path = await self.render(kind, fmt, document, style=style)
+            try:
+                return await asyncio.to_thread(open, path, "rb")
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                logger.info(f"[渲染缓存] 文件在打开前被淘汰，重新渲染: {path}")
+
+    @staticmethod
+    def _discard(tmp_path: str) -> None:
+        """删除未完成的临时文件（渲染超时时子进程可能仍在写入，删除后由其写完即释放）"""
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存指标"""
+        return {
+            "directory": self.directory,
+            "max_bytes": self.max_bytes,
+            "size_bytes": self._lru.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._lru.evictions,
+        }
+
+
+def _iter_file(handle: BinaryIO) -> Iterator[bytes]:
+    while True:
+        chunk = handle.read(_STREAM_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def rendered_file_response(handle: BinaryIO, media_type: str, filename: str) -> StreamingResponse:
+    """
+    以 open_rendered 打开的文件构造下载响应
+
+    直接读取已打开的文件对象而不按路径重新打开，返回前文件被淘汰也不影响下载；
+    响应结束（包括客户端断开）后关闭文件。
+    """
+    return StreamingResponse(
+        _iter_file(handle),
+        media_type=media_type,
+        headers={
+            "Content-Length": str(os.fstat(handle.fileno()).st_size),
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"
+        },
+        background=BackgroundTask(handle.close)
+    )
+
+
+# 全局渲染缓存实例
+render_cache = RenderCache(
+    directory=settings.RENDER_CACHE_DIR,
+    max_bytes=settings.RENDER_CACHE_MAX_MB * 1024 * 1024
+)
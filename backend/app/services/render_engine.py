@@ -0,0 +1,265 @@
+"""
+文档渲染引擎
+Process-pool backed Word/PDF rendering for document export endpoints.
+
+HTML 解析、python-docx 构建和 WeasyPrint 排版都是 CPU 密集型操作，
+在请求处理协程中直接执行会阻塞整个事件循环。渲染引擎把渲染任务
+提交到独立的进程池执行：
+
+- 并发受限：最多 RENDER_POOL_WORKERS 个任务同时渲染，另有
+  RENDER_MAX_QUEUE 个任务排队，超出时立即返回 503
+- 请求超时：等待超过 RENDER_TIMEOUT_SECONDS 返回 504
+- 指标：排队数、渲染中任务数、完成/失败/超时/拒绝次数、平均耗时
+
+子进程只接收文档列值的快照（普通 dict），不接触数据库会话；渲染结果
+直接写入调用方指定的文件，不经进程间管道传回完整内容。
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 文档类型 -> 导出方法名前缀（DocumentExportService.export_<prefix>_to_<format>）
+DOCUMENT_KINDS = ("wps", "pqr", "ppqr")
+RENDER_FORMATS = ("word", "pdf")
+
+
+def document_snapshot(document: Any) -> Dict[str, Any]:
+    """提取ORM文档对象的列值（可跨进程传递）"""
+    return {attr.key: getattr(document, attr.key) for attr in inspect(document).mapper.column_attrs}
+
+
+def _init_worker() -> None:
+    """
+    子进程启动时预先导入渲染依赖（WeasyPrint / python-docx 导入开销较大），
+    并预热PDF打印样式和字体配置
+    """
+    import app.services.document_export_service  # noqa: F401
+    from app.services.print_styles import print_stylesheets
+
+    try:
+        print_stylesheets.warm_up()
+    except Exception as e:
+        # 预热失败不影响进程池，首次导出时再按需加载
+        logger.warning(f"[渲染引擎] 工作进程预热失败: {e}")
+
+
+def _worker_ready() -> int:
+    """空任务：用于在启动时拉起工作进程（预热在 _init_worker 中完成）"""
+    return os.getpid()
+
+
+def _render_in_worker(
+    kind: str,
+    fmt: str,
+    snapshot: Dict[str, Any],
+    style: Optional[str],
+    target_path: str
+) -> int:
+    """在子进程中渲染文档，直接写入目标文件，返回文件大小"""
+    from app.services.document_export_service import DocumentExportService
+
+    service = DocumentExportService(None)
+    export = getattr(service, f"export_{kind}_to_{fmt}")
+    document = SimpleNamespace(**snapshot)
+    with open(target_path, "wb") as output:
+        if fmt == "word":
+            export(document, style=style, output=output)
+        else:
+            export(document, output=output)
+        output.flush()
+        return os.fstat(output.fileno()).st_size
+
+
+class RenderEngine:
+    """基于进程池的文档渲染引擎"""
+
+    def __init__(self, workers: int, max_queue: int, timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        # 指标
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self._total_render_ms = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """懒加载进程池（spawn 启动，避免 fork 继承事件循环和连接池）"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker
+                )
+                logger.info(f"[渲染引擎] 进程池已启动: {self.workers} 个工作进程")
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        """工作进程异常退出后丢弃进程池，下次提交时重建"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    async def render(
+        self,
+        kind: str,
+        fmt: str,
+        document: Any,
+        target_path: str,
+        style: Optional[str] = None
+    ) -> int:
+        """
+        渲染文档
+
+        Args:
+            kind: 文档类型（wps / pqr / ppqr）
+            fmt: 输出格式（word / pdf）
+            document: ORM文档对象
+            target_path: 输出文件路径
+            style: Word表格风格（仅 word 格式使用）
+
+        Returns:
+            int: 输出文件大小（字节）
+
+        Raises:
+            HTTPException: 排队已满（503）或渲染超时（504）
+        """
+        if kind not in DOCUMENT_KINDS or fmt not in RENDER_FORMATS:
+            raise ValueError(f"不支持的渲染任务: {kind}/{fmt}")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            logger.warning(f"[渲染引擎] 排队已满，拒绝 {kind}/{fmt} 渲染任务: {self.stats()}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="文档导出任务繁忙，请稍后重试"
+            )
+
+        snapshot = document_snapshot(document)
+        started = time.perf_counter()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="文档导出排队超时，请稍后重试"
+            )
+        finally:
+            self.queued -= 1
+
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._get_executor(), _render_in_worker, kind, fmt, snapshot, style, target_path
+            )
+        except Exception:
+            self._release_slot()
+            raise
+        # 子进程中的任务无法中途终止：超时后仍占用并发名额，直到真正结束
+        future.add_done_callback(lambda _: self._release_slot())
+
+        try:
+            remaining = max(self.timeout - (time.perf_counter() - started), 0.1)
+            size = await asyncio.wait_for(asyncio.shield(future), timeout=remaining)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"[渲染引擎] {kind}/{fmt} 渲染超时（{self.timeout}s）")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="文档导出超时"
+            )
+        except BrokenProcessPool:
+            self.failed += 1
+            logger.error("[渲染引擎] 工作进程异常退出，进程池将重建")
+            self._reset_executor()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.completed += 1
+        self._total_render_ms += elapsed_ms
+        logger.info(f"[渲染引擎] {kind}/{fmt} 渲染完成: {elapsed_ms:.0f}ms, {size} 字节")
+        return size
+
+    async def warm_up(self) -> None:
+        """启动全部工作进程并完成预热，使部署后的第一次导出无需等待进程启动"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            pids = await asyncio.gather(
+                *[loop.run_in_executor(executor, _worker_ready) for _ in range(self.workers)]
+            )
+        except Exception as e:
+            logger.warning(f"[渲染引擎] 预热失败: {e}")
+            return
+        logger.info(
+            f"[渲染引擎] 预热完成: {len(set(pids))} 个工作进程, "
+            f"{(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+    def _release_slot(self) -> None:
+        """渲染任务结束，释放并发名额"""
+        self.running -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """渲染引擎指标"""
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "avg_render_ms": round(self._total_render_ms / self.completed, 1) if self.completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# 全局渲染引擎实例
+render_engine = RenderEngine(
+    workers=settings.RENDER_POOL_WORKERS,
+    max_queue=settings.RENDER_MAX_QUEUE,
+    timeout=settings.RENDER_TIMEOUT_SECONDS
+)
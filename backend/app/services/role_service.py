@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 
 from app.models.role import Role, Permission, role_permission_association, user_role_association
 from app.models.user import User
+from app.services.permission_service import PermissionCache, permission_cache
 from app.schemas.role import RoleCreate, RoleUpdate, PermissionCreate, PermissionUpdate
 
 
@@ -187,19 +188,25 @@ class RoleService:
         return user
 
     def get_user_permissions(self, db: Session, *, user_id: int) -> Set[str]:
-        """Get all permissions for a user."""
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            return set()
-
-        permissions = set()
-        for role in user.roles:
-            if role.is_active:
-                for permission in role.permissions:
-                    # Format: "resource:action" e.g., "wps:create"
-                    permissions.add(f"{permission.resource}:{permission.action}")
+        """Get all permissions for a user (cached, see permission_service)."""
+        return permission_cache.get_or_load(
+            PermissionCache.ROLES, user_id,
+            lambda: self._load_user_permissions(db, user_id=user_id)
+        )
 
-        return permissions
+    def _load_user_permissions(self, db: Session, *, user_id: int) -> Set[str]:
+        """Resolve "resource:action" permissions of the user's active roles in one query."""
+        rows = (
+            db.query(Permission.resource, Permission.action)
+            .join(role_permission_association, role_permission_association.c.permission_id == Permission.id)
+            .join(Role, Role.id == role_permission_association.c.role_id)
+            .join(user_role_association, user_role_association.c.role_id == Role.id)
+            .filter(user_role_association.c.user_id == user_id, Role.is_active.is_(True))
+            .distinct()
+            .all()
+        )
+        # Format: "resource:action" e.g., "wps:create"
+        return {f"{resource}:{action}" for resource, action in rows}
 
     def check_user_permission(
         self, db: Session, *, user_id: int, resource: str, action: str
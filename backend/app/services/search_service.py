@@ -0,0 +1,435 @@
+"""
+文档全文检索服务
+Document search service (tsvector + pg_trgm) for WPS / PQR / pPQR.
+
+分词规则（对中文友好，不依赖 zhparser 等数据库扩展）：
+- 英文/数字按连续字母数字切分并转小写（全角字符先做 NFKC 归一化）
+- 连续的中文字符按二元组（bigram）切分，单字保留原样
+
+文档侧与查询侧使用相同的分词规则，tsvector 通过 array_to_tsvector
+直接写入词元，避免 PostgreSQL 解析器对中文的错误切分。
+"""
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Text, and_, cast, event, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, TSQUERY, insert as pg_insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.data_access import DataAccessMiddleware, WorkspaceContext
+from app.models.ppqr import PPQR
+from app.models.pqr import PQR
+from app.models.search_index import DocumentSearchIndex
+from app.models.user import User
+from app.models.wps import WPS
+
+logger = logging.getLogger(__name__)
+
+
+# 文档类型 -> (模型, 编号字段, A权重字段, B权重字段, 模块数据字段)
+DOCUMENT_SOURCES: Dict[str, Tuple[Any, str, List[str], List[str], str]] = {
+    "wps": (
+        WPS, "wps_number",
+        ["title", "wps_number"],
+        ["company", "project_name", "welding_process", "base_material_spec", "filler_material_classification"],
+        "modules_data",
+    ),
+    "pqr": (
+        PQR, "pqr_number",
+        ["title", "pqr_number", "wps_number"],
+        ["company", "project_name", "welding_process", "base_material_spec", "filler_material_classification"],
+        "modules_data",
+    ),
+    "ppqr": (
+        PPQR, "ppqr_number",
+        ["title", "ppqr_number"],
+        ["company", "project_name", "test_purpose", "welding_process", "base_material_spec"],
+        "module_data",
+    ),
+}
+
+# 展平后检索文本的最大长度
+MAX_CONTENT_LENGTH = 20000
+
+_TOKEN_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+|[0-9a-z]+")
+_CJK_PATTERN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    将文本切分为检索词元
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        List[str]: 词元列表（保持出现顺序，可能包含重复）
+    """
+    if not text:
+        return []
+    normalized = unicodedata.normalize("NFKC", str(text)).lower()
+    tokens: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(normalized):
+        run = match.group()
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def build_tsquery(text: str) -> Optional[str]:
+    """
+    构造 tsquery 文本（所有词元 AND，末尾词元前缀匹配）
+
+    Returns:
+        Optional[str]: tsquery 文本；没有可检索词元时返回None
+    """
+    tokens = list(dict.fromkeys(tokenize(text)))
+    if not tokens:
+        return None
+    # 词元只包含字母数字和中文，无需转义
+    parts = [f"'{token}'" for token in tokens[:-1]]
+    parts.append(f"'{tokens[-1]}':*")
+    return " & ".join(parts)
+
+
+def flatten_values(data: Any) -> Iterable[str]:
+    """
+    递归展平 modules_data 中的文本和数值
+
+    跳过内嵌图片（data: URI）和链接，它们对检索没有意义且体积大。
+    """
+    if data is None:
+        return
+    if isinstance(data, dict):
+        for value in data.values():
+            yield from flatten_values(value)
+    elif isinstance(data, (list, tuple)):
+        for value in data:
+            yield from flatten_values(value)
+    elif isinstance(data, bool):
+        return
+    elif isinstance(data, (int, float)):
+        yield str(data)
+    elif isinstance(data, str):
+        value = data.strip()
+        if value and not value.startswith(("data:", "http://", "https://")):
+            yield value
+
+
+def _escape_like(term: str) -> str:
+    """转义 LIKE 通配符"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _tsvector_expression(weighted_tokens: Dict[str, List[str]]):
+    """按权重构造 tsvector 表达式"""
+    expression = None
+    for weight, tokens in weighted_tokens.items():
+        part = func.setweight(
+            func.array_to_tsvector(literal(sorted(set(tokens)), ARRAY(Text))),
+            weight
+        )
+        expression = part if expression is None else expression.op("||")(part)
+    return expression
+
+
+def build_index_row(document_type: str, document: Any) -> Dict[str, Any]:
+    """
+    根据源文档构造索引行
+
+    Args:
+        document_type: 文档类型
+        document: WPS / PQR / PPQR 对象
+
+    Returns:
+        Dict: 可直接用于 INSERT 的列值
+    """
+    _, number_field, a_fields, b_fields, modules_field = DOCUMENT_SOURCES[document_type]
+
+    a_text = [str(getattr(document, f)) for f in a_fields if getattr(document, f, None)]
+    b_text = [str(getattr(document, f)) for f in b_fields if getattr(document, f, None)]
+    c_text = list(flatten_values(getattr(document, modules_field, None)))
+
+    content = " ".join(a_text + b_text + c_text)[:MAX_CONTENT_LENGTH]
+
+    return {
+        "document_type": document_type,
+        "document_id": document.id,
+        "user_id": document.user_id,
+        "workspace_type": document.workspace_type,
+        "company_id": document.company_id,
+        "factory_id": document.factory_id,
+        "access_level": document.access_level,
+        "document_number": getattr(document, number_field, None),
+        "title": document.title,
+        "status": document.status,
+        "content": content,
+        "search_vector": _tsvector_expression({
+            "A": [t for text in a_text for t in tokenize(text)],
+            "B": [t for text in b_text for t in tokenize(text)],
+            "C": tokenize(" ".join(c_text)[:MAX_CONTENT_LENGTH]),
+        }),
+        "source_updated_at": document.updated_at,
+        "indexed_at": datetime.utcnow(),
+    }
+
+
+def upsert_index_rows(connection: Connection, rows: List[Dict[str, Any]]) -> None:
+    """批量写入/更新索引行"""
+    for row in rows:
+        stmt = pg_insert(DocumentSearchIndex.__table__).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_search_index_document",
+            set_={key: stmt.excluded[key] for key in row if key not in ("document_type", "document_id")}
+        )
+        connection.execute(stmt)
+
+
+def delete_index_rows(connection: Connection, document_type: str, document_ids: List[int]) -> None:
+    """删除索引行"""
+    if not document_ids:
+        return
+    connection.execute(
+        DocumentSearchIndex.__table__.delete().where(
+            DocumentSearchIndex.document_type == document_type,
+            DocumentSearchIndex.document_id.in_(document_ids)
+        )
+    )
+
+
+def document_ids_matching(document_type: str, term: str):
+    """
+    返回匹配检索词的文档ID子查询
+
+    供列表接口在启用检索索引时替代多列 ILIKE 过滤。
+    """
+    tsquery_text = build_tsquery(term)
+    conditions = [DocumentSearchIndex.content.ilike(f"%{_escape_like(term)}%", escape="\\")]
+    if tsquery_text:
+        conditions.append(
+            DocumentSearchIndex.search_vector.op("@@")(cast(literal(tsquery_text), TSQUERY))
+        )
+    return select(DocumentSearchIndex.document_id).where(
+        DocumentSearchIndex.document_type == document_type,
+        or_(*conditions)
+    )
+
+
+class DocumentSearchService:
+    """文档检索服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.data_access = DataAccessMiddleware(db)
+
+    def index_document(self, document_type: str, document: Any) -> None:
+        """写入或更新单个文档的索引"""
+        upsert_index_rows(self.db.connection(), [build_index_row(document_type, document)])
+
+    def remove_document(self, document_type: str, document_id: int) -> None:
+        """删除单个文档的索引"""
+        delete_index_rows(self.db.connection(), document_type, [document_id])
+
+    def search(
+        self,
+        query_text: str,
+        current_user: User,
+        workspace_context: WorkspaceContext,
+        document_types: Optional[List[str]] = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        按相关度检索文档
+
+        相关度 = ts_rank_cd（标题/编号权重最高）+ 0.5 × word_similarity（三元组相似度），
+        全文匹配或子串匹配（由 pg_trgm 索引加速）任一命中即返回。
+
+        Args:
+            query_text: 检索词
+            current_user: 当前用户
+            workspace_context: 工作区上下文
+            document_types: 限定的文档类型（默认全部）
+            limit: 返回数量
+            offset: 偏移量
+
+        Returns:
+            Dict: {"items": [...], "total": int}
+        """
+        query_text = query_text.strip()
+        types = [t for t in (document_types or DOCUMENT_SOURCES.keys()) if t in DOCUMENT_SOURCES]
+        if not query_text or not types:
+            return {"items": [], "total": 0}
+
+        tsquery_text = build_tsquery(query_text)
+        conditions = [DocumentSearchIndex.content.ilike(f"%{_escape_like(query_text)}%", escape="\\")]
+        rank = func.word_similarity(query_text, DocumentSearchIndex.content) * 0.5
+        if tsquery_text:
+            tsquery = cast(literal(tsquery_text), TSQUERY)
+            conditions.append(DocumentSearchIndex.search_vector.op("@@")(tsquery))
+            rank = func.ts_rank_cd(DocumentSearchIndex.search_vector, tsquery) + rank
+
+        query = self.db.query(DocumentSearchIndex, rank.label("rank")).filter(
+            DocumentSearchIndex.document_type.in_(types),
+            or_(*conditions)
+        )
+        query = self.data_access.apply_workspace_filter(
+            query, DocumentSearchIndex, current_user, workspace_context
+        )
+
+        total = query.order_by(None).count()
+        rows = query.order_by(
+            rank.desc(), DocumentSearchIndex.source_updated_at.desc()
+        ).offset(offset).limit(limit).all()
+
+        items = [
+            {
+                "document_type": entry.document_type,
+                "document_id": entry.document_id,
+                "document_number": entry.document_number,
+                "title": entry.title,
+                "status": entry.status,
+                "rank": float(score or 0),
+                "snippet": self._make_snippet(entry.content, query_text),
+                "updated_at": entry.source_updated_at,
+            }
+            for entry, score in rows
+        ]
+        return {"items": items, "total": total}
+
+    def reindex(
+        self,
+        document_type: Optional[str] = None,
+        full: bool = False,
+        batch_size: int = 500
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        增量重建索引
+
+        只处理索引缺失或源文档 updated_at 晚于索引记录的文档，
+        并清理已删除/停用文档的索引；full=True 时重建全部。
+
+        Args:
+            document_type: 仅重建指定类型（默认全部）
+            full: 是否全量重建
+            batch_size: 每批处理的文档数
+
+        Returns:
+            Dict: 每种文档类型的 {"indexed": n, "removed": m}
+        """
+        types = [document_type] if document_type else list(DOCUMENT_SOURCES.keys())
+        result: Dict[str, Dict[str, int]] = {}
+
+        for doc_type in types:
+            model = DOCUMENT_SOURCES[doc_type][0]
+            query = self.db.query(model).outerjoin(
+                DocumentSearchIndex,
+                and_(
+                    DocumentSearchIndex.document_type == doc_type,
+                    DocumentSearchIndex.document_id == model.id
+                )
+            ).filter(model.is_active == True)
+            if not full:
+                query = query.filter(or_(
+                    DocumentSearchIndex.id.is_(None),
+                    DocumentSearchIndex.source_updated_at.is_(None),
+                    DocumentSearchIndex.source_updated_at < model.updated_at
+                ))
+
+            indexed = 0
+            last_id = 0
+            while True:
+                batch = query.filter(model.id > last_id).order_by(model.id).limit(batch_size).all()
+                if not batch:
+                    break
+                upsert_index_rows(self.db.connection(), [build_index_row(doc_type, doc) for doc in batch])
+                self.db.commit()
+                indexed += len(batch)
+                last_id = batch[-1].id
+
+            stale_ids = [
+                row.document_id for row in self.db.query(DocumentSearchIndex.document_id).outerjoin(
+                    model, model.id == DocumentSearchIndex.document_id
+                ).filter(
+                    DocumentSearchIndex.document_type == doc_type,
+                    or_(model.id.is_(None), model.is_active == False)
+                ).all()
+            ]
+            delete_index_rows(self.db.connection(), doc_type, stale_ids)
+            self.db.commit()
+
+            result[doc_type] = {"indexed": indexed, "removed": len(stale_ids)}
+            logger.info(f"[检索索引] {doc_type}: 索引 {indexed} 条, 清理 {len(stale_ids)} 条")
+
+        return result
+
+    @staticmethod
+    def _make_snippet(content: Optional[str], query_text: str, width: int = 60) -> Optional[str]:
+        """截取命中位置附近的文本片段"""
+        if not content:
+            return None
+        position = content.lower().find(query_text.lower())
+        if position < 0:
+            return content[:width * 2]
+        start = max(0, position - width)
+        end = min(len(content), position + len(query_text) + width)
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if end < len(content) else ""
+        return f"{prefix}{content[start:end]}{suffix}"
+
+
+# ---------------------------------------------------------------------------
+# 写入路径上的索引维护
+# ---------------------------------------------------------------------------
+_MODEL_TYPES = {model: doc_type for doc_type, (model, *_rest) in DOCUMENT_SOURCES.items()}
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_search_index(session: Session, flush_context) -> None:
+    """
+    在同一事务中同步文档索引
+
+    使用保存点隔离：索引写入失败只记录日志，不影响业务写入，
+    遗漏的文档由增量重建任务补齐。
+    """
+    if not settings.SEARCH_INDEX_ENABLED:
+        return
+
+    upserts: List[Tuple[str, Any]] = []
+    deletes: Dict[str, List[int]] = {}
+    for obj in list(session.new) + list(session.dirty):
+        doc_type = _MODEL_TYPES.get(type(obj))
+        if doc_type and obj.id is not None:
+            if obj.is_active is False:
+                deletes.setdefault(doc_type, []).append(obj.id)
+            else:
+                upserts.append((doc_type, obj))
+    for obj in session.deleted:
+        doc_type = _MODEL_TYPES.get(type(obj))
+        if doc_type and obj.id is not None:
+            deletes.setdefault(doc_type, []).append(obj.id)
+
+    if not upserts and not deletes:
+        return
+
+    connection = session.connection()
+    if connection.dialect.name != "postgresql":
+        return
+
+    try:
+        with connection.begin_nested():
+            upsert_index_rows(connection, [build_index_row(t, doc) for t, doc in upserts])
+            for doc_type, ids in deletes.items():
+                delete_index_rows(connection, doc_type, ids)
+    except Exception as e:
+        logger.warning(f"[检索索引] 同步索引失败，等待增量重建: {e}")
@@ -1,12 +1,14 @@
 """
 SMS service for sending verification codes.
-Supports multiple SMS providers: Aliyun SMS, Tencent Cloud SMS, Yunpian SMS.
+Supports multiple SMS providers: Aliyun SMS, Tencent Cloud SMS, Yunpian SMS,
+plus a local provider that only records messages (tests / development).
 """
 import json
 import logging
 import hashlib
 import time
-from typing import Optional, Dict, Any
+from datetime import datetime
+from typing import Optional, Dict, Any, List
 
 from app.core.config import settings
 
@@ -19,6 +21,9 @@ class SMSService:
     def __init__(self):
         """Initialize SMS service."""
         self.provider = getattr(settings, 'SMS_PROVIDER', 'aliyun')
+        # Messages captured by the local provider (tests / development)
+        self.outbox: List[Dict[str, Any]] = []
+        self._aliyun_client = None
         logger.info(f"SMS service initialized with provider: {self.provider}")
 
     def send_verification_code(
@@ -41,7 +46,7 @@ class SMSService:
             True if sent successfully, False otherwise
         """
         # Validate phone number format
-        if not self._validate_phone(phone):
+        if not self.validate_phone(phone):
             logger.error(f"Invalid phone number format: {phone}")
             return False
 
@@ -88,6 +93,8 @@ class SMSService:
                 return self._send_via_tencent(phone, template_code, template_params, sign_name)
             elif self.provider == 'yunpian':
                 return self._send_via_yunpian(phone, template_code, template_params)
+            elif self.provider == 'local':
+                return self._send_via_local(phone, template_code, template_params)
             else:
                 logger.error(f"Unknown SMS provider: {self.provider}")
                 return False
@@ -95,6 +102,22 @@ class SMSService:
             logger.error(f"Failed to send SMS: {str(e)}", exc_info=True)
             return False
 
+    def _send_via_local(
+        self,
+        phone: str,
+        template_code: str,
+        template_params: Dict[str, str]
+    ) -> bool:
+        """Record the SMS in the in-memory outbox instead of sending it."""
+        self.outbox.append({
+            "phone": phone,
+            "template_code": template_code,
+            "template_params": template_params,
+            "sent_at": datetime.utcnow(),
+        })
+        logger.info(f"SMS captured by local provider: {phone} - {template_code}")
+        return True
+
     def _send_via_aliyun(
         self,
         phone: str,
@@ -109,11 +132,14 @@ class SMSService:
             
             sign_name = sign_name or settings.ALIYUN_SMS_SIGN_NAME
             
-            client = AcsClient(
-                settings.ALIYUN_ACCESS_KEY_ID,
-                settings.ALIYUN_ACCESS_KEY_SECRET,
-                settings.ALIYUN_REGION_ID or 'cn-hangzhou'
-            )
+            # Reuse one client (and its HTTP session) across messages
+            client = self._aliyun_client
+            if client is None:
+                client = self._aliyun_client = AcsClient(
+                    settings.ALIYUN_ACCESS_KEY_ID,
+                    settings.ALIYUN_ACCESS_KEY_SECRET,
+                    settings.ALIYUN_REGION_ID or 'cn-hangzhou'
+                )
             
             request = CommonRequest()
             request.set_accept_format('json')
@@ -242,7 +268,7 @@ class SMSService:
             logger.error(f"Yunpian SMS send failed: {str(e)}", exc_info=True)
             return False
 
-    def _validate_phone(self, phone: str) -> bool:
+    def validate_phone(self, phone: str) -> bool:
         """Validate Chinese phone number format."""
         import re
         pattern = r'^1[3-9]\d{9}$'
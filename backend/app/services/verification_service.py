@@ -131,6 +131,14 @@ class VerificationService:
         db.commit()
         return expired_count
 
+    @staticmethod
+    def invalidate_code(db: Session, code_id: int) -> None:
+        """Invalidate a verification code (e.g. when it could not be delivered)."""
+        db.query(VerificationCode).filter(
+            VerificationCode.id == code_id
+        ).update({"is_used": True})
+        db.commit()
+
     @staticmethod
     def can_send_code(
         db: Session,
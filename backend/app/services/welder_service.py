@@ -3,7 +3,7 @@ Welder Service for the welding system backend.
 焊工管理服务层
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, exists
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from fastapi import HTTPException, status
@@ -14,6 +14,8 @@ from app.models.user import User
 from app.models.company import Company, CompanyEmployee, CompanyRole
 from app.schemas.welder import WelderCreate, WelderUpdate
 from app.core.data_access import DataAccessMiddleware, WorkspaceContext
+from app.core.pagination import TotalMode, apply_keyset, count_query
+from app.core.statistics import grouped_statistics
 from app.services.quota_service import QuotaService
 
 logger = logging.getLogger(__name__)
@@ -113,7 +115,9 @@ class WelderService:
         search: Optional[str] = None,
         skill_level: Optional[str] = None,
         welder_status: Optional[str] = None,
-        certification_status: Optional[str] = None
+        certification_status: Optional[str] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = TotalMode.EXACT
     ) -> tuple[List[Welder], int]:
         """
         获取焊工列表
@@ -121,12 +125,14 @@ class WelderService:
         Args:
             current_user: 当前用户
             workspace_context: 工作区上下文
-            skip: 跳过记录数
+            skip: 跳过记录数（提供cursor时忽略）
             limit: 返回记录数
             search: 搜索关键词
             skill_level: 技能等级筛选
             welder_status: 状态筛选
             certification_status: 证书状态筛选
+            cursor: 上一页返回的分页游标
+            total_mode: 总数模式（exact精确 / estimated估算）
 
         Returns:
             tuple: (焊工列表, 总数)
@@ -189,12 +195,15 @@ class WelderService:
 
             # 获取总数
             logger.info(f"[服务层] 获取总数...")
-            total = query.count()
+            total = count_query(self.db, query, total_mode)
             logger.info(f"[服务层] 总数: {total}")
 
             # 分页和排序
-            logger.info(f"[服务层] 执行分页查询 - skip={skip}, limit={limit}")
-            welders = query.order_by(Welder.created_at.desc()).offset(skip).limit(limit).all()
+            logger.info(f"[服务层] 执行分页查询 - skip={skip}, limit={limit}, cursor={cursor}")
+            query = apply_keyset(query, Welder, cursor)
+            if not cursor:
+                query = query.offset(skip)
+            welders = query.limit(limit).all()
             logger.info(f"[服务层] 查询成功 - 返回 {len(welders)} 条记录")
 
             return welders, total
@@ -202,6 +211,11 @@ class WelderService:
         except HTTPException as he:
             logger.error(f"[服务层] HTTPException: {he.detail}", exc_info=True)
             raise
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         except Exception as e:
             logger.error(f"[服务层] 未知错误: {str(e)}", exc_info=True)
             raise HTTPException(
@@ -1093,36 +1107,27 @@ class WelderService:
                 workspace_context
             )
 
-            # 统计总数
-            total_welders = query.count()
-
-            # 统计在职焊工
-            active_welders = query.filter(Welder.status == "active").count()
-
-            # 统计持证焊工
-            certified_welders = query.filter(
-                Welder.certification_status == "valid"
-            ).count()
-
-            # 统计即将到期的证书（30天内）
-            from datetime import datetime, timedelta
-            expiry_threshold = datetime.now() + timedelta(days=30)
-
-            expiring_count = 0
-            welders_with_certs = query.filter(
-                Welder.certification_status == "valid"
-            ).all()
+            # 统计即将到期的证书（30天内，含已过期仍标记为有效的证书）
+            from datetime import date, timedelta
+            expiry_threshold = date.today() + timedelta(days=30)
+            has_expiring_cert = self._valid_certifications_exist(
+                WelderCertification.expiry_date <= expiry_threshold
+            )
 
-            for welder in welders_with_certs:
-                # 查询该焊工的证书
-                certs = self.db.query(WelderCertification).filter(
-                    WelderCertification.welder_id == welder.id,
-                    WelderCertification.is_active == True,
-                    WelderCertification.status == "valid",
-                    WelderCertification.expiry_date <= expiry_threshold
-                ).count()
-                if certs > 0:
-                    expiring_count += 1
+            # 总数、在职、持证、证书即将到期在一次查询中统计
+            stats = grouped_statistics(
+                self.db, Welder, [query.whereclause],
+                dimensions={},
+                conditions={
+                    "active": Welder.status == "active",
+                    "certified": Welder.certification_status == "valid",
+                    "expiring": and_(Welder.certification_status == "valid", has_expiring_cert),
+                }
+            )
+            total_welders = stats.total
+            active_welders = stats.conditions["active"]
+            certified_welders = stats.conditions["certified"]
+            expiring_count = stats.conditions["expiring"]
 
             return {
                 "total_welders": total_welders,
@@ -1139,6 +1144,126 @@ class WelderService:
                 detail=f"获取统计信息失败: {str(e)}"
             )
 
+    def get_expiring_certifications(
+        self,
+        current_user: User,
+        workspace_context: WorkspaceContext,
+        days: int = 30,
+        include_expired: bool = False
+    ) -> Dict[str, Any]:
+        """
+        获取即将到期的焊工证书（用于复审计划）
+
+        一次连接查询取出工作区内所有在期限内到期的有效证书，
+        再按焊工和到期月份分组。
+
+        Args:
+            current_user: 当前用户
+            workspace_context: 工作区上下文
+            days: 到期天数范围（今天起N天内）
+            include_expired: 是否包含已过期但仍标记为有效的证书
+
+        Returns:
+            Dict: 到期证书按焊工、按月份的分组
+        """
+        try:
+            # 验证工作区上下文
+            workspace_context.validate()
+
+            # 检查查看权限并获取访问范围
+            self._check_list_permission(current_user, workspace_context)
+
+            # 工作区内可见的焊工
+            welder_query = self.data_access.apply_workspace_filter(
+                self.db.query(Welder.id).filter(Welder.is_active == True),
+                Welder,
+                current_user,
+                workspace_context
+            )
+
+            from datetime import date, timedelta
+            today = date.today()
+            threshold = today + timedelta(days=days)
+
+            expiry_filter = [WelderCertification.expiry_date <= threshold]
+            if not include_expired:
+                expiry_filter.append(WelderCertification.expiry_date >= today)
+
+            rows = self.db.query(
+                WelderCertification, Welder.welder_code, Welder.full_name
+            ).join(
+                Welder, Welder.id == WelderCertification.welder_id
+            ).filter(
+                WelderCertification.welder_id.in_(welder_query.subquery().select()),
+                WelderCertification.is_active == True,
+                WelderCertification.status == "valid",
+                *expiry_filter
+            ).order_by(
+                WelderCertification.expiry_date, WelderCertification.welder_id
+            ).all()
+
+            by_welder: Dict[int, Dict[str, Any]] = {}
+            by_month: Dict[str, Dict[str, Any]] = {}
+
+            for cert, welder_code, full_name in rows:
+                cert_dict = {
+                    "id": cert.id,
+                    "welder_id": cert.welder_id,
+                    "certification_number": cert.certification_number,
+                    "certification_type": cert.certification_type,
+                    "certification_level": cert.certification_level,
+                    "issuing_authority": cert.issuing_authority,
+                    "expiry_date": cert.expiry_date.isoformat(),
+                    "days_remaining": (cert.expiry_date - today).days,
+                    "next_renewal_date": cert.next_renewal_date.isoformat() if cert.next_renewal_date else None,
+                }
+
+                welder_entry = by_welder.setdefault(cert.welder_id, {
+                    "welder_id": cert.welder_id,
+                    "welder_code": welder_code,
+                    "full_name": full_name,
+                    "earliest_expiry_date": cert_dict["expiry_date"],
+                    "certifications": []
+                })
+                welder_entry["certifications"].append(cert_dict)
+
+                month = cert.expiry_date.strftime("%Y-%m")
+                month_entry = by_month.setdefault(month, {
+                    "month": month,
+                    "count": 0,
+                    "welder_ids": []
+                })
+                month_entry["count"] += 1
+                if cert.welder_id not in month_entry["welder_ids"]:
+                    month_entry["welder_ids"].append(cert.welder_id)
+
+            return {
+                "days": days,
+                "threshold_date": threshold.isoformat(),
+                "total_certifications": len(rows),
+                "total_welders": len(by_welder),
+                "by_welder": list(by_welder.values()),
+                "by_month": list(by_month.values())
+            }
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"获取到期证书失败: {str(e)}"
+            )
+
+    @staticmethod
+    def _valid_certifications_exist(*criteria):
+        """焊工存在满足条件的有效证书（相关子查询，走 idx_welder_cert_expiry 索引）"""
+        return exists().where(
+            WelderCertification.welder_id == Welder.id,
+            WelderCertification.status == "valid",
+            WelderCertification.is_active == True,
+            *criteria
+        )
+
     # ==================== 工作经历管理 ====================
 
     def get_work_records(
@@ -1,14 +1,35 @@
 """
 工作区管理服务
 Workspace Management Service
+
+请求的工作区上下文（X-Workspace-ID 请求头或用户默认工作区）由
+resolve_workspace_context 统一解析：
+
+- 同一请求内对相同参数只解析一次（缓存在数据库会话的 info 中），
+  依赖项和端点中重复调用不会重新推导
+- 企业成员校验复用 DataAccessMiddleware.resolve_principal 的访问主体缓存
+  （请求级 → Redis，员工/角色/企业变更后失效）
+- 未指定工作区的企业用户，其默认企业（首个有效员工记录）按用户缓存在Redis，
+  该用户的员工记录变更提交后失效
+
+用户的工作区列表（含配额快照）按用户缓存在Redis并附带 ETag，用户行、
+成员身份、所涉企业或其工厂变更提交后失效。
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
+from sqlalchemy import event, func, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
+from app.core.cache import bump_version, cache_get_json, cache_set_json, get_version, get_versions, make_key
+from app.core.config import settings
+from app.core.http_cache import make_etag
 from app.models.user import User
 from app.models.company import Company, CompanyEmployee, Factory
-from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.core.data_access import DataAccessMiddleware, WorkspaceContext, WorkspaceType
+
+# Session.info 中请求级工作区上下文缓存的键：(用户ID, 工作区ID) -> WorkspaceContext
+WORKSPACE_CONTEXT_CACHE_KEY = "workspace_contexts"
 
 
 class WorkspaceService:
@@ -16,6 +37,18 @@ class WorkspaceService:
     
     def __init__(self, db: Session):
         self.db = db
+
+    @classmethod
+    async def get_user_workspaces_async(cls, db: AsyncSession, user: User) -> List[Dict[str, Any]]:
+        """get_user_workspaces 的异步版本（在 AsyncSession 上通过 run_sync 执行）"""
+        return await db.run_sync(lambda session: cls(session).get_user_workspaces(user))
+
+    @classmethod
+    async def get_user_workspaces_with_etag_async(
+        cls, db: AsyncSession, user: User
+    ) -> Tuple[List[Dict[str, Any]], str]:
+        """get_user_workspaces_with_etag 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get_user_workspaces_with_etag(user))
     
     def get_user_workspaces(self, user: User) -> List[Dict[str, Any]]:
         """
@@ -27,7 +60,73 @@ class WorkspaceService:
         Returns:
             List[Dict]: 工作区列表
         """
+        return self.get_user_workspaces_with_etag(user)[0]
+    
+    def get_user_workspaces_with_etag(self, user: User) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        获取用户所有可用的工作区及其 ETag（含配额快照，按用户缓存）
+        
+        缓存键包含用户行版本（current_user）和成员身份版本（workspace_membership），
+        条目中另记录所涉企业的版本号，读取时批量比对，企业或工厂变更后重新构建。
+        
+        Returns:
+            (工作区列表, ETag)
+        """
+        redis_key = make_key(
+            "workspaces", user.id,
+            get_version("current_user", user.id),
+            get_version("workspace_membership", user.id)
+        )
+        cached = cache_get_json(redis_key)
+        if cached is not None:
+            company_versions = {int(company_id): version for company_id, version in cached["companies"].items()}
+            if get_versions("workspace_company", company_versions) == company_versions:
+                return cached["workspaces"], cached["etag"]
+        
+        # 传入的用户可能来自进程内的当前用户快照（最多落后 PRINCIPAL_LOCAL_CACHE_TTL 秒），
+        # 而条目写在刚读取的新版本键上：重新读取列表依赖的用户列，避免旧值被当作新值共享
+        user = self._load_user_row(user.id) or user
+        
+        # 先取企业版本号再查询数据库：并发变更递增版本后，旧值不会被当作新值
+        company_ids = self._get_related_company_ids(user)
+        company_versions = get_versions("workspace_company", company_ids)
+        workspaces = self._build_user_workspaces(user)
+        etag = make_etag(workspaces)
+        cache_set_json(redis_key, {
+            "workspaces": workspaces,
+            "etag": etag,
+            "companies": {str(company_id): version for company_id, version in company_versions.items()},
+        }, settings.WORKSPACE_LIST_CACHE_TTL)
+        return workspaces, etag
+    
+    def _load_user_row(self, user_id: int):
+        """读取工作区列表依赖的用户列（会员等级、会员类型和配额使用量）"""
+        return self.db.query(
+            User.id,
+            User.member_tier,
+            User.membership_type,
+            User.wps_quota_used,
+            User.pqr_quota_used,
+            User.ppqr_quota_used,
+            User.storage_quota_used
+        ).filter(User.id == user_id).first()
+    
+    def _get_related_company_ids(self, user: User) -> List[int]:
+        """工作区列表依赖的企业：用户拥有的企业和任职的企业"""
+        if user.membership_type != "enterprise":
+            return []
+        rows = self.db.query(Company.id).filter(Company.owner_id == user.id).union(
+            self.db.query(CompanyEmployee.company_id).filter(
+                CompanyEmployee.user_id == user.id,
+                CompanyEmployee.status == "active"
+            )
+        ).all()
+        return sorted(company_id for company_id, in rows)
+    
+    def _build_user_workspaces(self, user: User) -> List[Dict[str, Any]]:
+        """从数据库构建工作区列表"""
         workspaces = []
+        enterprise_workspaces = []
         
         # 1. 个人工作区（所有用户都有）
         # 个人工作区使用用户的会员等级
@@ -35,30 +134,26 @@ class WorkspaceService:
 
         # 如果用户是企业会员，检查企业会员获得方式
         if user.membership_type == "enterprise":
-            from app.models.company import Company, CompanyEmployee
+            # 企业工作区（任职记录、企业、工厂和计数一次查询）
+            enterprise_workspaces = self._get_enterprise_workspaces(user)
 
             # 检查用户是否是企业的所有者（付费企业会员）
-            owned_company = self.db.query(Company).filter(
-                Company.owner_id == user.id,
-                Company.is_active == True
-            ).first()
+            owns_company = self.db.query(
+                self.db.query(Company.id).filter(
+                    Company.owner_id == user.id,
+                    Company.is_active == True
+                ).exists()
+            ).scalar()
 
-            if owned_company:
+            if owns_company:
                 # 用户是企业所有者，直接付费购买的企业会员，个人工作区使用个人高级版配额
                 membership_tier = 'personal_advanced'
+            elif enterprise_workspaces:
+                # 通过企业加入的会员，个人工作区使用个人专业版配额
+                membership_tier = 'personal_pro'
             else:
-                # 检查用户是否是企业员工（通过企业加入获得会员身份）
-                enterprise_employee = self.db.query(CompanyEmployee).filter(
-                    CompanyEmployee.user_id == user.id,
-                    CompanyEmployee.status == "active"
-                ).first()
-
-                if enterprise_employee:
-                    # 通过企业加入的会员，个人工作区使用个人专业版配额
-                    membership_tier = 'personal_pro'
-                else:
-                    # 企业会员但没有关联企业，使用个人高级版配额作为默认
-                    membership_tier = 'personal_advanced'
+                # 企业会员但没有关联企业，使用个人高级版配额作为默认
+                membership_tier = 'personal_advanced'
 
         personal_workspace = {
             "type": WorkspaceType.PERSONAL,
@@ -75,37 +170,53 @@ class WorkspaceService:
         workspaces.append(personal_workspace)
         
         # 2. 企业工作区（如果用户是企业成员）
-        if user.membership_type == "enterprise":
-            enterprise_workspaces = self._get_enterprise_workspaces(user)
-            workspaces.extend(enterprise_workspaces)
+        workspaces.extend(enterprise_workspaces)
         
         return workspaces
     
     def _get_enterprise_workspaces(self, user: User) -> List[Dict[str, Any]]:
-        """获取用户的企业工作区列表"""
+        """获取用户的企业工作区列表（单次联表查询）"""
         workspaces = []
         
+        # 各企业的有效员工数和启用工厂数
+        employee_counts = self.db.query(
+            CompanyEmployee.company_id.label("company_id"),
+            func.count(CompanyEmployee.id).label("total")
+        ).filter(
+            CompanyEmployee.status == "active"
+        ).group_by(CompanyEmployee.company_id).subquery()
+        
+        factory_counts = self.db.query(
+            Factory.company_id.label("company_id"),
+            func.count(Factory.id).label("total")
+        ).filter(
+            Factory.is_active == True
+        ).group_by(Factory.company_id).subquery()
+        
         # 查询用户所属的所有企业
-        employees = self.db.query(CompanyEmployee).filter(
+        rows = self.db.query(
+            CompanyEmployee.factory_id,
+            CompanyEmployee.role,
+            CompanyEmployee.company_role_id,
+            Company,
+            Factory.name.label("factory_name"),
+            func.coalesce(employee_counts.c.total, 0).label("employee_count"),
+            func.coalesce(factory_counts.c.total, 0).label("factory_count")
+        ).join(
+            Company, Company.id == CompanyEmployee.company_id
+        ).outerjoin(
+            Factory, Factory.id == CompanyEmployee.factory_id
+        ).outerjoin(
+            employee_counts, employee_counts.c.company_id == Company.id
+        ).outerjoin(
+            factory_counts, factory_counts.c.company_id == Company.id
+        ).filter(
             CompanyEmployee.user_id == user.id,
             CompanyEmployee.status == "active"
-        ).all()
+        ).order_by(CompanyEmployee.id).all()
         
-        for employee in employees:
-            company = self.db.query(Company).filter(
-                Company.id == employee.company_id
-            ).first()
-            
-            if not company:
-                continue
-            
-            # 获取工厂信息
-            factory = None
-            if employee.factory_id:
-                factory = self.db.query(Factory).filter(
-                    Factory.id == employee.factory_id
-                ).first()
-            
+        for row in rows:
+            company = row.Company
             workspace = {
                 "type": WorkspaceType.ENTERPRISE,
                 "id": f"enterprise_{company.id}",
@@ -113,13 +224,13 @@ class WorkspaceService:
                 "description": f"{company.name} - 企业共享工作区",
                 "user_id": user.id,
                 "company_id": company.id,
-                "factory_id": employee.factory_id,
-                "factory_name": factory.name if factory else None,
+                "factory_id": row.factory_id,
+                "factory_name": row.factory_name,
                 "is_default": False,
-                "role": employee.role,
-                "company_role_id": employee.company_role_id,
+                "role": row.role,
+                "company_role_id": row.company_role_id,
                 "membership_tier": company.membership_tier,
-                "quota_info": self._get_company_quota_info(company)
+                "quota_info": self._get_company_quota_info(company, row.employee_count, row.factory_count)
             }
             workspaces.append(workspace)
         
@@ -180,8 +291,13 @@ class WorkspaceService:
         """获取个人配额信息"""
         return self._get_personal_quota_info_by_tier(user, user.member_tier or 'personal_free')
     
-    def _get_company_quota_info(self, company: Company) -> Dict[str, Any]:
-        """获取企业配额信息"""
+    def _get_company_quota_info(
+        self,
+        company: Company,
+        employee_count: Optional[int] = None,
+        factory_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """获取企业配额信息（未传入员工数/工厂数时查询）"""
         def calculate_percentage(used: int, limit: int) -> float:
             """计算使用百分比"""
             if limit == 0:
@@ -189,15 +305,17 @@ class WorkspaceService:
             return round((used / limit) * 100, 2)
 
         # 计算实际的员工和工厂数量
-        employee_count = self.db.query(CompanyEmployee).filter(
-            CompanyEmployee.company_id == company.id,
-            CompanyEmployee.status == "active"
-        ).count()
+        if employee_count is None:
+            employee_count = self.db.query(CompanyEmployee).filter(
+                CompanyEmployee.company_id == company.id,
+                CompanyEmployee.status == "active"
+            ).count()
 
-        factory_count = self.db.query(Factory).filter(
-            Factory.company_id == company.id,
-            Factory.is_active == True
-        ).count()
+        if factory_count is None:
+            factory_count = self.db.query(Factory).filter(
+                Factory.company_id == company.id,
+                Factory.is_active == True
+            ).count()
 
         return {
             "wps": {
@@ -343,7 +461,7 @@ class WorkspaceService:
         """
         # 解析工作区ID
         parts = workspace_id.split("_")
-        if len(parts) != 2:
+        if len(parts) != 2 or not parts[1].isdigit():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="无效的工作区ID格式"
@@ -368,14 +486,10 @@ class WorkspaceService:
         elif workspace_type == "enterprise":
             company_id = int(workspace_identifier)
             
-            # 验证用户是否是企业成员
-            employee = self.db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == user.id,
-                CompanyEmployee.company_id == company_id,
-                CompanyEmployee.status == "active"
-            ).first()
+            # 验证用户是否是企业成员（访问主体缓存）
+            principal = DataAccessMiddleware(self.db).resolve_principal(user.id, company_id)
             
-            if not employee:
+            if not principal.is_member:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="您不是该企业的成员"
@@ -385,7 +499,7 @@ class WorkspaceService:
                 user_id=user.id,
                 workspace_type=WorkspaceType.ENTERPRISE,
                 company_id=company_id,
-                factory_id=employee.factory_id
+                factory_id=principal.factory_id
             )
         
         else:
@@ -394,6 +508,79 @@ class WorkspaceService:
                 detail="不支持的工作区类型"
             )
     
+    def resolve_workspace_context(
+        self,
+        user: User,
+        workspace_id: Optional[str] = None
+    ) -> WorkspaceContext:
+        """
+        解析请求的工作区上下文（同一会话内对相同参数只解析一次）
+        
+        Args:
+            user: 当前用户
+            workspace_id: X-Workspace-ID 请求头（可选，未提供时使用默认工作区）
+            
+        Returns:
+            WorkspaceContext: 工作区上下文对象
+            
+        Raises:
+            HTTPException: 如果工作区ID无效或用户无权访问
+        """
+        request_cache = self.db.info.setdefault(WORKSPACE_CONTEXT_CACHE_KEY, {})
+        cache_key = (user.id, workspace_id or None)
+        context = request_cache.get(cache_key)
+        if context is None:
+            if workspace_id:
+                context = self.create_workspace_context(user, workspace_id)
+            else:
+                context = self._get_default_workspace_context(user)
+            request_cache[cache_key] = context
+        return context
+    
+    def _get_default_workspace_context(self, user: User) -> WorkspaceContext:
+        """未指定工作区时：企业用户使用其所在企业，否则使用个人工作区"""
+        if user.membership_type == "enterprise":
+            membership = self.get_default_membership(user.id)
+            if membership:
+                return WorkspaceContext(
+                    user_id=user.id,
+                    workspace_type=WorkspaceType.ENTERPRISE,
+                    company_id=membership["company_id"],
+                    factory_id=membership["factory_id"]
+                )
+        
+        return WorkspaceContext(
+            user_id=user.id,
+            workspace_type=WorkspaceType.PERSONAL
+        )
+    
+    def get_default_membership(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        获取用户的默认企业成员身份（首个有效员工记录）
+        
+        Returns:
+            {"company_id", "factory_id"}；不是任何企业的有效员工时返回None
+        """
+        # 先取版本号再查询数据库：并发提交递增版本后，旧值只会写到旧版本的键上
+        redis_key = make_key(
+            "workspace_membership", user_id, get_version("workspace_membership", user_id)
+        )
+        cached = cache_get_json(redis_key)
+        if cached is not None:
+            return cached or None
+        
+        employee = self.db.query(
+            CompanyEmployee.company_id,
+            CompanyEmployee.factory_id
+        ).filter(
+            CompanyEmployee.user_id == user_id,
+            CompanyEmployee.status == "active"
+        ).order_by(CompanyEmployee.id).first()
+        
+        membership = {"company_id": employee.company_id, "factory_id": employee.factory_id} if employee else {}
+        cache_set_json(redis_key, membership, settings.DATA_ACCESS_CACHE_TTL)
+        return membership or None
+    
     def validate_workspace_access(
         self,
         user: User,
@@ -423,13 +610,11 @@ class WorkspaceService:
         
         # 企业工作区：必须是企业成员
         if workspace_context.is_enterprise():
-            employee = self.db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == user.id,
-                CompanyEmployee.company_id == workspace_context.company_id,
-                CompanyEmployee.status == "active"
-            ).first()
+            principal = DataAccessMiddleware(self.db).resolve_principal(
+                user.id, workspace_context.company_id
+            )
             
-            if not employee:
+            if not principal.is_member:
                 raise HTTPException(
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="您不是该企业的成员"
@@ -509,3 +694,75 @@ def get_workspace_service(db: Session) -> WorkspaceService:
     """获取工作区服务实例"""
     return WorkspaceService(db)
 
+
+def resolve_workspace_context(
+    db: Session,
+    current_user: User,
+    workspace_id: Optional[str] = None
+) -> WorkspaceContext:
+    """
+    解析请求的工作区上下文（可直接传给 AsyncSession.run_sync）
+
+    Args:
+        db: 数据库会话
+        current_user: 当前用户
+        workspace_id: X-Workspace-ID 请求头（可选）
+    """
+    return WorkspaceService(db).resolve_workspace_context(current_user, workspace_id)
+
+
+# ---------------------------------------------------------------------------
+# 默认企业 / 工作区列表缓存失效
+# ---------------------------------------------------------------------------
+# 会话 info 中待失效用户ID、企业ID集合的键
+_PENDING_MEMBERSHIP_KEY = "workspace_pending_memberships"
+_PENDING_COMPANY_KEY = "workspace_pending_companies"
+
+
+def _with_previous(obj: Any, attr: str) -> Set[int]:
+    """属性的当前值及本次flush前的旧值（记录改绑时新旧双方都失效）"""
+    values = {getattr(obj, attr)}
+    values.update(inspect(obj).attrs[attr].history.deleted)
+    return {value for value in values if value is not None}
+
+
+@event.listens_for(Session, "before_flush")
+def _track_membership_changes(session: Session, flush_context, instances) -> None:
+    """flush前记录成员身份、企业和工厂的变更，并清空请求级工作区上下文缓存"""
+    user_ids: Set[int] = set()
+    company_ids: Set[int] = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, CompanyEmployee):
+            # 成员身份变化；企业员工数变化
+            user_ids |= _with_previous(obj, "user_id")
+            company_ids |= _with_previous(obj, "company_id")
+        elif isinstance(obj, Company):
+            # 企业所有者的个人工作区等级取决于其拥有的企业
+            user_ids |= _with_previous(obj, "owner_id")
+            if obj.id is not None:
+                company_ids.add(obj.id)
+        elif isinstance(obj, Factory):
+            # 工厂名称、工厂数变化
+            company_ids |= _with_previous(obj, "company_id")
+    if not user_ids and not company_ids:
+        return
+    session.info.setdefault(_PENDING_MEMBERSHIP_KEY, set()).update(user_ids)
+    session.info.setdefault(_PENDING_COMPANY_KEY, set()).update(company_ids)
+    session.info.pop(WORKSPACE_CONTEXT_CACHE_KEY, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_memberships(session: Session) -> None:
+    """事务提交后递增用户的成员身份版本号和企业的工作区版本号"""
+    for user_id in session.info.pop(_PENDING_MEMBERSHIP_KEY, set()):
+        bump_version("workspace_membership", user_id)
+    for company_id in session.info.pop(_PENDING_COMPANY_KEY, set()):
+        bump_version("workspace_company", company_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_membership_changes(session: Session) -> None:
+    """事务回滚后丢弃待失效记录"""
+    session.info.pop(_PENDING_MEMBERSHIP_KEY, None)
+    session.info.pop(_PENDING_COMPANY_KEY, None)
+    session.info.pop(WORKSPACE_CONTEXT_CACHE_KEY, None)
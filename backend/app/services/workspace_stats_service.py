@@ -0,0 +1,203 @@
+"""
+工作区统计服务
+Single round-trip module counts for a workspace, cached in Redis.
+
+所有模块的计数通过一条 UNION ALL 查询获得（启用 WORKSPACE_COUNTERS_ENABLED
+时改为读取 workspace_counters 计数表），结果按工作区缓存
+（TTL 见 settings.DASHBOARD_STATS_CACHE_TTL）；模块数据新增、删除或
+停用时，会话提交后自动清除对应工作区的缓存。
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, func, inspect, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_delete, cache_get_json, cache_set_json, make_key
+from app.core.config import settings
+from app.core.data_access import WorkspaceType
+from app.models.company import CompanyEmployee, Factory
+from app.models.equipment import Equipment
+from app.models.material import WeldingMaterial
+from app.models.ppqr import PPQR
+from app.models.pqr import PQR
+from app.models.production import ProductionTask
+from app.models.quality import QualityInspection
+from app.models.welder import Welder
+from app.models.wps import WPS
+from app.services.counter_service import counter_totals_select
+
+# 统计键 -> 模块模型（均带 user_id / workspace_type / company_id / is_active 列）
+MODULE_SOURCES: Dict[str, Any] = {
+    "wps_count": WPS,
+    "pqr_count": PQR,
+    "ppqr_count": PPQR,
+    "materials_count": WeldingMaterial,
+    "welders_count": Welder,
+    "equipment_count": Equipment,
+    "production_count": ProductionTask,
+}
+
+# 质量检验表没有 user_id / workspace_type / is_active 列，单独处理
+QUALITY_STAT_KEY = "quality_count"
+
+# 仪表盘展示的模块统计键（按展示顺序）
+MODULE_STAT_KEYS = (*MODULE_SOURCES.keys(), QUALITY_STAT_KEY)
+
+
+def stats_cache_key(workspace_type: str, owner_id: int) -> str:
+    """工作区统计缓存键（个人工作区为用户ID，企业工作区为企业ID）"""
+    return make_key("workspace_stats", workspace_type, owner_id)
+
+
+class WorkspaceStatsService:
+    """工作区模块计数服务"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_module_counts(
+        self,
+        workspace_type: str,
+        user_id: int,
+        company_id: Optional[int] = None
+    ) -> Dict[str, int]:
+        """
+        获取工作区各模块的记录数
+
+        Args:
+            workspace_type: 工作区类型
+            user_id: 当前用户ID（个人工作区的数据所有者）
+            company_id: 企业ID（企业工作区必填）
+
+        Returns:
+            Dict[str, int]: 统计键到记录数的映射；企业工作区额外包含
+            employee_count 和 factory_count
+        """
+        enterprise = workspace_type == WorkspaceType.ENTERPRISE
+        owner_id = company_id if enterprise else user_id
+        key = stats_cache_key(workspace_type, owner_id)
+
+        cached = cache_get_json(key)
+        if isinstance(cached, dict):
+            return cached
+
+        counts = self.compute_module_counts(workspace_type, user_id, company_id)
+        cache_set_json(key, counts, settings.DASHBOARD_STATS_CACHE_TTL)
+        return counts
+
+    def compute_module_counts(
+        self,
+        workspace_type: str,
+        user_id: int,
+        company_id: Optional[int] = None
+    ) -> Dict[str, int]:
+        """不经缓存，一次查询统计所有模块的记录数"""
+        enterprise = workspace_type == WorkspaceType.ENTERPRISE
+        if settings.WORKSPACE_COUNTERS_ENABLED:
+            selects = [counter_totals_select(workspace_type, company_id if enterprise else user_id)]
+        else:
+            selects = self._module_count_selects(workspace_type, user_id, company_id)
+
+        if enterprise:
+            selects.append(
+                select(literal("employee_count").label("stat"), func.count(CompanyEmployee.id).label("total"))
+                .where(CompanyEmployee.company_id == company_id, CompanyEmployee.status == 'active')
+            )
+            selects.append(
+                select(literal("factory_count").label("stat"), func.count(Factory.id).label("total"))
+                .where(Factory.company_id == company_id)
+            )
+
+        rows = self.db.execute(union_all(*selects)).all()
+        counts = {key: 0 for key in MODULE_STAT_KEYS}
+        counts.update({row.stat: int(row.total or 0) for row in rows})
+        return counts
+
+    @staticmethod
+    def _module_count_selects(workspace_type: str, user_id: int, company_id: Optional[int]) -> List[Any]:
+        """直接对各模块表计数的子查询"""
+        enterprise = workspace_type == WorkspaceType.ENTERPRISE
+        selects = []
+
+        for stat_key, model in MODULE_SOURCES.items():
+            if enterprise:
+                scope = model.company_id == company_id
+            else:
+                scope = model.user_id == user_id
+            selects.append(
+                select(literal(stat_key).label("stat"), func.count(model.id).label("total"))
+                .where(scope, model.workspace_type == workspace_type, model.is_active == True)
+            )
+
+        if enterprise:
+            quality_scope = QualityInspection.company_id == company_id
+        else:
+            quality_scope = (QualityInspection.owner_id == user_id) & QualityInspection.company_id.is_(None)
+        selects.append(
+            select(literal(QUALITY_STAT_KEY).label("stat"), func.count(QualityInspection.id).label("total"))
+            .where(quality_scope)
+        )
+        return selects
+
+
+# ---------------------------------------------------------------------------
+# 统计缓存失效
+# ---------------------------------------------------------------------------
+# 会话 info 中待失效工作区集合的键
+_PENDING_STATS_KEY = "workspace_stats_pending"
+
+_COUNTED_MODELS = tuple(MODULE_SOURCES.values())
+
+
+def _collect_affected_workspaces(session: Session) -> Set[Tuple[str, int]]:
+    """收集本次flush中记录数可能变化的工作区 (workspace_type, owner_id)"""
+    workspaces: Set[Tuple[str, int]] = set()
+    dirty = session.dirty
+
+    for obj in list(session.new) + list(dirty) + list(session.deleted):
+        if isinstance(obj, _COUNTED_MODELS):
+            # 普通字段更新不影响计数，只关心启用状态变化
+            if obj in dirty and not inspect(obj).attrs.is_active.history.has_changes():
+                continue
+            if obj.workspace_type == WorkspaceType.ENTERPRISE:
+                workspaces.add((WorkspaceType.ENTERPRISE, obj.company_id))
+            else:
+                workspaces.add((WorkspaceType.PERSONAL, obj.user_id))
+        elif isinstance(obj, QualityInspection):
+            if obj in dirty:
+                continue
+            if obj.company_id:
+                workspaces.add((WorkspaceType.ENTERPRISE, obj.company_id))
+            else:
+                workspaces.add((WorkspaceType.PERSONAL, obj.owner_id))
+        elif isinstance(obj, (CompanyEmployee, Factory)) and obj.company_id is not None:
+            if isinstance(obj, CompanyEmployee) and obj in dirty \
+                    and not inspect(obj).attrs.status.history.has_changes():
+                continue
+            if isinstance(obj, Factory) and obj in dirty:
+                continue
+            workspaces.add((WorkspaceType.ENTERPRISE, obj.company_id))
+
+    return {(ws_type, owner_id) for ws_type, owner_id in workspaces if owner_id}
+
+
+@event.listens_for(Session, "before_flush")
+def _track_stats_changes(session: Session, flush_context, instances) -> None:
+    """flush前记录记录数发生变化的工作区"""
+    workspaces = _collect_affected_workspaces(session)
+    if workspaces:
+        session.info.setdefault(_PENDING_STATS_KEY, set()).update(workspaces)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stats_cache(session: Session) -> None:
+    """事务提交后清除受影响工作区的统计缓存"""
+    pending = session.info.pop(_PENDING_STATS_KEY, set())
+    if pending:
+        cache_delete(*[stats_cache_key(ws_type, owner_id) for ws_type, owner_id in pending])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stats_changes(session: Session) -> None:
+    """事务回滚后丢弃待失效记录"""
+    session.info.pop(_PENDING_STATS_KEY, None)
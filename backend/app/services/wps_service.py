@@ -4,13 +4,18 @@ WPS (Welding Procedure Specification) service for the welding system backend.
 from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc
+from sqlalchemy import and_, or_
 
 from app.models.wps import WPS, WPSRevision
 from app.models.user import User
 from app.schemas.wps import WPSCreate, WPSUpdate, WPSRevisionCreate
 from app.core.data_access import DataAccessMiddleware, WorkspaceContext, WorkspaceType
+from app.core.config import settings
+from app.core.pagination import apply_keyset
+from app.core.statistics import date_bucket, grouped_statistics
+from app.services.search_service import document_ids_matching
 
 
 class WPSService:
@@ -21,6 +26,20 @@ class WPSService:
         self.db = db
         self.data_access = DataAccessMiddleware(db)
 
+    # ==================== 异步接口 ====================
+    # 在 AsyncSession 上复用同一套查询和数据权限逻辑（通过 run_sync），
+    # 供运行在 get_async_db 上的读接口使用，不占用线程池线程。
+
+    @classmethod
+    async def get_async(cls, db: AsyncSession, **kwargs) -> Optional[WPS]:
+        """get 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get(session, **kwargs))
+
+    @classmethod
+    async def get_multi_async(cls, db: AsyncSession, **kwargs) -> List[WPS]:
+        """get_multi 的异步版本"""
+        return await db.run_sync(lambda session: cls(session).get_multi(session, **kwargs))
+
     def get(
         self,
         db: Session,
@@ -91,23 +110,28 @@ class WPSService:
         workspace_context: WorkspaceContext,
         owner_id: Optional[int] = None,
         status: Optional[str] = None,
-        search_term: Optional[str] = None
+        search_term: Optional[str] = None,
+        cursor: Optional[str] = None
     ) -> List[WPS]:
         """
         Get multiple WPS with workspace filtering.
 
         Args:
             db: Database session
-            skip: Number of records to skip
+            skip: Number of records to skip (ignored when cursor is given)
             limit: Maximum number of records to return
             current_user: Current user
             workspace_context: Workspace context
             owner_id: Filter by owner ID (optional)
             status: Filter by status (optional)
             search_term: Search term (optional)
+            cursor: Keyset cursor returned by the previous page (optional)
 
         Returns:
             List of WPS objects
+
+        Raises:
+            ValueError: If the cursor is malformed
         """
         # Build base query
         query = db.query(WPS).filter(WPS.is_active == True)
@@ -145,18 +169,24 @@ class WPSService:
             query = query.filter(WPS.status == status)
 
         if search_term:
-            search_filter = or_(
-                WPS.title.ilike(f"%{search_term}%"),
-                WPS.wps_number.ilike(f"%{search_term}%"),
-                WPS.company.ilike(f"%{search_term}%"),
-                WPS.project_name.ilike(f"%{search_term}%"),
-                WPS.welding_process.ilike(f"%{search_term}%"),
-                WPS.base_material_spec.ilike(f"%{search_term}%")
-            )
-            query = query.filter(search_filter)
+            if settings.SEARCH_INDEX_ENABLED:
+                # Use the maintained full-text/trigram index instead of ILIKE scans
+                query = query.filter(WPS.id.in_(document_ids_matching("wps", search_term)))
+            else:
+                search_filter = or_(
+                    WPS.title.ilike(f"%{search_term}%"),
+                    WPS.wps_number.ilike(f"%{search_term}%"),
+                    WPS.company.ilike(f"%{search_term}%"),
+                    WPS.project_name.ilike(f"%{search_term}%"),
+                    WPS.welding_process.ilike(f"%{search_term}%"),
+                    WPS.base_material_spec.ilike(f"%{search_term}%")
+                )
+                query = query.filter(search_filter)
 
-        # Order by creation date (newest first)
-        query = query.order_by(desc(WPS.created_at))
+        # Order by creation date (newest first), id as tie-breaker
+        query = apply_keyset(query, WPS, cursor)
+        if cursor:
+            return query.limit(limit).all()
 
         return query.offset(skip).limit(limit).all()
 
@@ -420,16 +450,19 @@ class WPSService:
         # Search term
         if search_params.get("search_term"):
             search_term = search_params["search_term"]
-            search_filter = or_(
-                WPS.title.ilike(f"%{search_term}%"),
-                WPS.wps_number.ilike(f"%{search_term}%"),
-                WPS.company.ilike(f"%{search_term}%"),
-                WPS.project_name.ilike(f"%{search_term}%"),
-                WPS.welding_process.ilike(f"%{search_term}%"),
-                WPS.base_material_spec.ilike(f"%{search_term}%"),
-                WPS.filler_material_classification.ilike(f"%{search_term}%")
-            )
-            query = query.filter(search_filter)
+            if settings.SEARCH_INDEX_ENABLED:
+                query = query.filter(WPS.id.in_(document_ids_matching("wps", search_term)))
+            else:
+                search_filter = or_(
+                    WPS.title.ilike(f"%{search_term}%"),
+                    WPS.wps_number.ilike(f"%{search_term}%"),
+                    WPS.company.ilike(f"%{search_term}%"),
+                    WPS.project_name.ilike(f"%{search_term}%"),
+                    WPS.welding_process.ilike(f"%{search_term}%"),
+                    WPS.base_material_spec.ilike(f"%{search_term}%"),
+                    WPS.filler_material_classification.ilike(f"%{search_term}%")
+                )
+                query = query.filter(search_filter)
 
         # Status filter
         if search_params.get("status"):
@@ -539,41 +572,28 @@ class WPSService:
         owner_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """Get WPS statistics."""
-        query = db.query(WPS).filter(WPS.is_active == True)
+        criteria = [WPS.is_active == True]
 
         if owner_id:
-            query = query.filter(WPS.owner_id == owner_id)
-
-        # Total count
-        total_count = query.count()
-
-        # Count by status
-        status_counts = {}
-        for status in ["draft", "approved", "obsolete"]:
-            count = query.filter(WPS.status == status).count()
-            status_counts[status] = count
-
-        # Count by welding process
-        process_counts = {}
-        processes = db.query(WPS.welding_process).filter(
-            and_(WPS.welding_process.isnot(None), WPS.is_active == True)
-        ).distinct().all()
-
-        for (process,) in processes:
-            if process:
-                count = query.filter(WPS.welding_process == process).count()
-                process_counts[process] = count
-
-        # Recently created
-        recent_count = query.filter(
-            WPS.created_at >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        ).count()
+            criteria.append(WPS.owner_id == owner_id)
+
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        stats = grouped_statistics(
+            db, WPS, criteria,
+            dimensions={
+                "status": WPS.status,
+                "process": WPS.welding_process,
+                "month": date_bucket(db, WPS.created_at),
+            },
+            conditions={"recent": WPS.created_at >= today}
+        )
 
         return {
-            "total_count": total_count,
-            "status_counts": status_counts,
-            "process_counts": process_counts,
-            "recent_count": recent_count
+            "total_count": stats.total,
+            "status_counts": stats.group("status", ["draft", "approved", "obsolete"]),
+            "process_counts": stats.group("process"),
+            "monthly_counts": stats.group("month"),
+            "recent_count": stats.conditions["recent"]
         }
 
     # ==================== Permission Check Methods ====================
@@ -610,14 +630,11 @@ class WPSService:
                 return True
 
             # Check if user is company admin or has edit permission
-            from app.models.company import CompanyEmployee
-            employee = self.db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == current_user.id,
-                CompanyEmployee.company_id == workspace_context.company_id,
-                CompanyEmployee.status == "active"
-            ).first()
-
-            if employee and employee.role == "admin":
+            principal = self.data_access.resolve_principal(
+                current_user.id, workspace_context.company_id
+            )
+
+            if principal.is_member and principal.is_admin:
                 return True
 
             # Check access level
@@ -658,14 +675,11 @@ class WPSService:
                 return True
 
             # Check if user is company admin
-            from app.models.company import CompanyEmployee
-            employee = self.db.query(CompanyEmployee).filter(
-                CompanyEmployee.user_id == current_user.id,
-                CompanyEmployee.company_id == workspace_context.company_id,
-                CompanyEmployee.status == "active"
-            ).first()
-
-            if employee and employee.role == "admin":
+            principal = self.data_access.resolve_principal(
+                current_user.id, workspace_context.company_id
+            )
+
+            if principal.is_member and principal.is_admin:
                 return True
 
         return False
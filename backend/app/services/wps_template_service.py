@@ -12,6 +12,7 @@ from app.models.user import User
 from app.models.company import CompanyEmployee
 from app.schemas.wps_template import WPSTemplateCreate, WPSTemplateUpdate
 from app.core.data_access import DataAccessMiddleware, WorkspaceContext, WorkspaceType
+from app.services.quota_service import QuotaService
 from fastapi import HTTPException, status
 
 
@@ -363,6 +364,9 @@ class WPSTemplateService:
         max_templates = max_templates_map.get(user.member_tier, 0)
 
         if max_templates >= 0:  # -1表示无限制
+            # 模板数量没有使用量列，先计数再插入：在本事务内串行化同一用户的并发创建，
+            # 锁随创建模板的提交释放，避免并发请求同时通过检查
+            QuotaService(self.db).lock_quota_scope("wps_template", user.id)
             current_count = self.db.query(WPSTemplate).filter(
                 WPSTemplate.user_id == user.id,
                 WPSTemplate.is_active == True
@@ -0,0 +1,111 @@
+"""
+Celery 任务
+Worker tasks wrapping the plain task functions in app.tasks.
+
+任务函数本身仍可直接运行（python -m app.tasks.xxx）；这里把它们注册为
+Celery 任务，定时计划见 app.core.celery_app。
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.export_job import ExportJob
+# 导入即注册写入路径上的会话事件（计数、检索索引、工作区统计、权限、当前用户和工作区列表缓存失效）
+from app.services import (  # noqa: F401
+    counter_service, permission_service, principal_service, search_service, workspace_service,
+    workspace_stats_service
+)
+from app.services.export_job_service import run_export_job
+from app.tasks.counter_tasks import run_counter_reconcile_task
+from app.tasks.export_tasks import run_export_cleanup_task
+from app.tasks.notification_tasks import run_daily_notification_tasks, run_hourly_notification_tasks
+from app.tasks.search_tasks import run_search_reindex_task
+from app.tasks.verification_tasks import run_verification_cleanup_task
+
+# 每个线程一个长期使用的事件循环（渲染引擎的异步原语绑定首次使用的事件循环）
+_loops = threading.local()
+
+
+def _run_async(coro) -> Any:
+    """在工作线程的事件循环中执行协程"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        loop = getattr(_loops, "loop", None)
+        if loop is None:
+            loop = _loops.loop = asyncio.new_event_loop()
+        return loop.run_until_complete(coro)
+
+    # eager 模式下从API的事件循环中调用：在独立线程中执行
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(_run_async, coro).result()
+
+
+# ---------------------------------------------------------------------------
+# 定时通知
+# ---------------------------------------------------------------------------
+
+@celery_app.task(name="notifications.daily")
+def daily_notifications() -> Dict[str, Any]:
+    """每日通知任务"""
+    return run_daily_notification_tasks()
+
+
+@celery_app.task(name="notifications.hourly")
+def hourly_notifications() -> Dict[str, Any]:
+    """每小时通知任务"""
+    return run_hourly_notification_tasks()
+
+
+@celery_app.task(name="verification.cleanup")
+def verification_cleanup() -> Dict[str, Any]:
+    """过期验证码清理"""
+    return run_verification_cleanup_task()
+
+
+# ---------------------------------------------------------------------------
+# 维护任务
+# ---------------------------------------------------------------------------
+
+@celery_app.task(name="maintenance.export_cleanup")
+def export_cleanup() -> Dict[str, Any]:
+    """过期批量导出任务清理"""
+    return run_export_cleanup_task()
+
+
+@celery_app.task(name="maintenance.counter_reconcile")
+def counter_reconcile() -> Dict[str, Any]:
+    """工作区计数重建"""
+    return run_counter_reconcile_task()
+
+
+@celery_app.task(name="maintenance.search_reindex")
+def search_reindex(full: bool = False) -> Dict[str, Any]:
+    """检索索引重建"""
+    return run_search_reindex_task(full=full)
+
+
+# ---------------------------------------------------------------------------
+# 批量导出
+# ---------------------------------------------------------------------------
+
+@celery_app.task(name="exports.render_job", soft_time_limit=settings.EXPORT_JOB_STALE_SECONDS)
+def render_export_job(job_id: str) -> Dict[str, Any]:
+    """执行批量导出任务（进度和结果写回 export_jobs）"""
+    _run_async(run_export_job(job_id))
+
+    db = SessionLocal()
+    try:
+        job = db.get(ExportJob, job_id)
+        status = job.status if job else None
+    finally:
+        db.close()
+    return {
+        "success": status == "completed",
+        "job_id": job_id,
+        "status": status,
+    }
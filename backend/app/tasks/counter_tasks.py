@@ -0,0 +1,49 @@
+"""
+定时任务 - 工作区计数校准
+"""
+import logging
+from datetime import datetime
+
+from app.core.database import SessionLocal
+from app.services.counter_service import CounterService
+
+logger = logging.getLogger(__name__)
+
+
+def run_counter_reconcile_task():
+    """
+    工作区计数重建任务
+    从源表全量重建 workspace_counters，首次启用计数或怀疑计数漂移时运行；
+    也可每天低峰期运行一次作为校准
+    """
+    db = SessionLocal()
+    try:
+        logger.info(f"[定时任务] 开始重建工作区计数 - {datetime.utcnow()}")
+
+        totals = CounterService(db).reconcile()
+        for resource, total in totals.items():
+            logger.info(f"[定时任务] {resource}: {total} 条")
+
+        logger.info(f"[定时任务] 工作区计数重建完成 - {datetime.utcnow()}")
+
+        return {
+            "success": True,
+            "totals": totals,
+        }
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[定时任务] 工作区计数重建失败: {str(e)}", exc_info=True)
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # python -m app.tasks.counter_tasks
+    print("运行工作区计数重建任务...")
+    result = run_counter_reconcile_task()
+    print(f"结果: {result}")
@@ -0,0 +1,49 @@
+"""
+定时任务 - 批量导出任务清理
+"""
+import logging
+from datetime import datetime
+
+from app.core.database import SessionLocal
+from app.services.export_job_service import ExportJobService
+
+logger = logging.getLogger(__name__)
+
+
+def run_export_cleanup_task():
+    """
+    批量导出清理任务
+    删除过期的导出任务和ZIP文件，并把中断的任务标记为失败；建议每小时运行一次
+    """
+    db = SessionLocal()
+    try:
+        logger.info(f"[定时任务] 开始清理批量导出任务 - {datetime.utcnow()}")
+
+        result = ExportJobService(db).cleanup_expired_jobs()
+
+        logger.info(
+            f"[定时任务] 批量导出清理完成 - 删除 {result['deleted']} 个，"
+            f"标记中断 {result['interrupted']} 个"
+        )
+
+        return {
+            "success": True,
+            **result
+        }
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[定时任务] 批量导出清理失败: {str(e)}", exc_info=True)
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # python -m app.tasks.export_tasks
+    print("运行批量导出清理任务...")
+    result = run_export_cleanup_task()
+    print(f"结果: {result}")
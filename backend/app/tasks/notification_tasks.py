@@ -1,8 +1,14 @@
 """
 定时任务 - 自动通知任务
+
+各阶段分批读取（服务端游标）、批量写入通知，并通过 notification_ledger
+去重，重复运行不会重复通知。每个阶段记录耗时，随结果返回。
 """
 import logging
+import time
 from datetime import datetime
+from typing import Any, Callable, Dict
+
 from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
@@ -11,84 +17,113 @@ from app.services.notification_service import NotificationService
 logger = logging.getLogger(__name__)
 
 
-def run_daily_notification_tasks():
+def _run_phase(db: Session, name: str, func: Callable[[], int], timings: Dict[str, float]) -> int:
+    """执行一个阶段并记录耗时（毫秒）"""
+    started = time.perf_counter()
+    try:
+        return func()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        timings[name] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"[定时任务] {name} 耗时 {timings[name]:.0f}ms")
+
+
+def run_daily_notification_tasks() -> Dict[str, Any]:
     """
     每日通知任务
     建议在每天早上8点运行
     """
     db = SessionLocal()
+    timings: Dict[str, float] = {}
     try:
         notification_service = NotificationService(db)
-        
+
         logger.info(f"[定时任务] 开始执行每日通知任务 - {datetime.utcnow()}")
-        
-        # 1. 检查并通知即将到期的会员（7天、3天、1天前）
+
+        # 1. 检查并通知即将到期的会员（7天、3天、1天前各提醒一次）
         logger.info("[定时任务] 检查即将到期的会员...")
-        expiring_count = notification_service.send_expiration_reminders(days_ahead=7)
+        expiring_count = _run_phase(
+            db, "expiring", lambda: notification_service.send_expiration_reminders(days_ahead=7), timings
+        )
         logger.info(f"[定时任务] 发送了 {expiring_count} 条会员到期提醒")
-        
+
         # 2. 检查并通知已过期的会员
         logger.info("[定时任务] 检查已过期的会员...")
-        expired_count = notification_service.process_expired_subscriptions()
+        expired_count = _run_phase(
+            db, "expired", notification_service.process_expired_subscriptions, timings
+        )
         logger.info(f"[定时任务] 处理了 {expired_count} 个过期会员")
-        
+
         # 3. 处理自动续费
         logger.info("[定时任务] 处理自动续费...")
-        renewed_count = notification_service.process_auto_renewals()
+        renewed_count = _run_phase(
+            db, "renewals", notification_service.process_auto_renewals, timings
+        )
         logger.info(f"[定时任务] 处理了 {renewed_count} 个自动续费")
-        
+
         # 4. 检查配额使用情况
         logger.info("[定时任务] 检查配额使用情况...")
-        quota_count = notification_service.check_and_notify_quota_usage()
+        quota_count = _run_phase(
+            db, "quota", notification_service.check_and_notify_quota_usage, timings
+        )
         logger.info(f"[定时任务] 发送了 {quota_count} 条配额警告")
-        
+
         logger.info(f"[定时任务] 每日通知任务完成 - {datetime.utcnow()}")
-        
+
         return {
             "success": True,
             "expiring_count": expiring_count,
             "expired_count": expired_count,
             "renewed_count": renewed_count,
             "quota_count": quota_count,
+            "timings_ms": timings,
         }
-        
+
     except Exception as e:
         logger.error(f"[定时任务] 每日通知任务失败: {str(e)}", exc_info=True)
         return {
             "success": False,
-            "error": str(e)
+            "error": str(e),
+            "timings_ms": timings,
         }
     finally:
         db.close()
 
 
-def run_hourly_notification_tasks():
+def run_hourly_notification_tasks() -> Dict[str, Any]:
     """
     每小时通知任务
     用于更频繁的检查
     """
     db = SessionLocal()
+    timings: Dict[str, float] = {}
     try:
         notification_service = NotificationService(db)
-        
+
         logger.info(f"[定时任务] 开始执行每小时通知任务 - {datetime.utcnow()}")
-        
-        # 检查即将到期的会员（1天内）
-        expiring_count = notification_service.send_expiration_reminders(days_ahead=1)
+
+        # 检查即将到期的会员（1天内，与每日任务共用去重登记）
+        expiring_count = _run_phase(
+            db, "expiring", lambda: notification_service.send_expiration_reminders(days_ahead=1), timings
+        )
         logger.info(f"[定时任务] 发送了 {expiring_count} 条紧急到期提醒")
-        
+
         logger.info(f"[定时任务] 每小时通知任务完成 - {datetime.utcnow()}")
-        
+
         return {
             "success": True,
             "expiring_count": expiring_count,
+            "timings_ms": timings,
         }
-        
+
     except Exception as e:
         logger.error(f"[定时任务] 每小时通知任务失败: {str(e)}", exc_info=True)
         return {
             "success": False,
-            "error": str(e)
+            "error": str(e),
+            "timings_ms": timings,
         }
     finally:
         db.close()
@@ -99,4 +134,3 @@ if __name__ == "__main__":
     print("运行每日通知任务...")
     result = run_daily_notification_tasks()
     print(f"结果: {result}")
-
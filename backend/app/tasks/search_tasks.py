@@ -0,0 +1,51 @@
+"""
+定时任务 - 文档检索索引重建
+"""
+import logging
+import sys
+from datetime import datetime
+
+from app.core.database import SessionLocal
+from app.services.search_service import DocumentSearchService
+
+logger = logging.getLogger(__name__)
+
+
+def run_search_reindex_task(full: bool = False):
+    """
+    检索索引重建任务
+    增量模式只处理新增/修改/删除的文档，建议每小时运行；
+    首次上线或索引规则变更后使用 full=True 全量重建
+    """
+    db = SessionLocal()
+    try:
+        logger.info(f"[定时任务] 开始重建检索索引（{'全量' if full else '增量'}） - {datetime.utcnow()}")
+
+        stats = DocumentSearchService(db).reindex(full=full)
+        for doc_type, counts in stats.items():
+            logger.info(
+                f"[定时任务] {doc_type}: 索引 {counts['indexed']} 条，清理 {counts['removed']} 条"
+            )
+
+        logger.info(f"[定时任务] 检索索引重建完成 - {datetime.utcnow()}")
+
+        return {
+            "success": True,
+            "stats": stats,
+        }
+
+    except Exception as e:
+        logger.error(f"[定时任务] 检索索引重建失败: {str(e)}", exc_info=True)
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # python -m app.tasks.search_tasks [--full]
+    print("运行检索索引重建任务...")
+    result = run_search_reindex_task(full="--full" in sys.argv)
+    print(f"结果: {result}")
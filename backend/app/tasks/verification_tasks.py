@@ -0,0 +1,46 @@
+"""
+定时任务 - 验证码清理
+"""
+import logging
+from datetime import datetime
+
+from app.core.database import SessionLocal
+from app.services.verification_service import verification_service
+
+logger = logging.getLogger(__name__)
+
+
+def run_verification_cleanup_task():
+    """
+    验证码清理任务
+    删除过期超过1天的验证码，建议每天低峰期运行一次
+    """
+    db = SessionLocal()
+    try:
+        logger.info(f"[定时任务] 开始清理过期验证码 - {datetime.utcnow()}")
+
+        deleted = verification_service.cleanup_expired_codes(db)
+
+        logger.info(f"[定时任务] 过期验证码清理完成 - 删除 {deleted} 条")
+
+        return {
+            "success": True,
+            "deleted": deleted,
+        }
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[定时任务] 过期验证码清理失败: {str(e)}", exc_info=True)
+        return {
+            "success": False,
+            "error": str(e)
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # python -m app.tasks.verification_tasks
+    print("运行验证码清理任务...")
+    result = run_verification_cleanup_task()
+    print(f"结果: {result}")
@@ -0,0 +1,30 @@
+-- 游标（keyset）分页复合索引
+-- 列表接口按 (created_at DESC, id DESC) 排序并以 (created_at, id) < (游标) 定位，
+-- 以下索引使任意页深的查询都只需一次索引范围扫描
+
+CREATE INDEX IF NOT EXISTS idx_wps_company_created ON wps (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_wps_user_created ON wps (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_pqr_company_created ON pqr (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_pqr_user_created ON pqr (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_ppqr_company_created ON ppqr (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_ppqr_user_created ON ppqr (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_welders_company_created ON welders (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_welders_user_created ON welders (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_materials_company_created ON welding_materials (company_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_materials_user_created ON welding_materials (user_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_users_created ON users (created_at, id);
+
+-- 更新统计信息，保证 total_mode=estimated 的估算值准确
+ANALYZE wps;
+ANALYZE pqr;
+ANALYZE ppqr;
+ANALYZE welders;
+ANALYZE welding_materials;
+ANALYZE users;
+
+SELECT 'Migration completed: keyset pagination indexes created' AS result;
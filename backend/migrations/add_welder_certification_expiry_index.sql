@@ -0,0 +1,5 @@
+-- 焊工证书到期分析索引
+-- 焊工统计中的“证书即将到期”相关子查询与到期证书接口按
+-- (welder_id, status, expiry_date) 查找有效证书
+
+CREATE INDEX IF NOT EXISTS idx_welder_cert_expiry ON welder_certifications (welder_id, status, expiry_date);
@@ -0,0 +1,34 @@
+-- WPS / PQR / pPQR 全文检索索引表
+-- 中文按二元组在应用层切分后写入 search_vector，content 用于 pg_trgm 模糊匹配
+-- 建表后执行一次全量重建：python -m app.tasks.search_tasks --full
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS document_search_index (
+    id SERIAL PRIMARY KEY,
+    document_type VARCHAR(20) NOT NULL,
+    document_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    workspace_type VARCHAR(20) NOT NULL DEFAULT 'personal',
+    company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+    factory_id INTEGER REFERENCES factories(id) ON DELETE SET NULL,
+    access_level VARCHAR(20) DEFAULT 'private',
+    document_number VARCHAR(100),
+    title VARCHAR(500),
+    status VARCHAR(50),
+    content TEXT,
+    search_vector TSVECTOR,
+    source_updated_at TIMESTAMP,
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_search_index_document UNIQUE (document_type, document_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_document_search_index_id ON document_search_index (id);
+CREATE INDEX IF NOT EXISTS idx_search_index_company ON document_search_index (workspace_type, company_id, document_type);
+CREATE INDEX IF NOT EXISTS idx_search_index_user ON document_search_index (workspace_type, user_id, document_type);
+CREATE INDEX IF NOT EXISTS idx_search_index_vector ON document_search_index USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_search_index_content_trgm ON document_search_index USING gin (content gin_trgm_ops);
+
+COMMENT ON TABLE document_search_index IS 'WPS/PQR/pPQR 全文检索索引';
+COMMENT ON COLUMN document_search_index.content IS '展平后的检索文本（用于pg_trgm模糊匹配）';
+COMMENT ON COLUMN document_search_index.search_vector IS '全文检索向量';
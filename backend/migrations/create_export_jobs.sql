@@ -0,0 +1,31 @@
+-- 批量导出任务表
+-- 记录多文档ZIP导出的参数、进度和生成文件
+
+CREATE TABLE IF NOT EXISTS export_jobs (
+    id VARCHAR(36) PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    workspace_type VARCHAR(20) NOT NULL DEFAULT 'personal',
+    company_id INTEGER,
+    document_type VARCHAR(20) NOT NULL,
+    export_format VARCHAR(10) NOT NULL,
+    style VARCHAR(30),
+    document_ids JSON NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    total_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    errors JSON,
+    error_message TEXT,
+    file_path VARCHAR(500),
+    file_size INTEGER,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_export_jobs_user_created ON export_jobs (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_export_jobs_status_created ON export_jobs (status, created_at);
+
+COMMENT ON TABLE export_jobs IS '批量导出任务';
+COMMENT ON COLUMN export_jobs.document_ids IS '要导出的文档ID列表（已按工作区过滤）';
+COMMENT ON COLUMN export_jobs.status IS '状态: pending, running, completed, failed';
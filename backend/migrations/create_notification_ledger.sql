@@ -0,0 +1,18 @@
+-- 已发送通知登记表
+-- 定时通知任务按 (用户, 通知类型, 去重键) 登记已生成的通知，重复运行时跳过
+
+CREATE TABLE IF NOT EXISTS notification_ledger (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    kind VARCHAR(30) NOT NULL,
+    dedup_key VARCHAR(100) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_notification_ledger UNIQUE (user_id, kind, dedup_key)
+);
+
+CREATE INDEX IF NOT EXISTS ix_notification_ledger_id ON notification_ledger (id);
+CREATE INDEX IF NOT EXISTS idx_notification_ledger_created ON notification_ledger (created_at);
+
+COMMENT ON TABLE notification_ledger IS '已发送通知登记（定时通知去重）';
+COMMENT ON COLUMN notification_ledger.kind IS '通知类型: expiration_reminder, tier_change, quota_warning';
+COMMENT ON COLUMN notification_ledger.dedup_key IS '去重键（同类型下唯一标识一次通知）';
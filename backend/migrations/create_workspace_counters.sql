@@ -0,0 +1,22 @@
+-- 工作区记录计数表
+-- 按 (工作区类型, 所有者, 资源, 状态) 保存启用记录数，由写入路径在同一事务中维护
+-- 建表后执行一次计数重建：python -m app.tasks.counter_tasks
+-- 然后设置 WORKSPACE_COUNTERS_ENABLED=true
+
+CREATE TABLE IF NOT EXISTS workspace_counters (
+    id SERIAL PRIMARY KEY,
+    workspace_type VARCHAR(20) NOT NULL,
+    owner_id INTEGER NOT NULL,
+    resource VARCHAR(30) NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT '',
+    count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT uq_workspace_counter UNIQUE (workspace_type, owner_id, resource, status)
+);
+
+CREATE INDEX IF NOT EXISTS ix_workspace_counters_id ON workspace_counters (id);
+
+COMMENT ON TABLE workspace_counters IS '工作区记录计数';
+COMMENT ON COLUMN workspace_counters.owner_id IS '所有者ID（个人为用户ID，企业为企业ID）';
+COMMENT ON COLUMN workspace_counters.resource IS '资源类型: wps, pqr, ppqr, materials, welders, equipment, production, quality';
+COMMENT ON COLUMN workspace_counters.status IS '记录状态（无状态为空字符串）';
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+权限检查基准脚本
+
+对同一用户重复执行权限检查，分别记录不使用缓存（每次从数据库解析）和
+使用权限缓存时每次检查发出的SQL语句数和耗时，用于验证权限缓存效果。
+
+用法:
+    python scripts/benchmark_permission_checks.py --user-id 1 [--admin-id 1] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+from statistics import mean
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app.core.database import SessionLocal, engine
+from app.services.permission_service import Permission, PermissionService, permission_cache
+from app.services.role_service import role_service
+
+
+class QueryCounter:
+    """统计引擎上执行的SQL语句数"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+
+def measure(name, func, repeat):
+    """执行并打印每次检查的平均查询数和耗时"""
+    durations = []
+    with QueryCounter() as counter:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - started) * 1_000_000)
+    print(f"{name:<44} 查询数/次: {counter.count / repeat:6.2f}    平均耗时: {mean(durations):10.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="权限检查基准")
+    parser.add_argument("--user-id", type=int, required=True, help="用户ID")
+    parser.add_argument("--admin-id", type=int, default=None, help="管理员ID（可选）")
+    parser.add_argument("--repeat", type=int, default=200, help="每种检查重复次数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = PermissionService(db)
+        permissions = [Permission.WPS_CREATE.value, Permission.PQR_EXPORT.value]
+
+        print(f"数据库: {engine.url.render_as_string(hide_password=True)}")
+        print(f"重复 {args.repeat} 次\n")
+
+        measure(
+            "用户权限（无缓存）",
+            lambda: permissions[0] in service._load_user_permissions(args.user_id),
+            args.repeat
+        )
+        permission_cache.clear()
+        measure(
+            "用户权限（缓存）",
+            lambda: service.has_all_permissions(args.user_id, permissions),
+            args.repeat
+        )
+
+        measure(
+            "角色权限 resource:action（无缓存）",
+            lambda: "wps:create" in role_service._load_user_permissions(db, user_id=args.user_id),
+            args.repeat
+        )
+        permission_cache.clear()
+        measure(
+            "角色权限 resource:action（缓存）",
+            lambda: role_service.check_user_permission(db, user_id=args.user_id, resource="wps", action="create"),
+            args.repeat
+        )
+
+        if args.admin_id:
+            measure(
+                "管理员权限（无缓存）",
+                lambda: permissions[0] in service._load_admin_permissions(args.admin_id),
+                args.repeat
+            )
+            permission_cache.clear()
+            measure(
+                "管理员权限（缓存）",
+                lambda: service.has_permission(args.admin_id, permissions[0], is_admin=True),
+                args.repeat
+            )
+
+        print(f"\n缓存指标: {permission_cache.stats()}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+统计接口查询数基准脚本
+
+对 WPS / PQR / 设备统计接口背后的服务方法各执行若干次，
+记录每次调用发出的SQL语句数和耗时，用于验证分组统计改造效果。
+
+用法:
+    python scripts/benchmark_statistics_queries.py --user-id 1 [--company-id 2] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+from statistics import mean
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.core.database import SessionLocal, engine
+from app.models.user import User
+from app.services.equipment_service import EquipmentService
+from app.services.pqr_service import PQRService
+from app.services.wps_service import WPSService
+
+
+class QueryCounter:
+    """统计引擎上执行的SQL语句数"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+
+def measure(name, func, repeat):
+    """执行并打印查询数和平均耗时"""
+    counts, durations = [], []
+    for _ in range(repeat):
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - started) * 1000)
+        counts.append(counter.count)
+    print(f"{name:<40} 查询数: {max(counts):>3}    平均耗时: {mean(durations):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统计接口查询数基准")
+    parser.add_argument("--user-id", type=int, required=True, help="用户ID")
+    parser.add_argument("--company-id", type=int, default=None, help="企业ID（设备统计使用企业工作区）")
+    parser.add_argument("--repeat", type=int, default=5, help="每个接口重复次数")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == args.user_id).first()
+        if not user:
+            print(f"用户 {args.user_id} 不存在")
+            return
+
+        if args.company_id:
+            workspace_context = WorkspaceContext(user.id, WorkspaceType.ENTERPRISE, args.company_id)
+        else:
+            workspace_context = WorkspaceContext(user.id, WorkspaceType.PERSONAL)
+
+        print(f"数据库: {engine.url.render_as_string(hide_password=True)}")
+        print(f"工作区: {workspace_context.workspace_type}, 重复 {args.repeat} 次\n")
+
+        measure(
+            "GET /wps/statistics/overview",
+            lambda: WPSService(db).get_wps_statistics(db, owner_id=user.id),
+            args.repeat
+        )
+        measure(
+            "GET /pqr/statistics/overview",
+            lambda: PQRService(db).get_pqr_statistics(db, owner_id=user.id),
+            args.repeat
+        )
+        measure(
+            "GET /equipment/statistics/overview",
+            lambda: EquipmentService(db).get_equipment_statistics(user, workspace_context),
+            args.repeat
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
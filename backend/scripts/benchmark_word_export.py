@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Word/PDF导出基准脚本
+
+对同一份WPS HTML分别执行原转换流程（BeautifulSoup + html.parser）和
+lxml 单次遍历转换器，记录平均耗时和 Python 内存分配峰值（tracemalloc），
+并比较两者生成的 document.xml 是否一致。
+
+另在独立子进程中完整导出一次，比较不同输出方式的进程峰值内存（RSS）：
+BytesIO + getvalue + 序列化（原渲染进程返回方式）、直接写入文件
+（当前渲染进程）和默认的 spooled 临时文件。
+
+默认使用按前端模块模板生成的代表性HTML（基本信息表、并列模块、
+带 colspan/rowspan 的嵌套表格、base64 示意图），也可指定数据库中的WPS。
+
+用法:
+    python scripts/benchmark_word_export.py [--modules 12] [--images 2] [--repeat 5]
+    python scripts/benchmark_word_export.py --wps-id 1
+    python scripts/benchmark_word_export.py --images 8 --format pdf
+"""
+import argparse
+import base64
+import io
+import multiprocessing
+import os
+import pickle
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from statistics import mean
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from PIL import Image
+
+from app.services.docx_converter import HtmlDocxConverter
+from app.services.document_export_service import DocumentExportService
+from app.services.image_pipeline import image_pipeline
+
+
+def module_table(title: str, fields: int) -> str:
+    """单个模块：标题 + 标签/值表格（与前端 generateModuleHTML 结构一致）"""
+    rows = "".join(
+        f"""
+      <tr style="border-bottom: 1px solid #f0f0f0;">
+        <td style="width: 35%; padding: 6px 8px; font-weight: 500; background-color: #fafafa;">
+          字段{i} <span style="color: #999; font-size: 11px;">(mm)</span>
+        </td>
+        <td style="width: 65%; padding: 6px 8px;">
+          值 {i}-{title}
+        </td>
+      </tr>
+    """
+        for i in range(fields)
+    )
+    return (
+        f'<h3 style="font-size: 14px; font-weight: bold;">{title}</h3>'
+        f'<table style="width: 100%; border-collapse: collapse;"><tbody>{rows}</tbody></table>'
+    )
+
+
+def span_table() -> str:
+    """带表头和合并单元格的表格字段"""
+    return (
+        '<table style="width: 100%;">'
+        '<tr><th rowspan="2" colspan="1">焊层</th><th colspan="2" rowspan="1">电流</th><th>电压</th></tr>'
+        '<tr><th>范围</th><th>极性</th><th>V</th></tr>'
+        + "".join(
+            f'<tr><td rowspan="1" colspan="1">{i}</td><td>{100 + i}-{120 + i}</td><td>DCEP</td><td>2{i}</td></tr>'
+            for i in range(6)
+        )
+        + "</table>"
+    )
+
+
+def sample_wps_html(modules: int, images: int) -> str:
+    """按前端模板结构生成代表性WPS HTML"""
+    image_uris = []
+    for index in range(images):
+        # 噪点图接近照片的压缩率；每张内容不同，避免Word内去重
+        buffer = io.BytesIO()
+        Image.merge("RGB", [Image.effect_noise((2400, 1600), 40 + index)] * 3).save(buffer, "JPEG", quality=90)
+        image_uris.append("data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode())
+
+    html = '<h1 style="text-align: center;">焊接工艺规程</h1>'
+    html += '<p style="text-align: center; font-size: 14px; color: #666;">文档编号: WPS-001 | 版本: A</p><hr />'
+    for index in range(modules):
+        if index % 3 == 2:
+            # 并列模块
+            html += '<table style="width: 100%; border: none;"><tbody><tr style="vertical-align: top;">'
+            for column in range(2):
+                html += f'<td style="border: none;">{module_table(f"并列模块{index}-{column}", 8)}</td>'
+            html += "</tr></tbody></table>"
+        else:
+            html += module_table(f"模块{index}", 12)
+        if index % 4 == 1:
+            html += span_table()
+    html += '<div style="text-align: center; padding: 16px;">'
+    html += "".join(f'<img src="{uri}" style="max-width: 100%;" alt="示意图{i}" />' for i, uri in enumerate(image_uris))
+    html += "</div>"
+    return html
+
+
+def convert_legacy(html_content: str, style: str) -> Document:
+    doc = Document()
+    DocumentExportService(None)._html_to_word_legacy(doc, html_content, style=style)
+    return doc
+
+
+def convert_lxml(html_content: str, style: str) -> Document:
+    doc = Document()
+    HtmlDocxConverter(doc, style=style).convert(html_content)
+    return doc
+
+
+def document_xml(doc: Document) -> bytes:
+    """保存后的 word/document.xml"""
+    stream = io.BytesIO()
+    doc.save(stream)
+    with zipfile.ZipFile(stream) as archive:
+        return archive.read("word/document.xml")
+
+
+def measure(name, func, repeat):
+    """执行并打印平均耗时和内存分配峰值"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<32} 平均耗时: {mean(durations):8.2f} ms    内存峰值: {peak / 1024 / 1024:7.2f} MB")
+    return mean(durations)
+
+
+def _memory_kb(field: str) -> int:
+    """读取 /proc/self/status 中的内存字段（KB）；非 Linux 时退回 ru_maxrss
+
+    VmHWM 按进程地址空间统计；ru_maxrss 在 exec 后会沿用父进程的峰值，不适合 spawn 子进程。
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _rss_child(mode: str, html_content: str, fmt: str, style: str, image_dir: str, queue) -> None:
+    """子进程：完整导出一次，返回导出前的常驻内存和导出期间的峰值（KB）"""
+    image_pipeline.directory = image_dir
+    document = SimpleNamespace(
+        id=0, wps_number="BENCH", title="基准", revision="A", status="draft", document_html=html_content
+    )
+    export = getattr(DocumentExportService(None), f"export_wps_to_{fmt}")
+    options = {"style": style} if fmt == "word" else {}
+
+    sys.stdout = open(os.devnull, "w")
+    try:
+        # 重置 VmHWM，使峰值只反映导出过程（不含接收参数时的反序列化）
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    baseline = _memory_kb("VmRSS")
+    if mode == "bytesio":
+        content = export(document, output=io.BytesIO(), **options).getvalue()
+        size = len(pickle.dumps(content))
+    elif mode == "file":
+        with tempfile.TemporaryFile() as output:
+            export(document, output=output, **options)
+            size = os.fstat(output.fileno()).st_size
+    else:
+        with export(document, **options) as output:
+            size = output.seek(0, os.SEEK_END)
+    peak = _memory_kb("VmHWM")
+    queue.put((baseline, peak, size))
+
+
+def measure_rss(html_content: str, fmt: str, style: str, image_dir: str) -> None:
+    """比较不同输出方式的进程峰值内存"""
+    context = multiprocessing.get_context("spawn")
+    modes = [
+        ("bytesio", "BytesIO + 序列化（原方式）"),
+        ("file", "直接写入文件（渲染进程）"),
+        ("spooled", "spooled 临时文件（默认）"),
+    ]
+    print(f"\n{fmt} 导出进程峰值内存（RSS）:")
+    for mode, name in modes:
+        queue = context.Queue()
+        process = context.Process(target=_rss_child, args=(mode, html_content, fmt, style, image_dir, queue))
+        process.start()
+        baseline, peak, size = queue.get()
+        process.join()
+        print(
+            f"{name:<28} 峰值: {peak / 1024:7.1f} MB    导出增量: {(peak - baseline) / 1024:7.1f} MB"
+            f"    文件: {size / 1024 / 1024:6.2f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Word导出转换基准")
+    parser.add_argument("--wps-id", type=int, default=None, help="使用数据库中的WPS文档HTML")
+    parser.add_argument("--modules", type=int, default=12, help="生成HTML的模块数")
+    parser.add_argument("--images", type=int, default=2, help="生成HTML的示意图数")
+    parser.add_argument("--style", default="blue_white", help="表格风格")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument("--format", choices=["word", "pdf"], default="word", help="峰值内存测试的导出格式")
+    args = parser.parse_args()
+
+    if args.wps_id:
+        from app.core.database import SessionLocal
+        from app.models.wps import WPS
+
+        db = SessionLocal()
+        try:
+            wps = db.query(WPS).filter(WPS.id == args.wps_id).first()
+            if not wps or not wps.document_html:
+                print(f"WPS {args.wps_id} 不存在或没有文档内容")
+                return
+            html_content = wps.document_html
+        finally:
+            db.close()
+    else:
+        html_content = sample_wps_html(args.modules, args.images)
+
+    # 图片处理结果写入临时目录，并预热，使两种流程只比较HTML转换本身
+    image_dir = tempfile.mkdtemp(prefix="benchmark_image_cache_")
+    image_pipeline.directory = image_dir
+    convert_lxml(html_content, args.style)
+
+    print(f"HTML大小: {len(html_content) / 1024:.1f} KB, 风格: {args.style}, 重复 {args.repeat} 次\n")
+
+    # 原流程输出大量调试日志，计时期间屏蔽标准输出
+    def quiet(func):
+        def wrapper():
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, "w")
+            try:
+                return func()
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+        return wrapper
+
+    legacy = measure("BeautifulSoup（原流程）", quiet(lambda: convert_legacy(html_content, args.style)), args.repeat)
+    current = measure("lxml 单次遍历转换器", lambda: convert_lxml(html_content, args.style), args.repeat)
+    print(f"\n加速比: {legacy / current:.2f}x")
+
+    same = quiet(lambda: document_xml(convert_legacy(html_content, args.style)))() == \
+        document_xml(convert_lxml(html_content, args.style))
+    print(f"document.xml 一致: {'是' if same else '否'}")
+
+    measure_rss(html_content, args.format, args.style, image_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+配额并发测试脚本
+
+多个线程同时为同一用户在个人工作区创建WPS（与创建接口相同：预留配额 →
+创建 → 失败时退回），检查结束后：
+- 成功创建数 = 创建前剩余配额与尝试次数中的较小值（没有超出配额）
+- 使用量增加值 = 成功创建数（没有丢失累加）
+
+测试结束后删除本次创建的WPS并退回配额。
+
+用法:
+    python scripts/test_quota_concurrency.py --user-id 1 [--threads 16] [--attempts 40]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+
+from app.core.data_access import WorkspaceContext, WorkspaceType
+from app.core.database import SessionLocal, engine
+from app.models.user import User
+from app.models.wps import WPS
+from app.schemas.wps import WPSCreate
+from app.services.membership_service import MembershipService
+from app.services.quota_service import QuotaService, QuotaType
+from app.services.wps_service import WPSService
+
+
+def read_usage(user_id: int):
+    """读取用户的WPS使用量和配额上限"""
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        if user is None:
+            raise SystemExit(f"用户不存在: {user_id}")
+        limit = MembershipService(db).get_membership_limits(user.member_tier)["wps"]
+        return user.wps_quota_used or 0, limit
+    finally:
+        db.close()
+
+
+def create_one(user_id: int, run_id: str, index: int, start: threading.Event) -> str:
+    """按创建接口的流程创建一个WPS，返回 created / rejected / failed"""
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        workspace_context = WorkspaceContext(user_id=user_id, workspace_type=WorkspaceType.PERSONAL)
+        start.wait()
+        try:
+            reservation = QuotaService(db).reserve(user, workspace_context, QuotaType.WPS)
+        except HTTPException:
+            return "rejected"
+        with reservation:
+            WPSService(db).create(
+                db,
+                obj_in=WPSCreate(title=f"配额并发测试 {index}", wps_number=f"QC-{run_id}-{index}"),
+                current_user=user,
+                workspace_context=workspace_context
+            )
+        return "created"
+    except Exception as e:
+        print(f"  [{index}] 创建失败: {e}")
+        return "failed"
+    finally:
+        db.close()
+
+
+def cleanup(user_id: int, run_id: str) -> int:
+    """删除本次创建的WPS并退回配额"""
+    db = SessionLocal()
+    try:
+        user = db.get(User, user_id)
+        created = db.query(WPS).filter(WPS.wps_number.like(f"QC-{run_id}-%")).all()
+        for wps in created:
+            db.delete(wps)
+        db.commit()
+        QuotaService(db).release_usage(
+            user,
+            WorkspaceContext(user_id=user_id, workspace_type=WorkspaceType.PERSONAL),
+            QuotaType.WPS,
+            len(created)
+        )
+        return len(created)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="配额并发测试")
+    parser.add_argument("--user-id", type=int, required=True, help="用户ID（个人工作区）")
+    parser.add_argument("--threads", type=int, default=16, help="并发线程数")
+    parser.add_argument("--attempts", type=int, default=40, help="创建尝试次数")
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    used_before, limit = read_usage(args.user_id)
+    expected = max(0, min(args.attempts, limit - used_before))
+
+    print(f"数据库: {engine.url.render_as_string(hide_password=True)}")
+    print(f"WPS配额: 已使用 {used_before}/{limit}，{args.threads} 个线程并发创建 {args.attempts} 次\n")
+
+    start = threading.Event()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        futures = [
+            executor.submit(create_one, args.user_id, run_id, index, start)
+            for index in range(args.attempts)
+        ]
+        start.set()
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - started
+
+    used_after, _ = read_usage(args.user_id)
+    created = results.count("created")
+    print(f"成功: {created}    配额不足: {results.count('rejected')}    失败: {results.count('failed')}    耗时: {elapsed:.2f}s")
+    print(f"使用量: {used_before} -> {used_after}")
+
+    ok = created == expected and used_after - used_before == created and used_after <= limit
+    print(f"\n{'通过' if ok else '未通过'}：预期成功 {expected}，实际成功 {created}，使用量增加 {used_after - used_before}")
+
+    removed = cleanup(args.user_id, run_id)
+    print(f"已清理 {removed} 个测试WPS，使用量恢复为 {read_usage(args.user_id)[0]}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()